@@ -1,12 +1,17 @@
 #!/usr/bin/env python3
 """
-Populate embeddings on existing Chunk nodes and create Neo4j vector index.
+Populate embeddings on Chunk nodes and create the Neo4j vector index.
+
+Incremental: only chunks without an up-to-date embedding are embedded, and vectors are
+served from the local embedding cache when the same text was embedded before.
+Ingestion already runs this automatically; use the script to backfill or retry.
 
 Run after ingestion: python -m src.data.ingestion
-Then: python scripts/add_embeddings.py
+Then: python scripts/add_embeddings.py [--file soliq_kodeksi.json]
 
 Requires: OPENAI_API_KEY, NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD
 """
+import argparse
 import os
 import sys
 
@@ -19,51 +24,27 @@ load_dotenv()
 
 
 def main() -> None:
-    try:
-        from langchain_neo4j import Neo4jVector
-        from langchain_openai import OpenAIEmbeddings
-    except ImportError:
-        try:
-            from langchain_community.vectorstores.neo4j_vector import Neo4jVector
-            from langchain_openai import OpenAIEmbeddings
-        except ImportError:
-            print("Error: Install langchain-neo4j: pip install langchain-neo4j")
-            sys.exit(1)
+    parser = argparse.ArgumentParser(description="Embed pending Chunk nodes.")
+    parser.add_argument("--file", default=None, help="Only embed chunks of this Document file_name")
+    parser.add_argument("--batch-size", type=int, default=64, help="Texts per embedding call")
+    parser.add_argument("--concurrency", type=int, default=4, help="Embedding calls in flight")
+    parser.add_argument("--write-batch-size", type=int, default=500, help="Chunks per Neo4j write")
+    args = parser.parse_args()
 
-    url = os.getenv("NEO4J_URI")
-    username = os.getenv("NEO4J_USERNAME")
-    password = os.getenv("NEO4J_PASSWORD")
-    if not all([url, username, password]):
-        print("Error: Set NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD")
-        sys.exit(1)
+    from src.data.embeddings import VECTOR_INDEX_NAME, embed_pending_chunks, get_embedder
 
-    if not os.getenv("OPENAI_API_KEY"):
+    if get_embedder() is None:
         print("Error: Set OPENAI_API_KEY")
         sys.exit(1)
 
-    if url and url.startswith("neo4j+s://"):
-        url = url.replace("neo4j+s://", "neo4j+ssc://")
-
-    index_name = "chunk_vector_index"
-    embeddings = OpenAIEmbeddings()
-
-    print("Creating vector index and populating embeddings on Chunk nodes...")
-    kwargs = dict(
-        embedding=embeddings,
-        url=url,
-        username=username,
-        password=password,
-        index_name=index_name,
-        node_label="Chunk",
-        embedding_node_property="embedding",
+    print("Embedding pending Chunk nodes...")
+    written = embed_pending_chunks(
+        file_name=args.file,
+        batch_size=args.batch_size,
+        max_concurrency=args.concurrency,
+        write_batch_size=args.write_batch_size,
     )
-    try:
-        # langchain-neo4j uses text_node_properties (plural, list)
-        store = Neo4jVector.from_existing_graph(**kwargs, text_node_properties=["text"])
-    except TypeError:
-        # langchain-community uses text_node_property (singular)
-        store = Neo4jVector.from_existing_graph(**kwargs, text_node_property="text")
-    print(f"Done. Vector index '{index_name}' is ready.")
+    print(f"Done. {written} chunks updated. Vector index '{VECTOR_INDEX_NAME}' is ready.")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Measure embedding throughput of the configured backend on the source corpus.
+
+With EMBEDDING_BACKEND=local this makes zero external calls, so it runs in CI or on an
+air-gapped machine.
+
+Usage:
+  EMBEDDING_BACKEND=local python scripts/bench_embeddings.py [--batch-size 64] [--limit 500]
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def main() -> None:
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(description="Benchmark the embedding backend.")
+    parser.add_argument(
+        "--json-dir",
+        default=os.path.join(repo_root, "src", "data", "source", "Json"),
+        help="Directory with ingestion JSON files",
+    )
+    parser.add_argument("--batch-size", type=int, default=64, help="Texts per embed_documents call")
+    parser.add_argument("--limit", type=int, default=None, help="Max chunks to embed")
+    args = parser.parse_args()
+
+    from src.data.embeddings import embedding_model_id, get_embedder
+
+    embedder = get_embedder()
+    if embedder is None:
+        print("Error: no embedding backend configured (set EMBEDDING_BACKEND=local or OPENAI_API_KEY)")
+        sys.exit(1)
+
+    texts = []
+    for path in sorted(glob.glob(os.path.join(args.json_dir, "*.json"))):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        texts.extend(c["original_text"] for c in data.get("graph_data", []) if c.get("original_text"))
+    texts = texts[: args.limit] if args.limit else texts
+
+    started = time.perf_counter()
+    dims = 0
+    for i in range(0, len(texts), args.batch_size):
+        vectors = embedder.embed_documents(texts[i : i + args.batch_size])
+        dims = len(vectors[0]) if vectors else dims
+    elapsed = time.perf_counter() - started
+    chars = sum(len(t) for t in texts)
+    print(f"Backend: {embedding_model_id(embedder)} ({dims} dims)")
+    print(f"Embedded {len(texts)} chunks ({chars} chars) in {elapsed:.2f}s")
+    if elapsed > 0:
+        print(f"Throughput: {len(texts) / elapsed:.1f} chunks/s, {chars / elapsed / 1000:.1f}k chars/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark ingestion and retrieval throughput/latency of the whole pipeline.
+
+Runs against the in-memory graph backend by default (NEO4J_URI=memory://), so it needs
+no Neo4j server; with --backend neo4j it uses NEO4J_URI from the environment. Set
+EMBEDDING_BACKEND=local to include embedding and vector search without network access.
+
+Usage:
+  python scripts/bench_pipeline.py [--backend memory|neo4j] [--repeat 3]
+  EMBEDDING_BACKEND=local python scripts/bench_pipeline.py --questions tests/eval_questions.json
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def _latency_summary(name: str, samples: list[float]) -> str:
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return (
+        f"{name}: n={len(samples)} p50={statistics.median(ordered) * 1000:.2f}ms "
+        f"p95={p95 * 1000:.2f}ms max={ordered[-1] * 1000:.2f}ms"
+    )
+
+
+def main() -> None:
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(description="Benchmark the ingestion and retrieval pipeline.")
+    parser.add_argument("--backend", choices=["memory", "neo4j"], default="memory")
+    parser.add_argument(
+        "--json-dir",
+        default=os.path.join(repo_root, "src", "data", "source", "Json"),
+        help="Directory with ingestion JSON files",
+    )
+    parser.add_argument(
+        "--questions",
+        default=os.path.join(repo_root, "tests", "eval_questions.json"),
+        help="JSON list of {question: ...} used as retrieval queries",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Passes over the question set")
+    args = parser.parse_args()
+
+    if args.backend == "memory":
+        os.environ["NEO4J_URI"] = "memory://"
+
+    from src.data.graph_rag import fallback_text_search, hybrid_retrieve
+    from src.data.ingestion import ingest_json_data
+    from src.data.neo4j_client import get_neo4j_graph
+
+    graph = get_neo4j_graph()
+
+    started = time.perf_counter()
+    ingest_json_data(args.json_dir)
+    ingest_seconds = time.perf_counter() - started
+    graph.query(
+        "CREATE FULLTEXT INDEX chunk_text_index IF NOT EXISTS FOR (c:Chunk) ON EACH [c.text]"
+    )
+
+    with open(args.questions, encoding="utf-8") as f:
+        questions = [q["question"] for q in json.load(f)]
+
+    contains, fulltext, hybrid = [], [], []
+    for _ in range(max(1, args.repeat)):
+        for question in questions:
+            t0 = time.perf_counter()
+            fallback_text_search(question, original_query=question)
+            contains.append(time.perf_counter() - t0)
+
+            t0 = time.perf_counter()
+            graph.query(
+                'CALL db.index.fulltext.queryNodes("chunk_text_index", $query) '
+                "YIELD node, score RETURN node.text AS text, score LIMIT 5",
+                {"query": question},
+            )
+            fulltext.append(time.perf_counter() - t0)
+
+            t0 = time.perf_counter()
+            hybrid_retrieve(question, original_query=question)
+            hybrid.append(time.perf_counter() - t0)
+
+    print(f"Backend: {os.getenv('NEO4J_URI')}")
+    if hasattr(graph, "counts"):
+        print(f"Graph: {graph.counts()}")
+    print(f"Ingestion: {ingest_seconds:.2f}s")
+    print(_latency_summary("fallback_text_search", contains))
+    print(_latency_summary("fulltext_query", fulltext))
+    print(_latency_summary("hybrid_retrieve", hybrid))
+    total = sum(contains) + sum(fulltext) + sum(hybrid)
+    if total > 0:
+        print(f"Retrieval throughput: {(len(contains) + len(fulltext) + len(hybrid)) / total:.1f} queries/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Compute PageRank priors, communities and community summaries (for global search).
+
+Incremental: a community whose members are unchanged since the last run keeps its
+summary, so only new or changed communities cost an LLM call. Communities that no
+longer exist are deleted.
+
+Run after ingestion: python -m src.data.ingestion
+Then: python scripts/compute_graph_analytics.py [--no-summaries]
+
+Requires: NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD; DEEPSEEK_API_KEY for summaries
+"""
+import argparse
+import os
+import sys
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compute graph analytics and community summaries.")
+    parser.add_argument("--min-entities", type=int, default=3, help="Entities a community needs to be stored")
+    parser.add_argument("--max-communities", type=int, default=200, help="Most communities stored, by PageRank")
+    parser.add_argument("--concurrency", type=int, default=4, help="Summary calls in flight")
+    parser.add_argument("--no-summaries", action="store_true", help="Keep cached summaries, make no LLM calls")
+    args = parser.parse_args()
+
+    from src.data.graph_analytics import compute_graph_analytics
+
+    print("Computing graph analytics...")
+    result = compute_graph_analytics(
+        summarize=(lambda prompt: "") if args.no_summaries else None,
+        min_entities=args.min_entities,
+        max_communities=args.max_communities,
+        max_concurrency=args.concurrency,
+    )
+    print(
+        f"Done. {result['nodes']} nodes scored, {result['communities']} communities "
+        f"({result['summarized']} summarized, {result['cached']} cached)."
+    )
+
+
+if __name__ == "__main__":
+    main()
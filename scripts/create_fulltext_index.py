@@ -1,9 +1,12 @@
 #!/usr/bin/env python3
 """
-Create Neo4j full-text index on Chunk.text for keyword search.
+Create Neo4j full-text index on Chunk.text for keyword search, the Citation.key index, the
+Citation.id uniqueness constraint that backs the MERGE of citation writes, and the Chunk
+(document_file, seq) index used by graph expansion to find neighbouring chunks.
 
 Run after ingestion. Enables Cypher queries like:
   CALL db.index.fulltext.queryNodes("chunk_text_index", $query) YIELD node, score RETURN node.text
+  MATCH (k:Citation {key: "article:237"}) RETURN k.chunk_id
 """
 import os
 import sys
@@ -28,6 +31,12 @@ def main() -> None:
     try:
         graph.query(cypher)
         print(f"Full-text index '{index_name}' created or already exists.")
+        graph.query("CREATE INDEX citation_key IF NOT EXISTS FOR (k:Citation) ON (k.key)")
+        print("Index 'citation_key' created or already exists.")
+        graph.query("CREATE CONSTRAINT citation_id IF NOT EXISTS FOR (k:Citation) REQUIRE k.id IS UNIQUE")
+        print("Constraint 'citation_id' created or already exists.")
+        graph.query("CREATE INDEX chunk_document_seq IF NOT EXISTS FOR (c:Chunk) ON (c.document_file, c.seq)")
+        print("Index 'chunk_document_seq' created or already exists.")
     except Exception as e:
         print(f"Error: {e}")
         sys.exit(1)
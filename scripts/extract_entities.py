@@ -5,41 +5,42 @@ Extract entities (NormativeDocument, AccountCode, BHMS, etc.) from chunks using
 Outputs nodes and relationships to update JSON for re-ingestion.
 Optional: run after add_doc_to_source, then merge into JSON and re-run ingestion.
 
+One LLM client and chain are shared by all chunks, and calls run concurrently with an
+adaptive limit that halves on rate limits and recovers gradually. Every finished chunk is
+appended to a checkpoint sidecar (<output>.extract.jsonl) keyed by chunk-text hash, so an
+interrupted run resumes where it stopped and unchanged or duplicate text is never sent to
+the LLM again. Entity ids are canonicalized (src.data.entity_resolution) and the merged
+JSON is written atomically at the end.
+
 Usage:
   python scripts/extract_entities.py [--input path/to/file.json] [--output path/to/output.json]
+  python scripts/extract_entities.py --concurrency 16 --limit 100
 """
 import argparse
+import asyncio
 import json
 import os
+import random
 import sys
+import time
+from typing import Any
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from dotenv import load_dotenv
 
+from src.data.document_utils import content_hash, write_json_atomic
+from src.data.entity_resolution import resolve_graph_data
+
 load_dotenv()
 
 # Entity types to extract (Uzbek accounting domain)
 ENTITY_TYPES = ["NormativeDocument", "AccountCode", "BHMS", "MinistryOfFinance", "Regulation"]
 
+# Bump when the prompt changes so cached results from the old prompt are not reused
+PROMPT_VERSION = "1"
 
-def extract_entities_from_chunk(chunk_text: str, chunk_id: str) -> tuple[list, list]:
-    """
-    Use LLM to extract entities and relationships from a chunk.
-
-    Returns (nodes, relationships).
-    """
-    try:
-        from src.core.llm_config import get_llm
-        from langchain_core.output_parsers import JsonOutputParser
-        from langchain_core.prompts import PromptTemplate
-    except ImportError:
-        return [], []
-
-    llm = get_llm(temperature=0)
-    parser = JsonOutputParser()
-
-    prompt = PromptTemplate.from_template("""
+EXTRACTION_PROMPT = """
 Extract accounting-related entities from this Uzbek text. Return JSON with "nodes" and "relationships".
 
 Entity types: NormativeDocument, AccountCode, BHMS, MinistryOfFinance, Regulation.
@@ -51,22 +52,207 @@ Text:
 {text}
 
 Return only valid JSON, no markdown.
-""")
-    chain = prompt | llm | parser
+"""
+
+MAX_TEXT_CHARS = 3000
+
+
+def build_extraction_chain() -> Any:
+    """Build the prompt | llm | parser chain once; it is shared by all concurrent calls."""
+    from langchain_core.output_parsers import JsonOutputParser
+    from langchain_core.prompts import PromptTemplate
+
+    from src.core.llm_config import get_llm
+
+    # Retries are handled by extract_chunk so backoff is coordinated across workers
+    llm = get_llm(temperature=0, max_retries=0)
+    return PromptTemplate.from_template(EXTRACTION_PROMPT) | llm | JsonOutputParser()
+
+
+class AdaptiveLimiter:
+    """
+    Concurrency gate with additive-increase / multiplicative-decrease.
+
+    The limit halves on each rate-limit error and grows by one after a streak of
+    successes, up to max_concurrency. All workers also pause until the shared
+    cool-down deadline after a rate limit.
+    """
+
+    def __init__(self, max_concurrency: int, increase_after: int = 10):
+        self.max_concurrency = max(1, max_concurrency)
+        self.limit = self.max_concurrency
+        self.increase_after = increase_after
+        self._in_flight = 0
+        self._successes = 0
+        self._resume_at = 0.0
+        self._cond = asyncio.Condition()
+
+    async def __aenter__(self) -> "AdaptiveLimiter":
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._in_flight < self.limit)
+            self._in_flight += 1
+        delay = self._resume_at - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        async with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    def on_success(self) -> None:
+        self._successes += 1
+        if self._successes >= self.increase_after and self.limit < self.max_concurrency:
+            self.limit += 1
+            self._successes = 0
+
+    def on_rate_limit(self, retry_after: float) -> None:
+        self.limit = max(1, self.limit // 2)
+        self._successes = 0
+        self._resume_at = max(self._resume_at, time.monotonic() + retry_after)
+
+
+def _retry_after_seconds(exc: BaseException, attempt: int) -> float:
+    """Use the server's Retry-After header when present, else exponential backoff with jitter."""
+    response = getattr(exc, "response", None)
+    header = response.headers.get("retry-after") if response is not None else None
     try:
-        result = chain.invoke({"text": chunk_text[:3000]})
-        nodes = result.get("nodes", []) if isinstance(result, dict) else []
-        rels = result.get("relationships", []) if isinstance(result, dict) else []
-        return nodes, rels
-    except Exception:
-        return [], []
+        if header:
+            return float(header)
+    except ValueError:
+        pass
+    return min(60.0, 2.0**attempt) + random.uniform(0, 1)
+
+
+async def extract_chunk(
+    chain: Any, text: str, limiter: AdaptiveLimiter, max_attempts: int = 6
+) -> tuple[list, list] | None:
+    """
+    Extract (nodes, relationships) from one chunk.
+
+    Returns None if the chunk could not be processed; such chunks are not checkpointed
+    and will be retried on the next run.
+    """
+    from openai import APIConnectionError, APITimeoutError, RateLimitError
+
+    for attempt in range(max_attempts):
+        backoff = 0.0
+        async with limiter:
+            try:
+                result = await chain.ainvoke({"text": text[:MAX_TEXT_CHARS]})
+            except RateLimitError as e:
+                limiter.on_rate_limit(_retry_after_seconds(e, attempt))
+                continue
+            except (APIConnectionError, APITimeoutError) as e:
+                backoff = _retry_after_seconds(e, attempt)
+            except Exception as e:
+                print(f"  chunk failed: {e}", file=sys.stderr)
+                return None
+        if backoff:
+            # Back off outside the limiter, so the slot stays free for other chunks
+            await asyncio.sleep(backoff)
+            continue
+        limiter.on_success()
+        if not isinstance(result, dict):
+            return [], []
+        return result.get("nodes", []) or [], result.get("relationships", []) or []
+    return None
+
+
+def _cache_key(text: str) -> str:
+    return f"{PROMPT_VERSION}:{content_hash(text)}"
+
+
+def load_checkpoint(path: str) -> dict[str, dict]:
+    """Load finished results from the sidecar; a torn last line from a crash is ignored."""
+    results: dict[str, dict] = {}
+    if not os.path.isfile(path):
+        return results
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            results[record["key"]] = record
+    return results
+
+
+async def extract_file(
+    fp: str, out: str, chain: Any, concurrency: int, limit: int | None, fresh: bool
+) -> None:
+    """Extract entities for every chunk of one JSON file, resuming from its checkpoint."""
+    with open(fp, encoding="utf-8") as f:
+        data = json.load(f)
+    graph_data = data.get("graph_data", [])
+    chunks = graph_data[:limit] if limit else graph_data
+
+    checkpoint_path = f"{out}.extract.jsonl"
+    if fresh and os.path.exists(checkpoint_path):
+        os.unlink(checkpoint_path)
+    done = load_checkpoint(checkpoint_path)
+
+    pending: dict[str, str] = {}
+    for chunk in chunks:
+        text = chunk.get("original_text", "")
+        key = _cache_key(text)
+        if text and key not in done:
+            pending.setdefault(key, text)
+    print(f"{fp}: {len(chunks)} chunks, {len(chunks) - len(pending)} cached, {len(pending)} to extract")
+
+    limiter = AdaptiveLimiter(concurrency)
+    started = time.perf_counter()
+    failed = completed = 0
+
+    with open(checkpoint_path, "a", encoding="utf-8") as checkpoint:
+
+        async def _run(key: str, text: str) -> None:
+            nonlocal failed, completed
+            result = await extract_chunk(chain, text, limiter)
+            if result is None:
+                failed += 1
+                return
+            record = {"key": key, "nodes": result[0], "relationships": result[1]}
+            done[key] = record
+            checkpoint.write(json.dumps(record, ensure_ascii=False) + "\n")
+            checkpoint.flush()
+            # Completions of this run only; checkpointed results were loaded, not extracted
+            completed += 1
+            if completed % 25 == 0:
+                rate = completed / max(time.perf_counter() - started, 1e-6)
+                print(f"  {completed}/{len(pending)} done ({rate:.1f}/s, concurrency {limiter.limit})")
+
+        await asyncio.gather(*(_run(k, t) for k, t in pending.items()))
+
+    for chunk in chunks:
+        record = done.get(_cache_key(chunk.get("original_text", "")))
+        if record is not None:
+            chunk["nodes"] = record["nodes"]
+            chunk["relationships"] = record["relationships"]
+    # Canonicalize entity ids so spelling variants become one node at ingestion
+    data["graph_data"] = resolve_graph_data(graph_data)
+
+    write_json_atomic(out, data, indent=None if len(graph_data) > 500 else 4)
+    elapsed = time.perf_counter() - started
+    print(f"Wrote {out} ({elapsed:.1f}s, {failed} chunks failed and will be retried next run)")
+
+
+async def run(files: list[str], output: str | None, concurrency: int, limit: int | None, fresh: bool) -> None:
+    chain = build_extraction_chain()
+    for fp in files:
+        if not os.path.isfile(fp):
+            continue
+        await extract_file(fp, output or fp, chain, concurrency, limit, fresh)
 
 
 def main() -> None:
     parser = argparse.ArgumentParser()
     parser.add_argument("--input", default=None, help="Input JSON file (default: all in Json/)")
     parser.add_argument("--output", default=None, help="Output JSON file")
-    parser.add_argument("--limit", type=int, default=5, help="Max chunks to process (for testing)")
+    parser.add_argument("--limit", type=int, default=None, help="Max chunks per file (default: all)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Max concurrent LLM calls")
+    parser.add_argument("--fresh", action="store_true", help="Ignore and discard existing checkpoints")
     args = parser.parse_args()
 
     repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -75,24 +261,12 @@ def main() -> None:
     if args.input:
         files = [args.input]
     else:
-        files = [os.path.join(json_dir, f) for f in os.listdir(json_dir) if f.endswith(".json")]
+        files = sorted(os.path.join(json_dir, f) for f in os.listdir(json_dir) if f.endswith(".json"))
+    if args.output and len(files) > 1:
+        print("Error: --output requires --input (one output per input file)", file=sys.stderr)
+        sys.exit(1)
 
-    for fp in files:
-        if not os.path.isfile(fp):
-            continue
-        with open(fp, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        graph_data = data.get("graph_data", [])
-        for i, chunk in enumerate(graph_data[: args.limit]):
-            text = chunk.get("original_text", "")
-            nodes, rels = extract_entities_from_chunk(text, chunk.get("chunk_id", str(i)))
-            chunk["nodes"] = nodes
-            chunk["relationships"] = rels
-
-        out = args.output or fp
-        with open(out, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=4)
-        print(f"Wrote {out}")
+    asyncio.run(run(files, args.output, args.concurrency, args.limit, args.fresh))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Fit the TF-IDF + SVD projection for the offline local embedding backend.
+
+Reads chunk texts from src/data/source/Json (no database or network needed) and writes
+an .npz file. Point LOCAL_EMBEDDING_MODEL at it and set EMBEDDING_BACKEND=local.
+
+Usage:
+  python scripts/fit_local_embeddings.py --output .cache/local_embeddings.npz --dimensions 256
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main() -> None:
+    repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(description="Fit local LSA embedding projection.")
+    parser.add_argument(
+        "--json-dir",
+        default=os.path.join(repo_root, "src", "data", "source", "Json"),
+        help="Directory with ingestion JSON files",
+    )
+    parser.add_argument(
+        "--output",
+        default=os.path.join(repo_root, ".cache", "local_embeddings.npz"),
+        help="Output .npz path",
+    )
+    parser.add_argument("--dimensions", type=int, default=256, help="SVD components (vector size)")
+    parser.add_argument("--features", type=int, default=2**14, help="Hashed feature space size")
+    args = parser.parse_args()
+
+    from src.data.local_embeddings import HashingEmbedder
+
+    texts = []
+    for path in sorted(glob.glob(os.path.join(args.json_dir, "*.json"))):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        texts.extend(c["original_text"] for c in data.get("graph_data", []) if c.get("original_text"))
+    if not texts:
+        print(f"Error: no chunk texts found in {args.json_dir}", file=sys.stderr)
+        sys.exit(1)
+
+    print(f"Fitting on {len(texts)} chunks...")
+    started = time.perf_counter()
+    embedder = HashingEmbedder()
+    embedder.fit_lsa(texts, dimensions=args.dimensions, n_features=args.features)
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    embedder.save(args.output)
+    print(f"Wrote {args.output} ({embedder.dimensions} dims, {time.perf_counter() - started:.1f}s).")
+    print(f"Use it with: EMBEDDING_BACKEND=local LOCAL_EMBEDDING_MODEL={args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,6 @@
 """Health check functionality."""
 from typing import Dict, Any
-from src.data.neo4j_client import get_neo4j_graph
+from src.data.neo4j_driver import get_graph_client
 from src.core.logging_config import get_logger
 from src.core.metrics import neo4j_connection_status, openai_api_status
 
@@ -10,13 +10,15 @@ logger = get_logger(__name__)
 def check_neo4j_health() -> tuple[bool, str]:
     """
     Check Neo4j database connection health.
+
+    Runs a trivial read through the pooled client; the schema is not reloaded here
+    (see src.data.schema_service).
     
     Returns:
         Tuple of (is_healthy, message).
     """
     try:
-        graph = get_neo4j_graph()
-        graph.refresh_schema()
+        get_graph_client().read("RETURN 1 AS ok", timeout=5)
         neo4j_connection_status.set(1)
         return True, "Neo4j connection healthy"
     except Exception as e:
@@ -0,0 +1,229 @@
+"""
+Background health prober and HTTP endpoints for monitoring.
+
+HealthProber runs the Neo4j and LLM checks from src.api.health concurrently on its own
+small thread pool, each bounded by a timeout, and keeps the last result as a snapshot. A
+timed-out check keeps running in its thread, so the check is skipped until that run
+returns; a hung dependency holds at most one probe thread and none of the default
+executor the bot uses. The LLM
+check is a paid completion, so it runs on its own, longer interval. Everything that
+reports health (the HTTP endpoints and the bot's /health command) reads the snapshot.
+
+Endpoints (aiohttp):
+  GET /metrics  Prometheus exposition of src.core.metrics
+  GET /healthz  Liveness: 200 while the prober loop is running
+  GET /readyz   Readiness: 200 when the last snapshot is healthy, 503 otherwise
+
+Configuration (environment):
+  HTTP_HOST                  Bind address (default 0.0.0.0)
+  HTTP_PORT                  Port (default 8080; 0 disables the server)
+  HEALTH_PROBE_INTERVAL      Seconds between Neo4j probes (default 30)
+  HEALTH_LLM_PROBE_INTERVAL  Seconds between LLM probes (default 300)
+  HEALTH_PROBE_TIMEOUT       Seconds before a probe counts as failed (default 10)
+"""
+import asyncio
+import os
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from aiohttp import web
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, generate_latest
+
+from src.api.health import check_neo4j_health, check_openai_health
+from src.core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+
+class HealthProber:
+    """Periodically probes dependencies and caches the overall health snapshot."""
+
+    def __init__(
+        self,
+        interval: Optional[float] = None,
+        llm_interval: Optional[float] = None,
+        timeout: Optional[float] = None,
+        checks: Optional[dict[str, Callable[[], tuple[bool, str]]]] = None,
+    ):
+        """
+        Args:
+            interval: Seconds between probe rounds.
+            llm_interval: Seconds between LLM probes (a paid API call).
+            timeout: Seconds before a single check is reported as failed.
+            checks: Name -> check function; defaults to neo4j and openai.
+        """
+        self.interval = interval or float(os.getenv("HEALTH_PROBE_INTERVAL", "30"))
+        self.llm_interval = llm_interval or float(os.getenv("HEALTH_LLM_PROBE_INTERVAL", "300"))
+        self.timeout = timeout or float(os.getenv("HEALTH_PROBE_TIMEOUT", "10"))
+        self.checks = checks or {"neo4j": check_neo4j_health, "openai": check_openai_health}
+        self._results: dict[str, dict[str, Any]] = {}
+        self._last_round: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._in_flight: dict[str, Future] = {}
+
+    async def _run_check(self, name: str, check: Callable[[], tuple[bool, str]]) -> None:
+        running = self._in_flight.get(name)
+        if running is not None and not running.done():
+            logger.warning("health_probe_skipped", check=name, reason="previous run still in flight")
+            return
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=max(len(self.checks), 1), thread_name_prefix="health-probe")
+        started = time.monotonic()
+        future = self._in_flight[name] = self._executor.submit(check)
+        try:
+            healthy, message = await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            healthy, message = False, f"Health check timed out after {self.timeout:.0f}s"
+        except Exception as e:
+            healthy, message = False, f"Health check failed: {e}"
+        self._results[name] = {
+            "healthy": healthy,
+            "message": message,
+            "checked_at": time.time(),
+            "duration_ms": round((time.monotonic() - started) * 1000, 1),
+        }
+        if not healthy:
+            logger.warning("health_probe_failed", check=name, message=message)
+
+    def _due(self, name: str) -> bool:
+        result = self._results.get(name)
+        if result is None:
+            return True
+        interval = self.llm_interval if name == "openai" else self.interval
+        checked_at: float = result["checked_at"]
+        return time.time() - checked_at >= interval - 0.5
+
+    async def probe(self, force: bool = False) -> dict[str, Any]:
+        """Run every due check concurrently and return the new snapshot."""
+        await asyncio.gather(*(
+            self._run_check(name, check)
+            for name, check in self.checks.items()
+            if force or self._due(name)
+        ))
+        self._last_round = time.monotonic()
+        return self.snapshot()
+
+    def snapshot(self) -> dict[str, Any]:
+        """
+        Last known health, in the get_health_status() shape plus probe timestamps.
+
+        Status is 'unknown' until every check has run once.
+        """
+        snapshot: dict[str, Any] = {name: self._results.get(name) for name in self.checks}
+        if any(result is None for result in snapshot.values()):
+            status = "unknown"
+        else:
+            status = "healthy" if all(r["healthy"] for r in snapshot.values()) else "unhealthy"
+        for name, result in snapshot.items():
+            if result is None:
+                snapshot[name] = {"healthy": False, "message": "Not checked yet"}
+        snapshot["status"] = status
+        return snapshot
+
+    def is_alive(self) -> bool:
+        """True while the probe loop keeps completing rounds."""
+        if self._task is None or self._task.done() or self._last_round is None:
+            return False
+        return time.monotonic() - self._last_round < 3 * self.interval + self.timeout
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.probe()
+            except Exception as e:
+                logger.error("health_probe_loop_error", error=str(e), exc_info=True)
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """Start the background probe loop on the running event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def stop(self) -> None:
+        """Cancel the probe loop and release the probe threads (a hung check is not waited for)."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self._in_flight.clear()
+
+
+PROBER_KEY = web.AppKey("prober", HealthProber)
+
+
+async def metrics_handler(request: web.Request) -> web.Response:
+    body = generate_latest(REGISTRY)
+    return web.Response(body=body, headers={"Content-Type": CONTENT_TYPE_LATEST})
+
+
+async def healthz_handler(request: web.Request) -> web.Response:
+    prober = request.app[PROBER_KEY]
+    alive = prober.is_alive()
+    return web.json_response({"alive": alive}, status=200 if alive else 503)
+
+
+async def readyz_handler(request: web.Request) -> web.Response:
+    snapshot = request.app[PROBER_KEY].snapshot()
+    return web.json_response(snapshot, status=200 if snapshot["status"] == "healthy" else 503)
+
+
+def create_app(prober: HealthProber) -> web.Application:
+    """Build the monitoring application (routes only; the prober is started separately)."""
+    app = web.Application()
+    app[PROBER_KEY] = prober
+    app.router.add_get("/metrics", metrics_handler)
+    app.router.add_get("/healthz", healthz_handler)
+    app.router.add_get("/readyz", readyz_handler)
+    return app
+
+
+async def start_http_server(
+    prober: HealthProber,
+    host: Optional[str] = None,
+    port: Optional[int] = None,
+    configure: Optional[Callable[[web.Application], None]] = None,
+) -> Optional[web.AppRunner]:
+    """
+    Start the prober and serve the monitoring endpoints on the running event loop.
+
+    Args:
+        prober: Health prober backing /healthz and /readyz.
+        host: Bind address (default HTTP_HOST).
+        port: Port (default HTTP_PORT; 0 disables the server).
+        configure: Adds further routes to the app (e.g. the Telegram webhook).
+
+    Returns:
+        The AppRunner (pass to runner.cleanup() on shutdown), or None if HTTP_PORT=0.
+    """
+    prober.start()
+    port = int(os.getenv("HTTP_PORT", "8080")) if port is None else port
+    if port == 0:
+        return None
+    host = host or os.getenv("HTTP_HOST", "0.0.0.0")
+    app = create_app(prober)
+    if configure is not None:
+        configure(app)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info("http_server_started", host=host, port=port)
+    return runner
+
+
+_prober_instance: Optional[HealthProber] = None
+
+
+def get_health_prober() -> HealthProber:
+    """Return the process-wide health prober."""
+    global _prober_instance
+    if _prober_instance is None:
+        _prober_instance = HealthProber()
+    return _prober_instance
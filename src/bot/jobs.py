@@ -0,0 +1,175 @@
+"""
+Background ingestion jobs for uploaded documents.
+
+handle_document only downloads the file (into memory), hashes it and registers a job;
+extraction, chunking, ingestion and embedding run afterwards on the scheduler's
+ingestion pool and the user is notified when the job finishes. Users can check
+progress with /status.
+
+Uploads are named after their content hash, so the same file always maps to the same
+Document: a re-upload of an ingested file, or of a file whose job is still running, is
+answered without any processing.
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Optional
+
+from src.bot.scheduler import SchedulerBusy, get_scheduler
+from src.core.logging_config import get_logger
+from src.data.document_utils import iter_chunks, iter_text
+from src.data.ingest_single import ingest_single_document
+
+logger = get_logger(__name__)
+
+ACTIVE_STATUSES = ("queued", "running")
+
+
+@dataclass
+class UploadJob:
+    """State of one upload's ingestion."""
+
+    id: str
+    user_id: int
+    chat_id: int
+    title: str
+    file_name: str
+    content_hash: str
+    status: str = "queued"  # queued | running | done | failed
+    chunks: int = 0
+    error: str = ""
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+
+    def describe(self) -> str:
+        """One-line summary for /status."""
+        if self.status == "done":
+            detail = f"done, {self.chunks} chunks"
+        elif self.status == "failed":
+            detail = f"failed: {self.error}"
+        else:
+            detail = f"{self.status} for {int(time.time() - self.created_at)}s"
+        return f"{self.id} {self.title}: {detail}"
+
+
+class JobRegistry:
+    """Recent upload jobs in memory, bounded to the last max_jobs."""
+
+    def __init__(self, max_jobs: int = 1000):
+        self.max_jobs = max_jobs
+        self._jobs: OrderedDict[str, UploadJob] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(self, user_id: int, chat_id: int, title: str, content_hash: str) -> UploadJob:
+        """Register a queued job for an upload."""
+        job = UploadJob(
+            id=uuid.uuid4().hex[:8],
+            user_id=user_id,
+            chat_id=chat_id,
+            title=title,
+            file_name=upload_file_name(content_hash),
+            content_hash=content_hash,
+        )
+        with self._lock:
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.max_jobs:
+                self._jobs.popitem(last=False)
+        return job
+
+    def get(self, job_id: str) -> Optional[UploadJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def active_for_hash(self, content_hash: str) -> Optional[UploadJob]:
+        """The queued or running job for this content, if any."""
+        with self._lock:
+            return next(
+                (j for j in self._jobs.values() if j.content_hash == content_hash and j.status in ACTIVE_STATUSES),
+                None,
+            )
+
+    def for_user(self, user_id: int, limit: int = 5) -> list[UploadJob]:
+        """The user's most recent jobs, newest first."""
+        with self._lock:
+            jobs = [j for j in reversed(self._jobs.values()) if j.user_id == user_id]
+        return jobs[:limit]
+
+
+def upload_file_name(content_hash: str) -> str:
+    """Document file_name of an upload: derived from its content, so duplicates coincide."""
+    return f"upload_{content_hash[:16]}.json"
+
+
+def process_upload(job: UploadJob, data: bytes, ext: str) -> int:
+    """
+    Extract, chunk and ingest (with embeddings) an upload; runs on a worker thread.
+
+    Returns:
+        Number of chunks ingested.
+
+    Raises:
+        ValueError: If no meaningful text could be extracted.
+    """
+    # Chunking consumes pages as extraction produces them
+    graph_data = list(iter_chunks(iter_text(data, ext), max_chunk_size=800, chunk_overlap=150))
+    if sum(len(chunk["original_text"]) for chunk in graph_data) < 50:
+        raise ValueError("Could not extract meaningful text from the file.")
+    metadata = {
+        "file_name": job.file_name,
+        "document_title": job.title,
+        "authority": "O'zbekiston Respublikasi",
+    }
+    ingest_single_document(metadata, graph_data)
+    return len(graph_data)
+
+
+async def run_upload_job(
+    job: UploadJob,
+    data: bytes,
+    ext: str,
+    notify: Callable[[int, str], Awaitable[Any]],
+) -> None:
+    """
+    Run an upload job on the ingestion pool and report the outcome with notify(chat_id, text).
+    """
+    job.status = "running"
+    try:
+        job.chunks = await get_scheduler().ingestion.run(process_upload, job, data, ext)
+        job.status = "done"
+        message = f"File added successfully ({job.chunks} chunks). You can now ask questions about it."
+        logger.info("document_ingested", job_id=job.id, user_id=job.user_id, file_name=job.title, chunks=job.chunks)
+    except SchedulerBusy:
+        job.status, job.error = "failed", "busy"
+        message = "The bot is busy right now. Please send the file again in a minute."
+    except ImportError as e:
+        logger.error("document_import_error", job_id=job.id, error=str(e))
+        job.status, job.error = "failed", "missing dependency"
+        message = "Missing dependency for this file type. Contact administrator."
+    except ValueError as e:
+        logger.warning("document_processing_error", job_id=job.id, error=str(e))
+        job.status, job.error = "failed", str(e)
+        message = str(e)
+    except Exception as e:
+        logger.error("document_processing_error", job_id=job.id, user_id=job.user_id, error=str(e), exc_info=True)
+        job.status, job.error = "failed", "processing error"
+        message = "Sorry, I could not process this file. Please try again or use a different format."
+    finally:
+        job.finished_at = time.time()
+
+    try:
+        await notify(job.chat_id, f"{job.title}: {message}")
+    except Exception as e:
+        logger.error("job_notify_failed", job_id=job.id, error=str(e))
+
+
+_registry_instance: Optional[JobRegistry] = None
+
+
+def get_job_registry() -> JobRegistry:
+    """Return the process-wide job registry."""
+    global _registry_instance
+    if _registry_instance is None:
+        _registry_instance = JobRegistry()
+    return _registry_instance
@@ -1,65 +1,206 @@
-"""Rate limiting for Telegram bot."""
+"""
+Rate limiting for Telegram bot.
+
+Each user has a token bucket holding up to max_requests tokens that refills at
+max_requests per window_seconds; a request takes one token. A check is O(1): only the
+user's (tokens, updated_at) pair is read and written. Buckets that have been idle long
+enough to be full again carry no information and are evicted periodically.
+
+State lives in a pluggable backend:
+  memory  In-process dict (default)
+  sqlite  SQLite file shared by several bot processes, so they enforce one quota
+
+Configuration (environment):
+  RATE_LIMIT_MAX_REQUESTS  Requests allowed per window (default 10)
+  RATE_LIMIT_WINDOW        Window in seconds (default 60)
+  RATE_LIMIT_BACKEND       memory | sqlite (default memory)
+  RATE_LIMIT_DB_PATH       SQLite file for the sqlite backend (default .cache/rate_limit.sqlite3)
+"""
+import math
+import os
+import sqlite3
+import threading
 import time
-from collections import defaultdict
-from typing import Dict, Tuple, List
+from typing import Dict, Optional, Tuple, Union
+
+
+def _refill(tokens: float, updated: float, now: float, capacity: float, rate: float) -> float:
+    return min(capacity, tokens + max(0.0, now - updated) * rate)
+
+
+class MemoryBackend:
+    """Token buckets in a process-local dict."""
+
+    def __init__(self) -> None:
+        self._buckets: Dict[int, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, key: int, capacity: float, rate: float, now: float) -> float:
+        """Take a token; return 0 if allowed, else seconds until one is available."""
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = _refill(tokens, updated, now, capacity, rate)
+            if tokens < 1:
+                self._buckets[key] = (tokens, now)
+                return (1 - tokens) / rate
+            self._buckets[key] = (tokens - 1, now)
+            return 0.0
+
+    def reset(self, key: int) -> None:
+        with self._lock:
+            self._buckets.pop(key, None)
+
+    def evict_idle(self, cutoff: float) -> int:
+        """Drop buckets not touched since cutoff; returns the number removed."""
+        with self._lock:
+            idle = [key for key, (_, updated) in self._buckets.items() if updated < cutoff]
+            for key in idle:
+                del self._buckets[key]
+            return len(idle)
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+class SQLiteBackend:
+    """Token buckets in a SQLite file; each check is one short IMMEDIATE transaction."""
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Database file, shared by every process that should use the same quota.
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=5.0, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_buckets "
+            "(key INTEGER PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+        )
+        self._lock = threading.Lock()
+
+    def acquire(self, key: int, capacity: float, rate: float, now: float) -> float:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT tokens, updated FROM rate_buckets WHERE key = ?", (key,)
+                ).fetchone()
+                tokens = _refill(row[0], row[1], now, capacity, rate) if row else capacity
+                wait = (1 - tokens) / rate if tokens < 1 else 0.0
+                self._conn.execute(
+                    "INSERT INTO rate_buckets (key, tokens, updated) VALUES (?, ?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated",
+                    (key, tokens if wait else tokens - 1, now),
+                )
+                self._conn.execute("COMMIT")
+                return wait
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def reset(self, key: int) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM rate_buckets WHERE key = ?", (key,))
+
+    def evict_idle(self, cutoff: float) -> int:
+        with self._lock:
+            return self._conn.execute("DELETE FROM rate_buckets WHERE updated < ?", (cutoff,)).rowcount
+
+    def __len__(self) -> int:
+        with self._lock:
+            count: int = self._conn.execute("SELECT COUNT(*) FROM rate_buckets").fetchone()[0]
+            return count
 
 
 class RateLimiter:
     """
-    Simple in-memory rate limiter.
-    
+    Token-bucket rate limiter.
+
     Tracks requests per user and enforces rate limits.
     """
-    
-    def __init__(self, max_requests: int = 10, window_seconds: int = 60):
+
+    def __init__(
+        self,
+        max_requests: int = 10,
+        window_seconds: int = 60,
+        backend: Optional[Union[MemoryBackend, SQLiteBackend]] = None,
+        sweep_interval: Optional[float] = None,
+    ):
         """
         Initialize rate limiter.
-        
+
         Args:
-            max_requests: Maximum number of requests allowed per window.
-            window_seconds: Time window in seconds.
+            max_requests: Maximum number of requests allowed per window (bucket capacity).
+            window_seconds: Time window in seconds over which the bucket refills completely.
+            backend: Bucket store (MemoryBackend or SQLiteBackend); defaults to MemoryBackend.
+            sweep_interval: Seconds between idle-bucket evictions (default: window_seconds).
         """
         self.max_requests = max_requests
         self.window_seconds = window_seconds
-        self._requests: Dict[int, List[float]] = defaultdict(list)
-    
+        self.rate = max_requests / window_seconds
+        self.backend: Union[MemoryBackend, SQLiteBackend] = backend if backend is not None else MemoryBackend()
+        self.sweep_interval = sweep_interval or window_seconds
+        self._next_sweep = 0.0
+
     def is_allowed(self, user_id: int) -> Tuple[bool, str]:
         """
         Check if a request from a user is allowed.
-        
+
         Args:
             user_id: The Telegram user ID.
-            
+
         Returns:
             Tuple of (is_allowed, message). If allowed, message is empty.
         """
         current_time = time.time()
-        user_requests = self._requests[user_id]
-        
-        # Remove requests outside the time window
-        user_requests[:] = [req_time for req_time in user_requests 
-                          if current_time - req_time < self.window_seconds]
-        
-        # Check if limit exceeded
-        if len(user_requests) >= self.max_requests:
-            oldest_request = min(user_requests)
-            wait_time = int(self.window_seconds - (current_time - oldest_request))
+        if current_time >= self._next_sweep:
+            self._next_sweep = current_time + self.sweep_interval
+            self.evict_idle(current_time)
+
+        wait = self.backend.acquire(user_id, self.max_requests, self.rate, current_time)
+        if wait > 0:
+            wait_time = max(1, math.ceil(wait))
             return False, f"Rate limit exceeded. Please wait {wait_time} seconds before trying again."
-        
-        # Add current request
-        user_requests.append(current_time)
         return True, ""
-    
+
+    def evict_idle(self, now: Optional[float] = None) -> int:
+        """
+        Remove buckets idle for a full window (they would be full again anyway).
+
+        Returns:
+            Number of evicted users.
+        """
+        now = time.time() if now is None else now
+        return self.backend.evict_idle(now - self.window_seconds)
+
     def reset_user(self, user_id: int):
         """
         Reset rate limit for a specific user.
-        
+
         Args:
             user_id: The Telegram user ID to reset.
         """
-        if user_id in self._requests:
-            del self._requests[user_id]
+        self.backend.reset(user_id)
+
+
+def create_rate_limiter() -> RateLimiter:
+    """Build the rate limiter configured by RATE_LIMIT_* environment variables."""
+    backend_name = os.getenv("RATE_LIMIT_BACKEND", "memory").lower()
+    if backend_name == "sqlite":
+        backend: Union[MemoryBackend, SQLiteBackend] = SQLiteBackend(os.getenv("RATE_LIMIT_DB_PATH", ".cache/rate_limit.sqlite3"))
+    elif backend_name == "memory":
+        backend = MemoryBackend()
+    else:
+        raise ValueError(f"Unknown RATE_LIMIT_BACKEND: {backend_name}")
+    return RateLimiter(
+        max_requests=int(os.getenv("RATE_LIMIT_MAX_REQUESTS", "10")),
+        window_seconds=int(os.getenv("RATE_LIMIT_WINDOW", "60")),
+        backend=backend,
+    )
 
 
 # Global rate limiter instance
-rate_limiter = RateLimiter(max_requests=10, window_seconds=60)
+rate_limiter = create_rate_limiter()
@@ -0,0 +1,185 @@
+"""
+Admission control and separate worker pools for the bot's blocking work.
+
+Questions and document uploads used to share asyncio's default executor, so a burst of
+large uploads (text extraction, chunking, per-chunk writes) could occupy every thread
+while questions waited behind them. The scheduler gives each kind of work its own
+bounded pool:
+
+  queries    interactive questions (process_query)
+  ingestion  document uploads (extract, chunk, ingest)
+
+Each pool accepts at most workers + queue_size jobs; beyond that run() raises
+SchedulerBusy immediately so the handler can answer "busy" instead of queueing
+unboundedly. Queue depth, wait time and rejections are exported per pool. The global
+cap on concurrent LLM calls is src.core.llm_config.llm_slot().
+
+ChatOrderedUpdateProcessor lets python-telegram-bot handle updates concurrently while
+updates from the same chat are still processed one after another.
+
+Configuration (environment):
+  QUERY_WORKERS       Threads for questions (default 8)
+  QUERY_QUEUE_SIZE    Questions allowed to wait for a thread (default 32)
+  INGEST_WORKERS      Threads for document ingestion (default 2)
+  INGEST_QUEUE_SIZE   Uploads allowed to wait for a thread (default 4)
+"""
+import asyncio
+import contextvars
+import functools
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Optional
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+from src.core.logging_config import get_logger
+from src.core.metrics import scheduler_queue_depth, scheduler_rejections, scheduler_wait_seconds
+from src.data.document_utils import shutdown_pdf_pool
+
+logger = get_logger(__name__)
+
+
+class SchedulerBusy(RuntimeError):
+    """Raised when a pool's queue is full."""
+
+    def __init__(self, pool: str):
+        super().__init__(f"The {pool} queue is full.")
+        self.pool = pool
+
+
+class WorkPool:
+    """Bounded thread pool with admission control; use from the event loop thread."""
+
+    def __init__(self, name: str, workers: int, queue_size: int):
+        """
+        Args:
+            name: Pool name used in metrics and logs.
+            workers: Number of worker threads.
+            queue_size: Jobs allowed to wait for a free worker.
+        """
+        self.name = name
+        self.workers = workers
+        self.capacity = workers + queue_size
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"{name}-worker")
+        self._pending = 0
+
+    @property
+    def pending(self) -> int:
+        """Jobs running or waiting."""
+        return self._pending
+
+    def has_capacity(self) -> bool:
+        """True if run() would accept a job now."""
+        return self._pending < self.capacity
+
+    def _publish(self) -> None:
+        scheduler_queue_depth.labels(pool=self.name).set(max(0, self._pending - self.workers))
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run fn(*args) on a worker thread and await its result.
+
+        Raises:
+            SchedulerBusy: If workers + queue_size jobs are already pending.
+        """
+        if not self.has_capacity():
+            scheduler_rejections.labels(pool=self.name).inc()
+            logger.warning("scheduler_busy", pool=self.name, pending=self._pending)
+            raise SchedulerBusy(self.name)
+
+        enqueued = time.perf_counter()
+
+        def job() -> Any:
+            scheduler_wait_seconds.labels(pool=self.name).observe(time.perf_counter() - enqueued)
+            return fn(*args)
+
+        # Keep context variables (as asyncio.to_thread does)
+        ctx = contextvars.copy_context()
+        self._pending += 1
+        self._publish()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, functools.partial(ctx.run, job))
+        finally:
+            self._pending -= 1
+            self._publish()
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class Scheduler:
+    """The bot's query and ingestion pools."""
+
+    def __init__(
+        self,
+        query_workers: Optional[int] = None,
+        query_queue_size: Optional[int] = None,
+        ingest_workers: Optional[int] = None,
+        ingest_queue_size: Optional[int] = None,
+    ):
+        self.queries = WorkPool(
+            "queries",
+            query_workers or int(os.getenv("QUERY_WORKERS", "8")),
+            int(os.getenv("QUERY_QUEUE_SIZE", "32")) if query_queue_size is None else query_queue_size,
+        )
+        self.ingestion = WorkPool(
+            "ingestion",
+            ingest_workers or int(os.getenv("INGEST_WORKERS", "2")),
+            int(os.getenv("INGEST_QUEUE_SIZE", "4")) if ingest_queue_size is None else ingest_queue_size,
+        )
+
+    def shutdown(self) -> None:
+        """Stop accepting work and drop queued jobs (running ones finish in the background)."""
+        self.queries.shutdown()
+        self.ingestion.shutdown()
+        shutdown_pdf_pool()
+
+
+class ChatOrderedUpdateProcessor(BaseUpdateProcessor):
+    """
+    Process up to max_concurrent_updates updates at once, in order within each chat.
+
+    A slow question only delays later messages of the same chat; other chats proceed.
+    Updates without a chat (e.g. inline queries) run without ordering.
+    """
+
+    def __init__(self, max_concurrent_updates: int):
+        super().__init__(max_concurrent_updates)
+        # chat id -> [lock, number of updates holding or waiting for it]
+        self._chats: dict[int, list] = {}
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        chat = update.effective_chat if isinstance(update, Update) else None
+        if chat is None:
+            await coroutine
+            return
+        entry = self._chats.setdefault(chat.id, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                await coroutine
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                # Drop idle chats so the table does not grow with every user
+                del self._chats[chat.id]
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
+
+
+_scheduler_instance: Optional[Scheduler] = None
+
+
+def get_scheduler() -> Scheduler:
+    """Return the process-wide scheduler."""
+    global _scheduler_instance
+    if _scheduler_instance is None:
+        _scheduler_instance = Scheduler()
+    return _scheduler_instance
@@ -1,17 +1,19 @@
+import asyncio
 import os
 import re
-import asyncio
-import tempfile
-import uuid
+import signal
 from dotenv import load_dotenv
 from telegram import Update
-from telegram.ext import ApplicationBuilder, ContextTypes, CommandHandler, MessageHandler, filters
+from telegram.ext import Application, ApplicationBuilder, ContextTypes, CommandHandler, MessageHandler, filters
+from aiohttp import web
 from src.core.orchestrator import process_query
 from src.bot.rate_limiter import rate_limiter
-from src.api.health import get_health_status
+from src.bot.scheduler import ChatOrderedUpdateProcessor, SchedulerBusy, get_scheduler
+from src.api.server import get_health_prober, start_http_server
 from src.core.logging_config import setup_logging, get_logger
-from src.data.document_utils import read_file, chunk_text
-from src.data.ingest_single import ingest_single_document
+from src.bot.jobs import get_job_registry, run_upload_job, upload_file_name
+from src.data.document_utils import bytes_hash
+from src.data.ingest_single import document_exists
 
 load_dotenv()
 
@@ -21,6 +23,7 @@ logger = get_logger(__name__)
 
 MAX_FILE_SIZE_MB = 10
 SUPPORTED_EXTENSIONS = {".pdf", ".txt", ".doc", ".docx"}
+BUSY_MESSAGE = "The bot is busy right now. Please try again in a minute."
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /start command."""
@@ -30,8 +33,8 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     )
 
 async def health(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Handle /health command."""
-    health_status = get_health_status()
+    """Handle /health command from the background prober's cached snapshot."""
+    health_status = get_health_prober().snapshot()
     
     status_text = f"System Status: {health_status['status'].upper()}\n\n"
     status_text += f"Neo4j: {'✓' if health_status['neo4j']['healthy'] else '✗'} {health_status['neo4j']['message']}\n"
@@ -57,9 +60,9 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
         return
     
-    # Run synchronous process_query in a thread pool to avoid blocking the event loop
+    # Run synchronous process_query on the query pool to avoid blocking the event loop
     try:
-        response = await asyncio.to_thread(process_query, user_text)
+        response = await get_scheduler().queries.run(process_query, user_text)
         text = str(response)
         # Convert markdown bold **text** to HTML <b>text</b> for Telegram
         text = re.sub(r"\*\*(.+?)\*\*", r"<b>\1</b>", text)
@@ -74,6 +77,8 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
             parse_mode="HTML",
         )
         logger.info("message_processed", user_id=user_id)
+    except SchedulerBusy:
+        await context.bot.send_message(chat_id=update.effective_chat.id, text=BUSY_MESSAGE)
     except Exception as e:
         logger.error("message_processing_error", user_id=user_id, error=str(e), exc_info=True)
         await context.bot.send_message(
@@ -83,8 +88,9 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 
 async def handle_document(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Handle document uploads: extract text, chunk, ingest into Neo4j."""
+    """Handle document uploads: download to memory, dedup by content, ingest as a background job."""
     user_id = update.effective_user.id
+    chat_id = update.effective_chat.id
     document = update.message.document
 
     if not document:
@@ -95,7 +101,7 @@ async def handle_document(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if not is_allowed:
         logger.warning("rate_limit_exceeded", user_id=user_id)
         await context.bot.send_message(
-            chat_id=update.effective_chat.id,
+            chat_id=chat_id,
             text=rate_limit_message,
         )
         return
@@ -103,7 +109,7 @@ async def handle_document(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # File size limit (10 MB)
     if document.file_size and document.file_size > MAX_FILE_SIZE_MB * 1024 * 1024:
         await context.bot.send_message(
-            chat_id=update.effective_chat.id,
+            chat_id=chat_id,
             text=f"File too large. Maximum size is {MAX_FILE_SIZE_MB} MB.",
         )
         return
@@ -112,88 +118,204 @@ async def handle_document(update: Update, context: ContextTypes.DEFAULT_TYPE):
     ext = os.path.splitext(file_name)[1].lower()
     if ext not in SUPPORTED_EXTENSIONS:
         await context.bot.send_message(
-            chat_id=update.effective_chat.id,
+            chat_id=chat_id,
             text=f"Unsupported format. Please send PDF, TXT, DOC, or DOCX.",
         )
         return
 
-    await context.bot.send_message(
-        chat_id=update.effective_chat.id,
-        text="Processing your file...",
-    )
+    # Refuse before downloading when the ingestion queue is already full
+    if not get_scheduler().ingestion.has_capacity():
+        await context.bot.send_message(chat_id=chat_id, text=BUSY_MESSAGE)
+        return
 
     try:
         file = await context.bot.get_file(document.file_id)
-        suffix = ext or ".txt"
-        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as tmp:
-            await file.download_to_drive(tmp.name)
-            tmp_path = tmp.name
-
-        def _process():
-            text = read_file(tmp_path)
-            if not text or len(text.strip()) < 50:
-                raise ValueError("Could not extract meaningful text from the file.")
-            basename = f"upload_{uuid.uuid4().hex[:8]}"
-            graph_data = chunk_text(text, max_chunk_size=800, chunk_overlap=150)
-            metadata = {
-                "file_name": f"{basename}.json",
-                "document_title": file_name,
-                "authority": "O'zbekiston Respublikasi",
-            }
-            ingest_single_document(metadata, graph_data)
-            return len(graph_data)
-
-        try:
-            chunks_count = await asyncio.to_thread(_process)
-        finally:
-            try:
-                os.unlink(tmp_path)
-            except OSError:
-                pass
-
+        data = bytes(await file.download_as_bytearray())
+    except Exception as e:
+        logger.error("document_download_error", user_id=user_id, error=str(e), exc_info=True)
         await context.bot.send_message(
-            chat_id=update.effective_chat.id,
-            text=f"File added successfully ({chunks_count} chunks). You can now ask questions about it.",
+            chat_id=chat_id,
+            text="Sorry, I could not download this file. Please try again.",
         )
-        logger.info("document_ingested", user_id=user_id, file_name=file_name, chunks=chunks_count)
+        return
 
-    except ImportError as e:
-        logger.error("document_import_error", error=str(e))
-        await context.bot.send_message(
-            chat_id=update.effective_chat.id,
-            text="Missing dependency for this file type. Contact administrator.",
-        )
-    except ValueError as e:
-        logger.warning("document_processing_error", error=str(e))
+    registry = get_job_registry()
+    digest = bytes_hash(data)
+    running = registry.active_for_hash(digest)
+    if running is not None:
         await context.bot.send_message(
-            chat_id=update.effective_chat.id,
-            text=str(e),
+            chat_id=chat_id,
+            text=f"This file is already being processed (job {running.id}). Use /status {running.id} to check.",
         )
+        return
+    try:
+        exists = await get_scheduler().queries.run(document_exists, upload_file_name(digest))
     except Exception as e:
-        logger.error("document_processing_error", user_id=user_id, error=str(e), exc_info=True)
+        # Ingestion MERGEs, so a failed lookup only costs a redundant re-ingest
+        logger.warning("document_dedup_lookup_failed", error=str(e))
+        exists = False
+    if exists:
+        logger.info("document_duplicate", user_id=user_id, file_name=file_name, content_hash=digest[:16])
         await context.bot.send_message(
-            chat_id=update.effective_chat.id,
-            text="Sorry, I could not process this file. Please try again or use a different format.",
+            chat_id=chat_id,
+            text="This file is already in the knowledge base. You can ask questions about it.",
         )
+        return
 
+    job = registry.create(user_id, chat_id, file_name, digest)
+
+    async def notify(target_chat_id: int, text: str) -> None:
+        await context.bot.send_message(chat_id=target_chat_id, text=text)
+
+    context.application.create_task(run_upload_job(job, data, ext, notify))
+    await context.bot.send_message(
+        chat_id=chat_id,
+        text=f"Processing your file (job {job.id}). I will send a message when it is ready; use /status {job.id} to check.",
+    )
+
+
+async def status(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handle /status [job_id]: show one upload job or the user's recent jobs."""
+    user_id = update.effective_user.id
+    registry = get_job_registry()
+    if context.args:
+        job = registry.get(context.args[0])
+        jobs = [job] if job is not None and job.user_id == user_id else []
+        empty_text = "No such job."
+    else:
+        jobs = registry.for_user(user_id)
+        empty_text = "You have no recent uploads."
+    await context.bot.send_message(
+        chat_id=update.effective_chat.id,
+        text="\n".join(job.describe() for job in jobs) if jobs else empty_text,
+    )
+
+
+async def _start_monitoring(application: Application) -> None:
+    """Start the health prober and the /metrics, /healthz, /readyz server."""
+    application.bot_data["http_runner"] = await start_http_server(get_health_prober())
+
+
+async def _stop_monitoring(application: Application) -> None:
+    """Stop the prober, the HTTP server and the worker pools."""
+    await get_health_prober().stop()
+    get_scheduler().shutdown()
+    runner = application.bot_data.get("http_runner")
+    if runner is not None:
+        await runner.cleanup()
+
+
+def build_application(token: str) -> Application:
+    """
+    Build the bot application with its handlers.
+
+    Updates are processed concurrently (BOT_CONCURRENT_UPDATES at a time, default 64)
+    but in order within each chat.
+    """
+    application = (
+        ApplicationBuilder()
+        .token(token)
+        .concurrent_updates(ChatOrderedUpdateProcessor(int(os.getenv("BOT_CONCURRENT_UPDATES", "64"))))
+        .post_init(_start_monitoring)
+        .post_shutdown(_stop_monitoring)
+        .build()
+    )
 
-if __name__ == '__main__':
-    token = os.getenv("TELEGRAM_BOT_TOKEN")
-    if not token or token == "your_telegram_bot_token":
-        print("Error: TELEGRAM_BOT_TOKEN not found or not set in environment variables.")
-        exit(1)
-        
-    application = ApplicationBuilder().token(token).build()
-    
     start_handler = CommandHandler('start', start)
     health_handler = CommandHandler('health', health)
+    status_handler = CommandHandler('status', status)
     message_handler = MessageHandler(filters.TEXT & (~filters.COMMAND), handle_message)
     document_handler = MessageHandler(filters.Document.ALL, handle_document)
 
     application.add_handler(start_handler)
     application.add_handler(health_handler)
+    application.add_handler(status_handler)
     application.add_handler(message_handler)
     application.add_handler(document_handler)
-    
-    print("Bot is polling...")
-    application.run_polling()
+    return application
+
+
+def add_webhook_route(app: web.Application, application: Application, path: str, secret: str | None) -> None:
+    """
+    Accept Telegram webhook POSTs on path and hand the updates to the application.
+
+    Requests without the matching X-Telegram-Bot-Api-Secret-Token header are refused.
+    """
+
+    async def webhook_handler(request: web.Request) -> web.Response:
+        if secret and request.headers.get("X-Telegram-Bot-Api-Secret-Token") != secret:
+            return web.Response(status=403)
+        try:
+            data = await request.json()
+        except ValueError:
+            return web.Response(status=400)
+        await application.update_queue.put(Update.de_json(data, application.bot))
+        return web.Response()
+
+    app.router.add_post(path, webhook_handler)
+
+
+async def run_webhook(application: Application) -> None:
+    """
+    Serve updates via webhook on the monitoring server (same port as /metrics).
+
+    Reads WEBHOOK_URL (public base URL, required), WEBHOOK_PATH (default /telegram) and
+    WEBHOOK_SECRET (recommended).
+
+    Raises:
+        ValueError: If WEBHOOK_URL is not set or HTTP_PORT is 0.
+    """
+    base_url = os.getenv("WEBHOOK_URL")
+    if not base_url:
+        raise ValueError("WEBHOOK_URL must be set when BOT_MODE=webhook.")
+    if os.getenv("HTTP_PORT") == "0":
+        raise ValueError("BOT_MODE=webhook needs the HTTP server; HTTP_PORT must not be 0.")
+    path = os.getenv("WEBHOOK_PATH", "/telegram")
+    secret = os.getenv("WEBHOOK_SECRET") or None
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    async with application:
+        await application.start()
+        runner = await start_http_server(
+            get_health_prober(),
+            configure=lambda app: add_webhook_route(app, application, path, secret),
+        )
+        await application.bot.set_webhook(
+            url=base_url.rstrip("/") + path,
+            secret_token=secret,
+            allowed_updates=Update.ALL_TYPES,
+            max_connections=min(100, application.update_processor.max_concurrent_updates),
+        )
+        logger.info("webhook_started", path=path)
+        try:
+            await stop.wait()
+        finally:
+            await application.stop()
+            await get_health_prober().stop()
+            get_scheduler().shutdown()
+            if runner is not None:
+                await runner.cleanup()
+
+
+def main() -> None:
+    """Run the bot in BOT_MODE (polling, the default, or webhook)."""
+    token = os.getenv("TELEGRAM_BOT_TOKEN")
+    if not token or token == "your_telegram_bot_token":
+        print("Error: TELEGRAM_BOT_TOKEN not found or not set in environment variables.")
+        exit(1)
+
+    application = build_application(token)
+    if os.getenv("BOT_MODE", "polling").lower() == "webhook":
+        print("Bot is serving webhooks...")
+        asyncio.run(run_webhook(application))
+    else:
+        print("Bot is polling...")
+        application.run_polling()
+
+
+if __name__ == '__main__':
+    main()
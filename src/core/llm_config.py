@@ -1,10 +1,37 @@
 """Shared LLM configuration using DeepSeek (OpenAI-compatible API)."""
 import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator
 from langchain_openai import ChatOpenAI
+from src.core.metrics import llm_inflight, llm_slot_wait_seconds
 
 DEEPSEEK_BASE_URL = "https://api.deepseek.com"
 DEEPSEEK_MODEL = "deepseek-chat"
 
+# Process-wide cap on concurrent LLM calls (LLM_MAX_CONCURRENCY, default 8)
+_llm_semaphore = threading.BoundedSemaphore(int(os.getenv("LLM_MAX_CONCURRENCY", "8")))
+
+
+@contextmanager
+def llm_slot() -> Iterator[None]:
+    """
+    Hold one of the LLM_MAX_CONCURRENCY slots for the duration of an LLM call.
+
+    Wrap every request-path chain.invoke that reaches the LLM, so bursts of queries
+    queue here instead of piling up on the API (and its rate limits).
+    """
+    started = time.perf_counter()
+    _llm_semaphore.acquire()
+    llm_slot_wait_seconds.observe(time.perf_counter() - started)
+    llm_inflight.inc()
+    try:
+        yield
+    finally:
+        llm_inflight.dec()
+        _llm_semaphore.release()
+
 
 def get_llm(
     temperature: float = 0,
@@ -1,6 +1,6 @@
 """Metrics collection for monitoring."""
 from prometheus_client import Counter, Histogram, Gauge
-from typing import Any, Optional, ContextManager
+from typing import Any, Literal, Optional, ContextManager
 import time
 
 # Query metrics
@@ -29,6 +29,104 @@ neo4j_queries = Counter(
     ['status']  # 'success' or 'error'
 )
 
+# Cypher statement metrics (labelled by statement fingerprint, see src.data.query_monitor)
+cypher_query_duration = Histogram(
+    'graphrag_cypher_query_duration_seconds',
+    'Cypher statement latency by fingerprint',
+    ['fingerprint', 'kind'],  # kind: 'read' or 'write'
+    buckets=[0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+)
+
+cypher_slow_queries = Counter(
+    'graphrag_cypher_slow_queries_total',
+    'Cypher statements slower than CYPHER_SLOW_QUERY_MS',
+    ['fingerprint']
+)
+
+cypher_profile_db_hits = Histogram(
+    'graphrag_cypher_profile_db_hits',
+    'Total db hits of sampled PROFILE plans',
+    ['fingerprint'],
+    buckets=[10, 100, 1000, 10000, 100000, 1000000]
+)
+
+cypher_guard_rejections = Counter(
+    'graphrag_cypher_guard_rejections_total',
+    'LLM-generated Cypher statements rejected by the cost guard',
+    ['reason']  # 'write', 'procedure', 'no_return', 'explain_error', 'plan_rows', 'plan_operators', 'timeout'
+)
+
+# Read-result cache metrics (see src.data.result_cache)
+result_cache_requests = Counter(
+    'graphrag_result_cache_requests_total',
+    'Cached read lookups',
+    ['result']  # 'hit' or 'miss'
+)
+
+result_cache_hit_ratio = Gauge(
+    'graphrag_result_cache_hit_ratio',
+    'Share of cached read lookups served from memory since start'
+)
+
+result_cache_bytes = Gauge(
+    'graphrag_result_cache_bytes',
+    'Estimated memory held by cached read results'
+)
+
+result_cache_entries = Gauge(
+    'graphrag_result_cache_entries',
+    'Number of cached read results'
+)
+
+result_cache_evictions = Counter(
+    'graphrag_result_cache_evictions_total',
+    'Cached read results evicted to stay within RESULT_CACHE_MAX_BYTES'
+)
+
+# Bot scheduler metrics (see src.bot.scheduler)
+scheduler_queue_depth = Gauge(
+    'graphrag_scheduler_queue_depth',
+    'Jobs waiting for a worker',
+    ['pool']  # 'queries' or 'ingestion'
+)
+
+scheduler_wait_seconds = Histogram(
+    'graphrag_scheduler_wait_seconds',
+    'Time a job waited for a worker',
+    ['pool'],
+    buckets=[0.01, 0.05, 0.1, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0]
+)
+
+scheduler_rejections = Counter(
+    'graphrag_scheduler_rejections_total',
+    'Jobs rejected because the pool queue was full',
+    ['pool']
+)
+
+llm_inflight = Gauge(
+    'graphrag_llm_inflight',
+    'LLM calls currently holding a concurrency slot'
+)
+
+llm_slot_wait_seconds = Histogram(
+    'graphrag_llm_slot_wait_seconds',
+    'Time spent waiting for an LLM concurrency slot',
+    buckets=[0.001, 0.01, 0.1, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0]
+)
+
+# Synthesis context metrics
+context_tokens = Histogram(
+    'graphrag_context_tokens',
+    'Estimated tokens of the packed synthesis context',
+    buckets=[100, 250, 500, 1000, 2000, 3000, 4000, 6000, 8000]
+)
+
+context_passages = Counter(
+    'graphrag_context_passages_total',
+    'Retrieved passages by packing outcome',
+    ['outcome']  # 'packed', 'duplicate', 'over_budget'
+)
+
 # System health metrics
 neo4j_connection_status = Gauge(
     'graphrag_neo4j_connection_status',
@@ -51,7 +149,7 @@ class QueryTimer(ContextManager):
         self.start_time = time.time()
         return self
     
-    def __exit__(self, exc_type: Optional[type], exc_val: Optional[Exception], exc_tb: Optional[Any]) -> bool:
+    def __exit__(self, exc_type: Optional[type], exc_val: Optional[BaseException], exc_tb: Optional[Any]) -> Literal[False]:
         if self.start_time:
             duration = time.time() - self.start_time
             query_duration.observe(duration)
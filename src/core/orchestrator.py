@@ -1,5 +1,6 @@
 from src.data.graph_rag import hybrid_retrieve, fallback_text_search, _is_weak_result
-from src.core.llm_config import get_llm
+from src.data.citations import cited_documents, resolve_citations
+from src.core.llm_config import get_llm, llm_slot
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
@@ -68,7 +69,8 @@ Do NOT ask the user for clarification. Make your best guess for a search query."
         ("human", "{question}")
     ])
     chain = prompt | llm | StrOutputParser()
-    return chain.invoke({"question": user_query})
+    with llm_slot():
+        return chain.invoke({"question": user_query})
 
 @retry(
     stop=stop_after_attempt(3),
@@ -106,7 +108,7 @@ Your responses MUST include:
    - How exchange rate differences are treated
    - Which accounts record exchange rate profit/loss
    - When exchange rate differences are recognized
-4. DATA STRUCTURE REVIEW: Always reference specific sections, paragraphs, or tables from the provided context
+4. DATA STRUCTURE REVIEW: Always reference specific sections, paragraphs, or tables from the provided context; passages start with a header like "[1] document, art. 12" that tells you their source
 5. STRUCTURED FORMAT for Telegram (use HTML tags):
    - Bold: <b>account codes</b>, <b>Debit:</b>, <b>Credit:</b>
    - Bullet lists: use "•" or "-" at line start, one item per line
@@ -123,7 +125,8 @@ If the context says 'I don't know' or is empty, politely inform the user you cou
         ("human", "{question}")
     ])
     chain = prompt | llm | StrOutputParser()
-    return chain.invoke({"question": user_query, "context": graph_result})
+    with llm_slot():
+        return chain.invoke({"question": user_query, "context": graph_result})
 
 def validate_query(user_query: str) -> tuple[bool, str]:
     """
@@ -174,20 +177,27 @@ def process_query(user_query: str) -> str:
     # Track metrics
     with QueryTimer():
         try:
-            # 1. Refine Query
-            refined_query = refine_query(user_query)
-            logger.info("query_refined", original=user_query, refined=refined_query)
-
-            # 2. Retrieve: hybrid (vector + CONTAINS) or Cypher chain
-            graph_result = hybrid_retrieve(refined_query, original_query=user_query)
-            logger.info("retrieve_completed", result_length=len(graph_result))
-
-            # 2b. Fallback: if result still weak, try CONTAINS with original query (raw Uzbek terms)
-            if _is_weak_result(graph_result):
-                graph_result = fallback_text_search(
-                    user_query, original_query=user_query
-                )
-                logger.info("fallback_used", original_query=user_query)
+            # 0. Article and chapter citations ("237-modda", "V bob") resolve by direct lookup
+            graph_result = resolve_citations(user_query)
+            if graph_result:
+                logger.info("citation_lookup_used", result_length=len(graph_result))
+            else:
+                # 1. Refine Query
+                refined_query = refine_query(user_query)
+                logger.info("query_refined", original=user_query, refined=refined_query)
+
+                # 2. Retrieve: hybrid (vector + CONTAINS) or Cypher chain; documents the question
+                # names ("21-son BHMS", "reg 3259", "Soliq kodeksi") are ranked first
+                documents = cited_documents(user_query)
+                graph_result = hybrid_retrieve(refined_query, original_query=user_query, documents=documents)
+                logger.info("retrieve_completed", result_length=len(graph_result))
+
+                # 2b. Fallback: if result still weak, try CONTAINS with original query (raw Uzbek terms)
+                if _is_weak_result(graph_result):
+                    graph_result = fallback_text_search(
+                        user_query, original_query=user_query, documents=documents
+                    )
+                    logger.info("fallback_used", original_query=user_query)
 
             # 3. Synthesize Answer
             final_answer = synthesize_response(user_query, graph_result)
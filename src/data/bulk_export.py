@@ -0,0 +1,265 @@
+"""
+Export source JSON to CSV files for `neo4j-admin database import full`.
+
+Produces the same graph as ingest_json_data (Document, Chunk, Citation and entity nodes
+with CONTAINS, MENTIONS and entity relationships) but as header-annotated CSV, so a full
+rebuild runs through the offline bulk importer instead of per-row Cypher MERGE.
+CHUNK_STORAGE applies as in ingestion (see src.data.chunk_store).
+See scripts/bulk_import_neo4j.sh for the offline import itself.
+
+Usage:
+  python -m src.data.bulk_export --output ./import [--with-embeddings]
+"""
+import argparse
+import csv
+import glob
+import json
+import os
+from typing import Any, Optional
+
+from src.core.logging_config import get_logger
+from src.data.chunk_store import layout_document, storage_mode
+from src.data.citations import index_document
+from src.data.document_utils import content_hash
+from src.data.entity_resolution import resolve_graph_data
+from src.data.ingestion import sanitize_label, sanitize_rel_type, validate_json_structure
+
+logger = get_logger(__name__)
+
+# neo4j-admin default array delimiter
+ARRAY_DELIMITER = ";"
+
+
+def _array_value(values: list[Any]) -> str:
+    """Encode a list as a neo4j-admin array field (delimiter stripped from items)."""
+    return ARRAY_DELIMITER.join(str(v).replace(ARRAY_DELIMITER, ",") for v in values)
+
+
+def _scalar_value(value: Any) -> str:
+    """Encode a scalar property; nested structures are stored as JSON strings."""
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+def export_csv(
+    json_dir: str,
+    output_dir: str,
+    embedding_cache: Optional[Any] = None,
+    embedding_model: Optional[str] = None,
+) -> dict[str, int]:
+    """
+    Convert every JSON file in json_dir to neo4j-admin import CSV files in output_dir.
+
+    Entity nodes share one ID space keyed by their id, as in Cypher ingestion where
+    relationships match endpoints by id alone; an id used with several types becomes
+    one node carrying all of those labels.
+
+    Args:
+        json_dir: Directory with ingestion JSON files.
+        output_dir: Directory for the CSV files (created if missing).
+        embedding_cache: Optional EmbeddingCache; cached vectors pre-populate Chunk.embedding
+            so the embedding pipeline has nothing left to do after import.
+        embedding_model: Model id (embedding_model_id) whose cached vectors are used.
+
+    Returns:
+        Row counts per CSV file.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    documents: list[list[str]] = []
+    chunks: list[list[Any]] = []
+    citations: list[list[Any]] = []
+    contains: list[list[str]] = []
+    mentions: set[tuple[str, str]] = set()
+    relationships: set[tuple[str, str, str]] = set()
+    entities: dict[str, dict[str, Any]] = {}
+    model = embedding_model or ""
+    offsets = storage_mode() == "offsets"
+
+    for file_path in sorted(glob.glob(os.path.join(json_dir, "*.json"))):
+        try:
+            with open(file_path, encoding="utf-8") as f:
+                data = json.load(f)
+        except json.JSONDecodeError as e:
+            logger.error("invalid_json", file=file_path, error=str(e))
+            continue
+        is_valid, error_message = validate_json_structure(data)
+        if not is_valid:
+            logger.error("json_validation_failed", file=file_path, error=error_message)
+            continue
+
+        metadata = data["metadata"]
+        file_name = metadata["file_name"]
+        graph_data = resolve_graph_data(data["graph_data"])
+        document_text, spans = layout_document(graph_data)
+        documents.append([
+            file_name,
+            _scalar_value(metadata.get("document_title")),
+            _scalar_value(metadata.get("reg_number")),
+            _scalar_value(metadata.get("date_signed")),
+            _scalar_value(metadata.get("authority")),
+            document_text if offsets else "",
+            "Document",
+        ])
+
+        citations.extend(
+            [row["id"], row["key"], row["chunk_id"], file_name, row["start"], row["end"], row["seq"], "Citation"]
+            for row in index_document(metadata, graph_data, spans)
+        )
+
+        vectors: dict[str, list[float]] = {}
+        if embedding_cache is not None and model:
+            vectors = embedding_cache.get_many(
+                model, {content_hash(c["original_text"]) for c in graph_data if c.get("original_text")}
+            )
+
+        for seq, (chunk, (start, end)) in enumerate(zip(graph_data, spans, strict=True)):
+            chunk_node_id = f"{file_name}_{chunk.get('chunk_id')}"
+            text = chunk.get("original_text") or ""
+            text_hash = content_hash(text) if text else ""
+            vector = vectors.get(text_hash)
+            chunks.append([
+                chunk_node_id,
+                "" if offsets else text,
+                text_hash,
+                file_name,
+                chunk.get("section", ""),
+                chunk.get("chapter", ""),
+                chunk.get("article", ""),
+                start,
+                end,
+                seq,
+                _array_value(vector) if vector else "",
+                text_hash if vector else "",
+                model if vector else "",
+                "Chunk",
+            ])
+            contains.append([file_name, chunk_node_id, "CONTAINS"])
+
+            for node in chunk.get("nodes", []):
+                node_id = str(node["id"])
+                entity = entities.setdefault(node_id, {"labels": [], "properties": {}})
+                label = sanitize_label(node.get("type", "Entity"))
+                if label not in entity["labels"]:
+                    entity["labels"].append(label)
+                for key, value in (node.get("properties") or {}).items():
+                    entity["properties"].setdefault(key, value)
+                mentions.add((chunk_node_id, node_id))
+
+            for rel in chunk.get("relationships", []):
+                relationships.add(
+                    (str(rel["source"]), str(rel["target"]), sanitize_rel_type(rel.get("type")))
+                )
+
+    # Relationship endpoints must exist in the entity ID space for the importer
+    dangling = {r for r in relationships if r[0] not in entities or r[1] not in entities}
+    relationships -= dangling
+
+    # Column type per property key: lists become string arrays, everything else strings
+    property_keys: dict[str, str] = {}
+    for entity in entities.values():
+        for key, value in entity["properties"].items():
+            safe_key = "".join(ch for ch in key if ch.isalnum() or ch == "_")
+            if safe_key and safe_key not in ("id", "LABEL"):
+                if isinstance(value, list) or property_keys.get(safe_key) == "string[]":
+                    property_keys[safe_key] = "string[]"
+                else:
+                    property_keys.setdefault(safe_key, "string")
+
+    def _write(name: str, header: list[str], rows: Any) -> int:
+        count = 0
+        with open(os.path.join(output_dir, name), "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            for row in rows:
+                writer.writerow(row)
+                count += 1
+        return count
+
+    counts = {
+        "documents.csv": _write(
+            "documents.csv",
+            ["file_name:ID(Document)", "title", "reg_number", "date_signed", "authority", "text", ":LABEL"],
+            documents,
+        ),
+        "chunks.csv": _write(
+            "chunks.csv",
+            ["id:ID(Chunk)", "text", "text_hash", "document_file", "section", "chapter", "article",
+             "start:int", "end:int", "seq:int", "embedding:float[]", "embedding_hash", "embedding_model", ":LABEL"],
+            chunks,
+        ),
+        "citations.csv": _write(
+            "citations.csv",
+            ["id:ID(Citation)", "key", "chunk_id", "document_file", "start:int", "end:int", "seq:int", ":LABEL"],
+            citations,
+        ),
+    }
+
+    def _entity_rows() -> Any:
+        for node_id, entity in entities.items():
+            props = {
+                "".join(ch for ch in k if ch.isalnum() or ch == "_"): v
+                for k, v in entity["properties"].items()
+            }
+            row = [node_id, ARRAY_DELIMITER.join(entity["labels"])]
+            for key, kind in property_keys.items():
+                value = props.get(key)
+                if kind == "string[]":
+                    row.append(_array_value(value if isinstance(value, list) else [value]) if value is not None else "")
+                else:
+                    row.append(_scalar_value(value))
+            yield row
+
+    counts["entities.csv"] = _write(
+        "entities.csv",
+        ["id:ID(Entity)", ":LABEL"]
+        + [f"{k}:string[]" if t == "string[]" else k for k, t in property_keys.items()],
+        _entity_rows(),
+    )
+    counts["contains.csv"] = _write(
+        "contains.csv", [":START_ID(Document)", ":END_ID(Chunk)", ":TYPE"], contains
+    )
+    counts["mentions.csv"] = _write(
+        "mentions.csv",
+        [":START_ID(Chunk)", ":END_ID(Entity)", ":TYPE"],
+        ([c, e, "MENTIONS"] for c, e in sorted(mentions)),
+    )
+    counts["relationships.csv"] = _write(
+        "relationships.csv",
+        [":START_ID(Entity)", ":END_ID(Entity)", ":TYPE"],
+        (list(r) for r in sorted(relationships)),
+    )
+    logger.info("bulk_export_complete", output_dir=output_dir, dangling_relationships=len(dangling), **{
+        k.replace(".csv", ""): v for k, v in counts.items()
+    })
+    return counts
+
+
+if __name__ == "__main__":
+    base_path = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Export source JSON to neo4j-admin import CSV.")
+    parser.add_argument("--json-dir", default=os.path.join(base_path, "source", "Json"))
+    parser.add_argument("--output", default="import", help="Output directory for CSV files")
+    parser.add_argument(
+        "--with-embeddings",
+        action="store_true",
+        help="Fill Chunk.embedding from the local embedding cache",
+    )
+    args = parser.parse_args()
+
+    cache, model = None, None
+    if args.with_embeddings:
+        from src.data.embeddings import EmbeddingCache, embedding_model_id, get_embedder
+
+        embedder = get_embedder()
+        if embedder is not None:
+            cache, model = EmbeddingCache(), embedding_model_id(embedder)
+    try:
+        result = export_csv(args.json_dir, args.output, embedding_cache=cache, embedding_model=model)
+    finally:
+        if cache is not None:
+            cache.close()
+    for name, count in result.items():
+        print(f"{name}: {count} rows")
@@ -0,0 +1,191 @@
+"""
+How chunk text is stored in the graph.
+
+Configuration (environment):
+  CHUNK_STORAGE  text (default): every Chunk keeps its text in c.text.
+                 offsets: the Document keeps the document text once in d.text. Chunks
+                 keep only c.start/c.end, and readers slice the text out (CHUNK_TEXT).
+
+Storing every chunk's text repeats the overlap between chunks, and Raw/ and Json/
+already hold the whole document. Offsets mode stores each character once, so the
+Neo4j store is smaller and fewer pages compete for the page cache.
+
+The chunk_text_index full-text index covers Chunk.text, so it is empty in offsets
+mode. Keyword search (fallback_text_search) then scans each Document text once and maps
+the hit offsets to chunks by start/end, instead of slicing and scanning every chunk.
+
+Chunks record start/end in both modes. merge_spans joins chunks of one document
+that overlap or touch into a single passage, so the overlap is shown once when
+neighbouring chunks are retrieved together.
+"""
+import os
+from typing import Any, Iterable, Optional
+
+# A chunk's text in either mode; needs c and its Document d bound
+CHUNK_TEXT = "coalesce(c.text, substring(d.text, c.start, c.end - c.start))"
+
+TEXT_SEARCH_CYPHER = """
+MATCH (c:Chunk)
+WHERE c.text IS NOT NULL AND toLower(c.text) CONTAINS toLower($keyword)
+RETURN c.text AS text, c.id AS id, c.document_file AS document, c.start AS start, c.end AS end,
+       c.article AS article, c.pagerank AS pagerank
+"""
+
+# Offsets mode: each Document text is lowered and searched once; the keyword's hit offsets
+# (from splitting on it) select the chunks whose span contains a hit, and only those are sliced
+SLICED_SEARCH_CYPHER = """
+MATCH (d:Document)
+WHERE d.text IS NOT NULL
+WITH d, toLower(d.text) AS lowered, toLower($keyword) AS keyword
+WHERE keyword <> "" AND lowered CONTAINS keyword
+WITH d, size(keyword) AS width, split(lowered, keyword) AS parts
+WITH d, width, reduce(acc = [0, []], part IN parts[..-1] |
+     [acc[0] + size(part) + width, acc[1] + [acc[0] + size(part)]])[1] AS hits
+MATCH (d)-[:CONTAINS]->(c:Chunk)
+WHERE any(hit IN hits WHERE c.start <= hit AND hit + width <= c.end)
+RETURN substring(d.text, c.start, c.end - c.start) AS text, c.id AS id, c.document_file AS document,
+       c.start AS start, c.end AS end, c.article AS article, c.pagerank AS pagerank
+"""
+
+# Neo4jVector retrieval_query (node and score are bound by the index call)
+VECTOR_RETRIEVAL_QUERY = """
+OPTIONAL MATCH (d:Document {file_name: node.document_file})
+RETURN coalesce(node.text, substring(d.text, node.start, node.end - node.start)) AS text, score,
+       {id: node.id, document: node.document_file, start: node.start, end: node.end, article: node.article,
+        pagerank: node.pagerank} AS metadata
+"""
+
+# Overlap between consecutive chunks without offsets is found by matching the previous
+# text's tail against the chunk's head; shorter matches are taken as coincidence
+MIN_OVERLAP = 20
+MAX_OVERLAP = 400
+
+# Passages of one document at most this many characters apart are joined; such a gap is
+# whitespace stripped from the chunk ends (chunks tile the text) and becomes a line break
+MERGE_GAP = 16
+
+
+def storage_mode() -> str:
+    """
+    Configured chunk storage mode.
+
+    Raises:
+        ValueError: If CHUNK_STORAGE is neither 'text' nor 'offsets'.
+    """
+    mode = os.getenv("CHUNK_STORAGE", "text").lower()
+    if mode not in ("text", "offsets"):
+        raise ValueError(f"Unknown CHUNK_STORAGE: {mode}")
+    return mode
+
+
+def search_cypher(limit: int = 5) -> str:
+    """
+    Keyword CONTAINS scan over chunk text for the configured storage mode.
+
+    The limit is written as a literal: some Neo4j versions reject a parameter in LIMIT.
+    """
+    base = SLICED_SEARCH_CYPHER if storage_mode() == "offsets" else TEXT_SEARCH_CYPHER
+    return f"{base}LIMIT {int(limit)}\n"
+
+
+def _overlap(tail: str, text: str) -> int:
+    for size in range(min(len(tail), len(text), MAX_OVERLAP), MIN_OVERLAP - 1, -1):
+        if tail.endswith(text[:size]):
+            return size
+    return 0
+
+
+def layout_document(graph_data: list[dict[str, Any]]) -> tuple[str, list[tuple[int, int]]]:
+    """
+    Canonical document text and each chunk's (start, end) span in it.
+
+    Chunks with start/end offsets (src.data.chunking) are placed at their offsets, with
+    line breaks in the gaps (the whitespace the chunker stripped). Chunks without offsets (older JSON) are laid end to end: the
+    overlap with the text so far is dropped, and otherwise a blank line separates them.
+    Every span satisfies text[start:end] == original_text.
+    """
+    parts: list[str] = []
+    length = 0
+    tail = ""
+    spans: list[tuple[int, int]] = []
+    for chunk in graph_data:
+        text = chunk.get("original_text") or ""
+        start = chunk.get("start")
+        if isinstance(start, int) and start >= length:
+            addition = "\n" * (start - length) + text
+        elif isinstance(start, int) and length - start <= len(tail) and text.startswith(tail[len(tail) - (length - start):]):
+            addition = text[length - start:]
+        else:
+            size = _overlap(tail, text)
+            if size:
+                start = length - size
+                addition = text[size:]
+            else:
+                separator = "\n\n" if length else ""
+                start = length + len(separator)
+                addition = separator + text
+        parts.append(addition)
+        length += len(addition)
+        tail = (tail + addition)[-MAX_OVERLAP:]
+        spans.append((start, start + len(text)))
+    return "".join(parts), spans
+
+
+def merge_spans(rows: Iterable[dict[str, Any]]) -> list[dict[str, Any]]:
+    """
+    Join retrieved chunks of the same document whose spans overlap or touch.
+
+    Args:
+        rows: Dicts with 'text' and, when known, 'document', 'start', 'end' and 'article'.
+
+    Returns:
+        Passages in first-retrieved order, each overlap stated once: dicts with text,
+        document, start, end, articles (distinct article numbers, in text order) and
+        focus, the (start, end) of the passage's first-retrieved chunk within its text.
+    """
+    passages: list[dict[str, Any]] = []
+    for row in rows:
+        text = row.get("text")
+        if not text:
+            continue
+        document, start, end = row.get("document"), row.get("start"), row.get("end")
+        article = row.get("article")
+        target: Optional[dict[str, Any]] = None
+        if document is not None and isinstance(start, int) and isinstance(end, int):
+            target = next(
+                (
+                    p for p in passages
+                    if p["document"] == document and start <= p["end"] + MERGE_GAP and end + MERGE_GAP >= p["start"]
+                ),
+                None,
+            )
+        if target is None:
+            if all(p["text"] != text for p in passages):
+                passages.append({
+                    "text": text, "document": document, "start": start, "end": end,
+                    "articles": [article] if article else [], "focus": (0, len(text)),
+                })
+            continue
+        if article and article not in target["articles"]:
+            target["articles"].insert(0 if start < target["start"] else len(target["articles"]), article)
+        if start >= target["start"] and end <= target["end"]:
+            continue
+        focus_start, focus_end = target["focus"]
+        if start <= target["start"] and end >= target["end"]:
+            shift = target["start"] - start
+            target.update(start=start, end=end, text=text, focus=(focus_start + shift, focus_end + shift))
+        elif start > target["start"]:
+            joiner = "\n" if start > target["end"] else ""
+            target["text"] += joiner + text[max(0, target["end"] - start):]
+            target["end"] = end
+        else:
+            joiner = "\n" if end < target["start"] else ""
+            merged = text + joiner + target["text"][max(0, end - target["start"]):]
+            shift = len(merged) - len(target["text"])
+            target.update(start=start, text=merged, focus=(focus_start + shift, focus_end + shift))
+    return passages
+
+
+def merge_passages(rows: Iterable[dict[str, Any]]) -> list[str]:
+    """Texts of merge_spans(rows)."""
+    return [p["text"] for p in merge_spans(rows)]
@@ -0,0 +1,248 @@
+"""
+Structure-aware chunking of legal and accounting documents.
+
+The chunker makes one linear pass over the text. A single regex finds structural
+boundaries, which split the text into segments:
+  - parts: "I қисм", "II BOʻLIM", "Муқаддима"
+  - chapters: "1-bob", "II боб"
+  - articles: "17-modda", "26 1-modda" (article 26¹)
+  - numbered postings and clauses at the start of a line: "13 Номоддий ...", "2. Mazkur ..."
+
+Segments are packed greedily into chunks of at most max_chunk_size characters:
+  - Several short articles share a chunk.
+  - A new part or chapter always starts a new chunk, unless the current chunk holds
+    only headings.
+  - Only a segment longer than the budget is cut inside (at a paragraph or sentence
+    break, with chunk_overlap characters of overlap).
+
+Each chunk records the section, chapter and article in force where it starts, and its
+start/end character offsets in the document text.
+
+Text can be fed in pieces (iter_structured_chunks). Chunks are emitted as soon as they
+are complete, and only the open chunk is buffered.
+"""
+import re
+from typing import Iterable, Iterator, Optional
+
+# Structural boundaries; keywords match in any case, posting text must start in upper case.
+# Every boundary starts a word with a digit, a Roman numeral, "m" (muqaddima) or
+# posting indentation; checking that first keeps the scan fast.
+BOUNDARY_PATTERN = re.compile(
+    r"(?<!\S)(?=[\dIVXLCMmМм \t])(?:"
+    r"(?P<part>(?:[IVXLC]+|\d+)\s?-?\s?(?i:qism|қисм|bo[ʻʼ'‘’`]?lim|бўлим)\.|(?i:муқаддима|muqaddima)(?!\w))"
+    r"|(?P<chapter>(?:[IVXLC]+|\d+)\s?-?\s?(?i:bob|боб)\.)"
+    r"|(?P<article>(?P<article_no>\d+)(?:\s(?P<article_sup>\d{1,2}))?\s?-\s?(?i:modda|модда)\.)"
+    r"|(?P<posting>(?m:^)[ \t]{0,16}\d{1,3}(?:\.\d{1,3})*\.?[ \t]+(?=[A-ZА-ЯЁЎҚҒҲ«\"“]))"
+    r")"
+)
+
+# Boundaries that close the current chunk (once it holds more than headings)
+HARD_BOUNDARIES = ("part", "chapter")
+
+# Characters kept unscanned at the end of the buffer, so a boundary split across two
+# pieces is matched once both are buffered
+_SCAN_GUARD = 64
+
+# Where an oversized segment is cut, in order of preference
+_BREAKS = ("\n\n", ". ", "; ", "\n", " ")
+
+_SUPERSCRIPT = str.maketrans("0123456789", "⁰¹²³⁴⁵⁶⁷⁸⁹")
+
+DEFAULT_SECTION = "Unknown"
+DEFAULT_CHAPTER = "Unknown"
+
+
+def _heading_label(marker: str) -> str:
+    return " ".join(marker.rstrip(".").split())
+
+
+def article_number(match: re.Match) -> str:
+    """Article number of an article boundary match, e.g. '17' or '26¹'."""
+    number: str = match.group("article_no")
+    sup: Optional[str] = match.group("article_sup")
+    return number + sup.translate(_SUPERSCRIPT) if sup else number
+
+
+class StructuredChunker:
+    """Incremental structure-aware chunker; see the module docstring."""
+
+    def __init__(self, max_chunk_size: int = 800, chunk_overlap: int = 150):
+        """
+        Args:
+            max_chunk_size: Size budget of a chunk in characters.
+            chunk_overlap: Overlap between the pieces of a segment longer than the budget.
+        """
+        self.max_chunk_size = max_chunk_size
+        self.chunk_overlap = chunk_overlap
+        self._buffer = ""
+        self._base = 0  # document offset of _buffer[0]
+        self._scan = 0  # document offset up to which boundaries have been matched
+        self._state = {"section": DEFAULT_SECTION, "chapter": DEFAULT_CHAPTER, "article": ""}
+        # Open segment
+        self._seg_start = 0
+        self._seg_kind = "text"
+        self._seg_state = dict(self._state)
+        # Open chunk
+        self._chunk_start: Optional[int] = None
+        self._chunk_end = 0
+        self._chunk_state: dict = {}
+        self._chunk_has_body = False
+        self._count = 0
+
+    def feed(self, text: str) -> Iterator[dict]:
+        """Add text; yield the chunks it completes."""
+        self._buffer += text
+        limit = self._base + len(self._buffer) - _SCAN_GUARD
+        yield from self._process(limit)
+
+    def close(self) -> Iterator[dict]:
+        """Finish the document; yield the remaining chunks."""
+        end = self._base + len(self._buffer)
+        yield from self._process(end)
+        yield from self._add_segment(end)
+        yield from self._flush()
+
+    def _process(self, limit: int) -> Iterator[dict]:
+        if limit <= self._scan:
+            return
+        for match in BOUNDARY_PATTERN.finditer(self._buffer, self._scan - self._base):
+            position = self._base + match.start()
+            if position >= limit:
+                break
+            self._scan = self._base + match.end()
+            if position > self._seg_start:
+                yield from self._add_segment(position)
+                if match.lastgroup in HARD_BOUNDARIES and self._chunk_has_body:
+                    yield from self._flush()
+            self._enter(match, position)
+        self._scan = max(self._scan, limit)
+        # Bound the buffer when a segment runs on without boundaries
+        if limit - self._seg_start > 2 * self.max_chunk_size:
+            yield from self._close_chunk()
+            yield from self._cut_segment(limit, keep=self.max_chunk_size)
+        self._trim()
+
+    def _enter(self, match: re.Match, position: int) -> None:
+        kind = match.lastgroup
+        if kind == "part":
+            self._state = {"section": _heading_label(match.group(0)), "chapter": DEFAULT_CHAPTER, "article": ""}
+        elif kind == "chapter":
+            self._state = {**self._state, "chapter": _heading_label(match.group(0)), "article": ""}
+        elif kind == "article":
+            self._state = {**self._state, "article": article_number(match)}
+        self._seg_start = position
+        self._seg_kind = kind or "text"
+        self._seg_state = dict(self._state)
+
+    def _add_segment(self, end: int) -> Iterator[dict]:
+        """Add the open segment [seg_start, end) to the open chunk."""
+        start = self._seg_start
+        if end <= start:
+            return
+        if self._chunk_start is not None and end - self._chunk_start > self.max_chunk_size:
+            yield from self._close_chunk()
+        if self._chunk_start is None:
+            yield from self._cut_segment(end, keep=0)
+            self._chunk_start = self._seg_start
+            self._chunk_state = dict(self._seg_state)
+        else:
+            # Fill in what the chunk's start did not know yet (e.g. a heading before the first article)
+            for key, value in self._seg_state.items():
+                if self._chunk_state[key] in ("", DEFAULT_SECTION) and value not in ("", DEFAULT_SECTION):
+                    self._chunk_state[key] = value
+        is_heading = self._seg_kind in HARD_BOUNDARIES and end - start < self.max_chunk_size // 4
+        self._chunk_has_body = self._chunk_has_body or not is_heading
+        self._chunk_end = end
+        self._seg_start = end
+
+    def _close_chunk(self) -> Iterator[dict]:
+        """Make room for an open segment that does not fit the open chunk."""
+        if self._chunk_start is None:
+            return
+        if self._chunk_has_body:
+            yield from self._flush()
+        else:
+            # Headings only: keep them with the start of the segment that follows
+            self._seg_start, self._chunk_start = self._chunk_start, None
+
+    def _cut_segment(self, end: int, keep: int) -> Iterator[dict]:
+        """Emit budget-sized pieces of the open segment until at most max_chunk_size + keep characters remain."""
+        while end - self._seg_start > self.max_chunk_size + keep:
+            start = self._seg_start
+            cut = self._break_before(start, start + self.max_chunk_size)
+            chunk = self._make_chunk(start, cut, self._seg_state)
+            if chunk is not None:
+                yield chunk
+            self._seg_start = cut - self.chunk_overlap if cut - self.chunk_overlap > start else cut
+            self._seg_kind = "text"
+
+    def _break_before(self, start: int, end: int) -> int:
+        """
+        Document offset just after the last paragraph, sentence, clause or word break in
+        the second part of [start, end] (so a heading is not cut off alone), else end.
+        """
+        buffer, base = self._buffer, self._base
+        earliest = start + self.max_chunk_size // 4 - base
+        for separator in _BREAKS:
+            found = buffer.rfind(separator, earliest, end - base + 1)
+            if found >= 0:
+                return found + base + len(separator)
+        return end
+
+    def _flush(self) -> Iterator[dict]:
+        if self._chunk_start is None:
+            return
+        chunk = self._make_chunk(self._chunk_start, self._chunk_end, self._chunk_state)
+        self._chunk_start = None
+        self._chunk_has_body = False
+        if chunk is not None:
+            yield chunk
+
+    def _make_chunk(self, start: int, end: int, state: dict) -> Optional[dict]:
+        raw = self._buffer[start - self._base:end - self._base]
+        text = raw.strip()
+        if not text:
+            return None
+        offset = start + len(raw) - len(raw.lstrip())
+        chunk = {
+            "chunk_id": str(self._count),
+            "original_text": text,
+            "section": state["section"],
+            "chapter": state["chapter"],
+            "article": state["article"],
+            "start": offset,
+            "end": offset + len(text),
+            "nodes": [],
+            "relationships": [],
+        }
+        self._count += 1
+        return chunk
+
+    def _trim(self) -> None:
+        keep_from = min(self._seg_start, self._chunk_start if self._chunk_start is not None else self._seg_start)
+        if keep_from - self._base > 1 << 16:
+            self._buffer = self._buffer[keep_from - self._base:]
+            self._base = keep_from
+
+
+def iter_structured_chunks(
+    pieces: Iterable[str],
+    max_chunk_size: int = 800,
+    chunk_overlap: int = 150,
+) -> Iterator[dict]:
+    """
+    Chunk a document arriving in pieces.
+
+    Yields:
+        Dicts with chunk_id, original_text, section, chapter, article, start, end, nodes
+        and relationships; start/end are offsets into the concatenated text.
+    """
+    chunker = StructuredChunker(max_chunk_size=max_chunk_size, chunk_overlap=chunk_overlap)
+    for piece in pieces:
+        yield from chunker.feed(piece)
+    yield from chunker.close()
+
+
+def chunk_document(text: str, max_chunk_size: int = 800, chunk_overlap: int = 150) -> list[dict]:
+    """Chunk a whole document; see iter_structured_chunks."""
+    return list(iter_structured_chunks([text], max_chunk_size=max_chunk_size, chunk_overlap=chunk_overlap))
@@ -0,0 +1,417 @@
+"""
+Citation index: direct lookup of articles, chapters, BHMS standards and registration numbers.
+
+Questions such as "Soliq kodeksi 237-modda", "21-son BHMS" or "adliya reg 3259" name
+exact identifiers. They do not need the LLM Cypher chain or keyword scans:
+  - At ingestion, index_document walks a document's chunks in order and records where
+    each article and chapter ("237-modda.", "V боб.", found with the chunker's
+    BOUNDARY_PATTERN) runs, as document offsets per chunk. Document-level citations
+    (the BHMS number in the title, metadata.reg_number, a code name such as "Soliq
+    kodeksi") are recorded once per document, without a chunk. Entries are stored as
+    Citation nodes (key, chunk_id, document_file, start, end, seq).
+  - CitationIndex keeps all entries in an in-process dict keyed by citation key,
+    loaded in one statement and reloaded after ingestion (mark_stale) or after
+    CITATION_INDEX_MAX_AGE seconds.
+  - resolve_citations parses a question (Uzbek Latin or Cyrillic, Russian, English;
+    Cyrillic is transliterated first), looks the article and chapter keys up in the
+    dict and fetches the cited chunks by id in one statement. Only the cited part of
+    each chunk is kept, so an article split across chunks is merged back into one
+    passage by pack_context.
+  - cited_documents returns the documents a question names by BHMS number,
+    registration number or code. Such a question is not answered from the citation
+    index; hybrid retrieval ranks the candidates of those documents first.
+
+Article and chapter citations are scoped by the document-level citations in the same
+question. Unscoped article numbers found in several documents are ambiguous and left
+to normal retrieval.
+
+Configuration (environment):
+  CITATION_MAX_CHUNKS     Chunks returned for one question (default 8; 0 disables direct lookup)
+  CITATION_INDEX_MAX_AGE  Seconds before the in-process index is reloaded (default 600; 0 never)
+"""
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from src.core.logging_config import get_logger
+from src.data.chunking import BOUNDARY_PATTERN, article_number
+from src.data.context_packer import pack_context
+from src.data.document_utils import to_latin
+from src.data.graph_expansion import FETCH_CHUNKS_CYPHER
+
+logger = get_logger(__name__)
+
+# Citation kinds; document-level kinds cover whole documents and scope the others
+DOCUMENT_KINDS = ("bhms", "reg", "code")
+SPAN_KINDS = ("article", "chapter")
+
+# Code names, matched in transliterated lowercase titles and questions
+CODE_ALIASES = {
+    "soliq": re.compile(r"soliq kodeks|nalogov\w* kodeks|tax code"),
+    "mehnat": re.compile(r"mehnat kodeks|trudov\w* kodeks|labou?r code"),
+    "fuqarolik": re.compile(r"fuqarolik kodeks|grajdansk\w* kodeks|civil code"),
+}
+
+_SUPERSCRIPT_DIGITS = str.maketrans("⁰¹²³⁴⁵⁶⁷⁸⁹", "0123456789")
+_TO_SUPERSCRIPT = str.maketrans("0123456789", "⁰¹²³⁴⁵⁶⁷⁸⁹")
+_ROMAN = {"i": 1, "v": 5, "x": 10, "l": 50, "c": 100}
+
+# Question patterns, applied to transliterated lowercase text
+_ARTICLE = re.compile(
+    r"\b(\d+)([⁰¹²³⁴⁵⁶⁷⁸⁹]*)\s?-?\s?modda|\b(?:statya|stat'ya|st\.|article|art\.)\s?(\d+)([⁰¹²³⁴⁵⁶⁷⁸⁹]*)"
+)
+_CHAPTER = re.compile(r"\b(\d+|[ivxlc]+)\s?-?\s?bob\b|\b(?:glava|chapter)\s?(\d+|[ivxlc]+)\b")
+_BHMS = re.compile(
+    r"\b(\d+)\s?-?\s?son(?:li)?\)?\s?(?:bhms|bxms|standart)|\b(?:bhms|bxms|nsbu)\s?(?:№|no\.?)?\s?(\d+)\b"
+)
+_REG = re.compile(
+    r"\b(?:adliya\s)?(?:reg(?:istration)?\.?|ro'yxat(?:ga olish)? raqami|registratsionniy nomer)\s?"
+    r"(?:№|no\.?|#|:)?\s?([a-z]{0,4}-?\d+)\b"
+)
+# Number of a chapter heading: "V боб." / "1-bob."
+_HEADING_NUMBER = re.compile(r"[IVXLC]+|\d+")
+# BHMS number in a document title: "Ijara hisobi (6-sonli BHMS)"
+_TITLE_BHMS = re.compile(r"(\d+)\s?-?\s?son(?:li)?\)?\s?(?:bhms|bxms)")
+
+LOAD_CITATIONS_CYPHER = """
+MATCH (k:Citation)
+RETURN k.key AS key, k.chunk_id AS chunk_id, k.document_file AS document, k.start AS start, k.end AS end,
+       k.seq AS seq
+"""
+
+WRITE_CITATIONS_CYPHER = """
+UNWIND $rows AS row
+MERGE (k:Citation {id: row.id})
+SET k.key = row.key, k.chunk_id = row.chunk_id, k.document_file = row.document_file, k.start = row.start,
+    k.end = row.end, k.seq = row.seq
+"""
+
+DELETE_STALE_CITATIONS_CYPHER = """
+MATCH (k:Citation {document_file: $file_name})
+WHERE NOT k.id IN $ids
+DETACH DELETE k
+"""
+
+
+@dataclass(frozen=True)
+class Citation:
+    """A parsed citation, e.g. Citation('article', '237')."""
+
+    kind: str
+    value: str
+
+    @property
+    def key(self) -> str:
+        return f"{self.kind}:{self.value}"
+
+
+def _roman_or_int(value: str) -> Optional[str]:
+    """'5' -> '5', 'V' -> '5', anything else -> None."""
+    if value.isdigit():
+        return str(int(value))
+    total = 0
+    previous = 0
+    for char in reversed(value.lower()):
+        number = _ROMAN.get(char)
+        if number is None:
+            return None
+        total = total - number if number < previous else total + number
+        previous = max(previous, number)
+    return str(total) if total else None
+
+
+def _article_value(number: str, sup: str = "") -> str:
+    return f"{int(number)}{sup.translate(_SUPERSCRIPT_DIGITS).translate(_TO_SUPERSCRIPT)}"
+
+
+def parse_citations(text: str) -> list[Citation]:
+    """
+    Citations named in a question, in order of appearance kind by kind.
+
+    Examples: "237-modda" / "237-модда" / "статья 237" -> article 237; "V боб" -> chapter 5;
+    "21-сонли БҲМС" / "BHMS 21" -> bhms 21; "adliya reg 3259" / "рўйхат рақами 3259" ->
+    reg 3259; "Soliq kodeksi" / "Налоговый кодекс" -> code soliq.
+    """
+    lowered = to_latin(text.lower())
+    found: list[Citation] = []
+
+    def add(kind: str, value: Optional[str]) -> None:
+        citation = Citation(kind, value) if value else None
+        if citation and citation not in found:
+            found.append(citation)
+
+    for m in _ARTICLE.finditer(lowered):
+        number, sup = (m.group(1), m.group(2)) if m.group(1) else (m.group(3), m.group(4))
+        add("article", _article_value(number, sup))
+    for m in _CHAPTER.finditer(lowered):
+        add("chapter", _roman_or_int(m.group(1) or m.group(2)))
+    for m in _BHMS.finditer(lowered):
+        add("bhms", str(int(m.group(1) or m.group(2))))
+    for m in _REG.finditer(lowered):
+        add("reg", m.group(1).upper())
+    for name, pattern in CODE_ALIASES.items():
+        if pattern.search(lowered):
+            add("code", name)
+    return found
+
+
+def document_citations(metadata: dict[str, Any]) -> list[Citation]:
+    """Document-level citations of a document: its BHMS number, registration number and code name."""
+    title = to_latin(str(metadata.get("document_title") or "").lower())
+    citations = [Citation("bhms", str(int(m.group(1)))) for m in _TITLE_BHMS.finditer(title)]
+    reg_number = str(metadata.get("reg_number") or "").strip()
+    if reg_number:
+        citations.append(Citation("reg", reg_number.upper()))
+    citations.extend(Citation("code", name) for name, pattern in CODE_ALIASES.items() if pattern.search(title))
+    return list(dict.fromkeys(citations))
+
+
+def index_document(
+    metadata: dict[str, Any],
+    graph_data: list[dict[str, Any]],
+    spans: list[tuple[int, int]],
+) -> list[dict[str, Any]]:
+    """
+    Citation entries of one document, as rows for WRITE_CITATIONS_CYPHER.
+
+    Args:
+        metadata: Document metadata with 'file_name'.
+        graph_data: Chunks in document order, with chunk_id and original_text.
+        spans: Each chunk's (start, end) in the document text (chunk_store.layout_document).
+
+    Returns:
+        One row per (article or chapter, chunk): id, key, chunk_id, document_file, start,
+        end, seq; start/end delimit the cited part of the chunk in document offsets. Plus
+        one row per document-level citation, with chunk_id, start, end and seq None.
+    """
+    file_name = metadata.get("file_name")
+    rows: dict[tuple[str, str], dict[str, Any]] = {
+        (c.key, ""): {
+            "id": f"{file_name}|{c.key}", "key": c.key, "chunk_id": None,
+            "document_file": file_name, "start": None, "end": None, "seq": None,
+        }
+        for c in document_citations(metadata)
+    }
+
+    def cite(key: str, chunk_id: str, seq: int, start: int, end: int) -> None:
+        row = rows.get((key, chunk_id))
+        if row is None:
+            rows[(key, chunk_id)] = {
+                "id": f"{chunk_id}|{key}", "key": key, "chunk_id": chunk_id,
+                "document_file": file_name, "start": start, "end": end, "seq": seq,
+            }
+        else:
+            row["start"], row["end"] = min(row["start"], start), max(row["end"], end)
+
+    state: dict[str, Optional[str]] = {"chapter": None, "article": None}
+    for seq, (chunk, (start, _)) in enumerate(zip(graph_data, spans, strict=True)):
+        chunk_id = f"{file_name}_{chunk.get('chunk_id')}"
+        text = chunk.get("original_text") or ""
+
+        # Regions between headings belong to the article/chapter in force
+        position = 0
+        for m in BOUNDARY_PATTERN.finditer(text):
+            kind = next((k for k in ("part", "chapter", "article") if m.group(k)), None)
+            if kind is None:
+                continue
+            for span_kind in SPAN_KINDS:
+                if state[span_kind] and m.start() > position:
+                    cite(f"{span_kind}:{state[span_kind]}", chunk_id, seq, start + position, start + m.start())
+            position = m.start()
+            if kind == "part":
+                state = {"chapter": None, "article": None}
+            elif kind == "chapter":
+                number = _HEADING_NUMBER.match(m.group("chapter"))
+                state = {"chapter": _roman_or_int(number.group(0)) if number else None, "article": None}
+            else:
+                state = {**state, "article": article_number(m)}
+        for span_kind in SPAN_KINDS:
+            if state[span_kind] and len(text) > position:
+                cite(f"{span_kind}:{state[span_kind]}", chunk_id, seq, start + position, start + len(text))
+    return list(rows.values())
+
+
+class CitationIndex:
+    """In-process citation key -> entries map over the stored Citation nodes."""
+
+    def __init__(self, client: Any = None, max_age: Optional[float] = None):
+        """
+        Args:
+            client: Graph client with read(cypher, params, timeout=...). Defaults to
+                get_graph_client() on first load.
+            max_age: Seconds after which the index is reloaded even without a local write
+                (CITATION_INDEX_MAX_AGE, default 600; 0 disables).
+        """
+        self._client = client
+        self.max_age = float(os.getenv("CITATION_INDEX_MAX_AGE", "600")) if max_age is None else max_age
+        self._entries: dict[str, list[dict[str, Any]]] = {}
+        self._loaded_at = 0.0
+        self._stale = True
+        self._lock = threading.Lock()
+
+    @property
+    def client(self) -> Any:
+        if self._client is None:
+            from src.data.neo4j_driver import get_graph_client
+
+            self._client = get_graph_client()
+        return self._client
+
+    def mark_stale(self) -> None:
+        """Schedule a reload before the next lookup (call after ingestion)."""
+        self._stale = True
+
+    def _needs_reload(self) -> bool:
+        if self._stale:
+            return True
+        return bool(self.max_age) and time.monotonic() - self._loaded_at > self.max_age
+
+    def entries(self) -> dict[str, list[dict[str, Any]]]:
+        """Citation key -> entries (chunk_id, document, start, end, seq), reloading if stale."""
+        if self._needs_reload():
+            with self._lock:
+                if self._needs_reload():
+                    self._stale = False
+                    try:
+                        rows = self.client.read(LOAD_CITATIONS_CYPHER)
+                    except Exception:
+                        self._stale = True
+                        raise
+                    entries: dict[str, list[dict[str, Any]]] = defaultdict(list)
+                    for row in rows:
+                        entries[row["key"]].append(dict(row))
+                    for items in entries.values():
+                        items.sort(key=lambda e: (e.get("document") or "", e.get("seq") or 0))
+                    self._entries = dict(entries)
+                    self._loaded_at = time.monotonic()
+                    logger.info("citation_index_loaded", keys=len(self._entries), entries=len(rows))
+        return self._entries
+
+    def documents(self, citations: list[Citation]) -> Optional[set[str]]:
+        """
+        Documents matching every document-level citation, or None when there is none.
+        """
+        entries = self.entries()
+        scope: Optional[set[str]] = None
+        for citation in citations:
+            if citation.kind in DOCUMENT_KINDS:
+                documents = {e["document"] for e in entries.get(citation.key, ())}
+                scope = documents if scope is None else scope & documents
+        return scope
+
+    def lookup(self, citations: list[Citation]) -> list[dict[str, Any]]:
+        """
+        Article or chapter entries cited by a question, in document order.
+
+        Article citations are used when present, else chapter citations, each scoped to
+        the documents of the document-level citations. Without a scope they must all fall
+        in one document. Document-level citations alone return nothing (see
+        cited_documents).
+        """
+        entries = self.entries()
+        scope = self.documents(citations)
+        for kind in SPAN_KINDS:
+            keys = [c.key for c in citations if c.kind == kind]
+            if not keys:
+                continue
+            found = [e for key in keys for e in entries.get(key, ()) if scope is None or e["document"] in scope]
+            if scope is None and len({e["document"] for e in found}) > 1:
+                logger.info("citation_ambiguous", keys=keys, documents=len({e["document"] for e in found}))
+                return []
+            return found
+        return []
+
+
+def citation_max_chunks() -> int:
+    """Configured number of chunks a citation lookup returns (0 disables it)."""
+    return int(os.getenv("CITATION_MAX_CHUNKS", "8"))
+
+
+def resolve_citations(question: str, index: Optional["CitationIndex"] = None, max_chunks: Optional[int] = None) -> str:
+    """
+    Context for a question that cites articles, chapters, standards or registrations.
+
+    Args:
+        question: The user's question, in any script.
+        index: Citation index (default get_citation_index()).
+        max_chunks: Chunks returned (default CITATION_MAX_CHUNKS; 0 disables).
+
+    Returns:
+        Packed context of the cited passages, or "" when the question cites no article or
+        chapter that resolves (the caller then retrieves as usual).
+    """
+    max_chunks = citation_max_chunks() if max_chunks is None else max_chunks
+    citations = parse_citations(question)
+    if max_chunks <= 0 or not any(c.kind in SPAN_KINDS for c in citations):
+        return ""
+    index = index or get_citation_index()
+    try:
+        cited = index.lookup(citations)[:max_chunks]
+        if not cited:
+            return ""
+        fetched = {
+            r["id"]: r for r in index.client.read(FETCH_CHUNKS_CYPHER, {"ids": [e["chunk_id"] for e in cited]})
+        }
+    except Exception as e:
+        logger.warning("citation_lookup_error", error=str(e))
+        return ""
+
+    rows: list[dict[str, Any]] = []
+    for entry in cited:
+        chunk = fetched.get(entry["chunk_id"])
+        if not chunk or not chunk.get("text"):
+            continue
+        text, start, end = chunk["text"], entry["start"], entry["end"]
+        if chunk.get("start") is not None and start is not None and end is not None:
+            text = text[start - chunk["start"]:end - chunk["start"]]
+        else:
+            start, end = chunk.get("start"), chunk.get("end")
+        kind, _, value = entry["key"].partition(":")
+        article = value if kind == "article" else chunk.get("article")
+        rows.append({**dict(chunk), "text": text, "start": start, "end": end, "article": article})
+    packed = pack_context(rows)
+    logger.info("citation_resolved", citations=[c.key for c in citations], chunks=len(rows), spans=packed.spans)
+    return packed.text
+
+
+def cited_documents(question: str, index: Optional["CitationIndex"] = None) -> Optional[set[str]]:
+    """
+    Documents a question names by BHMS number, registration number or code name.
+
+    Args:
+        question: The user's question, in any script.
+        index: Citation index (default get_citation_index()).
+
+    Returns:
+        File names of the matching documents for hybrid retrieval to rank first, or None
+        when the question names no document or the lookup fails.
+    """
+    citations = [c for c in parse_citations(question) if c.kind in DOCUMENT_KINDS]
+    if not citations:
+        return None
+    index = index or get_citation_index()
+    try:
+        documents = index.documents(citations)
+    except Exception as e:
+        logger.warning("citation_lookup_error", error=str(e))
+        return None
+    logger.info("citation_documents", citations=[c.key for c in citations], documents=len(documents or ()))
+    return documents or None
+
+
+_index_instance: Optional[CitationIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_citation_index() -> CitationIndex:
+    """Return the process-wide citation index."""
+    global _index_instance
+    if _index_instance is None:
+        with _index_lock:
+            if _index_instance is None:
+                _index_instance = CitationIndex()
+    return _index_instance
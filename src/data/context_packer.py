@@ -0,0 +1,242 @@
+"""
+Packing retrieved chunks into the synthesis context.
+
+Retrieval rows (vector hits and CONTAINS matches, best first) are turned into the
+context string passed to synthesize_response:
+  1. Chunks of one document that overlap or touch are merged into one span, so an
+     overlap is sent once (chunk_store.merge_spans).
+  2. Near-duplicates are dropped: a span whose word 3-grams are mostly covered by an
+     already packed span (the same article in two documents, a repeated preamble) adds
+     little to the answer.
+  3. Spans are added in relevance order while they fit the token budget; a span that
+     does not fit is skipped and smaller ones after it can still be packed. The top span
+     is cut to the budget rather than dropped, so the context is never empty; the cut
+     keeps the window around its best-ranked chunk, not the head of a merged span.
+  4. Expansion rows (graph-neighbourhood chunks, src.data.graph_expansion) come after
+     every ranked span. They never merge into a ranked span: only the part of a chunk
+     not already packed is added, as a span of its own capped at EXPANSION_SPAN_TOKENS.
+
+Each span is preceded by a compact citation header: "[n] document, art. 12, 13".
+
+Tokens are estimated locally from word lengths; it only has to be close enough to
+budget a prompt, and needs no tokenizer download or API call.
+
+Configuration (environment):
+  CONTEXT_MAX_TOKENS  Token budget of the packed context (default 12000; 0 disables the cap)
+"""
+import itertools
+import math
+import os
+import re
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Iterable, Optional
+
+from src.core.logging_config import get_logger
+from src.core.metrics import context_passages, context_tokens
+from src.data.chunk_store import merge_spans
+
+logger = get_logger(__name__)
+
+# Source chunks average about 2,900 characters, ~1,050 estimated tokens (90th percentile
+# ~1,300), so the default fits about ten of the RERANK_TOP_K=12 reranked chunks
+DEFAULT_MAX_TOKENS = 12000
+
+# Share of a span's 3-grams found in one packed span above which it is a near-duplicate
+DUPLICATE_THRESHOLD = 0.8
+
+# Characters per token of an ASCII word and of a non-ASCII (Cyrillic, Uzbek ʻ) word
+_ASCII_CHARS_PER_TOKEN = 4.0
+_OTHER_CHARS_PER_TOKEN = 2.0
+
+_TOKEN_PIECE = re.compile(r"\w+|[^\w\s]")
+_WORD = re.compile(r"\w+")
+
+SPAN_SEPARATOR = "\n\n"
+
+# Token cap of one expansion span (about one source chunk), and the shortest remainder of
+# an expansion chunk, once already packed text is removed, worth a span of its own
+EXPANSION_SPAN_TOKENS = 1300
+MIN_EXPANSION_CHARS = 200
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of text for an OpenAI-style BPE tokenizer."""
+    tokens = 0
+    for piece in _TOKEN_PIECE.findall(text):
+        if piece.isascii():
+            tokens += math.ceil(len(piece) / _ASCII_CHARS_PER_TOKEN)
+        elif piece[0].isalnum() or piece[0] == "_":
+            tokens += math.ceil(len(piece) / _OTHER_CHARS_PER_TOKEN)
+        else:
+            tokens += 1
+    return tokens
+
+
+def _shingles(text: str) -> set[int]:
+    words = _WORD.findall(text.lower())
+    if len(words) < 3:
+        return {hash(" ".join(words))}
+    return {hash((words[i], words[i + 1], words[i + 2])) for i in range(len(words) - 2)}
+
+
+def citation_header(number: int, span: dict[str, Any]) -> str:
+    """Header line of a packed span, e.g. '[1] soliq_kodeksi, art. 12, 13'."""
+    parts = [f"[{number}]"]
+    document = span.get("document")
+    if document:
+        parts.append(os.path.splitext(str(document))[0])
+    articles = span.get("articles") or []
+    if articles:
+        parts[-1] += ","
+        parts.append("art. " + ", ".join(str(a) for a in articles))
+    return " ".join(parts)
+
+
+def _cut_to_budget(text: str, budget: int, focus: Optional[tuple[int, int]] = None) -> str:
+    """
+    Window of text within budget tokens, cut at sentence or word breaks when possible.
+
+    The window is centred on focus (a (start, end) range of text, e.g. the best-ranked
+    chunk of a merged span) and starts at the head of text without one.
+    """
+    tokens = estimate_tokens(text)
+    if tokens <= budget:
+        return text
+    focus_start, focus_end = focus if focus is not None else (0, 0)
+    size = int(len(text) * budget / tokens)
+    while True:
+        slack = max(size - (focus_end - focus_start), 0)
+        start = max(0, min(focus_start - slack // 2, len(text) - size))
+        if size <= 0 or estimate_tokens(text[start:start + size]) <= budget:
+            break
+        size = int(size * 0.9)
+    window = text[start:start + size]
+    if start > 0:
+        for separator in (". ", "\n", " "):
+            found = window.find(separator)
+            if 0 <= found < size // 2:
+                window = window[found + len(separator):].lstrip()
+                break
+    if start + size >= len(text):
+        return window
+    for separator in (". ", "\n", " "):
+        found = window.rfind(separator)
+        if found > len(window) // 2:
+            return window[:found + 1].rstrip()
+    return window
+
+
+@dataclass
+class PackedContext:
+    """Packed synthesis context and what was left out."""
+
+    text: str
+    tokens: int
+    spans: int
+    duplicates: int = 0
+    over_budget: int = 0
+
+
+def max_context_tokens() -> Optional[int]:
+    """Configured budget; None when CONTEXT_MAX_TOKENS is 0 (no cap)."""
+    budget = int(os.getenv("CONTEXT_MAX_TOKENS", str(DEFAULT_MAX_TOKENS)))
+    return budget if budget > 0 else None
+
+
+def _uncovered(start: int, end: int, covered: list[tuple[int, int]]) -> tuple[int, int]:
+    """Longest part of [start, end) outside the covered ranges; empty when fully covered."""
+    best = (start, start)
+    position = start
+    for covered_start, covered_end in sorted(covered) + [(end, end)]:
+        if covered_start > position:
+            segment = (position, min(covered_start, end))
+            if segment[1] - segment[0] > best[1] - best[0]:
+                best = segment
+        position = max(position, covered_end)
+        if position >= end:
+            break
+    return best
+
+
+def _expansion_span(row: dict[str, Any], covered: dict[Any, list[tuple[int, int]]]) -> Optional[dict[str, Any]]:
+    """An expansion row as a span of its own, without text already packed; None if little is left."""
+    text = row.get("text") or ""
+    document, start, end = row.get("document"), row.get("start"), row.get("end")
+    if document is not None and isinstance(start, int) and isinstance(end, int) and end - start == len(text):
+        start, end = _uncovered(start, end, covered.get(document, []))
+        text = text[start - row["start"]:end - row["start"]]
+    if len(text.strip()) < MIN_EXPANSION_CHARS:
+        return None
+    article = row.get("article")
+    return {
+        "text": _cut_to_budget(text, EXPANSION_SPAN_TOKENS), "document": document, "start": start, "end": end,
+        "articles": [article] if article else [],
+    }
+
+
+def pack_context(
+    rows: Iterable[dict[str, Any]],
+    max_tokens: Optional[int] = None,
+    expansion: Optional[Iterable[dict[str, Any]]] = None,
+) -> PackedContext:
+    """
+    Merge, deduplicate and budget retrieval rows into a context string.
+
+    Args:
+        rows: Retrieval rows, most relevant first, with 'text' and, when known,
+            'document', 'start', 'end' and 'article'.
+        max_tokens: Token budget (default CONTEXT_MAX_TOKENS).
+        expansion: Rows of the same shape packed after all of rows, each as its own
+            capped span without text already packed.
+
+    Returns:
+        PackedContext; text is empty when no row has text.
+    """
+    budget = max_tokens if max_tokens is not None else max_context_tokens()
+    packed: list[str] = []
+    packed_shingles: list[set[int]] = []
+    covered: dict[Any, list[tuple[int, int]]] = defaultdict(list)
+    used = 0
+    duplicates = over_budget = 0
+
+    candidates = itertools.chain(((span, False) for span in merge_spans(rows)), ((row, True) for row in expansion or ()))
+    for candidate, is_expansion in candidates:
+        span = _expansion_span(candidate, covered) if is_expansion else candidate
+        if span is None:
+            duplicates += 1
+            continue
+        lead = len(span["text"]) - len(span["text"].lstrip())
+        text = span["text"].strip()
+        shingles = _shingles(text)
+        if any(len(shingles & kept) >= DUPLICATE_THRESHOLD * len(shingles) for kept in packed_shingles):
+            duplicates += 1
+            continue
+        header = citation_header(len(packed) + 1, span)
+        cost = estimate_tokens(header) + estimate_tokens(text) + 1
+        if budget is not None and used + cost > budget:
+            if packed:
+                over_budget += 1
+                continue
+            focus = None
+            if span.get("focus"):
+                focus_start, focus_end = span["focus"]
+                focus = (max(focus_start - lead, 0), max(focus_end - lead, 0))
+            text = _cut_to_budget(text, max(budget - estimate_tokens(header) - 1, 1), focus)
+            cost = estimate_tokens(header) + estimate_tokens(text) + 1
+        packed.append(f"{header}\n{text}")
+        packed_shingles.append(shingles)
+        used += cost
+        if span.get("document") is not None and isinstance(span.get("start"), int) and isinstance(span.get("end"), int):
+            covered[span["document"]].append((span["start"], span["end"]))
+
+    context_passages.labels(outcome="packed").inc(len(packed))
+    context_passages.labels(outcome="duplicate").inc(duplicates)
+    context_passages.labels(outcome="over_budget").inc(over_budget)
+    if packed:
+        context_tokens.observe(used)
+    logger.info("context_packed", spans=len(packed), tokens=used, duplicates=duplicates, over_budget=over_budget)
+    return PackedContext(
+        text=SPAN_SEPARATOR.join(packed), tokens=used, spans=len(packed),
+        duplicates=duplicates, over_budget=over_budget,
+    )
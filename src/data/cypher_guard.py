@@ -0,0 +1,194 @@
+"""
+Cost guard for LLM-generated Cypher.
+
+GraphCypherQAChain executes whatever Cypher the LLM writes. GuardedGraph sits between
+generation and execution (it is the graph the chain is built with) and, for every
+statement:
+
+  1. rejects anything that writes (and runs it in a read transaction regardless),
+  2. injects a LIMIT when missing and clamps larger literal limits,
+  3. runs EXPLAIN and rejects plans whose estimated rows or operator count exceed the
+     budget (syntax errors are caught here too, before execution),
+  4. executes with a short transaction timeout.
+
+Rejections raise CypherRejected and are counted by reason in
+graphrag_cypher_guard_rejections_total. query_graph treats the error like any failed
+chain call, so hybrid retrieval falls back to keyword search.
+
+Configuration (environment):
+  CYPHER_GUARD_MAX_ROWS            Injected/clamped LIMIT (default 10, the chain's top_k)
+  CYPHER_GUARD_MAX_ESTIMATED_ROWS  Max EstimatedRows of any plan operator (default 100000)
+  CYPHER_GUARD_MAX_OPERATORS       Max operators in the plan (default 40)
+  CYPHER_GUARD_TIMEOUT             Transaction timeout in seconds (default 5)
+"""
+import os
+import re
+from typing import Any, Optional
+
+from langchain_community.graphs.graph_store import GraphStore
+
+from src.core.logging_config import get_logger
+from src.core.metrics import cypher_guard_rejections
+from src.data.neo4j_driver import is_write_query
+
+logger = get_logger(__name__)
+
+_TRAILING_LIMIT = re.compile(r"\bLIMIT\s+(\d+|\$\w+)\s*$", re.IGNORECASE)
+_UNION = re.compile(r"\bUNION\b", re.IGNORECASE)
+_RETURN = re.compile(r"\bRETURN\b", re.IGNORECASE)
+# Procedures that only read; anything else called by generated Cypher is rejected
+_ALLOWED_PROCEDURES = ("db.index.fulltext.querynodes", "db.index.vector.querynodes")
+_CALL_PROCEDURE = re.compile(r"\bCALL\s+([\w.]+)\s*\(", re.IGNORECASE)
+
+
+class CypherRejected(ValueError):
+    """Raised when generated Cypher is refused by the guard."""
+
+    def __init__(self, reason: str, message: str):
+        super().__init__(message)
+        self.reason = reason
+
+
+def apply_limit(cypher: str, max_rows: int) -> str:
+    """
+    Ensure the statement returns at most max_rows rows.
+
+    A trailing literal LIMIT above max_rows is clamped; a missing LIMIT is appended
+    (UNION queries are wrapped in a subquery so the LIMIT covers every branch).
+    """
+    statement = cypher.strip().rstrip(";").strip()
+    match = _TRAILING_LIMIT.search(statement)
+    if match:
+        value = match.group(1)
+        if value.isdigit() and int(value) > max_rows:
+            return f"{statement[: match.start()]}LIMIT {max_rows}"
+        return statement
+    if _UNION.search(statement):
+        return f"CALL {{ {statement} }} RETURN * LIMIT {max_rows}"
+    return f"{statement}\nLIMIT {max_rows}"
+
+
+def plan_cost(plan: Optional[dict]) -> tuple[float, int]:
+    """Return (max EstimatedRows over all operators, operator count) of an EXPLAIN plan."""
+    if not plan:
+        return 0.0, 0
+    max_rows = 0.0
+    operators = 0
+    stack = [plan]
+    while stack:
+        node = stack.pop()
+        operators += 1
+        args = node.get("args", {}) or {}
+        max_rows = max(max_rows, float(args.get("EstimatedRows", 0) or 0))
+        stack.extend(node.get("children", []) or [])
+    return max_rows, operators
+
+
+class GuardedGraph(GraphStore):
+    """GraphStore for GraphCypherQAChain that checks and bounds every generated statement."""
+
+    def __init__(
+        self,
+        graph: Any,
+        client: Any,
+        max_rows: Optional[int] = None,
+        max_estimated_rows: Optional[float] = None,
+        max_operators: Optional[int] = None,
+        timeout: Optional[float] = None,
+        schema_service: Any = None,
+    ):
+        """
+        Args:
+            graph: Neo4jGraph providing the schema the chain prompts with.
+            client: Graph client (get_graph_client()) used to EXPLAIN and execute.
+            max_rows: LIMIT injected or clamped to.
+            max_estimated_rows: Largest EstimatedRows allowed for any plan operator.
+            max_operators: Largest number of operators allowed in the plan.
+            timeout: Transaction timeout in seconds.
+            schema_service: SchemaService supplying the cached, size-bounded schema
+                (default: the graph's own full schema).
+        """
+        self.graph = graph
+        self.client = client
+        self.max_rows = max_rows or int(os.getenv("CYPHER_GUARD_MAX_ROWS", "10"))
+        self.max_estimated_rows = max_estimated_rows or float(
+            os.getenv("CYPHER_GUARD_MAX_ESTIMATED_ROWS", "100000")
+        )
+        self.max_operators = max_operators or int(os.getenv("CYPHER_GUARD_MAX_OPERATORS", "40"))
+        self.timeout = timeout or float(os.getenv("CYPHER_GUARD_TIMEOUT", "5"))
+        self.schema_service = schema_service
+
+    @property
+    def get_schema(self) -> str:
+        schema: str = (
+            self.schema_service.summary_for() if self.schema_service is not None else self.graph.get_schema
+        )
+        return schema
+
+    @property
+    def get_structured_schema(self) -> dict[str, Any]:
+        structured: dict[str, Any] = (
+            self.schema_service.prune() if self.schema_service is not None else self.graph.get_structured_schema
+        )
+        return structured
+
+    def refresh_schema(self) -> None:
+        if self.schema_service is not None:
+            self.schema_service.mark_stale()
+            return
+        self.graph.refresh_schema()
+
+    def add_graph_documents(self, graph_documents: list, include_source: bool = False) -> None:
+        raise CypherRejected("write", "GuardedGraph is read-only.")
+
+    def _reject(self, reason: str, message: str, cypher: str) -> CypherRejected:
+        cypher_guard_rejections.labels(reason=reason).inc()
+        logger.warning("cypher_rejected", reason=reason, detail=message, cypher=" ".join(cypher.split())[:1000])
+        return CypherRejected(reason, f"Cypher rejected ({reason}): {message}")
+
+    def check(self, cypher: str, params: Optional[dict] = None) -> str:
+        """
+        Validate a generated statement and return the bounded version to execute.
+
+        Raises:
+            CypherRejected: If the statement writes, calls a non-read procedure, fails
+                EXPLAIN or exceeds the plan budget.
+        """
+        if not cypher or not _RETURN.search(cypher):
+            raise self._reject("no_return", "statement has no RETURN clause", cypher or "")
+        if is_write_query(cypher):
+            raise self._reject("write", "statement modifies the graph", cypher)
+        for procedure in _CALL_PROCEDURE.findall(cypher):
+            if procedure.lower() not in _ALLOWED_PROCEDURES:
+                raise self._reject("procedure", f"procedure {procedure} is not allowed", cypher)
+
+        bounded = apply_limit(cypher, self.max_rows)
+        explain = getattr(self.client, "explain", None)
+        if explain is None:
+            return bounded
+        try:
+            plan = explain(bounded, params)
+        except Exception as e:
+            raise self._reject("explain_error", str(e), bounded) from e
+        estimated_rows, operators = plan_cost(plan)
+        if estimated_rows > self.max_estimated_rows:
+            raise self._reject(
+                "plan_rows", f"estimated {estimated_rows:.0f} rows > {self.max_estimated_rows:.0f}", bounded
+            )
+        if operators > self.max_operators:
+            raise self._reject("plan_operators", f"{operators} operators > {self.max_operators}", bounded)
+        return bounded
+
+    def query(self, query: str, params: Optional[dict] = None) -> list[dict[str, Any]]:
+        """Check, bound and run a generated statement in a read transaction with a timeout."""
+        from langchain_community.graphs.neo4j_graph import value_sanitize
+
+        bounded = self.check(query, params)
+        try:
+            records = self.client.read(bounded, params, timeout=self.timeout, cache=True)
+        except Exception as e:
+            if "TransactionTimedOut" in str(getattr(e, "code", "")) or "timed out" in str(e).lower():
+                raise self._reject("timeout", f"exceeded {self.timeout}s", bounded) from e
+            raise
+        # Drop huge lists (e.g. embedding vectors) before they reach the QA prompt
+        return [value_sanitize(r.data() if hasattr(r, "data") else dict(r)) for r in records]
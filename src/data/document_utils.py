@@ -1,50 +1,309 @@
 """
 Shared utilities for document text extraction and chunking.
 Used by add_doc_to_source script and Telegram bot file upload.
+
+Large PDFs are extracted in page ranges on a shared, long-lived process pool
+(PDF_EXTRACT_WORKERS, default one per core; PDFs under PDF_PARALLEL_MIN_PAGES pages,
+default 32, are read serially).
+iter_text yields the text incrementally and iter_chunks consumes it incrementally, so
+chunking starts before extraction finishes and only a window of pages is held at once.
+Chunking itself (articles, chapters, postings) lives in src.data.chunking.
 """
+import atexit
+import codecs
+import hashlib
+import io
+import itertools
+import json
+import multiprocessing
 import os
 import re
+import tempfile
+import threading
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from html.parser import HTMLParser
+from typing import Any, Iterable, Iterator
+
+from src.data.chunking import chunk_document, iter_structured_chunks
+
+
+def content_hash(text: str) -> str:
+    """Return a stable SHA-256 hex digest of text (used as a cache and dedup key)."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+# Uzbek Cyrillic -> Latin (official 1995 alphabet). Lowercase input is assumed for
+# multi-letter mappings to come out lowercase.
+_UZ_CYRILLIC_TO_LATIN = {
+    "а": "a", "б": "b", "в": "v", "г": "g", "д": "d", "е": "e", "ё": "yo", "ж": "j",
+    "з": "z", "и": "i", "й": "y", "к": "k", "л": "l", "м": "m", "н": "n", "о": "o",
+    "п": "p", "р": "r", "с": "s", "т": "t", "у": "u", "ф": "f", "х": "x", "ц": "ts",
+    "ч": "ch", "ш": "sh", "щ": "sh", "ъ": "'", "ь": "", "ы": "i", "э": "e", "ю": "yu",
+    "я": "ya", "ў": "o'", "қ": "q", "ғ": "g'", "ҳ": "h",
+}
+_UZ_CYRILLIC_TO_LATIN.update({k.upper(): v.capitalize() for k, v in list(_UZ_CYRILLIC_TO_LATIN.items())})
+_TRANSLIT_TABLE = str.maketrans(_UZ_CYRILLIC_TO_LATIN)
+# Variants of the o'/g' apostrophe used across sources
+_APOSTROPHES = re.compile(r"[ʻʼ’‘`´]")
+
+
+def to_latin(text: str) -> str:
+    """Transliterate Uzbek Cyrillic to Latin and unify o'/g' apostrophe variants."""
+    return _APOSTROPHES.sub("'", text.translate(_TRANSLIT_TABLE))
+
+
+def write_json_atomic(path: str, data: Any, indent: int | None = None) -> None:
+    """
+    Write JSON so readers never see a partial file.
+
+    Data is written to a temporary file in the same directory and moved into place
+    with os.replace, which is atomic on POSIX and Windows.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp_", suffix=".json")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=indent)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+# Tags whose content is not document text
+_SKIP_TAGS = frozenset({"style", "script", "template"})
+# Tags that start a new line of text
+_BLOCK_TAGS = frozenset({
+    "address", "article", "aside", "blockquote", "body", "caption", "dd", "div", "dl", "dt",
+    "fieldset", "figcaption", "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6",
+    "header", "hr", "li", "main", "nav", "ol", "p", "pre", "section", "table", "tbody",
+    "tfoot", "thead", "title", "tr", "ul",
+})
+# Table cells: keep neighbouring cells apart
+_CELL_TAGS = frozenset({"td", "th"})
+
+# Characters read per step when streaming text files
+TEXT_READ_SIZE = 1 << 16
+
+
+class HTMLTextConverter(HTMLParser):
+    """
+    Single-pass HTML to plain text (used for Word "Save as HTML" .doc files).
+
+    Skips style/script content, turns <br> and block tags into newlines, decodes all
+    entities and collapses other whitespace to single spaces. Feed the document in
+    pieces and drain() the text produced so far; only unfinished markup is buffered.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(convert_charrefs=True)
+        self._out = io.StringIO()
+        self._skip_depth = 0
+        self._pending = ""  # separator owed before the next text: "", " " or "\n"
+        self._started = False
+
+    def _separate(self, separator: str) -> None:
+        if self._started and (separator == "\n" or not self._pending):
+            self._pending = separator
+
+    def handle_starttag(self, tag: str, attrs: list) -> None:
+        if tag in _SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag == "br" or tag in _BLOCK_TAGS:
+            self._separate("\n")
+        elif tag in _CELL_TAGS:
+            self._separate(" ")
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in _SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in _BLOCK_TAGS:
+            self._separate("\n")
+        elif tag in _CELL_TAGS:
+            self._separate(" ")
+
+    def handle_data(self, data: str) -> None:
+        if self._skip_depth:
+            return
+        words = data.split()
+        if not words:
+            if data:
+                self._separate(" ")
+            return
+        if data[0].isspace():
+            self._separate(" ")
+        self._out.write(self._pending)
+        self._out.write(" ".join(words))
+        self._pending = ""
+        self._started = True
+        if data[-1].isspace():
+            self._separate(" ")
+
+    def drain(self) -> str:
+        """Return the text converted since the last drain()."""
+        text = self._out.getvalue()
+        self._out.seek(0)
+        self._out.truncate()
+        return text
+
+
+def iter_html_text(pieces: Iterable[str]) -> Iterator[str]:
+    """Convert HTML arriving in pieces to plain text, yielding text as it is produced."""
+    converter = HTMLTextConverter()
+    for piece in pieces:
+        converter.feed(piece)
+        text = converter.drain()
+        if text:
+            yield text
+    converter.close()
+    text = converter.drain()
+    if text:
+        yield text
 
 
 def strip_html(html: str) -> str:
     """Remove HTML tags and normalize whitespace."""
-    html = re.sub(r"<style[^>]*>[\s\S]*?</style>", " ", html, flags=re.IGNORECASE)
-    html = re.sub(r"<script[^>]*>[\s\S]*?</script>", " ", html, flags=re.IGNORECASE)
-    text = re.sub(r"<br\s*/?>", "\n", html, flags=re.IGNORECASE)
-    text = re.sub(r"</(?:p|div|tr|li)>", "\n", text, flags=re.IGNORECASE)
-    text = re.sub(r"<[^>]+>", " ", text)
-    text = re.sub(r"&nbsp;", " ", text, flags=re.IGNORECASE)
-    text = re.sub(r"&amp;", "&", text, flags=re.IGNORECASE)
-    text = re.sub(r"&lt;", "<", text, flags=re.IGNORECASE)
-    text = re.sub(r"&gt;", ">", text, flags=re.IGNORECASE)
-    text = re.sub(r"\s+", " ", text)
-    text = re.sub(r"\n\s*\n", "\n\n", text)
-    return text.strip()
-
-
-def read_pdf(path: str) -> str:
-    """Extract text from a PDF file."""
+    return "".join(iter_html_text([html]))
+
+
+def _looks_like_html(text: str) -> bool:
+    lowered = text.lower()
+    return "<html" in lowered or "<body" in lowered or "<div" in lowered
+
+
+# Pages per process-pool task; each document keeps two tasks per worker in flight
+PDF_PAGES_PER_TASK = 8
+
+# Shared extraction pool: spawn start-up (re-importing the app in every worker) costs
+# seconds, so the pool is created once and reused by every PDF
+_pdf_pool_instance: ProcessPoolExecutor | None = None
+_pdf_pool_lock = threading.Lock()
+
+# (document token, PdfReader) of the document a worker process extracted last
+_worker_reader: tuple[str, Any] | None = None
+
+
+def get_pdf_pool(workers: int) -> ProcessPoolExecutor:
+    """Return the process-wide PDF extraction pool, starting it with `workers` processes on first use."""
+    global _pdf_pool_instance
+    with _pdf_pool_lock:
+        if _pdf_pool_instance is None:
+            # spawn: the bot process runs threads (driver pool, executors) that fork would copy mid-lock
+            _pdf_pool_instance = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pdf_pool_instance
+
+
+def shutdown_pdf_pool() -> None:
+    """Stop the PDF extraction pool (a later PDF starts a new one)."""
+    global _pdf_pool_instance
+    with _pdf_pool_lock:
+        pool, _pdf_pool_instance = _pdf_pool_instance, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+atexit.register(shutdown_pdf_pool)
+
+
+def _extract_page_range(token: str, path: str, start: int, end: int) -> list[str]:
+    global _worker_reader
+    if _worker_reader is None or _worker_reader[0] != token:
+        from pypdf import PdfReader
+        _worker_reader = (token, PdfReader(path))
+    reader = _worker_reader[1]
+    return [reader.pages[i].extract_text() or "" for i in range(start, end)]
+
+
+def iter_pdf_pages(
+    source: str | bytes | io.BytesIO,
+    workers: int | None = None,
+    pages_per_task: int = PDF_PAGES_PER_TASK,
+) -> Iterator[str]:
+    """
+    Yield the text of each non-empty PDF page, in page order.
+
+    Args:
+        source: File path or PDF content.
+        workers: Extraction processes (default PDF_EXTRACT_WORKERS or the core count);
+            only used when the shared pool is first started.
+        pages_per_task: Pages extracted per process-pool task.
+    """
     from pypdf import PdfReader
-    reader = PdfReader(path)
-    parts = []
-    for page in reader.pages:
-        t = page.extract_text()
-        if t:
-            parts.append(t)
-    return "\n\n".join(parts)
 
+    if isinstance(source, io.BytesIO):
+        source = source.getvalue()
+    reader = PdfReader(io.BytesIO(source) if isinstance(source, bytes) else source)
+    page_count = len(reader.pages)
+    if workers is None:
+        workers = int(os.getenv("PDF_EXTRACT_WORKERS", "0")) or os.cpu_count() or 1
+    if workers <= 1 or page_count < int(os.getenv("PDF_PARALLEL_MIN_PAGES", "32")):
+        for page in reader.pages:
+            t = page.extract_text()
+            if t:
+                yield t
+        return
+    del reader
 
-def read_docx(path: str) -> str:
-    """Extract text from a DOCX file."""
+    # Workers open the PDF by path (bytes are spilled to a temp file), not from pickled content
+    spill_path = None
+    if isinstance(source, bytes):
+        fd, spill_path = tempfile.mkstemp(suffix=".pdf")
+        with os.fdopen(fd, "wb") as f:
+            f.write(source)
+    path = spill_path or str(source)
+    token = uuid.uuid4().hex
+    pool = get_pdf_pool(workers)
+    ranges = iter([(s, min(s + pages_per_task, page_count)) for s in range(0, page_count, pages_per_task)])
+    pending: deque = deque()
+    try:
+        for page_range in ranges:
+            pending.append(pool.submit(_extract_page_range, token, path, *page_range))
+            if len(pending) >= 2 * workers:
+                break
+        while pending:
+            texts = pending.popleft().result()
+            next_range = next(ranges, None)
+            if next_range is not None:
+                pending.append(pool.submit(_extract_page_range, token, path, *next_range))
+            for t in texts:
+                if t:
+                    yield t
+    finally:
+        # Stopped early or failed: drop this document's queued ranges, keep the pool
+        for future in pending:
+            future.cancel()
+        if spill_path is not None:
+            os.unlink(spill_path)
+
+
+def read_pdf(path: str | io.BytesIO) -> str:
+    """Extract text from a PDF file."""
+    return "\n\n".join(iter_pdf_pages(path))
+
+
+def iter_docx_paragraphs(path: str | io.BytesIO) -> Iterator[str]:
+    """Yield the text of each DOCX paragraph, in order."""
     from docx import Document
-    doc = Document(path)
-    return "\n".join(p.text for p in doc.paragraphs)
+    for paragraph in Document(path).paragraphs:
+        yield paragraph.text
 
 
-def read_doc_or_txt(path: str) -> str:
-    """Read file; if it looks like HTML, strip tags and return plain text."""
-    with open(path, "rb") as f:
-        raw = f.read()
+def read_docx(path: str | io.BytesIO) -> str:
+    """Extract text from a DOCX file."""
+    return "\n".join(iter_docx_paragraphs(path))
+
+
+def decode_text(raw: bytes, name: str = "file") -> str:
+    """Decode TXT/DOC bytes; if the content looks like HTML, strip tags and return plain text."""
     for enc in ("utf-8", "utf-8-sig", "cp1251", "latin-1"):
         try:
             text = raw.decode(enc)
@@ -52,58 +311,98 @@ def read_doc_or_txt(path: str) -> str:
         except UnicodeDecodeError:
             continue
     else:
-        raise ValueError(f"Cannot decode {path}")
-    if "<html" in text.lower() or "<body" in text.lower() or "<div" in text.lower():
+        raise ValueError(f"Cannot decode {name}")
+    if _looks_like_html(text):
         return strip_html(text)
     return text
 
 
+def _detect_encoding(path: str) -> str:
+    """First encoding decode_text would accept for the file, checked without loading it whole."""
+    for enc in ("utf-8", "utf-8-sig", "cp1251", "latin-1"):
+        decoder = codecs.getincrementaldecoder(enc)()
+        try:
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(TEXT_READ_SIZE), b""):
+                    decoder.decode(block)
+            decoder.decode(b"", final=True)
+            return enc
+        except UnicodeDecodeError:
+            continue
+    raise ValueError(f"Cannot decode {path}")
+
+
+def iter_doc_or_txt(path: str) -> Iterator[str]:
+    """
+    Yield a TXT/DOC file's text in pieces; HTML (decided from the first piece) is
+    converted to plain text as it streams.
+    """
+    with open(path, encoding=_detect_encoding(path), newline="") as f:
+        head = f.read(TEXT_READ_SIZE)
+        pieces = itertools.chain([head], iter(lambda: f.read(TEXT_READ_SIZE), ""))
+        if _looks_like_html(head):
+            yield from iter_html_text(pieces)
+        else:
+            yield from (piece for piece in pieces if piece)
+
+
+def read_doc_or_txt(path: str) -> str:
+    """Read file; if it looks like HTML, strip tags and return plain text."""
+    return "".join(iter_doc_or_txt(path))
+
+
 def read_file(path: str) -> str:
     """Read file based on extension; return plain text. Supports PDF, TXT, DOC, DOCX."""
-    ext = os.path.splitext(path)[1].lower()
+    return "".join(iter_text(path))
+
+
+def read_bytes(data: bytes, ext: str) -> str:
+    """Extract plain text from in-memory file content; ext selects the format like read_file."""
+    return "".join(iter_text(data, ext))
+
+
+def iter_text(source: str | bytes, ext: str | None = None) -> Iterator[str]:
+    """
+    Yield a document's text in pieces (PDF pages, DOCX paragraphs) as they are extracted.
+
+    The pieces concatenate to exactly what read_file / read_bytes return.
+
+    Args:
+        source: File path or in-memory content.
+        ext: Format extension; defaults to the path's extension.
+    """
+    if ext is None:
+        ext = os.path.splitext(source)[1] if isinstance(source, str) else ""
+    ext = ext.lower()
     if ext == ".pdf":
-        return read_pdf(path)
-    if ext == ".docx":
-        return read_docx(path)
-    return read_doc_or_txt(path)
-
-
-# Uzbek document header patterns (chapter, section)
-CHAPTER_PATTERN = re.compile(
-    r"^(I{1,3}|IV|V|VI|VII|VIII|IX|X+)\s+[бБ]об\.?\s*(.*)$",
-    re.MULTILINE,
-)
-SECTION_PATTERN = re.compile(
-    r"^(I{1,3}|IV|V|VI|VII|VIII|IX|X+)\s+[қК]исм\.?\s*(.*)$",
-    re.MULTILINE,
-)
-INTRO_PATTERN = re.compile(r"^Муқаддима\s*$", re.MULTILINE)
-
-
-def _detect_section_chapter(text_slice: str) -> tuple[str, str]:
-    """Detect section and chapter from text. Returns (section, chapter)."""
-    section = ""
-    chapter = ""
-    for line in text_slice.split("\n")[:50]:
-        line = line.strip()
-        if not line:
-            continue
-        m = CHAPTER_PATTERN.match(line)
-        if m:
-            chapter = f"{m.group(1)} боб"
-            if m.group(2).strip():
-                section = m.group(2).strip()[:50]
-            continue
-        m = SECTION_PATTERN.match(line)
-        if m:
-            section = f"{m.group(1)} қисм"
-            if m.group(2).strip():
-                section = m.group(2).strip()[:50]
-            continue
-        if INTRO_PATTERN.match(line):
-            section = "Муқаддима"
-            chapter = ""
-    return (section or "Unknown", chapter or "Unknown")
+        pieces, separator = iter_pdf_pages(source), "\n\n"
+    elif ext == ".docx":
+        pieces, separator = iter_docx_paragraphs(io.BytesIO(source) if isinstance(source, bytes) else source), "\n"
+    elif isinstance(source, bytes):
+        yield decode_text(source, f"{ext or 'text'} upload")
+        return
+    else:
+        yield from iter_doc_or_txt(source)
+        return
+    for i, piece in enumerate(pieces):
+        yield piece if i == 0 else separator + piece
+
+
+def bytes_hash(data: bytes) -> str:
+    """Return the SHA-256 hex digest of raw file content (upload dedup key)."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def iter_chunks(
+    pieces: Iterable[str],
+    max_chunk_size: int = 800,
+    chunk_overlap: int = 150,
+) -> Iterator[dict]:
+    """
+    Chunk text arriving in pieces (see iter_text) with the structure-aware chunker
+    (src.data.chunking); chunks are yielded while later pieces are still being extracted.
+    """
+    return iter_structured_chunks(pieces, max_chunk_size=max_chunk_size, chunk_overlap=chunk_overlap)
 
 
 def chunk_text(
@@ -111,33 +410,5 @@ def chunk_text(
     max_chunk_size: int = 800,
     chunk_overlap: int = 150,
 ) -> list[dict]:
-    """Split text into chunks with overlap; each chunk has chunk_id, original_text, section, chapter, nodes, relationships."""
-    chunks = []
-    start = 0
-    i = 0
-    while start < len(text):
-        end = min(start + max_chunk_size, len(text))
-        if end < len(text):
-            break_at = text.rfind("\n\n", start, end + 1)
-            if break_at > start:
-                end = break_at + 2
-            else:
-                break_at = text.rfind(". ", start, end + 1)
-                if break_at > start:
-                    end = break_at + 2
-        part = text[start:end].strip()
-        if part:
-            section, chapter = _detect_section_chapter(part)
-            chunks.append({
-                "chunk_id": str(i),
-                "original_text": part,
-                "section": section,
-                "chapter": chapter,
-                "nodes": [],
-                "relationships": [],
-            })
-            i += 1
-        start = end - chunk_overlap if end < len(text) else end
-        if start >= len(text):
-            break
-    return chunks
+    """Split text into chunks; each chunk has chunk_id, original_text, section, chapter, article, start, end, nodes, relationships."""
+    return chunk_document(text, max_chunk_size=max_chunk_size, chunk_overlap=chunk_overlap)
@@ -0,0 +1,247 @@
+"""
+Incremental embedding pipeline for Chunk nodes.
+
+Only chunks whose text changed since their last embedding (or that were never embedded)
+are selected. Vectors are cached on disk keyed by text hash, so identical text is never
+sent to the embedding API twice, and results are written back to Neo4j in batches.
+
+Runs automatically after ingestion (both ingest_json_data and ingest_single_document)
+and manually via scripts/add_embeddings.py.
+"""
+import os
+import sqlite3
+import threading
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterable, Optional
+
+from src.core.logging_config import get_logger
+from src.data.chunk_store import CHUNK_TEXT
+from src.data.document_utils import content_hash
+
+logger = get_logger(__name__)
+
+VECTOR_INDEX_NAME = "chunk_vector_index"
+
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_CACHE_PATH = os.path.join(_REPO_ROOT, ".cache", "embeddings.sqlite3")
+
+# Chunks that were never embedded, whose text changed, or that were embedded by another model.
+# Text is stored on the chunk or sliced from its Document, depending on CHUNK_STORAGE.
+PENDING_CHUNKS_CYPHER = f"""
+MATCH (c:Chunk)
+WHERE (c.text IS NOT NULL OR c.start IS NOT NULL)
+  AND ($file_name IS NULL OR c.document_file = $file_name)
+  AND (c.embedding IS NULL
+       OR c.text_hash IS NULL
+       OR c.embedding_hash IS NULL
+       OR c.embedding_hash <> c.text_hash
+       OR c.embedding_model IS NULL
+       OR c.embedding_model <> $model)
+OPTIONAL MATCH (d:Document {{file_name: c.document_file}})
+RETURN c.id AS id, {CHUNK_TEXT} AS text
+"""
+
+WRITE_EMBEDDINGS_CYPHER = """
+UNWIND $rows AS row
+MATCH (c:Chunk {id: row.id})
+SET c.embedding = row.embedding,
+    c.text_hash = row.hash,
+    c.embedding_hash = row.hash,
+    c.embedding_model = $model
+"""
+
+
+class EmbeddingCache:
+    """
+    Content-addressed on-disk cache of embedding vectors.
+
+    Vectors are stored as float32 blobs in SQLite, keyed by (model, text hash).
+    Safe to share between threads.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Open (or create) the cache database.
+
+        Args:
+            path: SQLite file path. Defaults to EMBEDDING_CACHE_PATH or .cache/embeddings.sqlite3.
+        """
+        self.path = path or os.getenv("EMBEDDING_CACHE_PATH") or DEFAULT_CACHE_PATH
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " model TEXT NOT NULL, hash TEXT NOT NULL, vector BLOB NOT NULL,"
+            " PRIMARY KEY (model, hash))"
+        )
+        self._conn.commit()
+
+    def get_many(self, model: str, hashes: Iterable[str]) -> dict[str, list[float]]:
+        """Return cached vectors for the given text hashes (missing hashes are omitted)."""
+        hashes = list(hashes)
+        found: dict[str, list[float]] = {}
+        with self._lock:
+            # Stay well below SQLite's bound-parameter limit
+            for i in range(0, len(hashes), 500):
+                batch = hashes[i : i + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT hash, vector FROM embeddings WHERE model = ? AND hash IN ({placeholders})",
+                    [model, *batch],
+                ).fetchall()
+                for h, blob in rows:
+                    vec = array("f")
+                    vec.frombytes(blob)
+                    found[h] = vec.tolist()
+        return found
+
+    def put_many(self, model: str, vectors: dict[str, list[float]]) -> None:
+        """Store vectors keyed by text hash."""
+        if not vectors:
+            return
+        rows = [(model, h, array("f", v).tobytes()) for h, v in vectors.items()]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, hash, vector) VALUES (?, ?, ?)", rows
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+def get_embedder() -> Optional[Any]:
+    """
+    Return the configured LangChain embeddings model, or None if not configured.
+
+    EMBEDDING_BACKEND selects the backend:
+      - "openai" (default): OpenAIEmbeddings, requires OPENAI_API_KEY.
+      - "local": offline HashingEmbedder (see src.data.local_embeddings), no network calls.
+    """
+    backend = os.getenv("EMBEDDING_BACKEND", "openai").strip().lower()
+    if backend == "local":
+        from src.data.local_embeddings import get_local_embedder
+
+        return get_local_embedder()
+    if backend != "openai":
+        raise ValueError(f"Unknown EMBEDDING_BACKEND: {backend!r} (expected 'openai' or 'local')")
+    if not os.getenv("OPENAI_API_KEY"):
+        return None
+    from langchain_openai import OpenAIEmbeddings
+
+    return OpenAIEmbeddings()
+
+
+def embedding_model_id(embedder: Any) -> str:
+    """Identify an embedder so vectors from different models never mix in the cache or graph."""
+    model = getattr(embedder, "model", None)
+    return f"{embedder.__class__.__name__}:{model}" if model else embedder.__class__.__name__
+
+
+def ensure_vector_index(graph: Any, dimensions: int) -> None:
+    """Create the Chunk.embedding vector index if it does not exist."""
+    cypher = f"""
+    CREATE VECTOR INDEX {VECTOR_INDEX_NAME} IF NOT EXISTS
+    FOR (c:Chunk) ON (c.embedding)
+    OPTIONS {{indexConfig: {{
+        `vector.dimensions`: {int(dimensions)},
+        `vector.similarity_function`: 'cosine'
+    }}}}
+    """
+    graph.query(cypher)
+
+
+def embed_pending_chunks(
+    graph: Any = None,
+    embedder: Any = None,
+    file_name: Optional[str] = None,
+    batch_size: int = 64,
+    max_concurrency: int = 4,
+    write_batch_size: int = 500,
+    cache: Optional[EmbeddingCache] = None,
+) -> int:
+    """
+    Embed Chunk nodes that lack an up-to-date embedding.
+
+    Args:
+        graph: Graph object with a query(cypher, params) method. Defaults to get_graph_client().
+        embedder: LangChain embeddings model. Defaults to get_embedder() (EMBEDDING_BACKEND);
+            if none is configured the pipeline is skipped.
+        file_name: Restrict to chunks of one Document (e.g. a freshly uploaded file).
+        batch_size: Texts per embedding API call.
+        max_concurrency: Maximum number of embedding calls in flight.
+        write_batch_size: Chunks per UNWIND write to Neo4j.
+        cache: Embedding cache. Defaults to the on-disk cache.
+
+    Returns:
+        Number of Chunk nodes whose embedding was written.
+    """
+    embedder = embedder or get_embedder()
+    if embedder is None:
+        logger.info("embedding_pipeline_skipped", reason="no embedding backend configured")
+        return 0
+    if graph is None:
+        from src.data.neo4j_driver import get_graph_client
+
+        graph = get_graph_client()
+
+    model = embedding_model_id(embedder)
+    rows = graph.query(PENDING_CHUNKS_CYPHER, {"file_name": file_name, "model": model}) or []
+    pending = [(r["id"], r["text"], content_hash(r["text"])) for r in rows if r.get("text")]
+    if not pending:
+        logger.info("embedding_pipeline_up_to_date", file_name=file_name)
+        return 0
+
+    own_cache = cache is None
+    cache = cache or EmbeddingCache()
+    try:
+        unique_texts: dict[str, str] = {}
+        for _, text, h in pending:
+            unique_texts.setdefault(h, text)
+        vectors = cache.get_many(model, unique_texts.keys())
+        missing = [(h, t) for h, t in unique_texts.items() if h not in vectors]
+
+        batches = [missing[i : i + batch_size] for i in range(0, len(missing), batch_size)]
+
+        def _embed(batch: list[tuple[str, str]]) -> dict[str, list[float]]:
+            embedded = embedder.embed_documents([t for _, t in batch])
+            result = {h: list(v) for (h, _), v in zip(batch, embedded, strict=True)}
+            cache.put_many(model, result)
+            return result
+
+        if batches:
+            with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as pool:
+                for result in pool.map(_embed, batches):
+                    vectors.update(result)
+
+        write_rows = [
+            {"id": chunk_id, "hash": h, "embedding": vectors[h]}
+            for chunk_id, _, h in pending
+            if h in vectors
+        ]
+        for i in range(0, len(write_rows), write_batch_size):
+            graph.query(
+                WRITE_EMBEDDINGS_CYPHER,
+                {"rows": write_rows[i : i + write_batch_size], "model": model},
+            )
+        if write_rows:
+            ensure_vector_index(graph, len(write_rows[0]["embedding"]))
+
+        logger.info(
+            "embedding_pipeline_complete",
+            file_name=file_name,
+            pending=len(pending),
+            unique_texts=len(unique_texts),
+            cache_hits=len(unique_texts) - len(missing),
+            embedded=len(missing),
+            written=len(write_rows),
+        )
+        return len(write_rows)
+    finally:
+        if own_cache:
+            cache.close()
@@ -0,0 +1,189 @@
+"""
+Entity resolution: canonicalize LLM-extracted entity ids before ingestion.
+
+The extractor produces free-form ids, so one BHMS shows up as "21-son BHMS",
+"21-сон БҲМС", "bhms_21", ... and ingestion MERGEs each spelling into its own node.
+This module normalizes script (Cyrillic -> Latin), case and number formats for
+AccountCode, BHMS and NormativeDocument entities, blocks nodes by (type, key) and
+rewrites node ids and relationship endpoints to one canonical id per block.
+
+Canonical ids are derived from the key alone, so the same entity resolves to the same
+id across documents and runs. Its label is always the kind, because ingestion MERGEs
+on label and id and resolution sees one document at a time: a label taken from another
+node of the document would split the entity across documents. Entities that do not
+parse to a clean key (e.g. "BHMS_17_Eski", an old edition) are left untouched. Curated
+nodes whose id already is canonical (e.g. "BHMS_14" typed Standart) keep their id and
+properties and take the kind label; other spellings are rewritten to them.
+"""
+import re
+from typing import Any, Optional
+
+from src.core.logging_config import get_logger
+from src.data.document_utils import to_latin
+
+logger = get_logger(__name__)
+
+# Node types (lowercased, non-alphanumerics removed) that denote each resolvable kind
+_TYPE_ALIASES = {
+    "BHMS": {"bhms", "standart", "standard", "accountingstandard"},
+    "AccountCode": {"accountcode", "account", "hisob", "hisobvaraq", "schyot", "schet"},
+    "NormativeDocument": {"normativedocument", "normativhujjat", "law", "qonun"},
+}
+
+# Words that may surround the number without changing which entity is meant
+_BHMS_FILLER = {"bhms", "son", "sonli", "n", "no", "milliy", "standart", "standarti",
+                "buxgalteriya", "hisobining"}
+_ACCOUNT_FILLER = {"accountcode", "account", "code", "kod", "kodi", "hisob", "hisobi",
+                   "hisobvaraq", "hisobvaraqi", "schyot", "schyoti", "schet", "scheti",
+                   "n", "no", "raqami", "raqamli", "son", "sonli"}
+_REG_WORDS = {"reg", "registration", "ro'yxat", "ro'yxatdan", "royxat", "adliya", "adliya_reg"}
+_LAW_PREFIXES = {"zru", "o'rq", "orq", "pq", "pf", "vmq", "qaror"}
+
+_TOKEN = re.compile(r"[a-z']+|\d+")
+
+
+def _tokens(value: str) -> list[str]:
+    """Lowercase Latin tokens of value; numbers and words are separate tokens."""
+    return _TOKEN.findall(to_latin(value.lower()))
+
+
+def entity_kind(node_type: Optional[str]) -> Optional[str]:
+    """Map a node type to a resolvable kind (BHMS, AccountCode, NormativeDocument) or None."""
+    if not node_type:
+        return None
+    normalized = "".join(ch for ch in node_type.lower() if ch.isalnum() or ch == "_")
+    for kind, aliases in _TYPE_ALIASES.items():
+        if normalized in aliases or normalized.replace("_", "") in aliases:
+            return kind
+    return None
+
+
+def resolution_key(kind: str, node_id: str, properties: Optional[dict] = None) -> Optional[str]:
+    """
+    Return the blocking key for an entity, or None if it cannot be resolved safely.
+
+    Examples:
+        ("BHMS", "21-son BHMS") -> "21"
+        ("AccountCode", "Hisob 0110") -> "0110"
+        ("NormativeDocument", "ZRU-582") -> "ZRU-582"
+    """
+    tokens = _tokens(str(node_id))
+    numbers = [t for t in tokens if t.isdigit()]
+    words = [t for t in tokens if not t.isdigit()]
+
+    if kind == "BHMS":
+        if len(numbers) == 1 and all(w in _BHMS_FILLER for w in words):
+            return str(int(numbers[0]))
+        return None
+
+    if kind == "AccountCode":
+        if not numbers and properties:
+            for prop in ("code", "kod", "account", "number"):
+                if properties.get(prop):
+                    return resolution_key(kind, str(properties[prop]))
+        if len(numbers) == 1 and len(numbers[0]) == 4 and all(w in _ACCOUNT_FILLER for w in words):
+            return numbers[0]
+        return None
+
+    if kind == "NormativeDocument":
+        prefixes = [w for w in words if w in _LAW_PREFIXES]
+        if prefixes and len(numbers) == 1:
+            return f"{prefixes[0].replace(chr(39), '').upper()}-{int(numbers[0])}"
+        if len(numbers) == 1 and any(w in _REG_WORDS for w in words):
+            return f"reg-{int(numbers[0])}"
+        # Otherwise the normalized name is the key: fixes script and case variants only
+        return "_".join(t.replace("'", "") for t in tokens) or None
+
+    return None
+
+
+def canonical_id(kind: str, key: str) -> str:
+    """Build the canonical node id for a (kind, key) block, e.g. BHMS_21, AccountCode_0110."""
+    return f"{kind}_{key.replace('-', '_')}"
+
+
+def resolve_graph_data(graph_data: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """
+    Canonicalize entity ids across all chunks of a document.
+
+    Nodes in the same (kind, key) block get one canonical id and the kind as type, their
+    properties are merged (first value wins) and their original spellings are kept in
+    an "aliases" property. Relationship endpoints are rewritten; self-loops and
+    duplicates created by the merge are dropped.
+
+    Args:
+        graph_data: List of chunks with "nodes" and "relationships".
+
+    Returns:
+        New list of chunks with resolved nodes and relationships.
+    """
+    id_map: dict[str, str] = {}
+    blocks: dict[str, dict[str, Any]] = {}
+    curated: set[str] = set()
+
+    for chunk in graph_data:
+        for node in chunk.get("nodes", []) or []:
+            node_id = node.get("id")
+            kind = entity_kind(node.get("type"))
+            if node_id is None or kind is None:
+                continue
+            key = resolution_key(kind, str(node_id), node.get("properties"))
+            if key is None:
+                continue
+            cid = canonical_id(kind, key)
+            block = blocks.setdefault(cid, {"type": kind, "properties": {}, "aliases": set()})
+            if str(node_id) == cid:
+                curated.add(cid)
+                continue
+            id_map[str(node_id)] = cid
+            for k, v in (node.get("properties") or {}).items():
+                if v not in (None, "") and k not in block["properties"]:
+                    block["properties"][k] = v
+            block["aliases"].add(str(node_id))
+
+    resolved: list[dict[str, Any]] = []
+    nodes_in = nodes_out = 0
+    for chunk in graph_data:
+        new_nodes: list[dict[str, Any]] = []
+        # Curated nodes keep their id and properties; variants in the same chunk collapse into them
+        seen_nodes = {str(n.get("id")) for n in chunk.get("nodes", []) or [] if str(n.get("id")) in curated}
+        for node in chunk.get("nodes", []) or []:
+            nodes_in += 1
+            target_id = id_map.get(str(node.get("id")))
+            if target_id is None:
+                if str(node.get("id")) in curated and entity_kind(node.get("type")):
+                    node = {**node, "type": blocks[str(node["id"])]["type"]}
+                new_nodes.append(node)
+                continue
+            if target_id in seen_nodes:
+                continue
+            seen_nodes.add(target_id)
+            block = blocks[target_id]
+            properties = dict(block["properties"])
+            if block["aliases"]:
+                properties["aliases"] = sorted(block["aliases"])
+            new_nodes.append({"id": target_id, "type": block["type"], "properties": properties})
+        nodes_out += len(new_nodes)
+
+        new_rels: list[dict[str, Any]] = []
+        seen_rels: set[tuple] = set()
+        for rel in chunk.get("relationships", []) or []:
+            source = id_map.get(str(rel.get("source")), rel.get("source"))
+            target = id_map.get(str(rel.get("target")), rel.get("target"))
+            rel_key = (source, target, rel.get("type"))
+            if source == target or rel_key in seen_rels:
+                continue
+            seen_rels.add(rel_key)
+            new_rels.append({**rel, "source": source, "target": target})
+
+        resolved.append({**chunk, "nodes": new_nodes, "relationships": new_rels})
+
+    if id_map:
+        logger.info(
+            "entities_resolved",
+            resolvable=len(id_map),
+            canonical=len(blocks),
+            nodes_before=nodes_in,
+            nodes_after=nodes_out,
+        )
+    return resolved
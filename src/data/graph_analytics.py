@@ -0,0 +1,381 @@
+"""
+Offline graph analytics: PageRank priors, communities and community summaries.
+
+Broad questions ("tell me about depreciation accounting") have no keyword that picks
+the right chunks. This job precomputes a global view of the graph that global search
+(graph_rag.global_search) answers them from:
+  1. The chunk-entity graph (MENTIONS plus entity-entity relationships, undirected) is
+     loaded in two statements.
+  2. PageRank by sparse power iteration, as flat edge arrays with np.bincount, gives
+     every chunk and entity a centrality prior (property pagerank).
+  3. Label propagation finds communities. Chunks and entities update in alternating
+     half-steps, because synchronous updates oscillate on a bipartite graph. Each node
+     stores its community id (property community).
+  4. Each community with enough entities gets a Community node with a title, its
+     summed PageRank (rank) and an LLM-written summary of its top entities and chunks.
+     Summaries are keyed by a hash of the community's members (entity ids, chunk ids and
+     chunk text hashes). A community whose members are unchanged keeps its summary
+     without an LLM call, and Community nodes that no longer exist are removed.
+
+Run with scripts/compute_graph_analytics.py after ingestion.
+"""
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+import numpy as np
+
+from src.core.logging_config import get_logger
+from src.data.chunk_store import CHUNK_TEXT
+from src.data.context_packer import estimate_tokens
+from src.data.document_utils import content_hash
+
+logger = get_logger(__name__)
+
+DAMPING = 0.85
+PAGERANK_ITERATIONS = 100
+PAGERANK_TOLERANCE = 1e-9
+LPA_ITERATIONS = 20
+
+# Communities need this many entities to be summarized; at most MAX_COMMUNITIES are kept
+MIN_COMMUNITY_ENTITIES = 3
+MAX_COMMUNITIES = 200
+
+# What a summary prompt shows of a community
+SUMMARY_ENTITIES = 15
+SUMMARY_CHUNKS = 5
+SUMMARY_PROMPT_TOKENS = 2000
+
+LOAD_MENTIONS_CYPHER = """
+MATCH (c:Chunk)-[:MENTIONS]->(e)
+RETURN elementId(c) AS chunk, c.id AS chunk_id, c.text_hash AS text_hash, elementId(e) AS entity, e.id AS entity_id
+"""
+
+LOAD_ENTITY_LINKS_CYPHER = """
+MATCH (a)-[]->(b)
+WHERE NOT a:Chunk AND NOT a:Document AND NOT a:Community AND NOT b:Chunk AND NOT b:Document AND NOT b:Community
+RETURN elementId(a) AS source, elementId(b) AS target
+"""
+
+LOAD_MEMBERS_CYPHER = f"""
+UNWIND $ids AS node_id
+MATCH (c) WHERE elementId(c) = node_id
+OPTIONAL MATCH (d:Document {{file_name: c.document_file}})
+RETURN node_id AS node, labels(c) AS labels, coalesce(c.nomi, c.name, c.id) AS name, {CHUNK_TEXT} AS text
+"""
+
+WRITE_SCORES_CYPHER = """
+UNWIND $rows AS row
+MATCH (n) WHERE elementId(n) = row.node
+SET n.pagerank = row.pagerank, n.community = row.community
+"""
+
+WRITE_COMMUNITIES_CYPHER = """
+UNWIND $rows AS row
+MERGE (m:Community {id: row.id})
+SET m.title = row.title, m.summary = row.summary, m.member_hash = row.member_hash, m.size = row.size, m.rank = row.rank
+"""
+
+DELETE_STALE_COMMUNITIES_CYPHER = """
+MATCH (m:Community)
+WHERE NOT m.id IN $ids
+DETACH DELETE m
+"""
+
+LOAD_COMMUNITIES_CYPHER = """
+MATCH (m:Community)
+RETURN m.id AS id, m.title AS title, m.summary AS summary, m.member_hash AS member_hash, m.rank AS rank
+"""
+
+SUMMARY_PROMPT = """You summarize a cluster of an Uzbek accounting knowledge graph (BHMS standards, tax code, accounts).
+Write 4-6 sentences in the language of the excerpts: what the cluster is about, its key concepts, account codes and rules.
+Do not invent anything that is not in the entities or excerpts.
+
+Entities (most central first):
+{entities}
+
+Excerpts:
+{excerpts}"""
+
+
+def pagerank(
+    n: int,
+    sources: np.ndarray,
+    targets: np.ndarray,
+    weights: Optional[np.ndarray] = None,
+    damping: float = DAMPING,
+) -> np.ndarray:
+    """
+    PageRank of a directed edge list by sparse power iteration.
+
+    Args:
+        n: Number of nodes.
+        sources, targets: Edge endpoints (pass both directions for an undirected graph).
+        weights: Edge weights (default 1).
+
+    Returns:
+        Scores summing to 1; mass of nodes without out-edges is spread uniformly.
+    """
+    if n == 0:
+        return np.zeros(0)
+    weights = np.ones(len(sources)) if weights is None else weights
+    out = np.bincount(sources, weights=weights, minlength=n)
+    share = np.divide(weights, out[sources], out=np.zeros(len(sources)), where=out[sources] > 0)
+    dangling = out == 0
+    rank = np.full(n, 1.0 / n)
+    for _ in range(PAGERANK_ITERATIONS):
+        spread = np.bincount(targets, weights=rank[sources] * share, minlength=n)
+        updated: np.ndarray = (1 - damping) / n + damping * (spread + rank[dangling].sum() / n)
+        if np.abs(updated - rank).sum() < PAGERANK_TOLERANCE:
+            return updated
+        rank = updated
+    return rank
+
+
+def label_propagation(
+    n: int,
+    sources: np.ndarray,
+    targets: np.ndarray,
+    groups: list[np.ndarray],
+    iterations: int = LPA_ITERATIONS,
+) -> np.ndarray:
+    """
+    Community labels by label propagation, one node group per half-step.
+
+    Every node in the group being updated takes the label with the largest summed edge
+    weight among its neighbours (ties go to the smallest label). Updating the two sides
+    of a bipartite graph in turn avoids the oscillation of fully synchronous updates.
+
+    Args:
+        n: Number of nodes.
+        sources, targets: Edge endpoints, both directions.
+        groups: Node index arrays updated in turn (e.g. chunks, then entities).
+
+    Returns:
+        A label (a node index) per node.
+    """
+    labels = np.arange(n)
+    in_group = [np.zeros(n, dtype=bool) for _ in groups]
+    for mask, group in zip(in_group, groups, strict=True):
+        mask[group] = True
+    for _ in range(iterations):
+        changed = False
+        for mask in in_group:
+            edges = mask[targets]
+            if not edges.any():
+                continue
+            nodes, votes = targets[edges], labels[sources[edges]]
+            keys, inverse = np.unique(nodes * n + votes, return_inverse=True)
+            counts = np.bincount(inverse)
+            key_nodes, key_labels = keys // n, keys % n
+            # Per node: highest count first, then smallest label
+            order = np.lexsort((key_labels, -counts, key_nodes))
+            first = order[np.r_[True, key_nodes[order][1:] != key_nodes[order][:-1]]]
+            winners, new = key_nodes[first], key_labels[first]
+            if np.any(labels[winners] != new):
+                changed = True
+                labels[winners] = new
+        if not changed:
+            break
+    return labels
+
+
+@dataclass
+class Community:
+    """A detected community and what is stored for it."""
+
+    id: str
+    members: list[int]
+    entities: list[int]
+    chunks: list[int]
+    member_hash: str
+    rank: float
+    title: str = ""
+    summary: str = ""
+    keys: list[str] = field(default_factory=list)
+
+
+def _label(name: Any) -> str:
+    return re.sub(r"[_\s]+", " ", str(name or "")).strip()
+
+
+def default_summarizer() -> Callable[[str], str]:
+    """Summarize with the configured LLM, holding an LLM concurrency slot per call."""
+    from src.core.llm_config import get_llm, llm_slot
+
+    llm = get_llm(temperature=0, max_tokens=400)
+
+    def summarize(prompt: str) -> str:
+        with llm_slot():
+            return str(llm.invoke(prompt).content).strip()
+
+    return summarize
+
+
+def compute_graph_analytics(
+    graph: Any = None,
+    summarize: Optional[Callable[[str], str]] = None,
+    min_entities: int = MIN_COMMUNITY_ENTITIES,
+    max_communities: int = MAX_COMMUNITIES,
+    max_concurrency: int = 4,
+    write_batch_size: int = 1000,
+) -> dict[str, int]:
+    """
+    Compute and store PageRank, communities and community summaries.
+
+    Args:
+        graph: Graph object with a query(cypher, params) method. Defaults to get_graph_client().
+        summarize: prompt -> summary text. Defaults to the configured LLM; pass a stub to
+            skip LLM calls (communities then keep cached summaries or get an empty one).
+        min_entities: Entities a community needs to be stored.
+        max_communities: Most communities stored, by summed PageRank.
+        max_concurrency: Summary calls in flight.
+        write_batch_size: Nodes per UNWIND write.
+
+    Returns:
+        Counts: nodes, communities, summarized (LLM calls made), cached (summaries reused).
+    """
+    if graph is None:
+        from src.data.neo4j_driver import get_graph_client
+
+        graph = get_graph_client()
+
+    # 1. Graph: nodes indexed by elementId
+    index: dict[str, int] = {}
+    keys: list[str] = []
+    is_chunk: list[bool] = []
+
+    def node(element_id: str, key: str, chunk: bool) -> int:
+        i = index.get(element_id)
+        if i is None:
+            i = index[element_id] = len(keys)
+            keys.append(key)
+            is_chunk.append(chunk)
+        return i
+
+    edge_src: list[int] = []
+    edge_dst: list[int] = []
+    for row in graph.query(LOAD_MENTIONS_CYPHER) or []:
+        c = node(row["chunk"], f"chunk:{row['chunk_id']}:{row.get('text_hash') or ''}", True)
+        e = node(row["entity"], f"entity:{row['entity_id']}", False)
+        edge_src.append(c)
+        edge_dst.append(e)
+    for row in graph.query(LOAD_ENTITY_LINKS_CYPHER) or []:
+        a, b = index.get(row["source"]), index.get(row["target"])
+        if a is not None and b is not None and a != b:
+            edge_src.append(a)
+            edge_dst.append(b)
+    n = len(keys)
+    if n == 0:
+        logger.info("graph_analytics_empty")
+        return {"nodes": 0, "communities": 0, "summarized": 0, "cached": 0}
+    element_ids = list(index)
+    src = np.asarray(edge_src + edge_dst, dtype=np.int64)
+    dst = np.asarray(edge_dst + edge_src, dtype=np.int64)
+    chunk_mask = np.asarray(is_chunk)
+
+    # 2. PageRank; 3. communities
+    scores = pagerank(n, src, dst)
+    labels = label_propagation(n, src, dst, [np.flatnonzero(chunk_mask), np.flatnonzero(~chunk_mask)])
+
+    communities: list[Community] = []
+    order = np.argsort(labels, kind="stable")
+    bounds = np.flatnonzero(np.r_[True, labels[order][1:] != labels[order][:-1], True])
+    for start, end in zip(bounds[:-1], bounds[1:], strict=True):
+        members = sorted(order[start:end].tolist(), key=lambda i: -scores[i])
+        entities = [i for i in members if not is_chunk[i]]
+        if len(entities) < min_entities:
+            continue
+        member_keys = sorted(keys[i] for i in members)
+        member_hash = content_hash("\n".join(member_keys))
+        communities.append(Community(
+            id=f"community_{member_hash[:16]}",
+            members=members,
+            entities=entities,
+            chunks=[i for i in members if is_chunk[i]],
+            member_hash=member_hash,
+            rank=float(scores[members].sum()),
+        ))
+    communities = sorted(communities, key=lambda c: -c.rank)[:max_communities]
+
+    # 4. Summaries: reuse by member hash, otherwise ask the LLM
+    cached = {
+        r["member_hash"]: r["summary"]
+        for r in graph.query(LOAD_COMMUNITIES_CYPHER) or []
+        if r.get("member_hash") and r.get("summary")
+    }
+    shown = [
+        i for c in communities
+        for i in c.entities[:SUMMARY_ENTITIES] + (c.chunks[:SUMMARY_CHUNKS] if c.member_hash not in cached else [])
+    ]
+    details: dict[str, dict[str, Any]] = {}
+    for i in range(0, len(shown), write_batch_size):
+        batch = [element_ids[j] for j in shown[i:i + write_batch_size]]
+        for row in graph.query(LOAD_MEMBERS_CYPHER, {"ids": batch}) or []:
+            details[row["node"]] = row
+    pending: list[tuple[Community, str]] = []
+    for community in communities:
+        names = [_label(details.get(element_ids[i], {}).get("name")) for i in community.entities[:SUMMARY_ENTITIES]]
+        community.title = ", ".join(name for name in names[:3] if name)
+        if community.member_hash in cached:
+            community.summary = cached[community.member_hash]
+            continue
+        excerpts: list[str] = []
+        budget = SUMMARY_PROMPT_TOKENS - estimate_tokens(" ".join(names))
+        for i in community.chunks[:SUMMARY_CHUNKS]:
+            text = (details.get(element_ids[i], {}).get("text") or "").strip()
+            if text and estimate_tokens(text) <= budget:
+                excerpts.append(text)
+                budget -= estimate_tokens(text)
+        prompt = SUMMARY_PROMPT.format(
+            entities="\n".join(f"- {name}" for name in names if name),
+            excerpts="\n\n".join(excerpts) or "(none)",
+        )
+        pending.append((community, prompt))
+
+    summarized = 0
+    if pending:
+        summarize = summarize or default_summarizer()
+        with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as pool:
+            results = list(pool.map(lambda item: _safe_summary(summarize, *item), pending))
+        for (community, _), summary in zip(pending, results, strict=True):
+            community.summary = summary
+            summarized += bool(summary)
+
+    # 5. Store: node scores and community ids, Community nodes, stale communities removed
+    community_of = {i: c.id for c in communities for i in c.members}
+    rows = [
+        {"node": element_ids[i], "pagerank": float(scores[i]), "community": community_of.get(i)}
+        for i in range(n)
+    ]
+    for i in range(0, len(rows), write_batch_size):
+        graph.query(WRITE_SCORES_CYPHER, {"rows": rows[i:i + write_batch_size]})
+    community_rows = [
+        {
+            "id": c.id, "title": c.title, "summary": c.summary, "member_hash": c.member_hash,
+            "size": len(c.members), "rank": c.rank,
+        }
+        for c in communities
+    ]
+    for i in range(0, len(community_rows), write_batch_size):
+        graph.query(WRITE_COMMUNITIES_CYPHER, {"rows": community_rows[i:i + write_batch_size]})
+    graph.query(DELETE_STALE_COMMUNITIES_CYPHER, {"ids": [c.id for c in communities]})
+
+    result = {
+        "nodes": n,
+        "communities": len(communities),
+        "summarized": summarized,
+        "cached": len(communities) - len(pending),
+    }
+    logger.info("graph_analytics_complete", **result)
+    return result
+
+
+def _safe_summary(summarize: Callable[[str], str], community: Community, prompt: str) -> str:
+    try:
+        return summarize(prompt)
+    except Exception as e:
+        # Stored without a summary; the next run retries it
+        logger.warning("community_summary_failed", community=community.id, error=str(e))
+        return ""
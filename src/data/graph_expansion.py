@@ -0,0 +1,181 @@
+"""
+Graph-neighbourhood expansion of retrieved chunks.
+
+Keyword and vector search find chunks that share words with the question. Chunks that
+share entities with them instead (the same AccountCode or BHMS, through MENTIONS), or
+that continue them in the document (CONTAINS order), are only reached when the LLM
+writes such a traversal. This leg reaches them directly:
+  1. One batched statement (EXPANSION_CYPHER) takes the seed chunks and returns, per
+     seed, its sibling chunks (seq +-1 in the same Document, looked up through the
+     chunk_document_seq index rather than by scanning the document's chunks) and, per
+     mentioned entity, the entity's degree and up to fanout other chunks mentioning it.
+  2. Personalized PageRank runs in NumPy on that subgraph. The restart distribution is
+     the seeds, weighted by their retrieval score, and the restart probability is high,
+     so the walk stays within a few hops. MENTIONS edges are weighted down by the
+     entity's degree, so hub entities ("BHMS") spread little.
+  3. The best non-seed chunks are fetched with one more statement (FETCH_CHUNKS_CYPHER)
+     and returned as retrieval rows.
+
+Configuration (environment):
+  GRAPH_EXPANSION_TOP_K  Chunks added by expansion (default 4; 0 disables it)
+"""
+import math
+import os
+from typing import Any, Optional
+
+import numpy as np
+
+from src.core.logging_config import get_logger
+from src.data.chunk_store import CHUNK_TEXT
+
+logger = get_logger(__name__)
+
+# Seeds, and chunks per mentioned entity, taken into the subgraph
+MAX_SEEDS = 6
+ENTITY_FANOUT = 10
+
+# Random-walk restart probability and iteration limits
+RESTART = 0.5
+MAX_ITERATIONS = 30
+TOLERANCE = 1e-6
+
+# Edge weight of a sibling (next/previous chunk) relative to an entity of degree 1
+SIBLING_WEIGHT = 0.5
+
+EXPANSION_CYPHER = """
+UNWIND $ids AS seed_id
+MATCH (s:Chunk {id: seed_id})
+OPTIONAL MATCH (sib:Chunk)
+WHERE sib.document_file = s.document_file AND sib.seq IN [s.seq - 1, s.seq + 1]
+WITH s, collect(DISTINCT sib.id) AS siblings
+OPTIONAL MATCH (s)-[:MENTIONS]->(e)
+OPTIONAL MATCH (e)<-[:MENTIONS]-(o:Chunk)
+WITH s, siblings, e, collect(DISTINCT o.id)[..$fanout] AS others
+RETURN s.id AS seed, siblings, e.id AS entity, size([(e)<-[:MENTIONS]-(:Chunk) | 1]) AS degree, others
+"""
+
+FETCH_CHUNKS_CYPHER = f"""
+UNWIND $ids AS chunk_id
+MATCH (c:Chunk {{id: chunk_id}})
+OPTIONAL MATCH (d:Document {{file_name: c.document_file}})
+RETURN c.id AS id, {CHUNK_TEXT} AS text, c.document_file AS document, c.start AS start, c.end AS end,
+       c.article AS article
+"""
+
+
+def expansion_top_k() -> int:
+    """Configured number of chunks added by expansion (0 disables it)."""
+    return int(os.getenv("GRAPH_EXPANSION_TOP_K", "4"))
+
+
+def personalized_pagerank(
+    adjacency: np.ndarray,
+    personalization: np.ndarray,
+    restart: float = RESTART,
+    max_iterations: int = MAX_ITERATIONS,
+    tolerance: float = TOLERANCE,
+) -> np.ndarray:
+    """
+    Personalized PageRank by power iteration on a dense weighted adjacency matrix.
+
+    Args:
+        adjacency: Symmetric non-negative (n, n) edge weights.
+        personalization: Restart distribution (normalized here).
+        restart: Probability of jumping back to the personalization each step.
+
+    Returns:
+        Stationary visit probabilities, summing to 1.
+    """
+    p = personalization / (personalization.sum() or 1.0)
+    out = adjacency.sum(axis=1)
+    # Row-normalized transitions; a node without edges sends its mass back to the restart
+    transition = np.divide(adjacency, out[:, None], out=np.zeros_like(adjacency), where=out[:, None] > 0)
+    dangling = out == 0
+    rank = p.copy()
+    for _ in range(max_iterations):
+        updated: np.ndarray = (1 - restart) * (rank @ transition + rank[dangling].sum() * p) + restart * p
+        if np.abs(updated - rank).sum() < tolerance:
+            return updated
+        rank = updated
+    return rank
+
+
+def _subgraph(rows: list[dict[str, Any]]) -> tuple[list[str], np.ndarray, set[str]]:
+    """Node ids (chunks and 'entity:' ids) and weighted adjacency of the expansion rows."""
+    index: dict[str, int] = {}
+    edges: dict[tuple[int, int], float] = {}
+    chunks: set[str] = set()
+
+    def node(key: str) -> int:
+        return index.setdefault(key, len(index))
+
+    def link(a: int, b: int, weight: float) -> None:
+        if a != b:
+            key = (min(a, b), max(a, b))
+            edges[key] = max(edges.get(key, 0.0), weight)
+
+    for row in rows:
+        seed = node(row["seed"])
+        chunks.add(row["seed"])
+        for sibling in row.get("siblings") or []:
+            chunks.add(sibling)
+            link(seed, node(sibling), SIBLING_WEIGHT)
+        if row.get("entity") is None:
+            continue
+        entity = node(f"entity:{row['entity']}")
+        weight = 1.0 / math.log2(1 + max(row.get("degree") or 1, 1))
+        link(seed, entity, weight)
+        for other in row.get("others") or []:
+            chunks.add(other)
+            link(entity, node(other), weight)
+
+    adjacency = np.zeros((len(index), len(index)))
+    for (a, b), weight in edges.items():
+        adjacency[a, b] = adjacency[b, a] = weight
+    return list(index), adjacency, chunks
+
+
+def expand(
+    client: Any,
+    seeds: list[dict[str, Any]],
+    top_k: Optional[int] = None,
+    timeout: Optional[float] = None,
+) -> list[dict[str, Any]]:
+    """
+    Chunks related to the seeds through shared entities or document order.
+
+    Args:
+        client: Graph client with read(cypher, params, timeout=...).
+        seeds: Retrieval rows, best first, with 'id' and optionally 'score'.
+        top_k: Chunks to return (default GRAPH_EXPANSION_TOP_K).
+        timeout: Per-statement timeout in seconds.
+
+    Returns:
+        Retrieval rows (text, id, document, start, end, article, score) for the best
+        non-seed chunks, best first.
+    """
+    top_k = expansion_top_k() if top_k is None else top_k
+    seed_scores: dict[str, float] = {}
+    for position, row in enumerate(seeds):
+        if row.get("id") and row["id"] not in seed_scores and len(seed_scores) < MAX_SEEDS:
+            seed_scores[row["id"]] = max(float(row.get("score") or 0.0), 0.0) + 1.0 / (1 + position)
+    if top_k <= 0 or not seed_scores:
+        return []
+
+    rows = client.read(EXPANSION_CYPHER, {"ids": list(seed_scores), "fanout": ENTITY_FANOUT}, timeout=timeout)
+    nodes, adjacency, chunks = _subgraph(rows)
+    if not nodes:
+        return []
+    personalization = np.array([seed_scores.get(n, 0.0) for n in nodes])
+    rank = personalized_pagerank(adjacency, personalization)
+
+    candidates = [i for i, n in enumerate(nodes) if n in chunks and n not in seed_scores]
+    best = sorted(candidates, key=lambda i: -rank[i])[:top_k]
+    if not best:
+        return []
+    scores = {nodes[i]: float(rank[i]) for i in best}
+    fetched = {
+        r["id"]: r for r in client.read(FETCH_CHUNKS_CYPHER, {"ids": list(scores)}, timeout=timeout) if r.get("text")
+    }
+    logger.info("graph_expansion_completed", seeds=len(seed_scores), nodes=len(nodes), added=len(fetched))
+    return [{**dict(fetched[i]), "score": scores[i]} for i in scores if i in fetched]
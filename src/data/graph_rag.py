@@ -1,15 +1,39 @@
 from langchain_community.chains.graph_qa.cypher import GraphCypherQAChain
-from src.core.llm_config import get_llm
+from src.core.llm_config import get_llm, llm_slot
 from src.data.neo4j_client import get_neo4j_graph
+from src.data.neo4j_driver import get_graph_client
+from src.data.cypher_guard import GuardedGraph
+from src.data.chunk_store import search_cypher, storage_mode
+from src.data.context_packer import estimate_tokens, max_context_tokens, pack_context
+from src.data.graph_analytics import LOAD_COMMUNITIES_CYPHER
+from src.data.graph_expansion import expand
+from src.data.reranker import rerank, rerank_settings
+from src.data.schema_service import get_schema_service
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 from typing import Any
 from neo4j.exceptions import ServiceUnavailable, TransientError
 from src.core.logging_config import get_logger
 from src.core.metrics import neo4j_queries
+import os
 import re
 
 logger = get_logger(__name__)
 
+# Per-statement timeout (seconds) for keyword scans, so one slow scan cannot hold a pooled connection
+FALLBACK_QUERY_TIMEOUT = 10.0
+
+# Candidate pool for reranking: cap on CONTAINS rows per keyword, and vector hits
+MAX_LIMIT_PER_KEYWORD = 25
+VECTOR_POOL_SIZE = 10
+
+# Questions that ask for an overview of a whole topic, answered from community summaries.
+# Only explicitly corpus-wide phrasing: "haqida" or "explain" also introduce specific questions
+_BROAD_QUESTION = re.compile(
+    r"overview|summar|in general|umumiy ma.?lumot|umuman olganda|умумий маълумот|умуман олганда|"
+    r"обзор|в целом|общие сведения",
+    re.IGNORECASE,
+)
+
 # Minimum result length to consider retrieval successful
 WEAK_RESULT_MIN_LENGTH = 50
 WEAK_RESULT_PATTERNS = (
@@ -140,78 +164,149 @@ def _extract_bilingual_keywords(
     )
 
 
-def fallback_text_search(
-    query: str,
-    keywords: list[str] | None = None,
-    original_query: str | None = None,
-    limit_per_keyword: int = 5,
-) -> str:
-    """
-    Fallback text search using Cypher CONTAINS on Chunk.text when primary retrieval fails.
+def _search_terms(query: str, keywords: list[str] | None, original_query: str | None) -> list[str]:
+    if keywords is not None:
+        return keywords
+    if original_query is not None:
+        return _extract_bilingual_keywords(query, original_query, max_keywords=8)
+    return _extract_simple_keywords(query)
 
-    Args:
-        query: The search query string (typically refined query).
-        keywords: Optional list of keywords to search for. If None, extracted from query.
-        original_query: Optional original user query for bilingual keyword extraction.
-        limit_per_keyword: Max chunks to return per keyword.
 
-    Returns:
-        Concatenated chunk texts that match the search.
+def _text_search_rows(query: str, search_terms: list[str], limit_per_keyword: int) -> list[dict[str, Any]]:
     """
-    graph = get_neo4j_graph()
-    if keywords is not None:
-        search_terms = keywords
-    elif original_query is not None:
-        search_terms = _extract_bilingual_keywords(query, original_query, max_keywords=8)
-    else:
-        search_terms = _extract_simple_keywords(query)
-    seen_texts: set[str] = set()
-    results: list[str] = []
+    CONTAINS matches on chunk text: rows with text, document, start, end and article.
+    """
+    client = get_graph_client()
+    # Stored chunk text or a slice of the document text, depending on CHUNK_STORAGE
+    cypher = search_cypher(limit_per_keyword)
+    rows: list[dict[str, Any]] = []
 
     for term in search_terms:
         if not term or len(term) < 2:
             continue
         try:
-            # Use parameterized query; CONTAINS is case-sensitive, use toLower for both
-            # Note: LIMIT must be literal in some Neo4j versions; use fixed cap
-            cypher = """
-            MATCH (c:Chunk)
-            WHERE c.text IS NOT NULL AND toLower(c.text) CONTAINS toLower($keyword)
-            RETURN c.text AS text
-            LIMIT 5
-            """
-            raw = graph.query(cypher, {"keyword": term})
-            # Neo4jGraph.query may return list of dicts or list of lists
-            for row in raw if isinstance(raw, list) else []:
-                text = row.get("text") if isinstance(row, dict) else (row[0] if row else None)
-                if text and text not in seen_texts:
-                    seen_texts.add(text)
-                    results.append(text)
+            rows.extend(client.read(cypher, {"keyword": term}, timeout=FALLBACK_QUERY_TIMEOUT, cache=True))
         except Exception as e:
             logger.warning("fallback_text_search_error", keyword=term, error=str(e))
 
-    if not results:
+    if not any(row.get("text") for row in rows):
         # Last resort: try full query as single keyword (truncated)
         try:
             keyword = query.strip()[:100]
-            cypher = """
-            MATCH (c:Chunk)
-            WHERE c.text IS NOT NULL AND toLower(c.text) CONTAINS toLower($keyword)
-            RETURN c.text AS text
-            LIMIT 5
-            """
-            raw = graph.query(cypher, {"keyword": keyword})
-            for row in raw if isinstance(raw, list) else []:
-                text = row.get("text") if isinstance(row, dict) else (row[0] if row else None)
-                if text and text not in seen_texts:
-                    seen_texts.add(text)
-                    results.append(text)
+            rows.extend(client.read(cypher, {"keyword": keyword}, timeout=FALLBACK_QUERY_TIMEOUT, cache=True))
         except Exception as e:
             logger.warning("fallback_text_search_final_error", error=str(e))
+    return rows
+
+
+def _keyword_candidates(
+    query: str,
+    keywords: list[str] | None,
+    original_query: str | None,
+    limit_per_keyword: int | None,
+) -> tuple[list[str], list[dict[str, Any]]]:
+    """Search terms and their CONTAINS rows; the pool is widened when reranking is on."""
+    search_terms = _search_terms(query, keywords, original_query)
+    if limit_per_keyword is None:
+        top_k, pool_size, _ = rerank_settings()
+        terms = max(sum(1 for t in search_terms if t and len(t) >= 2), 1)
+        limit_per_keyword = min(max(-(-pool_size // terms), 5), MAX_LIMIT_PER_KEYWORD) if top_k > 0 else 5
+    return search_terms, _text_search_rows(query, search_terms, limit_per_keyword)
+
+
+def _rerank_rows(
+    query: str,
+    original_query: str | None,
+    search_terms: list[str],
+    rows: list[dict[str, Any]],
+    documents: set[str] | None = None,
+) -> list[dict[str, Any]]:
+    texts = [query] if original_query is None else [original_query, query]
+    domain_terms = [term for text in texts for term in _extract_domain_terms(text)]
+    return rerank(" ".join(texts), rows, terms=search_terms, domain_terms=domain_terms, documents=documents)
+
+
+def fallback_text_search(
+    query: str,
+    keywords: list[str] | None = None,
+    original_query: str | None = None,
+    limit_per_keyword: int | None = None,
+    documents: set[str] | None = None,
+) -> str:
+    """
+    Fallback text search using Cypher CONTAINS on chunk text when primary retrieval fails.
+
+    Matches are reranked (see src.data.reranker) and packed with pack_context:
+    overlapping chunks merged, near-duplicates dropped, and the result kept within
+    CONTEXT_MAX_TOKENS.
+
+    Args:
+        query: The search query string (typically refined query).
+        keywords: Optional list of keywords to search for. If None, extracted from query.
+        original_query: Optional original user query for bilingual keyword extraction.
+        limit_per_keyword: Max chunks to return per keyword (default: sized to the
+            rerank pool, or 5 with reranking off).
+        documents: Documents the question names (citations.cited_documents), ranked first.
+
+    Returns:
+        Matching passages, each under a citation header.
+    """
+    search_terms, rows = _keyword_candidates(query, keywords, original_query, limit_per_keyword)
+    packed = pack_context(_rerank_rows(query, original_query, search_terms, rows, documents))
+    logger.info("fallback_text_search_used", query=query, results_count=packed.spans)
+    return packed.text
+
+def _is_broad_question(*texts: str) -> bool:
+    """A topic-level question: broad wording and no number, BHMS, account code or article."""
+    text = " ".join(t for t in texts if t)
+    return bool(_BROAD_QUESTION.search(text)) and not re.search(r"\d", text)
+
+
+def global_search(query: str, original_query: str | None = None, top_k: int | None = None) -> str:
+    """
+    Answer context for a broad question from precomputed community summaries.
+
+    Community nodes are written by src.data.graph_analytics. Summaries are ranked
+    against the query with the reranker, their PageRank mass (rank) giving the
+    retrieval-order prior, and packed within CONTEXT_MAX_TOKENS.
+
+    Args:
+        query: The search query (typically refined query).
+        original_query: Optional original user query.
+        top_k: Summaries to return (default GLOBAL_SEARCH_COMMUNITIES; 0 disables).
+
+    Returns:
+        Summaries under '[n] Community: title' headers, or "" when there are none.
+    """
+    top_k = int(os.getenv("GLOBAL_SEARCH_COMMUNITIES", "4")) if top_k is None else top_k
+    if top_k <= 0:
+        return ""
+    communities = get_graph_client().read(LOAD_COMMUNITIES_CYPHER, timeout=FALLBACK_QUERY_TIMEOUT, cache=True)
+    rows = [
+        {"text": f"{c.get('title') or ''}\n{c['summary']}", "title": c.get("title"), "summary": c["summary"]}
+        for c in sorted(communities, key=lambda c: -(c.get("rank") or 0.0))
+        if c.get("summary")
+    ]
+    texts = [query] if original_query is None else [original_query, query]
+    ranked = rerank(" ".join(texts), rows, top_k=top_k)
+
+    budget = max_context_tokens()
+    parts: list[str] = []
+    used = 0
+    for row in ranked:
+        part = f"[{len(parts) + 1}] Community: {row['title']}\n{row['summary'].strip()}"
+        cost = estimate_tokens(part)
+        if budget is not None and parts and used + cost > budget:
+            break
+        parts.append(part)
+        used += cost
+    logger.info("global_search_used", query=query, communities=len(parts), tokens=used)
+    return "\n\n".join(parts)
+
+
+# Chains are stateless between calls; built once per model and reused
+_chain_cache: dict[str | None, GraphCypherQAChain] = {}
 
-    combined = "\n\n---\n\n".join(results[:10])  # cap total chunks
-    logger.info("fallback_text_search_used", query=query, results_count=len(results))
-    return combined
 
 def get_graph_rag_chain(model_name: str | None = None) -> GraphCypherQAChain:
     """
@@ -221,24 +316,39 @@ def get_graph_rag_chain(model_name: str | None = None) -> GraphCypherQAChain:
         model_name: The DeepSeek model name (default: deepseek-chat).
         
     Returns:
-        A configured GraphCypherQAChain instance.
+        A configured GraphCypherQAChain instance (cached per model name).
     """
-    graph = get_neo4j_graph()
+    cached = _chain_cache.get(model_name)
+    if cached is not None:
+        return cached
+
+    # Generated Cypher goes through the cost guard: read-only, bounded, EXPLAIN-checked.
+    # The schema comes from the cached schema service instead of a refresh per chain.
+    graph = GuardedGraph(get_neo4j_graph(), get_graph_client(), schema_service=get_schema_service())
     
     llm = get_llm(temperature=0, model=model_name)
     
     from langchain_core.prompts import PromptTemplate
 
+    if storage_mode() == "offsets":
+        # Chunks keep only offsets into Document.text; the full-text index is empty
+        chunk_instructions = """- The graph has Document and Chunk nodes. Document has a "text" property with the full document; Chunk has "start" and "end" offsets into it.
+- For content questions (regulations, standards, documents): MATCH (d:Document) WHERE d.text CONTAINS $keyword MATCH (d)-[:CONTAINS]->(c:Chunk) WITH c, substring(d.text, c.start, c.end - c.start) AS text WHERE text CONTAINS $keyword RETURN text
+- Always return the chunk text when answering content questions.
+"""
+    else:
+        chunk_instructions = """- The graph has Document and Chunk nodes. Chunk has a "text" property with full content.
+- For content questions (regulations, standards, documents): MATCH (d:Document)-[:CONTAINS]->(c:Chunk) WHERE c.text CONTAINS $keyword RETURN c.text
+- If full-text index "chunk_text_index" exists: CALL db.index.fulltext.queryNodes("chunk_text_index", $query) YIELD node, score RETURN node.text AS text
+- Always return Chunk.text when answering content questions. Use CONTAINS on c.text or fulltext query.
+"""
+
     CYPHER_GENERATION_TEMPLATE = """Task: Generate Cypher statement to query a graph database about accounting standards.
 
 Instructions:
 - Use only the provided relationship types and property keys in the schema
 - Do not use any other relationship types or property keys that are not provided
-- The graph has Document and Chunk nodes. Chunk has a "text" property with full content.
-- For content questions (regulations, standards, documents): MATCH (d:Document)-[:CONTAINS]->(c:Chunk) WHERE c.text CONTAINS $keyword RETURN c.text
-- If full-text index "chunk_text_index" exists: CALL db.index.fulltext.queryNodes("chunk_text_index", $query) YIELD node, score RETURN node.text AS text
-- Always return Chunk.text when answering content questions. Use CONTAINS on c.text or fulltext query.
-- For accounting queries, prioritize retrieving:
+""" + chunk_instructions + """- For accounting queries, prioritize retrieving:
   1. Nodes with "account", "hisob", "kod" properties (account codes)
   2. Relationships showing debit/credit flows
   3. Nodes related to "valyuta", "kurs", "exchange" (currency/exchange rate)
@@ -269,6 +379,7 @@ The question is:
         verbose=True,
         allow_dangerous_requests=True
     )
+    _chain_cache[model_name] = chain
     return chain
 
 @retry(
@@ -294,7 +405,10 @@ def query_graph(query: str) -> str:
     """
     chain = get_graph_rag_chain()
     try:
-        response = chain.invoke({"query": query})
+        # Prompt with only the part of the schema relevant to this question
+        schema = get_schema_service().summary_for(query, _extract_domain_terms(query))
+        with llm_slot():
+            response = chain.invoke({"query": query, "schema": schema})
         logger.info(
             "graph_query_success",
             query=query,
@@ -315,23 +429,37 @@ def hybrid_retrieve(
     query: str,
     original_query: str | None = None,
     k_vector: int = 3,
+    documents: set[str] | None = None,
 ) -> str:
     """
     Hybrid retrieval: combine vector search (if available) with CONTAINS text search.
 
-    Vector search provides semantic similarity; CONTAINS provides keyword match.
-    Both return raw chunk text for synthesis.
+    Vector search provides semantic similarity; CONTAINS provides keyword match. The
+    reranked candidates seed a graph expansion over MENTIONS and CONTAINS, and everything
+    is packed into one context for synthesis (see src.data.context_packer). Broad,
+    topic-level questions are answered from community summaries (global_search) when
+    graph analytics have been computed.
 
     Args:
         query: The search query (typically refined query).
         original_query: Optional original user query for bilingual keyword extraction.
         k_vector: Number of chunks to retrieve via vector search.
+        documents: Documents the question names by BHMS, registration number or code
+            (citations.cited_documents); the reranker ranks their candidates first.
 
     Returns:
-        Merged context string from both retrieval sources.
+        Packed context from both retrieval sources, one cited span per passage.
     """
-    seen_texts: set[str] = set()
-    results: list[str] = []
+    # 0. Global search for broad questions
+    if _is_broad_question(query, original_query or ""):
+        try:
+            context = global_search(query, original_query)
+            if not _is_weak_result(context):
+                return context
+        except Exception as e:
+            logger.warning("global_search_skip", error=str(e))
+
+    rows: list[dict[str, Any]] = []
 
     # 1. Vector search (optional - skip if not available)
     try:
@@ -339,28 +467,36 @@ def hybrid_retrieve(
 
         store = get_neo4j_vector_store()
         if store is not None:
-            docs_with_score = store.similarity_search_with_score(query, k=k_vector)
+            # A wider pool when the reranker picks the best candidates afterwards
+            k = max(k_vector, VECTOR_POOL_SIZE) if rerank_settings()[0] > 0 else k_vector
+            docs_with_score = store.similarity_search_with_score(query, k=k)
             for doc, _ in docs_with_score:
                 text = doc.page_content if hasattr(doc, "page_content") else str(doc)
-                if text and text not in seen_texts:
-                    seen_texts.add(text)
-                    results.append(text)
-            logger.info("hybrid_vector_results", count=len(results))
+                metadata = getattr(doc, "metadata", None) or {}
+                rows.append({"text": text, **{key: metadata.get(key) for key in ("id", "document", "start", "end", "article", "pagerank")}})
+            logger.info("hybrid_vector_results", count=len(rows))
     except Exception as e:
         logger.warning("hybrid_vector_skip", error=str(e))
 
-    # 2. CONTAINS text search (Cypher on Chunk.text) - always run for keyword coverage
-    fallback_result = fallback_text_search(query, original_query=original_query)
-    if fallback_result:
-        for part in fallback_result.split("\n\n---\n\n"):
-            if part.strip() and part.strip() not in seen_texts:
-                seen_texts.add(part.strip())
-                results.append(part.strip())
-
-    # 3. If we have vector store, use hybrid result; else run full Cypher chain
-    if results:
-        combined = "\n\n---\n\n".join(results[:10])
-        return combined
+    # 2. CONTAINS text search - always run for keyword coverage
+    search_terms, keyword_rows = _keyword_candidates(query, None, original_query, None)
+    rows.extend(keyword_rows)
+
+    # 3. Rerank the candidate pool
+    ranked = _rerank_rows(query, original_query, search_terms, rows, documents)
+
+    # 4. Graph expansion: chunks sharing entities with, or next to, the best candidates
+    expansion: list[dict[str, Any]] = []
+    try:
+        expansion = expand(get_graph_client(), ranked, timeout=FALLBACK_QUERY_TIMEOUT)
+    except Exception as e:
+        logger.warning("graph_expansion_skip", error=str(e))
+
+    # 5. Pack into the token budget; adjacent chunks are merged, so their overlap appears once.
+    # Expansion chunks come after every ranked span and never grow one
+    packed = pack_context(ranked, expansion=expansion)
+    if packed.text:
+        return packed.text
 
     # No vector + empty fallback: run GraphCypherQAChain (may return LLM answer)
     return query_graph(query)
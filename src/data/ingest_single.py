@@ -3,12 +3,27 @@ Ingest a single document (in-memory) into Neo4j.
 Used by Telegram bot file upload and programmatic ingestion.
 """
 from typing import Dict, List, Any
-from src.data.neo4j_client import get_neo4j_graph
-from src.data.ingestion import validate_json_structure
+from src.data.neo4j_driver import get_graph_client
+from src.data.schema_service import get_schema_service
+from src.data.citations import get_citation_index
+from src.data.ingestion import validate_json_structure, write_document
+from src.data.embeddings import embed_pending_chunks
+from src.data.entity_resolution import resolve_graph_data
 from src.core.logging_config import get_logger
 
 logger = get_logger(__name__)
 
+DOCUMENT_EXISTS_CYPHER = """
+MATCH (d:Document {file_name: $file_name})
+RETURN d.file_name AS file_name
+LIMIT 1
+"""
+
+
+def document_exists(file_name: str) -> bool:
+    """Return True if a Document with this file_name is already in the graph."""
+    return bool(get_graph_client().read(DOCUMENT_EXISTS_CYPHER, {"file_name": file_name}))
+
 
 def ingest_single_document(metadata: Dict[str, Any], graph_data: List[Dict[str, Any]]) -> None:
     """
@@ -26,79 +41,16 @@ def ingest_single_document(metadata: Dict[str, Any], graph_data: List[Dict[str,
     if not is_valid:
         raise ValueError(error_message)
 
-    graph = get_neo4j_graph()
+    graph_data = resolve_graph_data(graph_data)
     file_name = metadata.get("file_name")
-
-    # Create Document Node
-    doc_cypher = """
-    MERGE (d:Document {file_name: $file_name})
-    SET d.title = $title,
-        d.reg_number = $reg_number,
-        d.date_signed = $date_signed,
-        d.authority = $authority
-    """
-    graph.query(doc_cypher, {
-        "file_name": file_name,
-        "title": metadata.get("document_title"),
-        "reg_number": metadata.get("reg_number"),
-        "date_signed": metadata.get("date_signed"),
-        "authority": metadata.get("authority"),
-    })
-
-    for chunk in graph_data:
-        chunk_id = chunk.get("chunk_id")
-        original_text = chunk.get("original_text")
-        section = chunk.get("section", "")
-        chapter = chunk.get("chapter", "")
-
-        chunk_cypher = """
-        MERGE (c:Chunk {id: $chunk_id})
-        SET c.text = $text,
-            c.document_file = $file_name,
-            c.section = $section,
-            c.chapter = $chapter
-        WITH c
-        MATCH (d:Document {file_name: $file_name})
-        MERGE (d)-[:CONTAINS]->(c)
-        """
-        graph.query(chunk_cypher, {
-            "chunk_id": f"{file_name}_{chunk_id}",
-            "text": original_text,
-            "file_name": file_name,
-            "section": section,
-            "chapter": chapter,
-        })
-
-        for node in chunk.get("nodes", []):
-            node_id = node.get("id")
-            node_type = node.get("type", "Entity")
-            properties = node.get("properties", {})
-            safe_label = "".join(filter(str.isalnum, node_type)) or "Entity"
-
-            node_cypher = f"MERGE (n:{safe_label} {{id: $id}}) SET n += $props"
-            graph.query(node_cypher, {"id": node_id, "props": properties})
-
-            link_cypher = f"""
-            MATCH (c:Chunk {{id: $chunk_id}})
-            MATCH (n:{safe_label} {{id: $node_id}})
-            MERGE (c)-[:MENTIONS]->(n)
-            """
-            graph.query(link_cypher, {
-                "chunk_id": f"{file_name}_{chunk_id}",
-                "node_id": node_id,
-            })
-
-        for rel in chunk.get("relationships", []):
-            source_id = rel.get("source")
-            target_id = rel.get("target")
-            rel_type = rel.get("type", "RELATED_TO")
-            safe_rel_type = "".join(filter(lambda x: x.isalnum() or x == "_", rel_type)).upper() or "RELATED_TO"
-
-            rel_cypher = f"""
-            MATCH (a {{id: $source_id}}), (b {{id: $target_id}})
-            MERGE (a)-[r:{safe_rel_type}]->(b)
-            """
-            graph.query(rel_cypher, {"source_id": source_id, "target_id": target_id})
+    client = get_graph_client()
+    client.execute_write(write_document, metadata, graph_data)
 
     logger.info("ingest_single_complete", file_name=file_name, chunks=len(graph_data))
-    graph.refresh_schema()
+    get_schema_service().mark_stale()
+    get_citation_index().mark_stale()
+
+    try:
+        embed_pending_chunks(client, file_name=file_name)
+    except Exception as e:
+        logger.error("embedding_pipeline_error", file_name=file_name, error=str(e), exc_info=True)
@@ -2,11 +2,32 @@ import json
 import os
 import glob
 from typing import Dict, List, Any
-from src.data.neo4j_client import get_neo4j_graph
+from src.data.neo4j_driver import get_graph_client
+from src.data.schema_service import get_schema_service
+from src.data.chunk_store import layout_document, storage_mode
+from src.data.citations import (
+    DELETE_STALE_CITATIONS_CYPHER,
+    WRITE_CITATIONS_CYPHER,
+    get_citation_index,
+    index_document,
+)
+from src.data.document_utils import content_hash
+from src.data.embeddings import embed_pending_chunks
+from src.data.entity_resolution import resolve_graph_data
 from src.core.logging_config import get_logger
 
 logger = get_logger(__name__)
 
+def sanitize_label(node_type: str | None) -> str:
+    """Return a node label safe to interpolate into Cypher (alphanumerics only, default 'Entity')."""
+    return "".join(filter(str.isalnum, node_type or "")) or "Entity"
+
+
+def sanitize_rel_type(rel_type: str | None) -> str:
+    """Return a relationship type safe to interpolate into Cypher (default 'RELATED_TO')."""
+    return "".join(filter(lambda x: x.isalnum() or x == "_", rel_type or "")).upper() or "RELATED_TO"
+
+
 def validate_json_structure(data: Dict[str, Any]) -> tuple[bool, str]:
     """
     Validates the structure of JSON data for ingestion.
@@ -71,6 +92,113 @@ def validate_json_structure(data: Dict[str, Any]) -> tuple[bool, str]:
     
     return True, ""
 
+def write_document(tx: Any, metadata: Dict[str, Any], graph_data: List[Dict[str, Any]]) -> None:
+    """
+    Write one document's Document, Chunk and entity nodes inside a transaction.
+
+    Used as a managed write transaction function (client.execute_write), so a document
+    is written all-or-nothing and retried as a unit on transient errors.
+
+    Args:
+        tx: Transaction with a run(cypher, params) method.
+        metadata: Document metadata; must include 'file_name'.
+        graph_data: Resolved chunks with nodes and relationships.
+    """
+    file_name = metadata.get("file_name")
+    # Chunks always record their span in the document text; in offsets mode the text is
+    # stored once on the Document and chunks keep only the span
+    document_text, spans = layout_document(graph_data)
+    offsets = storage_mode() == "offsets"
+
+    # Create Document Node
+    doc_cypher = """
+    MERGE (d:Document {file_name: $file_name})
+    SET d.title = $title,
+        d.reg_number = $reg_number,
+        d.date_signed = $date_signed,
+        d.authority = $authority,
+        d.text = $text
+    """
+    tx.run(doc_cypher, {
+        "file_name": file_name,
+        "title": metadata.get("document_title"),
+        "reg_number": metadata.get("reg_number"),
+        "date_signed": metadata.get("date_signed"),
+        "authority": metadata.get("authority"),
+        "text": document_text if offsets else None,
+    })
+
+    for seq, (chunk, (start, end)) in enumerate(zip(graph_data, spans, strict=True)):
+        chunk_node_id = f"{file_name}_{chunk.get('chunk_id')}"
+        original_text = chunk.get("original_text")
+
+        # Create Chunk Node (optional, but good for grounding)
+        chunk_cypher = """
+        MERGE (c:Chunk {id: $chunk_id})
+        SET c.text = $text,
+            c.text_hash = $text_hash,
+            c.document_file = $file_name,
+            c.section = $section,
+            c.chapter = $chapter,
+            c.article = $article,
+            c.start = $start,
+            c.end = $end,
+            c.seq = $seq
+        WITH c
+        MATCH (d:Document {file_name: $file_name})
+        MERGE (d)-[:CONTAINS]->(c)
+        """
+        tx.run(chunk_cypher, {
+            "chunk_id": chunk_node_id,
+            "text": None if offsets else original_text,
+            "text_hash": content_hash(original_text) if original_text else None,
+            "file_name": file_name,
+            "section": chunk.get("section", ""),
+            "chapter": chunk.get("chapter", ""),
+            "article": chunk.get("article", ""),
+            "start": start,
+            "end": end,
+            "seq": seq,
+        })
+
+        # Create Nodes
+        for node in chunk.get("nodes", []):
+            node_id = node.get("id")
+            # Labels cannot be parameterized, so the type is sanitized before interpolation
+            safe_label = sanitize_label(node.get("type", "Entity"))
+
+            # We use MERGE on 'id' property.
+            node_cypher = f"""
+            MERGE (n:{safe_label} {{id: $id}})
+            SET n += $props
+            """
+            tx.run(node_cypher, {"id": node_id, "props": node.get("properties", {})})
+
+            # Link Node to Chunk (MENTIONS)
+            link_cypher = f"""
+            MATCH (c:Chunk {{id: $chunk_id}})
+            MATCH (n:{safe_label} {{id: $node_id}})
+            MERGE (c)-[:MENTIONS]->(n)
+            """
+            tx.run(link_cypher, {"chunk_id": chunk_node_id, "node_id": node_id})
+
+        # Create Relationships
+        for rel in chunk.get("relationships", []):
+            safe_rel_type = sanitize_rel_type(rel.get("type", "RELATED_TO"))
+
+            # Endpoint labels are unknown here; match by id, assumed unique across labels.
+            rel_cypher = f"""
+            MATCH (a {{id: $source_id}}), (b {{id: $target_id}})
+            MERGE (a)-[r:{safe_rel_type}]->(b)
+            """
+            tx.run(rel_cypher, {"source_id": rel.get("source"), "target_id": rel.get("target")})
+
+    # Citation index: where each article, chapter, BHMS and registration number is found
+    citations = index_document(metadata, graph_data, spans)
+    tx.run(WRITE_CITATIONS_CYPHER, {"rows": citations})
+    tx.run(DELETE_STALE_CITATIONS_CYPHER, {"file_name": file_name, "ids": [row["id"] for row in citations]})
+
+
 def ingest_json_data(json_dir: str) -> None:
     """
     Ingests graph data from JSON files into Neo4j.
@@ -84,8 +212,8 @@ def ingest_json_data(json_dir: str) -> None:
     if not os.path.isdir(json_dir):
         raise ValueError(f"Invalid directory: {json_dir}")
     
-    graph = get_neo4j_graph()
-    
+    client = get_graph_client()
+
     # Get all json files
     json_files = glob.glob(os.path.join(json_dir, "*.json"))
     
@@ -104,109 +232,26 @@ def ingest_json_data(json_dir: str) -> None:
                 continue
             
             metadata = data.get("metadata", {})
-            graph_data = data.get("graph_data", [])
+            graph_data = resolve_graph_data(data.get("graph_data", []))
             
-            # Create Document Node
-            doc_cypher = """
-            MERGE (d:Document {file_name: $file_name})
-            SET d.title = $title,
-                d.reg_number = $reg_number,
-                d.date_signed = $date_signed,
-                d.authority = $authority
-            """
-            graph.query(doc_cypher, {
-                "file_name": metadata.get("file_name"),
-                "title": metadata.get("document_title"),
-                "reg_number": metadata.get("reg_number"),
-                "date_signed": metadata.get("date_signed"),
-                "authority": metadata.get("authority")
-            })
-
-            for chunk in graph_data:
-                chunk_id = chunk.get("chunk_id")
-                original_text = chunk.get("original_text")
-                section = chunk.get("section", "")
-                chapter = chunk.get("chapter", "")
-
-                # Create Chunk Node (optional, but good for grounding)
-                chunk_cypher = """
-                MERGE (c:Chunk {id: $chunk_id})
-                SET c.text = $text,
-                    c.document_file = $file_name,
-                    c.section = $section,
-                    c.chapter = $chapter
-                WITH c
-                MATCH (d:Document {file_name: $file_name})
-                MERGE (d)-[:CONTAINS]->(c)
-                """
-                graph.query(chunk_cypher, {
-                    "chunk_id": f"{metadata.get('file_name')}_{chunk_id}",
-                    "text": original_text,
-                    "file_name": metadata.get("file_name"),
-                    "section": section,
-                    "chapter": chapter,
-                })
-                
-                # Create Nodes
-                for node in chunk.get("nodes", []):
-                    node_id = node.get("id")
-                    node_type = node.get("type", "Entity")
-                    properties = node.get("properties", {})
-                    
-                    # Dynamic label creation isn't directly supported in parameterized queries easily without APOC or string formatting.
-                    # For safety, we limit label characters or sanitise.
-                    # Assuming node_type is safe (alphanumeric).
-                    safe_label = "".join(filter(str.isalnum, node_type))
-                    if not safe_label: safe_label = "Entity"
-
-                    # Construct Cypher for Node
-                    # We use MERGE on 'id' property.
-                    node_cypher = f"""
-                    MERGE (n:{safe_label} {{id: $id}})
-                    SET n += $props
-                    """
-                    graph.query(node_cypher, {"id": node_id, "props": properties})
-                    
-                    # Link Node to Chunk (MENTIONS)
-                    link_cypher = f"""
-                    MATCH (c:Chunk {{id: $chunk_id}})
-                    MATCH (n:{safe_label} {{id: $node_id}})
-                    MERGE (c)-[:MENTIONS]->(n)
-                    """
-                    graph.query(link_cypher, {
-                        "chunk_id": f"{metadata.get('file_name')}_{chunk_id}",
-                        "node_id": node_id
-                    })
-
-                # Create Relationships
-                for rel in chunk.get("relationships", []):
-                    source_id = rel.get("source")
-                    target_id = rel.get("target")
-                    rel_type = rel.get("type", "RELATED_TO")
-                    
-                    # Sanitize Rel Type
-                    safe_rel_type = "".join(filter(lambda x: x.isalnum() or x == '_', rel_type)).upper()
-                    if not safe_rel_type: safe_rel_type = "RELATED_TO"
-
-                    # We don't know the exact labels of source/target here efficiently without querying or multiple passes.
-                    # But Cypher can match by ID if ID is unique across labels or if we rely on the id property index.
-                    # Assuming 'id' is unique for the entities in this context. 
-                    # A more robust way is to Match (a), (b) WHERE a.id = $s AND b.id = $t
-                    
-                    rel_cypher = f"""
-                    MATCH (a {{id: $source_id}}), (b {{id: $target_id}})
-                    MERGE (a)-[r:{safe_rel_type}]->(b)
-                    """
-                    graph.query(rel_cypher, {"source_id": source_id, "target_id": target_id})
-                    
+            client.execute_write(write_document, metadata, graph_data)
+            logger.info("document_ingested", file=file_path, chunks=len(graph_data))
+
         except json.JSONDecodeError as e:
             logger.error("invalid_json", file=file_path, error=str(e))
         except Exception as e:
             logger.error("ingestion_error", file=file_path, error=str(e), exc_info=True)
     
     logger.info("ingestion_complete")
-    graph.refresh_schema()
-    logger.info("schema_refreshed")
+    # New labels/relationship types appear in the Cypher prompt on the next query
+    get_schema_service().mark_stale()
+    get_citation_index().mark_stale()
+
+    # Embed new/changed chunks only; failures must not undo a successful ingestion
+    try:
+        embed_pending_chunks(client)
+    except Exception as e:
+        logger.error("embedding_pipeline_error", error=str(e), exc_info=True)
 
 if __name__ == "__main__":
     base_path = os.path.dirname(os.path.abspath(__file__))
@@ -0,0 +1,184 @@
+"""
+Offline CPU embedding backend.
+
+Hashing vectorizer over character n-grams. Uzbek text is written in both Cyrillic and
+Latin script, so text is transliterated to Latin before n-grams are taken; "ҳисобварақ"
+and "hisobvaraq" then land on the same features. Optionally, a TF-IDF + truncated SVD
+projection (LSA) fitted with NumPy on the corpus reduces the hashed space to a small dense
+vector. No network access is needed.
+
+Select with EMBEDDING_BACKEND=local. Set LOCAL_EMBEDDING_MODEL to an .npz file written by
+scripts/fit_local_embeddings.py to enable the SVD projection.
+"""
+import hashlib
+import os
+import re
+import zlib
+from typing import Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from src.core.logging_config import get_logger
+from src.data.document_utils import to_latin
+
+logger = get_logger(__name__)
+
+DEFAULT_DIMENSIONS = 512
+DEFAULT_NGRAM_RANGE = (3, 5)
+
+_NON_WORD = re.compile(r"[^\w']+")
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, transliterate Cyrillic to Latin and unify apostrophes."""
+    return _NON_WORD.sub(" ", to_latin(text.lower())).strip()
+
+
+class HashingEmbedder(Embeddings):
+    """
+    Character n-gram hashing embedder with optional LSA projection.
+
+    Implements the LangChain Embeddings interface, so it can be passed anywhere
+    OpenAIEmbeddings is used (Neo4jVector, the embedding pipeline).
+    """
+
+    def __init__(
+        self,
+        dimensions: int = DEFAULT_DIMENSIONS,
+        ngram_range: tuple[int, int] = DEFAULT_NGRAM_RANGE,
+        model_path: Optional[str] = None,
+    ):
+        """
+        Args:
+            dimensions: Output size when no projection is loaded (hashed space size).
+            ngram_range: Inclusive (min, max) character n-gram lengths.
+            model_path: Optional .npz file with "idf" and "components" arrays (see fit_lsa).
+        """
+        self.ngram_range = ngram_range
+        self.idf: Optional[np.ndarray] = None
+        self.components: Optional[np.ndarray] = None
+        self.n_features = dimensions
+        self.model = f"hashing-{dimensions}-{ngram_range[0]}{ngram_range[1]}"
+        if model_path:
+            self.load(model_path)
+
+    @property
+    def dimensions(self) -> int:
+        """Size of the vectors returned by embed_documents."""
+        return self.components.shape[0] if self.components is not None else self.n_features
+
+    def _features(self, text: str) -> list[int]:
+        """Return crc32 hashes of the padded character n-grams of text."""
+        lo, hi = self.ngram_range
+        hashes: list[int] = []
+        for word in normalize_text(text).split():
+            padded = f" {word} ".encode()
+            size = len(padded)
+            for n in range(lo, hi + 1):
+                if size < n:
+                    break
+                hashes.extend(zlib.crc32(padded[i : i + n]) for i in range(size - n + 1))
+        return hashes
+
+    def _hash_matrix(self, texts: list[str]) -> np.ndarray:
+        """Signed, sublinear term-frequency matrix of shape (len(texts), n_features)."""
+        rows: list[np.ndarray] = []
+        cols: list[np.ndarray] = []
+        for i, text in enumerate(texts):
+            h = np.fromiter(self._features(text), dtype=np.uint32)
+            rows.append(np.full(h.shape, i, dtype=np.int64))
+            cols.append(h)
+        matrix = np.zeros((len(texts), self.n_features), dtype=np.float32)
+        if not rows:
+            return matrix
+        h = np.concatenate(cols)
+        signs = np.where(h & np.uint32(0x80000000), -1.0, 1.0).astype(np.float32)
+        np.add.at(matrix, (np.concatenate(rows), (h % self.n_features).astype(np.int64)), signs)
+        sublinear: np.ndarray = np.sign(matrix) * np.log1p(np.abs(matrix))
+        return sublinear
+
+    @staticmethod
+    def _l2_normalize(matrix: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        normalized: np.ndarray = matrix / norms
+        return normalized
+
+    def transform(self, texts: list[str]) -> np.ndarray:
+        """Embed a batch of texts into an (n, dimensions) float32 array of unit vectors."""
+        matrix = self._hash_matrix(texts)
+        if self.idf is not None:
+            matrix *= self.idf
+        matrix = self._l2_normalize(matrix)
+        if self.components is not None:
+            matrix = self._l2_normalize(matrix @ self.components.T)
+        return matrix.astype(np.float32, copy=False)
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        """Embed a batch of documents (vectorized over the whole batch)."""
+        vectors: list[list[float]] = self.transform(list(texts)).tolist()
+        return vectors
+
+    def embed_query(self, text: str) -> list[float]:
+        """Embed a single query string."""
+        vector: list[float] = self.transform([text])[0].tolist()
+        return vector
+
+    def fit_lsa(self, texts: list[str], dimensions: int, n_features: int = 2**14) -> None:
+        """
+        Fit a TF-IDF weighting and truncated SVD projection on a corpus.
+
+        Args:
+            texts: Corpus texts (e.g. all Chunk texts).
+            dimensions: Number of SVD components kept (output vector size).
+            n_features: Size of the hashed feature space before projection.
+        """
+        self.n_features = n_features
+        self.idf = None
+        self.components = None
+        tf = self._hash_matrix(texts)
+        doc_freq = np.count_nonzero(tf, axis=0).astype(np.float32)
+        idf = np.log((1.0 + len(texts)) / (1.0 + doc_freq)) + 1.0
+        weighted = self._l2_normalize(tf * idf)
+        _, _, vt = np.linalg.svd(weighted, full_matrices=False)
+        self.idf = idf.astype(np.float32)
+        self.components = vt[: min(dimensions, vt.shape[0])].astype(np.float32)
+        self._set_model_id()
+
+    def save(self, path: str) -> None:
+        """Write the fitted projection to an .npz file."""
+        if self.idf is None or self.components is None:
+            raise ValueError("Nothing to save: call fit_lsa() first.")
+        np.savez_compressed(
+            path,
+            idf=self.idf,
+            components=self.components,
+            ngram_range=np.array(self.ngram_range),
+        )
+
+    def load(self, path: str) -> None:
+        """Load a projection written by save()."""
+        with np.load(path) as data:
+            self.idf = data["idf"].astype(np.float32)
+            self.components = data["components"].astype(np.float32)
+            self.ngram_range = (int(data["ngram_range"][0]), int(data["ngram_range"][1]))
+        self.n_features = self.idf.shape[0]
+        self._set_model_id()
+
+    def _set_model_id(self) -> None:
+        """Tie the model id to the fitted weights so cached vectors never mix across fits."""
+        if self.components is None:
+            raise ValueError("No projection fitted: call fit_lsa() or load() first.")
+        digest = hashlib.sha256(self.components.tobytes()).hexdigest()[:12]
+        self.model = f"lsa-{self.dimensions}-{digest}"
+
+
+def get_local_embedder() -> HashingEmbedder:
+    """Build the local embedder from LOCAL_EMBEDDING_DIMENSIONS / LOCAL_EMBEDDING_MODEL."""
+    model_path = os.getenv("LOCAL_EMBEDDING_MODEL") or None
+    if model_path and not os.path.isfile(model_path):
+        logger.warning("local_embedding_model_missing", path=model_path)
+        model_path = None
+    dimensions = int(os.getenv("LOCAL_EMBEDDING_DIMENSIONS", str(DEFAULT_DIMENSIONS)))
+    return HashingEmbedder(dimensions=dimensions, model_path=model_path)
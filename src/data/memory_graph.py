@@ -0,0 +1,829 @@
+"""
+In-memory graph backend for offline runs and benchmarks.
+
+Implements the Neo4jGraph query surface (query, refresh_schema, schema) for the subset
+of Cypher this project issues: the MERGE/SET/MATCH shapes used by ingestion, the
+CONTAINS scans in fallback_text_search (on stored or sliced chunk text, see
+src.data.chunk_store), the embedding pipeline, graph expansion, graph analytics and
+citation index statements, index creation and full-text queries. Anything else raises ValueError, the same error
+Neo4jGraph raises for Cypher it cannot run, so callers' error handling is unchanged.
+
+Nodes live in a dict keyed by internal id, with a label index and a (label, key) ->
+value property index for the merge keys. Chunk texts are additionally kept in parallel
+arrays so CONTAINS scans run over a flat list of lowercased strings.
+
+Select with NEO4J_URI=memory:// (see get_neo4j_graph).
+"""
+import hashlib
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import Any, Callable, Optional
+
+import numpy as np
+from langchain_community.graphs.graph_store import GraphStore
+
+from src.core.logging_config import get_logger
+from src.data.chunk_store import SLICED_SEARCH_CYPHER
+from src.data.citations import (
+    DELETE_STALE_CITATIONS_CYPHER,
+    LOAD_CITATIONS_CYPHER,
+    WRITE_CITATIONS_CYPHER,
+)
+from src.data.embeddings import PENDING_CHUNKS_CYPHER, WRITE_EMBEDDINGS_CYPHER
+from src.data.graph_analytics import (
+    DELETE_STALE_COMMUNITIES_CYPHER,
+    LOAD_COMMUNITIES_CYPHER,
+    LOAD_ENTITY_LINKS_CYPHER,
+    LOAD_MEMBERS_CYPHER,
+    LOAD_MENTIONS_CYPHER,
+    WRITE_COMMUNITIES_CYPHER,
+    WRITE_SCORES_CYPHER,
+)
+from src.data.graph_expansion import EXPANSION_CYPHER, FETCH_CHUNKS_CYPHER
+from src.data.neo4j_driver import is_write_query
+from src.data.query_monitor import monitor_work
+
+logger = get_logger(__name__)
+
+# Properties used as MERGE/MATCH keys; they get a (label, key) -> node index
+INDEXED_KEYS = ("id", "file_name")
+
+_WORD = re.compile(r"\w+")
+_LUCENE_OPERATORS = {"and", "or", "not", "to"}
+
+_NODE = r"\((\w+):(\w+) \{(\w+): \$(\w+)\}\)"
+_SET_ITEM = re.compile(r"^(\w+)(?:\.(\w+) = | \+= )\$(\w+)$")
+
+
+def _normalize(cypher: str) -> str:
+    """Collapse whitespace so differently indented copies of a statement compare equal."""
+    return " ".join(cypher.split())
+
+
+# Statement shapes, matched against the normalized Cypher text
+_MERGE_NODE = re.compile(
+    rf"^MERGE {_NODE}(?: SET (?P<set>.+?))?"
+    rf"(?: WITH \1 MATCH {_NODE} MERGE \(\6\)-\[:(\w+)\]->\(\1\))?$"
+)
+_MATCH_MERGE_REL = re.compile(rf"^MATCH {_NODE} MATCH {_NODE} MERGE \(\1\)-\[(?:\w+)?:(\w+)\]->\(\5\)$")
+_MATCH_ANY_MERGE_REL = re.compile(
+    r"^MATCH \((\w+) \{(\w+): \$(\w+)\}\), \((\w+) \{(\w+): \$(\w+)\}\) "
+    r"MERGE \(\1\)-\[(?:\w+)?:(\w+)\]->\(\4\)$"
+)
+_CONTAINS_SCAN = re.compile(
+    r"^MATCH \((\w+):(\w+)\) WHERE \1\.(\w+) IS NOT NULL AND toLower\(\1\.\3\) "
+    r"CONTAINS toLower\(\$(\w+)\) RETURN \1\.\3 AS (\w+)(?P<extra>(?:, \1\.\w+ AS \w+)*)(?: LIMIT (\d+))?$"
+)
+_RETURN_ITEM = re.compile(r"\w+\.(\w+) AS (\w+)")
+_CREATE_INDEX = re.compile(
+    r"^CREATE (FULLTEXT|VECTOR) INDEX (\w+) IF NOT EXISTS FOR \((\w+):(\w+)\) ON "
+    r"(?:EACH \[(.+?)\]|\((.+?)\))(?: OPTIONS .*)?$"
+)
+_LOOKUP = re.compile(
+    r"^MATCH \((\w+):(\w+) \{(\w+): \$(\w+)\}\) RETURN \1\.(\w+) AS (\w+)(?: LIMIT (\d+))?$"
+)
+_RETURN_LITERAL = re.compile(r"^RETURN (\d+) AS (\w+)$")
+_FULLTEXT_QUERY = re.compile(
+    r"""^CALL db\.index\.fulltext\.queryNodes\(["'](\w+)["'], \$(\w+)\) YIELD node, score """
+    r"RETURN node\.(\w+) AS (\w+)(, score)?(?: ORDER BY score DESC)?(?: LIMIT (\d+))?$"
+)
+
+
+class _Node:
+    __slots__ = ("nid", "labels", "props")
+
+    def __init__(self, nid: int, labels: set[str]):
+        self.nid = nid
+        self.labels = labels
+        self.props: dict[str, Any] = {}
+
+
+class InMemoryGraph(GraphStore):
+    """
+    Process-local graph store with the Neo4jGraph query interface.
+
+    Thread-safe; all statements run under one lock.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._nodes: dict[int, _Node] = {}
+        self._next_id = 0
+        self._by_label: dict[str, set[int]] = defaultdict(set)
+        self._by_key: dict[tuple[str, str], dict[Any, int]] = defaultdict(dict)
+        self._by_id: dict[Any, set[int]] = defaultdict(set)
+        # (document_file, seq) -> Chunk node id, the chunk_document_seq index of graph expansion
+        self._by_seq: dict[tuple[Any, Any], int] = {}
+        self._rels: set[tuple[int, str, int]] = set()
+        # Array-backed Chunk text store for CONTAINS scans: position -> node id / lowered text
+        self._text_nids: list[int] = []
+        self._text_lower: list[str] = []
+        self._text_pos: dict[int, int] = {}
+        self._indexes: dict[str, dict[str, Any]] = {}
+        self._fulltext_cache: dict[str, Any] = {}
+        self._vector_cache: dict[tuple[str, str], tuple[list[int], np.ndarray]] = {}
+        # rel type -> (relationship count when built, outgoing, incoming); cleared when rels are deleted
+        self._adjacency_cache: dict[str, tuple[int, dict[int, list[int]], dict[int, list[int]]]] = {}
+        self._plans: dict[str, tuple[Callable, Any]] = {}
+        self.schema = ""
+        self.structured_schema: dict[str, Any] = {}
+
+    # -- GraphStore interface -------------------------------------------------
+
+    @property
+    def get_schema(self) -> str:
+        return self.schema
+
+    @property
+    def get_structured_schema(self) -> dict[str, Any]:
+        return self.structured_schema
+
+    def add_graph_documents(self, graph_documents: list, include_source: bool = False) -> None:
+        """
+        Merge LangChain GraphDocuments the way ingestion does: nodes by (type, id), relationships by type.
+
+        With include_source, each source document becomes a Document node (keyed by its
+        metadata id, else the md5 of its text) that MENTIONS the document's nodes.
+        """
+        with self._lock:
+            for document in graph_documents:
+                nids = []
+                for node in document.nodes:
+                    nid = self._merge(node.type, "id", node.id)
+                    for key, value in (node.properties or {}).items():
+                        self._set(nid, key, value)
+                    nids.append(nid)
+                for rel in document.relationships:
+                    start = self._merge(rel.source.type, "id", rel.source.id)
+                    end = self._merge(rel.target.type, "id", rel.target.id)
+                    self._rels.add((start, rel.type, end))
+                if include_source and document.source is not None:
+                    source = document.source
+                    source_id = source.metadata.get("id") or hashlib.md5(source.page_content.encode()).hexdigest()
+                    did = self._merge("Document", "id", source_id)
+                    self._set(did, "text", source.page_content)
+                    for key, value in source.metadata.items():
+                        self._set(did, key, value)
+                    self._rels.update((did, "MENTIONS", nid) for nid in nids)
+
+    def query(self, query: str, params: Optional[dict] = None) -> list[dict[str, Any]]:
+        """
+        Run one supported Cypher statement.
+
+        Raises:
+            ValueError: If the statement shape is not supported.
+        """
+        handler, match = self._plan(query)
+        with self._lock:
+            rows: list[dict[str, Any]] = handler(match, params or {})
+            return rows
+
+    def refresh_schema(self) -> None:
+        """Rebuild schema / structured_schema in the Neo4jGraph format from the stored data."""
+        with self._lock:
+            node_props: dict[str, dict[str, str]] = defaultdict(dict)
+            for node in self._nodes.values():
+                for label in node.labels:
+                    for key, value in node.props.items():
+                        node_props[label].setdefault(key, _type_name(value))
+            rel_patterns = sorted(
+                {
+                    (label_a, rel_type, label_b)
+                    for a, rel_type, b in self._rels
+                    for label_a in self._nodes[a].labels
+                    for label_b in self._nodes[b].labels
+                }
+            )
+        self.structured_schema = {
+            "node_props": {
+                label: [{"property": k, "type": t} for k, t in props.items()]
+                for label, props in sorted(node_props.items())
+            },
+            "rel_props": {},
+            "relationships": [{"start": a, "type": r, "end": b} for a, r, b in rel_patterns],
+            "metadata": {"constraint": [], "index": list(self._indexes.values())},
+        }
+        node_lines = [
+            f"{label} {{{', '.join(f'{k}: {t}' for k, t in props.items())}}}"
+            for label, props in sorted(node_props.items())
+        ]
+        rel_lines = [f"(:{a})-[:{r}]->(:{b})" for a, r, b in rel_patterns]
+        self.schema = (
+            "Node properties:\n" + "\n".join(node_lines)
+            + "\nRelationship properties:\n\nThe relationships:\n" + "\n".join(rel_lines)
+        )
+
+    # -- Python API -----------------------------------------------------------
+
+    def clear(self) -> None:
+        """Drop all data and indexes."""
+        with self._lock:
+            self._reset()
+
+    def counts(self) -> dict[str, int]:
+        """Node count per label plus the relationship count."""
+        with self._lock:
+            result = {label: len(nids) for label, nids in self._by_label.items()}
+            result["relationships"] = len(self._rels)
+            return result
+
+    def vector_search(
+        self, embedding: list[float], k: int = 4, label: str = "Chunk", prop: str = "embedding"
+    ) -> list[tuple[dict[str, Any], float]]:
+        """
+        Exact cosine similarity search over node vectors (what the vector index answers).
+
+        Returns:
+            Up to k (properties, score) pairs, best first.
+        """
+        with self._lock:
+            cached = self._vector_cache.get((label, prop))
+            if cached is None:
+                nids = [n for n in self._by_label.get(label, ()) if self._nodes[n].props.get(prop)]
+                matrix = np.array([self._nodes[n].props[prop] for n in nids], dtype=np.float32)
+                if len(nids):
+                    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+                    norms[norms == 0] = 1.0
+                    matrix /= norms
+                cached = self._vector_cache[(label, prop)] = (nids, matrix)
+            nids, matrix = cached
+            if not nids:
+                return []
+            q = np.asarray(embedding, dtype=np.float32)
+            q /= np.linalg.norm(q) or 1.0
+            scores = matrix @ q
+            top = np.argsort(-scores)[:k]
+            return [(dict(self._nodes[nids[i]].props), float(scores[i])) for i in top]
+
+    # -- Planning -------------------------------------------------------------
+
+    def _plan(self, query: str) -> tuple[Callable, Any]:
+        """Map a statement to (handler, match); plans are cached by statement text."""
+        plan = self._plans.get(query)
+        if plan is not None:
+            return plan
+        text = _normalize(query)
+        if text == _PENDING_CHUNKS:
+            plan = (self._pending_chunks, None)
+        elif text == _WRITE_EMBEDDINGS:
+            plan = (self._write_embeddings, None)
+        elif text == _EXPANSION:
+            plan = (self._expansion, None)
+        elif text == _FETCH_CHUNKS:
+            plan = (self._fetch_chunks, None)
+        elif text in _ANALYTICS:
+            plan = (getattr(self, _ANALYTICS[text]), None)
+        else:
+            for pattern, handler in (
+                (_MERGE_NODE, self._merge_node),
+                (_MATCH_MERGE_REL, self._match_merge_rel),
+                (_MATCH_ANY_MERGE_REL, self._match_any_merge_rel),
+                (_CONTAINS_SCAN, self._contains_scan),
+                (_SLICED_SEARCH, self._sliced_search),
+                (_CREATE_INDEX, self._create_index),
+                (_FULLTEXT_QUERY, self._fulltext_query),
+                (_LOOKUP, self._lookup),
+                (_RETURN_LITERAL, self._return_literal),
+            ):
+                match = pattern.match(text)
+                if match:
+                    plan = (handler, match)
+                    break
+        if plan is None:
+            raise ValueError(f"Cypher statement not supported by the in-memory graph: {text[:200]}")
+        self._plans[query] = plan
+        return plan
+
+    # -- Storage primitives ---------------------------------------------------
+
+    def _find(self, label: Optional[str], key: str, value: Any) -> Optional[int]:
+        if label is None:
+            if key == "id":
+                nids = self._by_id.get(value)
+                return min(nids) if nids else None
+            return next((n for n, node in self._nodes.items() if node.props.get(key) == value), None)
+        if key in INDEXED_KEYS:
+            return self._by_key[(label, key)].get(value)
+        return next(
+            (n for n in self._by_label.get(label, ()) if self._nodes[n].props.get(key) == value), None
+        )
+
+    def _merge(self, label: str, key: str, value: Any) -> int:
+        nid = self._find(label, key, value)
+        if nid is not None:
+            return nid
+        nid = self._next_id
+        self._next_id += 1
+        self._nodes[nid] = _Node(nid, {label})
+        self._by_label[label].add(nid)
+        self._set(nid, key, value)
+        return nid
+
+    def _set(self, nid: int, key: str, value: Any) -> None:
+        node = self._nodes[nid]
+        old = node.props.get(key)
+        seq_key = "Chunk" in node.labels and key in ("document_file", "seq")
+        if seq_key:
+            self._by_seq.pop((node.props.get("document_file"), node.props.get("seq")), None)
+        if value is None:
+            node.props.pop(key, None)
+        else:
+            node.props[key] = value
+        if key in INDEXED_KEYS:
+            for label in node.labels:
+                index = self._by_key[(label, key)]
+                if old is not None and index.get(old) == nid:
+                    del index[old]
+                if value is not None:
+                    index[value] = nid
+            if key == "id":
+                if old is not None:
+                    self._by_id[old].discard(nid)
+                if value is not None:
+                    self._by_id[value].add(nid)
+        if seq_key and node.props.get("document_file") is not None and node.props.get("seq") is not None:
+            self._by_seq[(node.props["document_file"], node.props["seq"])] = nid
+        if key == "text" and "Chunk" in node.labels:
+            self._set_text(nid, value)
+        if self._vector_cache:
+            self._vector_cache.clear()
+
+    def _delete(self, nid: int) -> None:
+        """DETACH DELETE one node (Community and Citation nodes only; chunks stay in the scan arrays)."""
+        node = self._nodes[nid]
+        for key in INDEXED_KEYS:
+            self._set(nid, key, None)
+        for label in node.labels:
+            self._by_label[label].discard(nid)
+        self._rels = {rel for rel in self._rels if nid not in (rel[0], rel[2])}
+        self._adjacency_cache.clear()
+        del self._nodes[nid]
+
+    def _set_text(self, nid: int, text: Optional[str]) -> None:
+        lowered = text.lower() if isinstance(text, str) else ""
+        pos = self._text_pos.get(nid)
+        if pos is None:
+            self._text_pos[nid] = len(self._text_nids)
+            self._text_nids.append(nid)
+            self._text_lower.append(lowered)
+        else:
+            self._text_lower[pos] = lowered
+        self._fulltext_cache.clear()
+
+    def _chunk_text(self, props: dict[str, Any]) -> Optional[str]:
+        """A chunk's stored text, or its start/end slice of the Document text (CHUNK_TEXT)."""
+        stored: Optional[str] = props.get("text")
+        if stored is not None:
+            return stored
+        start, end = props.get("start"), props.get("end")
+        nid = self._by_key[("Document", "file_name")].get(props.get("document_file"))
+        if nid is None or start is None or end is None:
+            return None
+        text = self._nodes[nid].props.get("text")
+        return text[start:end] if isinstance(text, str) else None
+
+    def _adjacency(self, rel_type: str) -> tuple[dict[int, list[int]], dict[int, list[int]]]:
+        """Outgoing and incoming neighbours (ascending node id) over one relationship type."""
+        cached = self._adjacency_cache.get(rel_type)
+        if cached is None or cached[0] != len(self._rels):
+            outgoing: dict[int, list[int]] = defaultdict(list)
+            incoming: dict[int, list[int]] = defaultdict(list)
+            for start, kind, end in sorted(self._rels):
+                if kind == rel_type:
+                    outgoing[start].append(end)
+                    incoming[end].append(start)
+            cached = self._adjacency_cache[rel_type] = (len(self._rels), outgoing, incoming)
+        return cached[1], cached[2]
+
+    def _apply_set(self, nid: int, clause: Optional[str], var: str, params: dict) -> None:
+        if not clause:
+            return
+        for item in clause.split(", "):
+            match = _SET_ITEM.match(item.strip())
+            if not match or match.group(1) != var:
+                raise ValueError(f"Unsupported SET item for the in-memory graph: {item}")
+            prop, param = match.group(2), match.group(3)
+            if prop is None:
+                for key, value in (params.get(param) or {}).items():
+                    self._set(nid, key, value)
+            else:
+                self._set(nid, prop, params.get(param))
+
+    # -- Handlers -------------------------------------------------------------
+
+    def _merge_node(self, m: re.Match, params: dict) -> list:
+        var, label, key, param = m.group(1, 2, 3, 4)
+        nid = self._merge(label, key, params.get(param))
+        self._apply_set(nid, m.group("set"), var, params)
+        if m.group(6):
+            other = self._find(m.group(7), m.group(8), params.get(m.group(9)))
+            if other is not None:
+                self._rels.add((other, m.group(10), nid))
+        return []
+
+    def _match_merge_rel(self, m: re.Match, params: dict) -> list:
+        start = self._find(m.group(2), m.group(3), params.get(m.group(4)))
+        end = self._find(m.group(6), m.group(7), params.get(m.group(8)))
+        if start is not None and end is not None:
+            self._rels.add((start, m.group(9), end))
+        return []
+
+    def _match_any_merge_rel(self, m: re.Match, params: dict) -> list:
+        # MATCH without label binds every node with the id; Cypher MERGEs one rel per pair
+        starts = self._by_id.get(params.get(m.group(3)), ()) if m.group(2) == "id" else ()
+        ends = self._by_id.get(params.get(m.group(6)), ()) if m.group(5) == "id" else ()
+        for start in list(starts):
+            for end in list(ends):
+                self._rels.add((start, m.group(7), end))
+        return []
+
+    def _contains_scan(self, m: re.Match, params: dict) -> list:
+        label, prop, param, alias = m.group(2, 3, 4, 5)
+        limit = int(m.group(7)) if m.group(7) else None
+        extra = _RETURN_ITEM.findall(m.group("extra"))
+        needle = str(params.get(param, "")).lower()
+        rows: list[dict[str, Any]] = []
+        if label == "Chunk" and prop == "text":
+            nids = (self._text_nids[pos] for pos, lowered in enumerate(self._text_lower) if needle in lowered)
+        else:
+            nids = (
+                nid for nid in sorted(self._by_label.get(label, ()))
+                if isinstance(self._nodes[nid].props.get(prop), str)
+                and needle in self._nodes[nid].props[prop].lower()
+            )
+        for nid in nids:
+            props = self._nodes[nid].props
+            if props.get(prop) is None:
+                continue
+            rows.append({alias: props.get(prop), **{name: props.get(key) for key, name in extra}})
+            if limit is not None and len(rows) >= limit:
+                break
+        return rows
+
+    def _sliced_search(self, m: re.Match, params: dict) -> list:
+        limit = int(m.group(1))
+        needle = str(params.get("keyword", "")).lower()
+        rows: list[dict[str, Any]] = []
+        if not needle:
+            return rows
+        contains, _ = self._adjacency("CONTAINS")
+        for did in sorted(self._by_label.get("Document", ())):
+            text = self._nodes[did].props.get("text")
+            if not isinstance(text, str):
+                continue
+            lowered = text.lower()
+            hits = []
+            hit = lowered.find(needle)
+            while hit >= 0:
+                hits.append(hit)
+                hit = lowered.find(needle, hit + 1)
+            for nid in contains.get(did, []):
+                props = self._nodes[nid].props
+                start, end = props.get("start"), props.get("end")
+                if start is None or end is None or not any(start <= h and h + len(needle) <= end for h in hits):
+                    continue
+                rows.append({
+                    "text": text[start:end], "id": props.get("id"), "document": props.get("document_file"),
+                    "start": start, "end": end, "article": props.get("article"), "pagerank": props.get("pagerank"),
+                })
+                if len(rows) >= limit:
+                    return rows
+        return rows
+
+    def _lookup(self, m: re.Match, params: dict) -> list:
+        label, key, param, prop, alias = m.group(2, 3, 4, 5, 6)
+        nid = self._find(label, key, params.get(param))
+        if nid is None or m.group(7) == "0":
+            return []
+        return [{alias: self._nodes[nid].props.get(prop)}]
+
+    def _return_literal(self, m: re.Match, params: dict) -> list:
+        # Connectivity probe used by health checks
+        return [{m.group(2): int(m.group(1))}]
+
+    def _create_index(self, m: re.Match, params: dict) -> list:
+        kind, name, var, label = m.group(1, 2, 3, 4)
+        fields = m.group(5) or m.group(6)
+        props = [f.strip().split(".", 1)[1] for f in fields.split(",")]
+        self._indexes.setdefault(
+            name, {"name": name, "type": kind, "label": label, "properties": props}
+        )
+        return []
+
+    def _fulltext_query(self, m: re.Match, params: dict) -> list:
+        name, param, prop, alias, with_score = m.group(1, 2, 3, 4, 5)
+        limit = int(m.group(6)) if m.group(6) else None
+        index = self._indexes.get(name)
+        if index is None or index["type"] != "FULLTEXT":
+            raise ValueError(f"There is no such fulltext schema index: {name}")
+        postings, doc_len, avg_len = self._fulltext_postings(index)
+        terms = [t for t in _WORD.findall(str(params.get(param, "")).lower()) if t not in _LUCENE_OPERATORS]
+        n_docs = max(len(doc_len), 1)
+        scores: Counter = Counter()
+        # BM25 (k1=1.2, b=0.75), close to Lucene's default similarity
+        for term in terms:
+            docs = postings.get(term)
+            if not docs:
+                continue
+            idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            for nid, tf in docs.items():
+                norm = tf + 1.2 * (0.25 + 0.75 * doc_len[nid] / avg_len)
+                scores[nid] += idf * tf * 2.2 / norm
+        rows = []
+        for nid, score in scores.most_common(limit):
+            row = {alias: self._nodes[nid].props.get(prop)}
+            if with_score:
+                row["score"] = score
+            rows.append(row)
+        return rows
+
+    def _fulltext_postings(self, index: dict) -> tuple[dict, dict, float]:
+        cached: Optional[tuple[dict, dict, float]] = self._fulltext_cache.get(index["name"])
+        if cached is not None:
+            return cached
+        postings: dict[str, dict[int, int]] = defaultdict(dict)
+        doc_len: dict[int, int] = {}
+        for nid in self._by_label.get(index["label"], ()):
+            props = self._nodes[nid].props
+            tokens = _WORD.findall(" ".join(str(props.get(p) or "") for p in index["properties"]).lower())
+            doc_len[nid] = len(tokens)
+            for token, tf in Counter(tokens).items():
+                postings[token][nid] = tf
+        avg_len = (sum(doc_len.values()) / len(doc_len)) if doc_len else 1.0
+        cached = (postings, doc_len, avg_len or 1.0)
+        self._fulltext_cache[index["name"]] = cached
+        return cached
+
+    def _pending_chunks(self, _: Any, params: dict) -> list:
+        file_name, model = params.get("file_name"), params.get("model")
+        rows = []
+        for nid in self._text_nids:
+            p = self._nodes[nid].props
+            text = self._chunk_text(p)
+            if text is None or (file_name is not None and p.get("document_file") != file_name):
+                continue
+            if (
+                p.get("embedding") is None
+                or p.get("text_hash") is None
+                or p.get("embedding_hash") != p.get("text_hash")
+                or p.get("embedding_model") != model
+            ):
+                rows.append({"id": p.get("id"), "text": text})
+        return rows
+
+    def _expansion(self, _: Any, params: dict) -> list:
+        chunk_index = self._by_key[("Chunk", "id")]
+        mentions, mentioned_by = self._adjacency("MENTIONS")
+        fanout = params.get("fanout")
+        rows = []
+        for seed_id in params.get("ids") or []:
+            nid = chunk_index.get(seed_id)
+            if nid is None:
+                continue
+            props = self._nodes[nid].props
+            seq = props.get("seq")
+            neighbours = (
+                self._by_seq.get((props.get("document_file"), seq + offset)) if seq is not None else None
+                for offset in (-1, 1)
+            )
+            siblings = [self._nodes[c].props.get("id") for c in neighbours if c is not None]
+            entities = list(dict.fromkeys(mentions.get(nid, ())))
+            if not entities:
+                rows.append({"seed": seed_id, "siblings": siblings, "entity": None, "degree": None, "others": []})
+            for entity in entities:
+                chunks = [c for c in dict.fromkeys(mentioned_by.get(entity, ())) if "Chunk" in self._nodes[c].labels]
+                rows.append({
+                    "seed": seed_id,
+                    "siblings": siblings,
+                    "entity": self._nodes[entity].props.get("id"),
+                    "degree": len(chunks),
+                    "others": [self._nodes[c].props.get("id") for c in chunks][:fanout],
+                })
+        return rows
+
+    def _fetch_chunks(self, _: Any, params: dict) -> list:
+        chunk_index = self._by_key[("Chunk", "id")]
+        rows = []
+        for chunk_id in params.get("ids") or []:
+            nid = chunk_index.get(chunk_id)
+            if nid is None:
+                continue
+            props = self._nodes[nid].props
+            rows.append({
+                "id": chunk_id, "text": self._chunk_text(props), "document": props.get("document_file"),
+                "start": props.get("start"), "end": props.get("end"), "article": props.get("article"),
+            })
+        return rows
+
+    def _load_mentions(self, _: Any, params: dict) -> list:
+        return [
+            {
+                "chunk": str(start), "chunk_id": self._nodes[start].props.get("id"),
+                "text_hash": self._nodes[start].props.get("text_hash"),
+                "entity": str(end), "entity_id": self._nodes[end].props.get("id"),
+            }
+            for start, kind, end in sorted(self._rels)
+            if kind == "MENTIONS" and "Chunk" in self._nodes[start].labels
+        ]
+
+    def _load_entity_links(self, _: Any, params: dict) -> list:
+        excluded = {"Chunk", "Document", "Community"}
+        return [
+            {"source": str(start), "target": str(end)}
+            for start, _kind, end in sorted(self._rels)
+            if not self._nodes[start].labels & excluded and not self._nodes[end].labels & excluded
+        ]
+
+    def _load_members(self, _: Any, params: dict) -> list:
+        rows = []
+        for element_id in params.get("ids") or []:
+            node = self._nodes.get(int(element_id))
+            if node is None:
+                continue
+            p = node.props
+            rows.append({
+                "node": element_id, "labels": sorted(node.labels),
+                "name": next((p[k] for k in ("nomi", "name", "id") if p.get(k) is not None), None),
+                "text": self._chunk_text(p) if "Chunk" in node.labels else None,
+            })
+        return rows
+
+    def _write_scores(self, _: Any, params: dict) -> list:
+        for row in params.get("rows") or []:
+            nid = int(row["node"])
+            if nid in self._nodes:
+                self._set(nid, "pagerank", row["pagerank"])
+                self._set(nid, "community", row["community"])
+        return []
+
+    def _write_communities(self, _: Any, params: dict) -> list:
+        for row in params.get("rows") or []:
+            nid = self._merge("Community", "id", row["id"])
+            for key in ("title", "summary", "member_hash", "size", "rank"):
+                self._set(nid, key, row[key])
+        return []
+
+    def _delete_stale_communities(self, _: Any, params: dict) -> list:
+        keep = set(params.get("ids") or [])
+        for nid in list(self._by_label.get("Community", ())):
+            if self._nodes[nid].props.get("id") not in keep:
+                self._delete(nid)
+        return []
+
+    def _load_communities(self, _: Any, params: dict) -> list:
+        return [
+            {key: self._nodes[nid].props.get(key) for key in ("id", "title", "summary", "member_hash", "rank")}
+            for nid in sorted(self._by_label.get("Community", ()))
+        ]
+
+    def _write_citations(self, _: Any, params: dict) -> list:
+        for row in params.get("rows") or []:
+            nid = self._merge("Citation", "id", row["id"])
+            for key in ("key", "chunk_id", "document_file", "start", "end", "seq"):
+                self._set(nid, key, row[key])
+        return []
+
+    def _delete_stale_citations(self, _: Any, params: dict) -> list:
+        keep = set(params.get("ids") or [])
+        for nid in list(self._by_label.get("Citation", ())):
+            props = self._nodes[nid].props
+            if props.get("document_file") == params.get("file_name") and props.get("id") not in keep:
+                self._delete(nid)
+        return []
+
+    def _load_citations(self, _: Any, params: dict) -> list:
+        return [
+            {
+                "key": p.get("key"), "chunk_id": p.get("chunk_id"), "document": p.get("document_file"),
+                "start": p.get("start"), "end": p.get("end"), "seq": p.get("seq"),
+            }
+            for p in (self._nodes[nid].props for nid in sorted(self._by_label.get("Citation", ())))
+        ]
+
+    def _write_embeddings(self, _: Any, params: dict) -> list:
+        index = self._by_key[("Chunk", "id")]
+        for row in params.get("rows", []):
+            nid = index.get(row["id"])
+            if nid is None:
+                continue
+            self._set(nid, "embedding", row["embedding"])
+            self._set(nid, "text_hash", row["hash"])
+            self._set(nid, "embedding_hash", row["hash"])
+            self._set(nid, "embedding_model", params.get("model"))
+        return []
+
+
+_PENDING_CHUNKS = _normalize(PENDING_CHUNKS_CYPHER)
+_WRITE_EMBEDDINGS = _normalize(WRITE_EMBEDDINGS_CYPHER)
+_EXPANSION = _normalize(EXPANSION_CYPHER)
+_FETCH_CHUNKS = _normalize(FETCH_CHUNKS_CYPHER)
+# Graph analytics and citation statements -> handler name; elementId(n) is the node id as a string
+_ANALYTICS = {
+    _normalize(LOAD_MENTIONS_CYPHER): "_load_mentions",
+    _normalize(LOAD_ENTITY_LINKS_CYPHER): "_load_entity_links",
+    _normalize(LOAD_MEMBERS_CYPHER): "_load_members",
+    _normalize(WRITE_SCORES_CYPHER): "_write_scores",
+    _normalize(WRITE_COMMUNITIES_CYPHER): "_write_communities",
+    _normalize(DELETE_STALE_COMMUNITIES_CYPHER): "_delete_stale_communities",
+    _normalize(LOAD_COMMUNITIES_CYPHER): "_load_communities",
+    _normalize(WRITE_CITATIONS_CYPHER): "_write_citations",
+    _normalize(DELETE_STALE_CITATIONS_CYPHER): "_delete_stale_citations",
+    _normalize(LOAD_CITATIONS_CYPHER): "_load_citations",
+}
+_SLICED_SEARCH = re.compile(re.escape(_normalize(SLICED_SEARCH_CYPHER)) + r" LIMIT (\d+)$")
+
+
+def _type_name(value: Any) -> str:
+    """Neo4j type name of a property value, as shown in Neo4jGraph schemas."""
+    if isinstance(value, bool):
+        return "BOOLEAN"
+    if isinstance(value, int):
+        return "INTEGER"
+    if isinstance(value, float):
+        return "FLOAT"
+    if isinstance(value, list):
+        return "LIST"
+    return "STRING"
+
+
+class InMemoryVectorStore:
+    """Minimal Neo4jVector stand-in over InMemoryGraph.vector_search, for hybrid retrieval."""
+
+    def __init__(self, graph: InMemoryGraph, embedding: Any):
+        self.graph = graph
+        self.embedding = embedding
+
+    def similarity_search_with_score(self, query: str, k: int = 4) -> list[tuple[Any, float]]:
+        from langchain_core.documents import Document
+
+        hits = self.graph.vector_search(self.embedding.embed_query(query), k=k)
+        return [
+            (
+                Document(
+                    page_content=self.graph._chunk_text(props) or "",
+                    metadata={
+                        "id": props.get("id"), "document": props.get("document_file"),
+                        "start": props.get("start"), "end": props.get("end"), "article": props.get("article"),
+                        "pagerank": props.get("pagerank"),
+                    },
+                ),
+                score,
+            )
+            for props, score in hits
+        ]
+
+
+class _MemoryTransaction:
+    """Transaction stand-in: statements apply immediately (no rollback)."""
+
+    def __init__(self, graph: InMemoryGraph):
+        self._graph = graph
+
+    def run(self, query: str, parameters: Optional[dict] = None, **kwparameters: Any) -> list[dict]:
+        return self._graph.query(query, {**(parameters or {}), **kwparameters})
+
+
+class MemoryGraphClient:
+    """GraphClient interface over InMemoryGraph; records are plain dicts."""
+
+    def __init__(self, graph: InMemoryGraph, result_cache: Any = None):
+        self.graph = graph
+        self.result_cache = result_cache
+        self.last_bookmarks: Any = None
+
+    def execute_read(self, work: Callable, *args: Any, bookmarks: Any = None, **kwargs: Any) -> Any:
+        return monitor_work(work, "read")(_MemoryTransaction(self.graph), *args, **kwargs)
+
+    def execute_write(self, work: Callable, *args: Any, **kwargs: Any) -> Any:
+        try:
+            return monitor_work(work, "write")(_MemoryTransaction(self.graph), *args, **kwargs)
+        finally:
+            if self.result_cache is not None:
+                self.result_cache.bump_epoch()
+
+    def read(self, cypher: str, params: Optional[dict] = None, timeout: Optional[float] = None,
+             bookmarks: Any = None, cache: bool = False) -> list[dict]:
+        records: list[dict]
+        if cache and self.result_cache is not None:
+            records = self.result_cache.get_or_load(
+                cypher, params, lambda: self.execute_read(lambda tx: tx.run(cypher, params or {}))
+            )
+        else:
+            records = self.execute_read(lambda tx: tx.run(cypher, params or {}))
+        return records
+
+    def write(self, cypher: str, params: Optional[dict] = None, timeout: Optional[float] = None) -> list[dict]:
+        records: list[dict] = self.execute_write(lambda tx: tx.run(cypher, params or {}))
+        return records
+
+    def query(self, cypher: str, params: Optional[dict] = None) -> list[dict]:
+        run = self.write if is_write_query(cypher) else self.read
+        return run(cypher, params)
+
+    def close(self) -> None:
+        pass
@@ -2,16 +2,18 @@ import os
 from typing import Optional
 from dotenv import load_dotenv
 from langchain_community.graphs import Neo4jGraph
+from langchain_community.graphs.graph_store import GraphStore
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception
 from neo4j.exceptions import ServiceUnavailable, TransientError
 from src.core.logging_config import get_logger
+from src.data.query_monitor import instrument_graph
 
 load_dotenv()
 
 logger = get_logger(__name__)
 
 # Global graph instance for connection pooling
-_graph_instance: Optional[Neo4jGraph] = None
+_graph_instance: Optional[GraphStore] = None
 
 def _is_connection_error(exc: BaseException) -> bool:
     """Retry on connection-related errors (Neo4j startup, network, etc.)."""
@@ -28,13 +30,16 @@ def _is_connection_error(exc: BaseException) -> bool:
     retry=retry_if_exception(_is_connection_error),
     reraise=True
 )
-def get_neo4j_graph() -> Neo4jGraph:
+def get_neo4j_graph() -> GraphStore:
     """
     Establishes a connection to the Neo4j database using environment variables.
     Uses a singleton pattern to maintain connection pooling.
+
+    NEO4J_URI=memory:// selects the in-memory backend (src.data.memory_graph) instead;
+    no Neo4j server or credentials are needed.
     
     Returns:
-        Neo4jGraph: A LangChain Neo4j graph object.
+        GraphStore: A LangChain Neo4jGraph, or an InMemoryGraph for memory://.
         
     Raises:
         ValueError: If Neo4j configuration is missing.
@@ -48,6 +53,13 @@ def get_neo4j_graph() -> Neo4jGraph:
         return _graph_instance
     
     url = os.getenv("NEO4J_URI")
+    if url and url.startswith("memory://"):
+        from src.data.memory_graph import InMemoryGraph
+
+        _graph_instance = InMemoryGraph()
+        logger.info("neo4j_connected", url=url, backend="memory")
+        return _graph_instance
+
     username = os.getenv("NEO4J_USERNAME")
     password = os.getenv("NEO4J_PASSWORD")
     
@@ -63,10 +75,13 @@ def get_neo4j_graph() -> Neo4jGraph:
         _graph_instance = Neo4jGraph(
             url=url,
             username=username,
-            password=password
+            password=password,
+            # The constructor verifies connectivity; the schema is loaded lazily by
+            # src.data.schema_service when the Cypher chain first needs it
+            refresh_schema=False,
         )
-        # Test connection
-        _graph_instance.refresh_schema()
+        # Time the chain's generated Cypher like every other statement
+        instrument_graph(_graph_instance)
         logger.info("neo4j_connected", url=url)
         return _graph_instance
     except (ServiceUnavailable, TransientError) as e:
@@ -80,6 +95,6 @@ if __name__ == "__main__":
     try:
         g = get_neo4j_graph()
         g.refresh_schema()
-        print(f"Connected to Neo4j! Schema: {g.schema[:100]}...")
+        print(f"Connected to Neo4j! Schema: {g.get_schema[:100]}...")
     except Exception as e:
         print(f"Failed to connect: {e}")
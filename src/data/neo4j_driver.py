@@ -0,0 +1,269 @@
+"""
+Thin client on the official neo4j driver for hot-path reads and writes.
+
+LangChain's Neo4jGraph runs every statement as an auto-commit query with driver
+defaults and converts results to dicts. GraphClient instead exposes the pool size,
+acquisition timeout, fetch size and per-query timeouts, runs statements in managed
+read/write transactions (retried by the driver on transient errors, routed to readers
+or the leader on a cluster), tracks bookmarks for causal consistency and returns raw
+neo4j Records. Reads that opt in (read(..., cache=True)) are served from the
+write-epoch result cache (src.data.result_cache); every write bumps the epoch.
+
+Retrieval, ingestion and the embedding pipeline use get_graph_client(); Neo4jGraph
+(get_neo4j_graph) is kept for the GraphCypherQAChain, which needs its schema support.
+
+Configuration (environment):
+  NEO4J_MAX_POOL_SIZE            Max connections in the pool (default 50)
+  NEO4J_POOL_ACQUISITION_TIMEOUT Seconds to wait for a free connection (default 30)
+  NEO4J_CONNECTION_TIMEOUT       Seconds to establish a connection (default 15)
+  NEO4J_FETCH_SIZE               Records fetched per batch (default 1000)
+  NEO4J_QUERY_TIMEOUT            Default transaction timeout in seconds (default 30)
+  NEO4J_DATABASE                 Database name (default: server default)
+"""
+import os
+import re
+import threading
+from typing import Any, Callable, Optional
+
+from src.core.logging_config import get_logger
+from src.data.query_monitor import monitor_work
+from src.data.result_cache import get_result_cache
+
+logger = get_logger(__name__)
+
+# Clauses that make a statement a write; anything else is routed as a read
+_WRITE_CLAUSE = re.compile(
+    r"\b(CREATE|MERGE|SET|DELETE|REMOVE|DROP|FOREACH|LOAD\s+CSV)\b|\bCALL\s*\{", re.IGNORECASE
+)
+
+
+def is_write_query(cypher: str) -> bool:
+    """Return True if the statement contains a clause that writes to the graph."""
+    return bool(_WRITE_CLAUSE.search(cypher))
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+class GraphClient:
+    """
+    Neo4j driver wrapper with explicit pool, transaction and timeout settings.
+
+    Statements run in execute_read / execute_write are instrumented by
+    src.data.query_monitor (latency histogram, slow log, PROFILE sampling).
+
+    One instance (one driver and connection pool) is shared per process; see
+    get_graph_client().
+    """
+
+    def __init__(
+        self,
+        uri: str,
+        username: str,
+        password: str,
+        database: Optional[str] = None,
+        max_pool_size: int = 50,
+        acquisition_timeout: float = 30.0,
+        connection_timeout: float = 15.0,
+        fetch_size: int = 1000,
+        query_timeout: Optional[float] = 30.0,
+        result_cache: Any = None,
+    ):
+        """
+        Args:
+            uri: Bolt / neo4j URI.
+            username: Database user.
+            password: Database password.
+            database: Database name (None for the server default).
+            max_pool_size: Maximum pooled connections.
+            acquisition_timeout: Seconds to wait for a pooled connection before failing.
+            connection_timeout: Seconds to establish a new connection.
+            fetch_size: Records pulled from the server per batch.
+            query_timeout: Default transaction timeout in seconds (None for server default).
+            result_cache: ResultCache for read(..., cache=True) (None disables caching).
+        """
+        from neo4j import GraphDatabase
+
+        self.database = database
+        self.fetch_size = fetch_size
+        self.query_timeout = query_timeout
+        self.result_cache = result_cache
+        self._driver = GraphDatabase.driver(
+            uri,
+            auth=(username, password),
+            max_connection_pool_size=max_pool_size,
+            connection_acquisition_timeout=acquisition_timeout,
+            connection_timeout=connection_timeout,
+        )
+        # Shared by all sessions: reads started after a write see that write
+        self._bookmark_manager = GraphDatabase.bookmark_manager()
+        self.last_bookmarks: Any = None
+
+    def _session(self, access_mode: str, bookmarks: Any = None) -> Any:
+        config: dict[str, Any] = {
+            "database": self.database,
+            "fetch_size": self.fetch_size,
+            "default_access_mode": access_mode,
+        }
+        if bookmarks is not None:
+            config["bookmarks"] = bookmarks
+        else:
+            config["bookmark_manager"] = self._bookmark_manager
+        return self._driver.session(**config)
+
+    def _statement(self, cypher: str, timeout: Optional[float]) -> Callable:
+        """Build a transaction function that runs one statement and collects its records."""
+        from neo4j import unit_of_work
+
+        @unit_of_work(timeout=timeout if timeout is not None else self.query_timeout)
+        def work(tx: Any, params: dict) -> list:
+            return list(tx.run(cypher, params))
+
+        return work
+
+    def execute_read(self, work: Callable, *args: Any, bookmarks: Any = None, **kwargs: Any) -> Any:
+        """
+        Run work(tx, *args, **kwargs) in a managed read transaction.
+
+        Args:
+            work: Transaction function; may be decorated with neo4j.unit_of_work for a timeout.
+            bookmarks: Explicit bookmarks to wait for (default: all writes of this client).
+        """
+        from neo4j import READ_ACCESS
+
+        with self._session(READ_ACCESS, bookmarks) as session:
+            return session.execute_read(monitor_work(work, "read"), *args, **kwargs)
+
+    def execute_write(self, work: Callable, *args: Any, **kwargs: Any) -> Any:
+        """
+        Run work(tx, *args, **kwargs) in a managed write transaction; records bookmarks
+        and invalidates cached reads.
+        """
+        from neo4j import WRITE_ACCESS
+
+        try:
+            with self._session(WRITE_ACCESS) as session:
+                result = session.execute_write(monitor_work(work, "write"), *args, **kwargs)
+                self.last_bookmarks = session.last_bookmarks()
+                return result
+        finally:
+            # Also on failure: a partially applied retry may have changed the graph
+            if self.result_cache is not None:
+                self.result_cache.bump_epoch()
+
+    def read(
+        self,
+        cypher: str,
+        params: Optional[dict] = None,
+        timeout: Optional[float] = None,
+        bookmarks: Any = None,
+        cache: bool = False,
+    ) -> list:
+        """
+        Run one read statement and return its raw Records.
+
+        Args:
+            cache: Serve repeated statement/parameter pairs from the result cache
+                (ignored with explicit bookmarks, which ask for a fresh read).
+        """
+        records: list
+        if cache and self.result_cache is not None and bookmarks is None:
+            records = self.result_cache.get_or_load(
+                cypher, params, lambda: self.execute_read(self._statement(cypher, timeout), params or {})
+            )
+        else:
+            records = self.execute_read(self._statement(cypher, timeout), params or {}, bookmarks=bookmarks)
+        return records
+
+    def write(self, cypher: str, params: Optional[dict] = None, timeout: Optional[float] = None) -> list:
+        """Run one write statement and return its raw Records."""
+        records: list = self.execute_write(self._statement(cypher, timeout), params or {})
+        return records
+
+    def explain(self, cypher: str, params: Optional[dict] = None) -> Optional[dict]:
+        """Return the EXPLAIN plan of a statement without executing it."""
+        from neo4j import READ_ACCESS
+
+        with self._session(READ_ACCESS) as session:
+            plan: Optional[dict] = session.run("EXPLAIN " + cypher, params or {}).consume().plan
+            return plan
+
+    def query(self, cypher: str, params: Optional[dict] = None) -> list[dict[str, Any]]:
+        """Neo4jGraph-compatible query: routed by statement type, results as dicts."""
+        run = self.write if is_write_query(cypher) else self.read
+        return [record.data() for record in run(cypher, params)]
+
+    def close(self) -> None:
+        """Close the driver and its connection pool."""
+        self._driver.close()
+
+
+_client_instance: Optional[Any] = None
+_client_lock = threading.Lock()
+
+
+def get_graph_client() -> Any:
+    """
+    Return the process-wide graph client, creating it on first use.
+
+    With NEO4J_URI=memory:// this is a MemoryGraphClient over the same in-memory graph
+    that get_neo4j_graph() returns.
+
+    Raises:
+        ValueError: If Neo4j configuration is missing.
+    """
+    global _client_instance
+    if _client_instance is not None:
+        return _client_instance
+    with _client_lock:
+        if _client_instance is not None:
+            return _client_instance
+
+        url = os.getenv("NEO4J_URI")
+        if url and url.startswith("memory://"):
+            from src.data.memory_graph import InMemoryGraph, MemoryGraphClient
+            from src.data.neo4j_client import get_neo4j_graph
+
+            graph = get_neo4j_graph()
+            if not isinstance(graph, InMemoryGraph):
+                raise ValueError("NEO4J_URI=memory:// but the shared graph is not an InMemoryGraph.")
+            _client_instance = MemoryGraphClient(graph, result_cache=get_result_cache())
+            return _client_instance
+
+        username = os.getenv("NEO4J_USERNAME")
+        password = os.getenv("NEO4J_PASSWORD")
+        if not url or not username or not password:
+            raise ValueError("Neo4j configuration not found in environment variables.")
+        if url.startswith("neo4j+s://"):
+            url = url.replace("neo4j+s://", "neo4j+ssc://")
+
+        query_timeout = _env_float("NEO4J_QUERY_TIMEOUT", 30.0)
+        _client_instance = GraphClient(
+            url,
+            username,
+            password,
+            database=os.getenv("NEO4J_DATABASE") or None,
+            max_pool_size=int(os.getenv("NEO4J_MAX_POOL_SIZE", "50")),
+            acquisition_timeout=_env_float("NEO4J_POOL_ACQUISITION_TIMEOUT", 30.0),
+            connection_timeout=_env_float("NEO4J_CONNECTION_TIMEOUT", 15.0),
+            fetch_size=int(os.getenv("NEO4J_FETCH_SIZE", "1000")),
+            query_timeout=query_timeout if query_timeout > 0 else None,
+            result_cache=get_result_cache(),
+        )
+        logger.info(
+            "neo4j_driver_created",
+            url=url,
+            max_pool_size=os.getenv("NEO4J_MAX_POOL_SIZE", "50"),
+        )
+        return _client_instance
+
+
+def close_graph_client() -> None:
+    """Close and drop the process-wide client (e.g. on shutdown)."""
+    global _client_instance
+    with _client_lock:
+        if _client_instance is not None:
+            _client_instance.close()
+            _client_instance = None
@@ -0,0 +1,386 @@
+"""
+Cypher query instrumentation: per-fingerprint latency, slow-query log and PROFILE sampling.
+
+Every statement run through the graph client (retrieval, ingestion, embeddings) and the
+Neo4jGraph used by GraphCypherQAChain is timed and reported to the
+graphrag_cypher_query_duration_seconds histogram, labelled by statement fingerprint
+(literals replaced by "?", whitespace collapsed). Statements slower than
+CYPHER_SLOW_QUERY_MS are logged with their parameters. With
+CYPHER_PROFILE_SAMPLE_RATE > 0, that fraction of read statements is re-run with PROFILE
+and the db hits / rows of the plan are recorded.
+
+Slow statements, profile samples and per-fingerprint totals (flushed at exit) are
+appended to QUERY_STATS_PATH (JSONL, default .cache/query_stats.jsonl), so statistics
+from the bot, ingestion and scripts can be combined:
+
+  python -m src.data.query_monitor [--top 20] [--sort total|mean|max|db_hits]
+"""
+import argparse
+import atexit
+import functools
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from typing import Any, Callable, Optional
+
+from src.core.logging_config import get_logger
+from src.core.metrics import cypher_profile_db_hits, cypher_query_duration, cypher_slow_queries
+
+logger = get_logger(__name__)
+
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_STATS_PATH = os.path.join(_REPO_ROOT, ".cache", "query_stats.jsonl")
+
+# Fingerprints beyond this many are reported under "other" to bound metric cardinality
+MAX_FINGERPRINTS = 500
+
+_COMMENT = re.compile(r"//[^\n]*|/\*.*?\*/", re.DOTALL)
+_STRING = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+_NUMBER = re.compile(r"(?<![\w$.])-?\d+(?:\.\d+)?\b")
+_LIST = re.compile(r"\[\s*\?(?:\s*,\s*\?)*\s*\]")
+
+
+def normalize_statement(cypher: str) -> str:
+    """Strip comments, replace literals with ? and collapse whitespace."""
+    text = _COMMENT.sub(" ", cypher)
+    text = _STRING.sub("?", text)
+    text = _NUMBER.sub("?", text)
+    text = _LIST.sub("[?]", text)
+    return " ".join(text.split())
+
+
+def fingerprint(cypher: str) -> str:
+    """Short stable id of a statement shape (same id for different literals/whitespace)."""
+    return hashlib.sha1(normalize_statement(cypher).encode("utf-8")).hexdigest()[:12]
+
+
+def summarize_params(params: Optional[dict], max_chars: int = 200) -> dict[str, Any]:
+    """Make parameters safe to log: long strings truncated, lists reduced to their length."""
+    summary: dict[str, Any] = {}
+    for key, value in (params or {}).items():
+        if isinstance(value, str) and len(value) > max_chars:
+            summary[key] = value[:max_chars] + "..."
+        elif isinstance(value, (list, tuple)):
+            summary[key] = f"<list len={len(value)}>"
+        elif isinstance(value, dict):
+            summary[key] = f"<map keys={len(value)}>"
+        else:
+            summary[key] = value
+    return summary
+
+
+def _sum_profile(plan: Any) -> tuple[int, int]:
+    """Total db hits over a PROFILE plan tree and rows of its root operator."""
+    if not plan:
+        return 0, 0
+    db_hits = 0
+    stack = [plan]
+    while stack:
+        node = stack.pop()
+        db_hits += int(node.get("dbHits", 0) or 0)
+        stack.extend(node.get("children", []) or [])
+    return db_hits, int(plan.get("rows", 0) or 0)
+
+
+class QueryMonitor:
+    """Collects per-fingerprint statement statistics and writes slow/profile records."""
+
+    def __init__(
+        self,
+        slow_ms: float = 500.0,
+        profile_sample_rate: float = 0.0,
+        stats_path: Optional[str] = None,
+    ):
+        """
+        Args:
+            slow_ms: Statements at or above this wall time (ms) are logged as slow.
+            profile_sample_rate: Fraction (0-1) of read statements re-run with PROFILE.
+            stats_path: JSONL file for slow/profile/summary records; "" disables the file.
+        """
+        self.slow_ms = slow_ms
+        self.profile_sample_rate = profile_sample_rate
+        self.stats_path = DEFAULT_STATS_PATH if stats_path is None else stats_path
+        self._lock = threading.Lock()
+        self._stats: dict[str, dict[str, Any]] = {}
+
+    def _label(self, fp: str) -> str:
+        if fp in self._stats or len(self._stats) < MAX_FINGERPRINTS:
+            return fp
+        return "other"
+
+    def _append(self, record: dict[str, Any]) -> None:
+        if not self.stats_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.stats_path)), exist_ok=True)
+            with open(self.stats_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        except OSError as e:
+            logger.warning("query_stats_write_failed", path=self.stats_path, error=str(e))
+
+    def observe(
+        self,
+        cypher: str,
+        params: Optional[dict],
+        seconds: float,
+        kind: str,
+        error: Optional[BaseException] = None,
+        rows: Optional[int] = None,
+    ) -> str:
+        """
+        Record one executed statement.
+
+        Returns:
+            The fingerprint label the statement was recorded under.
+        """
+        fp = fingerprint(cypher)
+        with self._lock:
+            label = self._label(fp)
+            stats = self._stats.setdefault(
+                label,
+                {"statement": normalize_statement(cypher)[:500] if label != "other" else "other",
+                 "kind": kind, "count": 0, "errors": 0, "total_s": 0.0, "max_s": 0.0, "slow": 0},
+            )
+            stats["count"] += 1
+            stats["total_s"] += seconds
+            stats["max_s"] = max(stats["max_s"], seconds)
+            if error is not None:
+                stats["errors"] += 1
+            slow = seconds * 1000 >= self.slow_ms
+            if slow:
+                stats["slow"] += 1
+        cypher_query_duration.labels(fingerprint=label, kind=kind).observe(seconds)
+        if slow:
+            cypher_slow_queries.labels(fingerprint=label).inc()
+            safe_params = summarize_params(params)
+            logger.warning(
+                "slow_cypher_query",
+                fingerprint=label,
+                duration_ms=round(seconds * 1000, 1),
+                kind=kind,
+                rows=rows,
+                cypher=" ".join(cypher.split())[:1000],
+                params=safe_params,
+                error=str(error) if error else None,
+            )
+            self._append({
+                "type": "slow", "ts": time.time(), "fingerprint": label, "kind": kind,
+                "duration_ms": round(seconds * 1000, 3), "rows": rows,
+                "statement": " ".join(cypher.split())[:1000], "params": safe_params,
+            })
+        return label
+
+    def should_profile(self, cypher: str, kind: str) -> bool:
+        """Sample read statements for PROFILE (never writes: PROFILE executes the statement)."""
+        if kind != "read" or self.profile_sample_rate <= 0:
+            return False
+        if cypher.lstrip().upper().startswith(("PROFILE", "EXPLAIN")):
+            return False
+        return random.random() < self.profile_sample_rate
+
+    def record_profile(self, cypher: str, params: Optional[dict], plan: Any) -> None:
+        """Store the db hits / rows of a PROFILE plan for the statement's fingerprint."""
+        db_hits, rows = _sum_profile(plan)
+        fp = fingerprint(cypher)
+        with self._lock:
+            label = self._label(fp)
+            stats = self._stats.get(label)
+            if stats is not None:
+                stats["profiles"] = stats.get("profiles", 0) + 1
+                stats["db_hits"] = stats.get("db_hits", 0) + db_hits
+                stats["profile_rows"] = stats.get("profile_rows", 0) + rows
+        cypher_profile_db_hits.labels(fingerprint=label).observe(db_hits)
+        logger.info("cypher_profile", fingerprint=label, db_hits=db_hits, rows=rows)
+        self._append({
+            "type": "profile", "ts": time.time(), "fingerprint": label, "db_hits": db_hits,
+            "rows": rows, "statement": normalize_statement(cypher)[:1000],
+            "params": summarize_params(params),
+        })
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        """Copy of the in-process per-fingerprint statistics."""
+        with self._lock:
+            return {fp: dict(stats) for fp, stats in self._stats.items()}
+
+    def flush(self) -> None:
+        """Append per-fingerprint totals to the stats file and reset them."""
+        with self._lock:
+            stats, self._stats = self._stats, {}
+        for fp, s in stats.items():
+            self._append({"type": "summary", "ts": time.time(), "fingerprint": fp, **s})
+
+
+class MonitoredTransaction:
+    """
+    Transaction proxy that times each run() and optionally PROFILEs reads.
+
+    Results are fetched eagerly (a list of records) so the timing covers the full
+    server round trip rather than just the first response.
+    """
+
+    def __init__(self, tx: Any, kind: str, monitor: "QueryMonitor"):
+        self._tx = tx
+        self._kind = kind
+        self._monitor = monitor
+
+    def run(self, query: str, parameters: Optional[dict] = None, **kwparameters: Any) -> list:
+        params = {**(parameters or {}), **kwparameters}
+        started = time.perf_counter()
+        try:
+            result = self._tx.run(query, params)
+            records = list(result)
+        except Exception as e:
+            self._monitor.observe(query, params, time.perf_counter() - started, self._kind, error=e)
+            raise
+        self._monitor.observe(query, params, time.perf_counter() - started, self._kind, rows=len(records))
+        if hasattr(result, "consume") and self._monitor.should_profile(query, self._kind):
+            try:
+                summary = self._tx.run("PROFILE " + query, params).consume()
+                self._monitor.record_profile(query, params, summary.profile)
+            except Exception as e:
+                logger.warning("cypher_profile_failed", error=str(e))
+        return records
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._tx, name)
+
+
+def monitor_work(work: Callable, kind: str, monitor: Optional[QueryMonitor] = None) -> Callable:
+    """Wrap a transaction function so its statements are instrumented (keeps unit_of_work settings)."""
+    monitor = monitor or get_query_monitor()
+
+    @functools.wraps(work)
+    def wrapped(tx: Any, *args: Any, **kwargs: Any) -> Any:
+        return work(MonitoredTransaction(tx, kind, monitor), *args, **kwargs)
+
+    return wrapped
+
+
+def instrument_graph(graph: Any, monitor: Optional[QueryMonitor] = None) -> Any:
+    """
+    Instrument a Neo4jGraph in place (used for the GraphCypherQAChain's generated Cypher).
+
+    The graph's query method is replaced by a timed version; sampled reads are profiled
+    through the graph's driver.
+    """
+    from src.data.neo4j_driver import is_write_query
+
+    if vars(graph).get("_query_monitored") is True:
+        return graph
+    monitor = monitor or get_query_monitor()
+    original = graph.query
+
+    @functools.wraps(original)
+    def query(cypher: str, params: Optional[dict] = None, *args: Any, **kwargs: Any) -> Any:
+        params = {} if params is None else params
+        kind = "write" if is_write_query(cypher) else "read"
+        started = time.perf_counter()
+        try:
+            result = original(cypher, params, *args, **kwargs)
+        except Exception as e:
+            monitor.observe(cypher, params, time.perf_counter() - started, kind, error=e)
+            raise
+        monitor.observe(
+            cypher, params, time.perf_counter() - started, kind,
+            rows=len(result) if isinstance(result, list) else None,
+        )
+        driver = getattr(graph, "_driver", None)
+        if driver is not None and monitor.should_profile(cypher, kind):
+            try:
+                with driver.session(database=getattr(graph, "_database", None)) as session:
+                    summary = session.run("PROFILE " + cypher, params).consume()
+                monitor.record_profile(cypher, params, summary.profile)
+            except Exception as e:
+                logger.warning("cypher_profile_failed", error=str(e))
+        return result
+
+    graph.query = query
+    graph._query_monitored = True
+    return graph
+
+
+_monitor_instance: Optional[QueryMonitor] = None
+_monitor_lock = threading.Lock()
+
+
+def get_query_monitor() -> QueryMonitor:
+    """Return the process-wide monitor configured from the environment."""
+    global _monitor_instance
+    if _monitor_instance is None:
+        with _monitor_lock:
+            if _monitor_instance is None:
+                _monitor_instance = QueryMonitor(
+                    slow_ms=float(os.getenv("CYPHER_SLOW_QUERY_MS", "500")),
+                    profile_sample_rate=float(os.getenv("CYPHER_PROFILE_SAMPLE_RATE", "0")),
+                    stats_path=os.getenv("QUERY_STATS_PATH"),
+                )
+                atexit.register(_monitor_instance.flush)
+    return _monitor_instance
+
+
+def build_report(path: str) -> list[dict[str, Any]]:
+    """Aggregate a stats JSONL file into one row per fingerprint."""
+    rows: dict[str, dict[str, Any]] = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            fp = record.get("fingerprint", "?")
+            row = rows.setdefault(fp, {
+                "fingerprint": fp, "statement": record.get("statement", ""), "count": 0,
+                "total_s": 0.0, "max_s": 0.0, "slow": 0, "errors": 0, "profiles": 0, "db_hits": 0,
+            })
+            kind = record.get("type")
+            if kind == "summary":
+                row["count"] += record.get("count", 0)
+                row["total_s"] += record.get("total_s", 0.0)
+                row["max_s"] = max(row["max_s"], record.get("max_s", 0.0))
+                row["errors"] += record.get("errors", 0)
+                row["slow"] += record.get("slow", 0)
+            elif kind == "slow":
+                row["max_s"] = max(row["max_s"], record.get("duration_ms", 0.0) / 1000)
+            elif kind == "profile":
+                row["profiles"] += 1
+                row["db_hits"] += record.get("db_hits", 0)
+            if record.get("statement") and not row["statement"]:
+                row["statement"] = record["statement"]
+    for row in rows.values():
+        row["mean_ms"] = row["total_s"] / row["count"] * 1000 if row["count"] else 0.0
+        row["avg_db_hits"] = row["db_hits"] / row["profiles"] if row["profiles"] else None
+    return list(rows.values())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Report Cypher statement statistics.")
+    parser.add_argument("--path", default=os.getenv("QUERY_STATS_PATH") or DEFAULT_STATS_PATH)
+    parser.add_argument("--top", type=int, default=20, help="Number of statements to show")
+    parser.add_argument("--sort", choices=["total", "mean", "max", "db_hits"], default="total")
+    args = parser.parse_args()
+
+    if not os.path.isfile(args.path):
+        print(f"No query statistics at {args.path}")
+        return
+    sort_key = {
+        "total": lambda r: r["total_s"],
+        "mean": lambda r: r["mean_ms"],
+        "max": lambda r: r["max_s"],
+        "db_hits": lambda r: r["avg_db_hits"] or 0,
+    }[args.sort]
+    rows = sorted(build_report(args.path), key=sort_key, reverse=True)[: args.top]
+    print(f"{'fingerprint':<13} {'count':>7} {'total_s':>9} {'mean_ms':>9} {'max_ms':>9} "
+          f"{'slow':>5} {'err':>4} {'db_hits':>9}  statement")
+    for r in rows:
+        hits = f"{r['avg_db_hits']:.0f}" if r["avg_db_hits"] is not None else "-"
+        print(f"{r['fingerprint']:<13} {r['count']:>7} {r['total_s']:>9.3f} {r['mean_ms']:>9.2f} "
+              f"{r['max_s'] * 1000:>9.1f} {r['slow']:>5} {r['errors']:>4} {hits:>9}  "
+              f"{r['statement'][:100]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+CPU-only reranking of retrieval candidates.
+
+Keyword scans and vector search return candidates in no useful order (CONTAINS rows come
+back in store order). Retrieval therefore fetches a wider pool, and this stage scores
+each candidate against the query with a few cheap features, computed over the whole
+pool with NumPy:
+  - bm25:      BM25 (k1=1.2, b=0.75) of the query terms, with document frequencies
+               taken from the pool itself
+  - proximity: 1 / (1 + smallest gap between occurrences of two different query terms)
+  - domain:    share of domain terms (BHMS numbers, account codes; see
+               graph_rag._extract_domain_terms) found verbatim in the candidate
+  - article:   the candidate is an article the query names ("12-modda", "статья 12")
+  - document:  the candidate is from a document the question names by BHMS number,
+               registration number or code (citations.cited_documents)
+  - centrality: the chunk's PageRank (set by src.data.graph_analytics) relative to the
+               most central candidate; 0 until graph analytics have been computed
+  - prior:     reciprocal of the candidate's retrieval rank, to break ties
+
+Tokenizing the candidates is the only per-candidate Python work. It stops when the CPU
+time budget of the calling thread is spent; candidates not reached are ranked after the
+scored ones, in retrieval order, so a pathological pool cannot stall a query.
+
+Configuration (environment):
+  RERANK_TOP_K      Candidates kept after reranking (default 12; 0 disables reranking)
+  RERANK_POOL_SIZE  Most candidates scored per query (default 100)
+  RERANK_BUDGET_MS  CPU time budget of one rerank in milliseconds (default 25)
+"""
+import os
+import re
+import time
+from typing import Any, Iterable, Optional
+
+import numpy as np
+
+from src.core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+WEIGHTS = {
+    "bm25": 1.0, "proximity": 0.4, "domain": 0.8, "article": 0.6, "document": 1.0, "centrality": 0.2, "prior": 0.1,
+}
+
+_WORD = re.compile(r"\w+")
+# Article references in a query: "12-modda", "12 модда", "статья 12", "article 12"
+_ARTICLE_REF = re.compile(
+    r"(\d+)\s?-?\s?(?:modda|модда)|(?:статья|статьи|article|art\.)\s?(\d+)", re.IGNORECASE
+)
+
+
+def rerank_settings() -> tuple[int, int, float]:
+    """(top_k, pool_size, budget in seconds) from the environment."""
+    return (
+        int(os.getenv("RERANK_TOP_K", "12")),
+        int(os.getenv("RERANK_POOL_SIZE", "100")),
+        float(os.getenv("RERANK_BUDGET_MS", "25")) / 1000,
+    )
+
+
+def query_terms(*texts: str) -> list[str]:
+    """Distinct lowercased words of at least two characters, in order of appearance."""
+    terms: list[str] = []
+    for text in texts:
+        for word in _WORD.findall(text.lower()):
+            if len(word) >= 2 and word not in terms:
+                terms.append(word)
+    return terms
+
+
+def _article_refs(text: str) -> set[str]:
+    return {a or b for a, b in _ARTICLE_REF.findall(text)}
+
+
+def rerank(
+    query: str,
+    rows: Iterable[dict[str, Any]],
+    terms: Optional[list[str]] = None,
+    domain_terms: Optional[list[str]] = None,
+    top_k: Optional[int] = None,
+    budget: Optional[float] = None,
+    documents: Optional[set[str]] = None,
+) -> list[dict[str, Any]]:
+    """
+    Order retrieval candidates by relevance to the query and keep the best.
+
+    Args:
+        query: Query text; its words are scored, along with terms.
+        rows: Candidates in retrieval order, dicts with 'text' and optionally 'article'
+            and 'pagerank'.
+            Rows with the same text are scored once.
+        terms: Further search terms (e.g. the keywords the candidates were found with).
+        domain_terms: Terms whose verbatim presence is rewarded.
+        top_k: Candidates to return (default RERANK_TOP_K; 0 returns the pool unranked).
+        budget: CPU seconds for tokenization (default RERANK_BUDGET_MS).
+        documents: File names of documents the question names; their candidates
+            (by 'document') are boosted.
+
+    Returns:
+        Up to top_k rows, best first, each with a 'score' added.
+    """
+    default_k, pool_size, default_budget = rerank_settings()
+    top_k = default_k if top_k is None else top_k
+    budget = default_budget if budget is None else budget
+
+    seen: set[str] = set()
+    pool: list[dict[str, Any]] = []
+    for row in rows:
+        text = row.get("text")
+        if text and text not in seen:
+            seen.add(text)
+            pool.append(row)
+    pool = pool[:pool_size]
+    if top_k <= 0 or not pool:
+        return pool
+
+    vocab = {term: i for i, term in enumerate(query_terms(query, *(terms or [])))}
+    n_docs, n_terms = len(pool), max(len(vocab), 1)
+    started = time.thread_time()
+
+    # Query-term occurrences of all candidates as flat (doc, term, position) arrays
+    doc_ids: list[int] = []
+    term_ids: list[int] = []
+    positions: list[int] = []
+    lengths = np.zeros(n_docs, dtype=np.float64)
+    scored = 0
+    for d, row in enumerate(pool):
+        if scored and time.thread_time() - started > budget:
+            break
+        words = _WORD.findall(row["text"].lower())
+        lengths[d] = len(words)
+        for position, word in enumerate(words):
+            t = vocab.get(word)
+            if t is not None:
+                doc_ids.append(d)
+                term_ids.append(t)
+                positions.append(position)
+        scored += 1
+
+    docs = np.asarray(doc_ids, dtype=np.int64)
+    qterms = np.asarray(term_ids, dtype=np.int64)
+    pos = np.asarray(positions, dtype=np.int64)
+
+    # BM25
+    tf = np.bincount(docs * n_terms + qterms, minlength=n_docs * n_terms).reshape(n_docs, n_terms).astype(np.float64)
+    df = (tf[:scored] > 0).sum(axis=0)
+    idf = np.log1p((scored - df + 0.5) / (df + 0.5))
+    avg_len = lengths[:scored].mean() if scored and lengths[:scored].mean() > 0 else 1.0
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths / avg_len)
+    bm25 = (idf * tf * (BM25_K1 + 1) / (tf + norm[:, None])).sum(axis=1)
+    bm25 /= bm25.max() or 1.0
+
+    # Proximity: neighbouring occurrences (already in position order per doc) of different terms
+    proximity = np.zeros(n_docs)
+    if len(docs) > 1:
+        pair = (docs[1:] == docs[:-1]) & (qterms[1:] != qterms[:-1])
+        if pair.any():
+            gaps = np.full(n_docs, np.inf)
+            np.minimum.at(gaps, docs[1:][pair], (pos[1:] - pos[:-1])[pair] - 1)
+            proximity = np.where(np.isfinite(gaps), 1.0 / (1.0 + gaps), 0.0)
+
+    # Domain terms and article match (substring and equality checks, per candidate)
+    domain = np.zeros(n_docs)
+    lowered_terms = [t.lower() for t in domain_terms or []]
+    article = np.zeros(n_docs)
+    refs = _article_refs(" ".join([query, *(terms or [])]))
+    for d in range(scored):
+        text = pool[d]["text"]
+        if lowered_terms:
+            lowered = text.lower()
+            domain[d] = sum(term in lowered for term in lowered_terms) / len(lowered_terms)
+        if refs:
+            row_article = str(pool[d].get("article") or "")
+            head = _article_refs(text[:40])
+            article[d] = float(row_article in refs or bool(head & refs))
+
+    cited = np.array([row.get("document") in (documents or ()) for row in pool], dtype=np.float64)
+    centrality = np.array([float(row.get("pagerank") or 0.0) for row in pool])
+    centrality /= centrality.max() or 1.0
+
+    prior = 1.0 / (1.0 + np.arange(n_docs))
+    score = (
+        WEIGHTS["bm25"] * bm25
+        + WEIGHTS["proximity"] * proximity
+        + WEIGHTS["domain"] * domain
+        + WEIGHTS["article"] * article
+        + WEIGHTS["document"] * cited
+        + WEIGHTS["centrality"] * centrality
+        + WEIGHTS["prior"] * prior
+    )
+    # Candidates the budget did not reach rank after every scored one
+    score[scored:] = -1.0 + prior[scored:] * WEIGHTS["prior"]
+    order = np.argsort(-score, kind="stable")[:top_k]
+    elapsed_ms = round((time.thread_time() - started) * 1000, 2)
+    if scored < n_docs:
+        logger.warning("rerank_budget_exhausted", scored=scored, candidates=n_docs, elapsed_ms=elapsed_ms)
+    logger.info("rerank_completed", candidates=n_docs, kept=len(order), elapsed_ms=elapsed_ms)
+    return [{**pool[i], "score": float(score[i])} for i in order]
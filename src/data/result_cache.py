@@ -0,0 +1,164 @@
+"""
+Result cache for read-only Cypher statements.
+
+Keyword probes ("BHMS", "hisobvaraq", ...) and repeated generated statements return the
+same rows until the graph changes. ResultCache keeps those rows in process memory:
+
+  - key: statement (whitespace-normalized) + canonical JSON of its parameters;
+  - bounded by an estimated byte size with LRU eviction;
+  - every entry is tagged with the write-epoch it was loaded in. Each write through the
+    graph client bumps the epoch, so the next read reloads; entries also expire after
+    RESULT_CACHE_TTL seconds, bounding staleness from writes made by other processes
+    (e.g. a separate ingestion run).
+
+Only callers that opt in (read(..., cache=True)) are cached.
+
+Configuration (environment):
+  RESULT_CACHE_MAX_BYTES  Size budget in bytes (default 33554432 = 32 MiB; 0 disables)
+  RESULT_CACHE_TTL        Entry lifetime in seconds (default 300; 0 = no expiry)
+"""
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Optional
+
+from src.core.logging_config import get_logger
+from src.core.metrics import (
+    result_cache_bytes,
+    result_cache_entries,
+    result_cache_evictions,
+    result_cache_hit_ratio,
+    result_cache_requests,
+)
+from src.data.query_monitor import fingerprint
+
+logger = get_logger(__name__)
+
+# Bookkeeping overhead counted per cached row and per entry
+_ROW_OVERHEAD = 64
+_ENTRY_OVERHEAD = 256
+
+
+def cache_key(cypher: str, params: Optional[dict]) -> str:
+    """Key of a statement and its parameters (literals are part of the key)."""
+    return " ".join(cypher.split()) + "\x00" + json.dumps(params or {}, sort_keys=True, default=str)
+
+
+def estimate_size(rows: list) -> int:
+    """Approximate memory held by a list of records or dicts."""
+    return _ENTRY_OVERHEAD + sum(len(repr(row)) + _ROW_OVERHEAD for row in rows)
+
+
+class ResultCache:
+    """Byte-bounded LRU of read results, invalidated by a write-epoch and a TTL."""
+
+    def __init__(self, max_bytes: int, ttl: float = 300.0):
+        """
+        Args:
+            max_bytes: Size budget; results larger than a quarter of it are not cached.
+            ttl: Seconds an entry stays valid (0 for no expiry).
+        """
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.epoch = 0
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, tuple[int, float, int, list]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def bump_epoch(self) -> int:
+        """Invalidate every cached result (call after any write to the graph)."""
+        with self._lock:
+            self.epoch += 1
+            self._entries.clear()
+            self.size = 0
+            self._publish()
+            return self.epoch
+
+    def _publish(self) -> None:
+        result_cache_bytes.set(self.size)
+        result_cache_entries.set(len(self._entries))
+        total = self.hits + self.misses
+        result_cache_hit_ratio.set(self.hits / total if total else 0.0)
+
+    def get(self, key: str) -> Optional[list]:
+        """Return cached rows for key, or None on a miss or a stale entry."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                epoch, loaded_at, size, rows = entry
+                if epoch == self.epoch and (not self.ttl or time.monotonic() - loaded_at < self.ttl):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return rows
+                del self._entries[key]
+                self.size -= size
+            self.misses += 1
+            return None
+
+    def put(self, key: str, rows: list, epoch: int) -> None:
+        """Store rows loaded during epoch; dropped if a write happened meanwhile."""
+        size = estimate_size(rows)
+        if size > self.max_bytes // 4:
+            return
+        with self._lock:
+            if epoch != self.epoch:
+                return
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= previous[2]
+            self._entries[key] = (epoch, time.monotonic(), size, rows)
+            self.size += size
+            while self.size > self.max_bytes and self._entries:
+                _, (_, _, evicted, _) = self._entries.popitem(last=False)
+                self.size -= evicted
+                result_cache_evictions.inc()
+            self._publish()
+
+    def get_or_load(self, cypher: str, params: Optional[dict], load: Callable[[], list]) -> list:
+        """Return cached rows for the statement or run load() and cache its result."""
+        key = cache_key(cypher, params)
+        rows = self.get(key)
+        if rows is not None:
+            result_cache_requests.labels(result="hit").inc()
+            return rows
+        result_cache_requests.labels(result="miss").inc()
+        epoch = self.epoch
+        rows = list(load())
+        self.put(key, rows, epoch)
+        logger.debug("result_cache_miss", fingerprint=fingerprint(cypher), rows=len(rows))
+        return rows
+
+    def stats(self) -> dict[str, Any]:
+        """Current size, entry count, epoch and hit ratio."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.size,
+                "max_bytes": self.max_bytes,
+                "epoch": self.epoch,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            }
+
+
+_cache_instance: Optional[ResultCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> Optional[ResultCache]:
+    """Return the process-wide result cache, or None when RESULT_CACHE_MAX_BYTES=0."""
+    global _cache_instance
+    if _cache_instance is None:
+        with _cache_lock:
+            if _cache_instance is None:
+                max_bytes = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+                if max_bytes <= 0:
+                    return None
+                _cache_instance = ResultCache(max_bytes, float(os.getenv("RESULT_CACHE_TTL", "300")))
+    return _cache_instance
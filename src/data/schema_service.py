@@ -0,0 +1,252 @@
+"""
+Cached, versioned graph schema with a compact per-question summary for Cypher prompts.
+
+Entity extraction adds arbitrary labels and relationship types, so the full schema text
+grows with the corpus. SchemaService keeps the structured schema in memory, refreshes it
+only when marked stale after writes (or when older than SCHEMA_MAX_AGE seconds, to pick
+up writes from other processes), and renders a pruned summary for the Cypher generation
+prompt: the core Document/Chunk structure plus the labels, properties and relationships
+relevant to the question's terms, capped at SCHEMA_PROMPT_MAX_CHARS.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from src.core.logging_config import get_logger
+from src.data.document_utils import to_latin
+from src.data.entity_resolution import entity_kind
+
+logger = get_logger(__name__)
+
+# Always described to the LLM: the document/chunk backbone every answer relies on
+CORE_LABELS = ("Document", "Chunk")
+# Internal bookkeeping properties that never help Cypher generation
+HIDDEN_PROPERTIES = {"embedding", "text_hash", "embedding_hash", "embedding_model"}
+
+_TERM = re.compile(r"[^\W_]+")
+# Question patterns that point at a resolvable entity kind even without a name match
+_KIND_HINTS = {
+    "BHMS": re.compile(r"bhms|standart|\d+-?son", re.IGNORECASE),
+    "AccountCode": re.compile(r"\b\d{4}\b|hisobvaraq|schyot|schet", re.IGNORECASE),
+    "NormativeDocument": re.compile(r"qonun|kodeks|qaror|farmon|buyruq|nizom", re.IGNORECASE),
+}
+
+
+def question_terms(text: str) -> list[str]:
+    """Lowercase Latin-script terms (3+ chars) of a question, Cyrillic transliterated."""
+    return [t for t in _TERM.findall(to_latin(text.lower())) if len(t) >= 3]
+
+
+def _name_matches(name: str, terms: list[str]) -> bool:
+    """Loose match of a label/property/type name against question terms (shared 5-char stem)."""
+    lowered = to_latin(name.lower())
+    for term in terms:
+        if term in lowered or (len(lowered) >= 3 and lowered in term):
+            return True
+        if len(term) >= 5 and term[:5] in lowered:
+            return True
+    return False
+
+
+def _question_features(question: str, terms: Optional[list[str]]) -> tuple[list[str], set[str]]:
+    """Terms of the question and extra terms, and the entity kinds the question hints at."""
+    all_terms = question_terms(question) + [t for term in terms or [] for t in question_terms(term)]
+    kinds = {kind for kind, pattern in _KIND_HINTS.items() if pattern.search(to_latin(question))}
+    return all_terms, kinds
+
+
+def render_schema(structured: dict[str, Any]) -> str:
+    """Render a structured schema in the Neo4jGraph text format used by the Cypher prompt."""
+    def props_text(props: list) -> str:
+        return ", ".join(f"{p['property']}: {p['type']}" for p in props)
+
+    node_lines = [
+        f"{label} {{{props_text(props)}}}"
+        for label, props in structured.get("node_props", {}).items()
+    ]
+    rel_prop_lines = [
+        f"{rel_type} {{{props_text(props)}}}"
+        for rel_type, props in structured.get("rel_props", {}).items()
+        if props
+    ]
+    rel_lines = [
+        f"(:{r['start']})-[:{r['type']}]->(:{r['end']})" for r in structured.get("relationships", [])
+    ]
+    return (
+        "Node properties:\n" + "\n".join(node_lines)
+        + "\nRelationship properties:\n" + "\n".join(rel_prop_lines)
+        + "\nThe relationships:\n" + "\n".join(rel_lines)
+    )
+
+
+class SchemaService:
+    """Versioned schema cache with question-specific pruned summaries."""
+
+    def __init__(
+        self,
+        graph: Any = None,
+        max_chars: Optional[int] = None,
+        max_age: Optional[float] = None,
+    ):
+        """
+        Args:
+            graph: Neo4jGraph-like object with refresh_schema() and structured_schema.
+                Defaults to get_neo4j_graph() on first refresh.
+            max_chars: Size budget of a rendered summary (SCHEMA_PROMPT_MAX_CHARS, default 2500).
+            max_age: Seconds after which the cached schema is refreshed even without a
+                local write (SCHEMA_MAX_AGE, default 600; 0 disables).
+        """
+        self._graph = graph
+        self.max_chars = max_chars or int(os.getenv("SCHEMA_PROMPT_MAX_CHARS", "2500"))
+        self.max_age = float(os.getenv("SCHEMA_MAX_AGE", "600")) if max_age is None else max_age
+        self.version = 0
+        self._digest = ""
+        self._structured: dict[str, Any] = {}
+        self._loaded_at = 0.0
+        self._stale = True
+        self._lock = threading.Lock()
+        self._summaries: OrderedDict[tuple, str] = OrderedDict()
+
+    @property
+    def graph(self) -> Any:
+        if self._graph is None:
+            from src.data.neo4j_client import get_neo4j_graph
+
+            self._graph = get_neo4j_graph()
+        return self._graph
+
+    def mark_stale(self) -> None:
+        """Schedule a refresh before the next use (call after writing to the graph)."""
+        self._stale = True
+
+    def _needs_refresh(self) -> bool:
+        if self._stale:
+            return True
+        return bool(self.max_age) and time.monotonic() - self._loaded_at > self.max_age
+
+    def get_structured(self) -> dict[str, Any]:
+        """Return the full structured schema, refreshing it from the graph only if stale."""
+        if self._needs_refresh():
+            with self._lock:
+                if self._needs_refresh():
+                    self._stale = False
+                    started = time.perf_counter()
+                    try:
+                        self.graph.refresh_schema()
+                    except Exception:
+                        self._stale = True
+                        raise
+                    structured = dict(getattr(self.graph, "structured_schema", {}) or {})
+                    digest = hashlib.sha256(
+                        json.dumps(structured, sort_keys=True, default=str).encode("utf-8")
+                    ).hexdigest()
+                    if digest != self._digest:
+                        self._digest = digest
+                        self._structured = structured
+                        self.version += 1
+                        self._summaries.clear()
+                    self._loaded_at = time.monotonic()
+                    logger.info(
+                        "schema_refreshed",
+                        version=self.version,
+                        labels=len(structured.get("node_props", {})),
+                        duration_ms=round((time.perf_counter() - started) * 1000, 1),
+                    )
+        return self._structured
+
+    def prune(self, question: str = "", terms: Optional[list[str]] = None) -> dict[str, Any]:
+        """
+        Select the part of the schema relevant to a question.
+
+        Core labels come first, then labels matching the question's terms or detected
+        entity kinds, then labels reachable from those by one relationship. Labels are
+        added in that order until the rendered size reaches the budget.
+        """
+        structured = self.get_structured()
+        node_props: dict[str, list] = structured.get("node_props", {}) or {}
+        relationships: list[dict] = structured.get("relationships", []) or []
+        all_terms, kinds = _question_features(question, terms)
+
+        def visible(props: list) -> list:
+            return [p for p in props if p.get("property") not in HIDDEN_PROPERTIES]
+
+        matched = [
+            label for label, props in node_props.items()
+            if label not in CORE_LABELS and (
+                _name_matches(label, all_terms)
+                or entity_kind(label) in kinds
+                or any(_name_matches(p.get("property", ""), all_terms) for p in visible(props))
+            )
+        ]
+        related_types = {r["type"] for r in relationships if _name_matches(r["type"], all_terms)}
+        neighbours = [
+            end
+            for r in relationships
+            for start, end in ((r["start"], r["end"]), (r["end"], r["start"]))
+            if start in matched and end not in CORE_LABELS and end not in matched
+        ]
+        ordered = list(dict.fromkeys(
+            [label for label in CORE_LABELS if label in node_props] + matched + neighbours
+        ))
+
+        selected: dict[str, list] = {}
+        for label in ordered:
+            candidate = {**selected, label: visible(node_props[label])}
+            rendered = render_schema(self._subset(candidate, relationships, related_types, structured))
+            if selected and len(rendered) > self.max_chars:
+                break
+            selected = candidate
+        return self._subset(selected, relationships, related_types, structured)
+
+    @staticmethod
+    def _subset(
+        node_props: dict[str, list], relationships: list[dict], related_types: set[str],
+        structured: dict[str, Any],
+    ) -> dict[str, Any]:
+        rels = [r for r in relationships if r["start"] in node_props and r["end"] in node_props]
+        rel_types = {r["type"] for r in rels} | related_types
+        rel_props = {
+            t: p for t, p in (structured.get("rel_props", {}) or {}).items() if t in rel_types
+        }
+        return {"node_props": node_props, "rel_props": rel_props, "relationships": rels}
+
+    def summary_for(self, question: str = "", terms: Optional[list[str]] = None) -> str:
+        """
+        Rendered pruned schema for the Cypher generation prompt.
+
+        Cached per schema version and question features (terms and entity kinds), which
+        decide both the selected labels and the relationship types, so a hit skips prune.
+        """
+        self.get_structured()
+        all_terms, kinds = _question_features(question, terms)
+        key = (self.version, tuple(all_terms), frozenset(kinds))
+        with self._lock:
+            cached = self._summaries.get(key)
+            if cached is not None:
+                self._summaries.move_to_end(key)
+                return cached
+        text = render_schema(self.prune(question, terms))[: self.max_chars]
+        with self._lock:
+            self._summaries[key] = text
+            if len(self._summaries) > 256:
+                self._summaries.popitem(last=False)
+        return text
+
+
+_service_instance: Optional[SchemaService] = None
+_service_lock = threading.Lock()
+
+
+def get_schema_service() -> SchemaService:
+    """Return the process-wide schema service."""
+    global _service_instance
+    if _service_instance is None:
+        with _service_lock:
+            if _service_instance is None:
+                _service_instance = SchemaService()
+    return _service_instance
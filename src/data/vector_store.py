@@ -8,6 +8,8 @@ import os
 from typing import Optional
 
 from src.core.logging_config import get_logger
+from src.data.chunk_store import VECTOR_RETRIEVAL_QUERY
+from src.data.embeddings import VECTOR_INDEX_NAME, get_embedder
 
 logger = get_logger(__name__)
 
@@ -28,18 +30,31 @@ def get_neo4j_vector_store():
     if _vector_store_instance is not None:
         return _vector_store_instance
 
+    url = os.getenv("NEO4J_URI")
+    if url and url.startswith("memory://"):
+        from src.data.memory_graph import InMemoryGraph, InMemoryVectorStore
+        from src.data.neo4j_client import get_neo4j_graph
+
+        embeddings = get_embedder()
+        if embeddings is None:
+            logger.warning("vector_store_unavailable", reason="no embedding backend configured")
+            return None
+        graph = get_neo4j_graph()
+        if not isinstance(graph, InMemoryGraph):
+            logger.warning("vector_store_unavailable", reason="graph backend is not in-memory")
+            return None
+        _vector_store_instance = InMemoryVectorStore(graph, embeddings)
+        return _vector_store_instance
+
     try:
         from langchain_neo4j import Neo4jVector
-        from langchain_openai import OpenAIEmbeddings
     except ImportError:
         try:
             from langchain_community.vectorstores.neo4j_vector import Neo4jVector
-            from langchain_openai import OpenAIEmbeddings
         except ImportError:
             logger.warning("vector_store_unavailable", reason="langchain-neo4j or langchain_community not installed")
             return None
 
-    url = os.getenv("NEO4J_URI")
     username = os.getenv("NEO4J_USERNAME")
     password = os.getenv("NEO4J_PASSWORD")
     if not all([url, username, password]):
@@ -49,8 +64,11 @@ def get_neo4j_vector_store():
     if url and url.startswith("neo4j+s://"):
         url = url.replace("neo4j+s://", "neo4j+ssc://")
 
-    embeddings = OpenAIEmbeddings()
-    index_name = "chunk_vector_index"
+    embeddings = get_embedder()
+    if embeddings is None:
+        logger.warning("vector_store_unavailable", reason="no embedding backend configured")
+        return None
+    index_name = VECTOR_INDEX_NAME
 
     try:
         # Try existing index first (after add_embeddings has been run)
@@ -62,6 +80,9 @@ def get_neo4j_vector_store():
             index_name=index_name,
             node_label="Chunk",
             text_node_property="text",
+            # Chunk text may be sliced from the Document (CHUNK_STORAGE=offsets); the span
+            # metadata lets hybrid retrieval merge adjacent chunks
+            retrieval_query=VECTOR_RETRIEVAL_QUERY,
         )
         logger.info("vector_store_loaded", index=index_name)
     except Exception:
@@ -0,0 +1,79 @@
+"""Tests for bulk_export module."""
+import csv
+import json
+import os
+
+from src.data.bulk_export import export_csv
+from src.data.document_utils import content_hash
+from src.data.embeddings import EmbeddingCache
+
+
+def _read(path):
+    with open(path, encoding="utf-8", newline="") as f:
+        return list(csv.reader(f))
+
+
+class TestExportCsv:
+    """Tests for export_csv."""
+
+    def test_writes_nodes_and_relationships(self, tmp_path, sample_json_data):
+        json_dir = tmp_path / "json"
+        json_dir.mkdir()
+        data = sample_json_data
+        data["graph_data"][0]["nodes"].append(
+            {"id": "n2", "type": "Some-Type", "properties": {"aliases": ["a", "b"]}}
+        )
+        data["graph_data"][0]["relationships"] = [
+            {"source": "node1", "target": "n2", "type": "refers to"},
+            {"source": "node1", "target": "missing", "type": "REFERS"},
+        ]
+        (json_dir / "doc.json").write_text(json.dumps(data), encoding="utf-8")
+
+        out = tmp_path / "import"
+        counts = export_csv(str(json_dir), str(out))
+
+        assert counts["documents.csv"] == 1
+        assert counts["chunks.csv"] == 1
+        assert counts["entities.csv"] == 2
+        assert counts["mentions.csv"] == 2
+        assert counts["relationships.csv"] == 1
+
+        chunks = _read(os.path.join(out, "chunks.csv"))
+        assert chunks[0][0] == "id:ID(Chunk)"
+        assert chunks[1][0] == "test_document.json_chunk1"
+        assert chunks[1][2] == content_hash("Test text")
+
+        entities = _read(os.path.join(out, "entities.csv"))
+        header = entities[0]
+        assert header[:2] == ["id:ID(Entity)", ":LABEL"]
+        assert "aliases:string[]" in header
+        rows = {r[0]: r for r in entities[1:]}
+        assert rows["n2"][1] == "SomeType"
+        assert rows["n2"][header.index("aliases:string[]")] == "a;b"
+
+        rels = _read(os.path.join(out, "relationships.csv"))
+        assert rels[1] == ["node1", "n2", "REFERSTO"]
+        contains = _read(os.path.join(out, "contains.csv"))
+        assert contains[1] == ["test_document.json", "test_document.json_chunk1", "CONTAINS"]
+
+    def test_embeddings_from_cache(self, tmp_path, sample_json_data):
+        json_dir = tmp_path / "json"
+        json_dir.mkdir()
+        (json_dir / "doc.json").write_text(json.dumps(sample_json_data), encoding="utf-8")
+        cache = EmbeddingCache(":memory:")
+        cache.put_many("m", {content_hash("Test text"): [0.5, 0.25]})
+
+        export_csv(str(json_dir), str(tmp_path / "out"), embedding_cache=cache, embedding_model="m")
+
+        chunks = _read(os.path.join(tmp_path / "out", "chunks.csv"))
+        row = dict(zip(chunks[0], chunks[1], strict=True))
+        assert row["embedding:float[]"] == "0.5;0.25"
+        assert row["embedding_model"] == "m"
+        cache.close()
+
+    def test_skips_invalid_files(self, tmp_path):
+        json_dir = tmp_path / "json"
+        json_dir.mkdir()
+        (json_dir / "bad.json").write_text("{not json", encoding="utf-8")
+        counts = export_csv(str(json_dir), str(tmp_path / "out"))
+        assert counts["documents.csv"] == 0
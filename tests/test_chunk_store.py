@@ -0,0 +1,112 @@
+"""Tests for chunk_store module."""
+from unittest.mock import patch
+
+import pytest
+
+from src.data.chunk_store import layout_document, merge_passages, search_cypher, storage_mode
+from src.data.chunking import chunk_document
+from src.data.embeddings import PENDING_CHUNKS_CYPHER
+from src.data.graph_rag import fallback_text_search
+from src.data.ingest_single import ingest_single_document
+from src.data.memory_graph import InMemoryGraph, MemoryGraphClient
+
+TEXT = "\n\n".join(
+    f"{i}-modda. " + "Asosiy vositalar hisobi va moliyaviy hisobot. " * (i % 5 + 2) for i in range(1, 30)
+)
+
+
+class TestStorageMode:
+    """Tests for CHUNK_STORAGE."""
+
+    def test_default_is_text(self, monkeypatch):
+        monkeypatch.delenv("CHUNK_STORAGE", raising=False)
+        assert storage_mode() == "text"
+
+    def test_unknown_mode(self, monkeypatch):
+        monkeypatch.setenv("CHUNK_STORAGE", "blob")
+        with pytest.raises(ValueError):
+            storage_mode()
+
+
+class TestLayoutDocument:
+    """Tests for layout_document."""
+
+    def test_chunker_offsets_are_kept(self):
+        chunks = chunk_document(TEXT, max_chunk_size=300, chunk_overlap=80)
+        text, spans = layout_document(chunks)
+        assert spans == [(c["start"], c["end"]) for c in chunks]
+        assert len(text) == chunks[-1]["end"]
+        for chunk, (start, end) in zip(chunks, spans, strict=True):
+            assert text[start:end] == chunk["original_text"]
+
+    def test_overlap_without_offsets_is_stored_once(self):
+        chunks = [
+            {"original_text": "Birinchi qism matni, uning davomi bilan birga"},
+            {"original_text": "uning davomi bilan birga keladigan ikkinchi qism"},
+            {"original_text": "Boshqa hujjat bo'lagi"},
+        ]
+        text, spans = layout_document(chunks)
+        assert text == (
+            "Birinchi qism matni, uning davomi bilan birga keladigan ikkinchi qism\n\nBoshqa hujjat bo'lagi"
+        )
+        for chunk, (start, end) in zip(chunks, spans, strict=True):
+            assert text[start:end] == chunk["original_text"]
+
+
+class TestMergePassages:
+    """Tests for merge_passages."""
+
+    def test_overlapping_chunks_merge(self):
+        rows = [
+            {"text": "cdefg", "document": "a.json", "start": 2, "end": 7},
+            {"text": "abcde", "document": "a.json", "start": 0, "end": 5},
+            {"text": "ghij", "document": "a.json", "start": 6, "end": 10},
+            {"text": "cdefg", "document": "b.json", "start": 2, "end": 7},
+        ]
+        assert merge_passages(rows) == ["abcdefghij", "cdefg"]
+
+    def test_rows_without_offsets_are_deduplicated(self):
+        assert merge_passages([{"text": "x"}, {"text": "x"}, {"text": ""}, {"text": "y"}]) == ["x", "y"]
+
+
+@pytest.fixture
+def offsets_graph(monkeypatch):
+    """In-memory graph with TEXT ingested in offsets mode."""
+    monkeypatch.setenv("CHUNK_STORAGE", "offsets")
+    graph = InMemoryGraph()
+    chunks = chunk_document(TEXT, max_chunk_size=300, chunk_overlap=80)
+    with patch("src.data.ingest_single.get_schema_service"), \
+            patch("src.data.ingest_single.get_graph_client", return_value=MemoryGraphClient(graph)), \
+            patch("src.data.ingest_single.embed_pending_chunks"):
+        ingest_single_document({"file_name": "kodeks.json"}, chunks)
+    return graph, chunks
+
+
+class TestOffsetsStorage:
+    """Tests for CHUNK_STORAGE=offsets on the in-memory graph."""
+
+    def test_chunks_store_spans_only(self, offsets_graph):
+        graph, chunks = offsets_graph
+        rows = graph.query(PENDING_CHUNKS_CYPHER, {"file_name": None, "model": "m"})
+        assert [r["text"] for r in rows] == [c["original_text"] for c in chunks]
+        assert graph.query(
+            "MATCH (c:Chunk {id: $id}) RETURN c.text AS text", {"id": "kodeks.json_0"}
+        ) == [{"text": None}]
+
+    def test_sliced_search(self, offsets_graph):
+        graph, _ = offsets_graph
+        rows = graph.query(search_cypher(), {"keyword": "12-MODDA"})
+        assert len(rows) == 1
+        assert rows[0]["text"].startswith("12-modda.")
+        assert TEXT[rows[0]["start"]:rows[0]["end"]] == rows[0]["text"]
+
+    def test_fallback_merges_adjacent_chunks(self, offsets_graph, monkeypatch):
+        graph, chunks = offsets_graph
+        monkeypatch.setenv("RERANK_TOP_K", "0")
+        with patch("src.data.graph_rag.get_graph_client", return_value=MemoryGraphClient(graph)):
+            result = fallback_text_search("hisobot", keywords=["hisobot"], limit_per_keyword=5)
+        # The five hits are consecutive chunks: one passage, each overlap stated once
+        header, passage = result.split("\n", 1)
+        assert header == "[1] kodeks, art. 1, 2, 3, 4, 5"
+        assert all(c["original_text"] in passage for c in chunks[:5])
+        assert len(passage) <= chunks[4]["end"] - chunks[0]["start"]
@@ -0,0 +1,81 @@
+"""Tests for the structure-aware chunker."""
+import pytest
+
+from src.data.chunking import chunk_document, iter_structured_chunks
+
+TAX_CODE = (
+    "Soliq kodeksi UMUMIY QISM I BOʻLIM. UMUMIY QOIDALAR 1-bob. Asosiy qoidalar "
+    "1-modda. Munosabatlar Ushbu Kodeks soliqlarni belgilaydi. "
+    "2-modda. Soliq toʻgʻrisidagi qonunchilik Qonunchilik ushbu Kodeksdan iborat. "
+    "2 1-modda. Qoʻshimcha modda Matn. "
+    "3-modda. Uzun modda " + "Normativ-huquqiy hujjat qabul qilingan boʻlsa; " * 40 + "Oxiri. "
+    "2-bob. Soliq toʻlovchilar 4-modda. Shaxslar Soliq toʻlovchilar shaxslardir."
+)
+
+POSTINGS = (
+    "II боб. Счётларнинг боғланиши\n"
+    "I қисм. Узоқ муддатли активлар\n"
+    "13 Номоддий активлар сотилиши акс эттирилган:\n а) сотилган қиймати суммасига\n4010 9220\n"
+    " б) ҚҚС ҳисобланган бўлса\n9220 6410\n"
+    "14 Номоддий активлар текинга берилди:\n а) бошланғич қиймати ҳисобдан чиқарилганда\n9220 0410\n"
+)
+
+
+class TestChunkDocument:
+    """Tests for chunk_document."""
+
+    def test_articles_are_not_split_when_they_fit(self):
+        chunks = chunk_document(TAX_CODE, max_chunk_size=800)
+        assert chunks[0]["original_text"] == "Soliq kodeksi UMUMIY QISM"
+        first = chunks[1]
+        assert "1-modda." in first["original_text"] and "2 1-modda." in first["original_text"]
+        assert chunks[2]["original_text"].startswith("3-modda.")
+        assert chunks[2]["article"] == "3"
+
+    def test_tracks_section_chapter_and_article(self):
+        chunks = chunk_document(TAX_CODE, max_chunk_size=800)
+        assert chunks[1]["section"] == "I BOʻLIM"
+        assert chunks[1]["chapter"] == "1-bob"
+        assert chunks[1]["article"] == "1"
+        last = chunks[-1]
+        assert last["chapter"] == "2-bob"
+        assert last["article"] == "4"
+        assert last["original_text"].startswith("2-bob. Soliq toʻlovchilar 4-modda.")
+
+    def test_superscript_article_number(self):
+        chunks = chunk_document("2 1-modda. Qoʻshimcha modda Matn.")
+        assert chunks[0]["article"] == "2¹"
+
+    def test_oversized_article_is_cut_at_clause_breaks(self):
+        chunks = chunk_document(TAX_CODE, max_chunk_size=800, chunk_overlap=100)
+        pieces = [c for c in chunks if c["article"] == "3"]
+        assert len(pieces) > 1
+        assert all(len(c["original_text"]) <= 800 for c in pieces)
+        assert all(c["original_text"].endswith((";", ".")) for c in pieces[:-1])
+
+    def test_offsets_slice_the_document(self):
+        for text in (TAX_CODE, POSTINGS):
+            for chunk in chunk_document(text, max_chunk_size=120, chunk_overlap=30):
+                assert text[chunk["start"]:chunk["end"]] == chunk["original_text"]
+
+    def test_chapter_starts_new_chunk(self):
+        chunks = chunk_document("Muqaddima " + "Kirish matni. " * 20 + "1-bob. Asosiy qoidalar Matn.", max_chunk_size=800)
+        assert chunks[0]["section"] == "Muqaddima"
+        assert chunks[-1]["original_text"] == "1-bob. Asosiy qoidalar Matn."
+
+    def test_numbered_postings(self):
+        chunks = chunk_document(POSTINGS, max_chunk_size=200)
+        assert [c["original_text"][:2] for c in chunks] == ["II", "14"]
+        assert "13 Номоддий" in chunks[0]["original_text"]
+        assert chunks[0]["section"] == "I қисм"
+        assert (chunks[1]["section"], chunks[1]["chapter"]) == ("I қисм", "Unknown")
+
+
+class TestIterStructuredChunks:
+    """Tests for incremental chunking."""
+
+    @pytest.mark.parametrize("step", [1, 5, 64, 10000])
+    def test_pieces_match_whole_text(self, step):
+        for text in (TAX_CODE, POSTINGS, "x" * 3000):
+            pieces = [text[i:i + step] for i in range(0, len(text), step)]
+            assert list(iter_structured_chunks(pieces, 200, 50)) == chunk_document(text, 200, 50)
@@ -0,0 +1,138 @@
+"""Tests for citations module."""
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.data.chunk_store import layout_document
+from src.data.citations import (
+    CitationIndex,
+    cited_documents,
+    index_document,
+    parse_citations,
+    resolve_citations,
+)
+from src.data.ingest_single import ingest_single_document
+from src.data.memory_graph import InMemoryGraph, MemoryGraphClient
+
+CODE = {"file_name": "soliq_kodeksi.json", "document_title": "O'zbekiston Respublikasining Soliq kodeksi",
+        "reg_number": "ZRU-582"}
+CODE_CHUNKS = [
+    {"chunk_id": "0", "original_text": "V BOB. SOLIQ TO'LOVCHILAR 236-modda. Umumiy qoidalar. "
+                                       "Soliq to'lovchilar ro'yxatga olinadi. 237-modda. Hisobga qo'yish. "
+                                       "Soliq to'lovchilar soliq organlarida hisobga qo'yiladi."},
+    {"chunk_id": "1", "original_text": "Hisobga qo'yish ariza asosida amalga oshiriladi va uch kun ichida tugaydi. "
+                                       "238-modda. Hisobdan chiqarish. Tugatilganda hisobdan chiqariladi."},
+]
+STANDARD = {"file_name": "adliya_reg_3259_20200630.json", "document_title": "Tovar-moddiy zaxiralar (4-sonli BHMS)",
+            "reg_number": "3259"}
+STANDARD_CHUNKS = [
+    {"chunk_id": "0", "original_text": "1. 4-sonli BHMS \"Tovar-moddiy zaxiralar\" tasdiqlansin."},
+    {"chunk_id": "1", "original_text": "5. Tovar-moddiy zaxiralar tannarx bo'yicha baholanadi."},
+]
+OTHER = {"file_name": "mehnat.json", "document_title": "Mehnat kodeksi"}
+OTHER_CHUNKS = [{"chunk_id": "0", "original_text": "237-modda. Ish vaqti. Ish vaqti haftasiga 40 soatdan oshmaydi."}]
+
+
+@pytest.fixture
+def client():
+    graph = InMemoryGraph()
+    client = MemoryGraphClient(graph)
+    with patch("src.data.ingest_single.get_schema_service"), \
+            patch("src.data.ingest_single.get_citation_index"), \
+            patch("src.data.ingest_single.get_graph_client", return_value=client), \
+            patch("src.data.ingest_single.embed_pending_chunks"):
+        for metadata, chunks in ((CODE, CODE_CHUNKS), (STANDARD, STANDARD_CHUNKS), (OTHER, OTHER_CHUNKS)):
+            ingest_single_document(metadata, [{**c, "nodes": [], "relationships": []} for c in chunks])
+    return client
+
+
+class TestParseCitations:
+    """Tests for parse_citations."""
+
+    @pytest.mark.parametrize("question, keys", [
+        ("Soliq kodeksi 237-modda", ["article:237", "code:soliq"]),
+        ("Солиқ кодекси 237-моддаси", ["article:237", "code:soliq"]),
+        ("Налоговый кодекс, статья 26¹", ["article:26¹", "code:soliq"]),
+        ("V боб нима ҳақида?", ["chapter:5"]),
+        ("21-сонли БҲМС", ["bhms:21"]),
+        ("BHMS №4 bo'yicha baholash", ["bhms:4"]),
+        ("adliya reg 3259", ["reg:3259"]),
+        ("рўйхат рақами 3259", ["reg:3259"]),
+        ("Amortizatsiya qanday hisoblanadi?", []),
+        ("24-son buyruq", []),
+    ])
+    def test_parses_both_scripts(self, question, keys):
+        assert [c.key for c in parse_citations(question)] == keys
+
+
+class TestIndexDocument:
+    """Tests for index_document."""
+
+    def test_articles_span_chunks_and_document_keys_cover_all(self):
+        _, spans = layout_document(CODE_CHUNKS)
+        rows = {(r["key"], r["chunk_id"]): r for r in index_document(CODE, CODE_CHUNKS, spans)}
+        text = CODE_CHUNKS[0]["original_text"]
+        article = rows[("article:237", "soliq_kodeksi.json_0")]
+        assert (article["start"], article["end"]) == (text.index("237-modda"), len(text))
+        # Article 237 continues into the next chunk up to the 238 heading
+        continued = rows[("article:237", "soliq_kodeksi.json_1")]
+        assert continued["end"] - continued["start"] == CODE_CHUNKS[1]["original_text"].index("238-modda")
+        assert ("chapter:5", "soliq_kodeksi.json_1") in rows
+        # Document-level citations are stored once per document, not per chunk
+        for key in ("reg:ZRU-582", "code:soliq"):
+            assert [chunk for k, chunk in rows if k == key] == [None]
+            assert rows[(key, None)]["id"] == f"soliq_kodeksi.json|{key}"
+
+
+class TestResolveCitations:
+    """Tests for CitationIndex and resolve_citations on the in-memory graph."""
+
+    def test_scoped_article_returns_only_the_article(self, client):
+        context = resolve_citations("Soliq kodeksi 237-modda", index=CitationIndex(client))
+        assert context.startswith("[1] soliq_kodeksi, art. 237")
+        assert "237-modda. Hisobga qo'yish." in context
+        assert "uch kun ichida tugaydi." in context
+        assert "236-modda" not in context and "238-modda" not in context
+
+    def test_unscoped_article_in_several_documents_is_ambiguous(self, client):
+        assert resolve_citations("237-modda", index=CitationIndex(client)) == ""
+        assert "Ish vaqti" in resolve_citations("Mehnat kodeksi 237-modda", index=CitationIndex(client))
+
+    def test_bhms_and_registration_number_name_documents_for_retrieval(self, client):
+        index = CitationIndex(client)
+        for question in ("4-sonli BHMS bo'yicha baholash", "adliya reg 3259"):
+            assert resolve_citations(question, index=index) == ""
+            assert cited_documents(question, index=index) == {"adliya_reg_3259_20200630.json"}
+        assert cited_documents("Soliq kodeksi nima?", index=index) == {"soliq_kodeksi.json"}
+        assert cited_documents("21-son BHMS", index=index) is None
+        assert cited_documents("Amortizatsiya qanday hisoblanadi?", index=MagicMock()) is None
+
+    def test_no_citation_or_code_only_does_not_touch_the_graph(self):
+        index = MagicMock()
+        assert resolve_citations("Amortizatsiya qanday hisoblanadi?", index=index) == ""
+        index.lookup.assert_not_called()
+        assert resolve_citations("x", index=index, max_chunks=0) == ""
+
+    def test_code_only_is_left_to_retrieval(self, client):
+        assert resolve_citations("Soliq kodeksi nima?", index=CitationIndex(client)) == ""
+
+    def test_index_loads_once_until_marked_stale(self, client):
+        index = CitationIndex(client, max_age=0)
+        with patch.object(client, "read", wraps=client.read) as read:
+            index.entries()
+            index.entries()
+            assert read.call_count == 1
+            index.mark_stale()
+            index.entries()
+            assert read.call_count == 2
+
+    def test_reingest_drops_stale_citations(self, client):
+        with patch("src.data.ingest_single.get_schema_service"), \
+                patch("src.data.ingest_single.get_citation_index"), \
+                patch("src.data.ingest_single.get_graph_client", return_value=client), \
+                patch("src.data.ingest_single.embed_pending_chunks"):
+            ingest_single_document(OTHER, [{"chunk_id": "0", "original_text": "1-modda. Yangi.", "nodes": [],
+                                            "relationships": []}])
+        keys = CitationIndex(client).entries()
+        assert all(e["document"] != "mehnat.json" for e in keys.get("article:237", []))
+        assert keys["article:1"][0]["document"] == "mehnat.json"
@@ -0,0 +1,117 @@
+"""Tests for context_packer module."""
+from src.data.context_packer import SPAN_SEPARATOR, citation_header, estimate_tokens, pack_context
+
+ARTICLE = "Asosiy vositalar hisobi va moliyaviy hisobot tuzish tartibi. " * 10
+
+
+class TestEstimateTokens:
+    """Tests for estimate_tokens."""
+
+    def test_ascii_words(self):
+        assert estimate_tokens("the accounting standard") == 1 + 3 + 2
+
+    def test_cyrillic_costs_more_per_character(self):
+        assert estimate_tokens("бухгалтерия") > estimate_tokens("buxgalteriya")
+
+    def test_punctuation(self):
+        assert estimate_tokens("a, b.") == 4
+
+
+class TestPackContext:
+    """Tests for pack_context."""
+
+    def test_merges_overlapping_neighbours_with_header(self):
+        rows = [
+            {"text": "abc def ghi", "document": "kodeks.json", "start": 0, "end": 11, "article": "12"},
+            {"text": "ghi jkl", "document": "kodeks.json", "start": 8, "end": 15, "article": "13"},
+        ]
+        packed = pack_context(rows, max_tokens=100)
+        assert packed.text == "[1] kodeks, art. 12, 13\nabc def ghi jkl"
+        assert packed.spans == 1
+
+    def test_drops_near_duplicates(self):
+        rows = [
+            {"text": ARTICLE, "document": "a.json", "start": 0, "end": len(ARTICLE)},
+            {"text": ARTICLE + " Qo'shimcha.", "document": "b.json", "start": 0, "end": len(ARTICLE) + 12},
+            {"text": "Boshqa mavzu bo'yicha band"},
+        ]
+        packed = pack_context(rows, max_tokens=1000)
+        assert packed.spans == 2
+        assert packed.duplicates == 1
+        assert "[2]\nBoshqa mavzu" in packed.text
+
+    def test_budget_skips_large_spans_but_keeps_smaller_ones(self):
+        rows = [
+            {"text": "Birinchi band matni."},
+            {"text": " ".join(f"so'z{i}" for i in range(500))},
+            {"text": "Uchinchi band matni."},
+        ]
+        packed = pack_context(rows, max_tokens=40)
+        assert packed.spans == 2
+        assert packed.over_budget == 1
+        assert packed.tokens <= 40
+        assert "[2]\nUchinchi band" in packed.text
+
+    def test_top_span_is_cut_to_budget(self):
+        packed = pack_context([{"text": ARTICLE}], max_tokens=50)
+        assert packed.spans == 1
+        assert packed.tokens <= 50
+        assert packed.text.startswith("[1]\nAsosiy vositalar")
+
+    def test_cut_keeps_the_best_ranked_chunk_of_a_merged_span(self):
+        head = "Kirish qismi matni. " * 40
+        body = "12-modda. Asosiy vositalar amortizatsiyasi hisoblanadi. " * 3
+        rows = [
+            {"text": body, "document": "k.json", "start": len(head), "end": len(head) + len(body)},
+            {"text": head, "document": "k.json", "start": 0, "end": len(head)},
+        ]
+        packed = pack_context(rows, max_tokens=80)
+        assert packed.spans == 1
+        assert packed.tokens <= 80
+        assert packed.text.endswith(body.strip())
+        assert packed.text.count("Kirish") < 10
+
+    def test_expansion_is_packed_after_ranked_spans_without_growing_them(self):
+        ranked = "12-modda. Asosiy vositalar amortizatsiyasi hisoblanadi. " * 6
+        neighbour = "13-modda. Qoldiq qiymat balansda ko'rsatiladi va qayta baholanadi. " * 6
+        other = "Soliq deklaratsiyasi har oy topshiriladi va tekshiriladi. " * 6
+        start = len(ranked)
+        rows = [
+            {"text": ranked, "document": "k.json", "start": 0, "end": start},
+            {"text": other, "document": "s.json", "start": 0, "end": len(other)},
+        ]
+        expansion = [
+            # Overlaps the ranked span and would extend it if merged
+            {"text": ranked[-50:] + neighbour, "document": "k.json", "start": start - 50,
+             "end": start + len(neighbour)},
+        ]
+        packed = pack_context(rows, max_tokens=10_000, expansion=expansion)
+        assert packed.spans == 3
+        first, second, third = packed.text.split(SPAN_SEPARATOR)
+        assert first == "[1] k\n" + ranked.strip()
+        assert second.startswith("[2] s\n")
+        assert third == "[3] k\n" + neighbour.strip()
+
+    def test_expansion_fully_covered_is_a_duplicate(self):
+        rows = [{"text": ARTICLE, "document": "a.json", "start": 0, "end": len(ARTICLE)}]
+        packed = pack_context(rows, max_tokens=10_000, expansion=[dict(rows[0])])
+        assert packed.spans == 1
+        assert packed.duplicates == 1
+
+    def test_unlimited_budget(self, monkeypatch):
+        monkeypatch.setenv("CONTEXT_MAX_TOKENS", "0")
+        rows = [{"text": f"{i}-band. " + ARTICLE[i:]} for i in range(0, 300, 60)]
+        assert pack_context(rows).spans >= 1
+
+    def test_empty(self):
+        assert pack_context([{"text": ""}]).text == ""
+
+
+class TestCitationHeader:
+    """Tests for citation_header."""
+
+    def test_without_metadata(self):
+        assert citation_header(3, {}) == "[3]"
+
+    def test_document_only(self):
+        assert citation_header(1, {"document": "upload_ab12.json", "articles": []}) == "[1] upload_ab12"
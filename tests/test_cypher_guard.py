@@ -0,0 +1,80 @@
+"""Tests for cypher_guard module."""
+from unittest.mock import Mock
+
+import pytest
+
+from src.data.cypher_guard import CypherRejected, GuardedGraph, apply_limit, plan_cost
+
+
+def _plan(rows, children=()):
+    return {"operatorType": "Op", "args": {"EstimatedRows": rows}, "children": list(children)}
+
+
+@pytest.fixture
+def client():
+    c = Mock()
+    c.explain.return_value = _plan(5, [_plan(10)])
+    c.read.return_value = [{"text": "chunk"}]
+    return c
+
+
+class TestApplyLimit:
+    """Tests for LIMIT injection."""
+
+    def test_appends_missing_limit(self):
+        assert apply_limit("MATCH (c:Chunk) RETURN c.text;", 10).endswith("LIMIT 10")
+
+    def test_clamps_large_limit(self):
+        assert apply_limit("MATCH (c:Chunk) RETURN c.text LIMIT 5000", 10) == "MATCH (c:Chunk) RETURN c.text LIMIT 10"
+
+    def test_keeps_small_limit(self):
+        assert apply_limit("MATCH (c:Chunk) RETURN c.text LIMIT 3", 10) == "MATCH (c:Chunk) RETURN c.text LIMIT 3"
+
+    def test_wraps_union(self):
+        bounded = apply_limit("MATCH (a:A) RETURN a.x AS x UNION MATCH (b:B) RETURN b.x AS x", 10)
+        assert bounded.startswith("CALL {") and bounded.endswith("RETURN * LIMIT 10")
+
+
+class TestGuardedGraph:
+    """Tests for GuardedGraph."""
+
+    def test_plan_cost(self):
+        assert plan_cost(_plan(5, [_plan(10), _plan(2)])) == (10.0, 3)
+
+    def test_runs_bounded_read(self, client):
+        guarded = GuardedGraph(Mock(), client, max_rows=10, timeout=2)
+        assert guarded.query("MATCH (c:Chunk) RETURN c.text AS text") == [{"text": "chunk"}]
+        cypher, _ = client.read.call_args.args
+        assert cypher.endswith("LIMIT 10")
+        assert client.read.call_args.kwargs["timeout"] == 2
+
+    @pytest.mark.parametrize("cypher,reason", [
+        ("MATCH (n) DETACH DELETE n RETURN count(n)", "write"),
+        ("MERGE (n:X {id: 1}) RETURN n", "write"),
+        ("CALL apoc.periodic.iterate('a', 'b', {}) YIELD batches RETURN batches", "procedure"),
+        ("MATCH (n) WITH n", "no_return"),
+    ])
+    def test_rejects_unsafe(self, client, cypher, reason):
+        guarded = GuardedGraph(Mock(), client)
+        with pytest.raises(CypherRejected) as exc:
+            guarded.query(cypher)
+        assert exc.value.reason == reason
+        client.read.assert_not_called()
+
+    def test_rejects_expensive_plan(self, client):
+        client.explain.return_value = _plan(5, [_plan(10_000_000)])
+        guarded = GuardedGraph(Mock(), client, max_estimated_rows=1000)
+        with pytest.raises(CypherRejected, match="plan_rows"):
+            guarded.query("MATCH (a), (b) RETURN a, b")
+        client.read.assert_not_called()
+
+    def test_rejects_invalid_statement(self, client):
+        client.explain.side_effect = Exception("Invalid input")
+        with pytest.raises(CypherRejected, match="explain_error"):
+            GuardedGraph(Mock(), client).query("MATCH (a RETURN a")
+
+    def test_allows_fulltext_procedure_and_schema(self, client):
+        graph = Mock(get_schema="schema")
+        guarded = GuardedGraph(graph, client)
+        guarded.query('CALL db.index.fulltext.queryNodes("chunk_text_index", $q) YIELD node RETURN node.text')
+        assert guarded.get_schema == "schema"
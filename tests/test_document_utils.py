@@ -0,0 +1,151 @@
+"""Tests for streaming document extraction and chunking."""
+import io
+
+import pytest
+
+from src.data.document_utils import (
+    chunk_text,
+    get_pdf_pool,
+    iter_chunks,
+    iter_html_text,
+    iter_pdf_pages,
+    iter_text,
+    read_bytes,
+    read_doc_or_txt,
+    strip_html,
+)
+
+
+def make_pdf(texts: list[str]) -> bytes:
+    """Minimal PDF with one Helvetica text line per page."""
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for text in texts:
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET"
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {len(objects)} 0 R "
+            "/Resources << /Font << /F1 3 0 R >> >> >>"
+        )
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(out.tell())
+        out.write(f"{number} 0 obj\n{body}\nendobj\n".encode())
+    xref = out.tell()
+    out.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode())
+    for offset in offsets:
+        out.write(f"{offset:010d} 00000 n \n".encode())
+    out.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+    return out.getvalue()
+
+
+PAGES = [f"Page {i}" for i in range(20)]
+
+
+class TestIterPdfPages:
+    """Tests for page-range PDF extraction."""
+
+    def test_serial_below_threshold(self, monkeypatch):
+        monkeypatch.setenv("PDF_PARALLEL_MIN_PAGES", "100")
+        assert list(iter_pdf_pages(make_pdf(PAGES), workers=2)) == PAGES
+
+    def test_parallel_keeps_page_order(self, monkeypatch):
+        monkeypatch.setenv("PDF_PARALLEL_MIN_PAGES", "4")
+        assert list(iter_pdf_pages(make_pdf(PAGES), workers=2, pages_per_task=3)) == PAGES
+
+    def test_parallel_stops_early(self, monkeypatch):
+        monkeypatch.setenv("PDF_PARALLEL_MIN_PAGES", "4")
+        pages = iter_pdf_pages(make_pdf(PAGES), workers=2, pages_per_task=3)
+        assert next(pages) == "Page 0"
+        pages.close()
+
+    def test_pool_is_shared_across_documents(self, monkeypatch):
+        monkeypatch.setenv("PDF_PARALLEL_MIN_PAGES", "4")
+        pages = iter_pdf_pages(make_pdf(PAGES), workers=2, pages_per_task=3)
+        next(pages)
+        pages.close()
+        pool = get_pdf_pool(2)
+        assert list(iter_pdf_pages(make_pdf(PAGES[:6]), workers=2, pages_per_task=3)) == PAGES[:6]
+        assert get_pdf_pool(2) is pool
+
+    def test_read_bytes_joins_pages(self):
+        assert read_bytes(make_pdf(["a", "b"]), ".pdf") == "a\n\nb"
+
+
+class TestIterText:
+    """Tests for incremental text extraction."""
+
+    def test_docx_paragraphs(self):
+        from docx import Document
+        doc = Document()
+        for text in ("First", "", "Third"):
+            doc.add_paragraph(text)
+        buffer = io.BytesIO()
+        doc.save(buffer)
+        pieces = list(iter_text(buffer.getvalue(), ".docx"))
+        assert "".join(pieces) == "First\n\nThird"
+        assert len(pieces) == 3
+
+    def test_plain_text_is_one_piece(self):
+        assert list(iter_text(b"Matn", ".txt")) == ["Matn"]
+
+
+WORD_HTML = (
+    "<html><head><title>Soliq</title><style>p {color:red} a<b</style>"
+    "<script>var x = \"<p>\";</script></head><body><div>"
+    "<p class=MsoNormal><b>1-modda.</b> Asosiy&nbsp;vositalar &amp; &lt;hisob&gt; &#1073;</p>\n"
+    "<p>Ikkinchi<br/>qator</p><table><tr><td>A</td><td>B</td></tr></table></div></body></html>"
+)
+
+
+class TestStripHtml:
+    """Tests for the streaming HTML converter."""
+
+    def test_converts_word_html(self):
+        assert strip_html(WORD_HTML) == "Soliq\n1-modda. Asosiy vositalar & <hisob> б\nIkkinchi\nqator\nA B"
+
+    @pytest.mark.parametrize("step", [1, 7, 64])
+    def test_piece_boundaries_do_not_matter(self, step):
+        pieces = [WORD_HTML[i:i + step] for i in range(0, len(WORD_HTML), step)]
+        assert "".join(iter_html_text(pieces)) == strip_html(WORD_HTML)
+
+    def test_read_doc_streams_cp1251_html(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("src.data.document_utils.TEXT_READ_SIZE", 16)
+        path = tmp_path / "kodeks.doc"
+        path.write_bytes(WORD_HTML.replace("Asosiy", "Асосий").encode("cp1251"))
+        assert read_doc_or_txt(str(path)).startswith("Soliq\n1-modda. Асосий vositalar")
+
+    def test_plain_text_unchanged(self, tmp_path):
+        path = tmp_path / "note.txt"
+        path.write_bytes(b"line1\r\n<b>line2</b>")
+        assert read_doc_or_txt(str(path)) == "line1\r\n<b>line2</b>"
+
+
+class TestIterChunks:
+    """Tests for the streaming chunker."""
+
+    TEXT = "\n\n".join(
+        f"{i}-modda. " + "Buxgalteriya hisobi va moliyaviy hisobot. " * (i % 7 + 1) for i in range(40)
+    )
+
+    @pytest.mark.parametrize("step", [1, 13, 500, 100000])
+    def test_matches_chunk_text(self, step):
+        pieces = [self.TEXT[i:i + step] for i in range(0, len(self.TEXT), step)]
+        for size, overlap in ((800, 150), (300, 50)):
+            assert list(iter_chunks(pieces, size, overlap)) == chunk_text(self.TEXT, size, overlap)
+
+    def test_break_near_start_terminates(self):
+        # A paragraph break inside the overlap used to send the loop back to the same chunk
+        text = "a\n\n" + "b. " * 400
+        chunks = chunk_text(text, max_chunk_size=300, chunk_overlap=150)
+        assert chunks[0]["original_text"].startswith("a\n\nb.")
+        assert len(chunks) < 20
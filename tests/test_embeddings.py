@@ -0,0 +1,86 @@
+"""Tests for embeddings module."""
+from unittest.mock import Mock
+
+import pytest
+
+from src.data.document_utils import content_hash
+from src.data.embeddings import (
+    PENDING_CHUNKS_CYPHER,
+    WRITE_EMBEDDINGS_CYPHER,
+    EmbeddingCache,
+    embed_pending_chunks,
+)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    """Embedding cache backed by a temporary SQLite file."""
+    c = EmbeddingCache(str(tmp_path / "emb.sqlite3"))
+    yield c
+    c.close()
+
+
+@pytest.fixture
+def embedder():
+    """Fake embedder returning one 3-dim vector per text."""
+    emb = Mock()
+    emb.model = "fake"
+    emb.embed_documents = Mock(side_effect=lambda texts: [[float(len(t)), 1.0, 0.0] for t in texts])
+    return emb
+
+
+class TestEmbeddingCache:
+    """Tests for the on-disk embedding cache."""
+
+    def test_roundtrip(self, cache):
+        cache.put_many("m", {"h1": [0.5, 1.5]})
+        assert cache.get_many("m", ["h1", "h2"]) == {"h1": [0.5, 1.5]}
+
+    def test_keyed_by_model(self, cache):
+        cache.put_many("m1", {"h1": [1.0]})
+        assert cache.get_many("m2", ["h1"]) == {}
+
+
+class TestEmbedPendingChunks:
+    """Tests for embed_pending_chunks."""
+
+    def test_skips_without_embedder(self, mock_neo4j_graph, monkeypatch):
+        monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+        assert embed_pending_chunks(mock_neo4j_graph) == 0
+        mock_neo4j_graph.query.assert_not_called()
+
+    def test_embeds_identical_text_once(self, mock_neo4j_graph, embedder, cache):
+        mock_neo4j_graph.query.side_effect = lambda cypher, params=None: (
+            [{"id": "a", "text": "same"}, {"id": "b", "text": "same"}, {"id": "c", "text": "other"}]
+            if cypher == PENDING_CHUNKS_CYPHER
+            else []
+        )
+        written = embed_pending_chunks(mock_neo4j_graph, embedder=embedder, cache=cache)
+        assert written == 3
+        embedded_texts = [t for call in embedder.embed_documents.call_args_list for t in call[0][0]]
+        assert sorted(embedded_texts) == ["other", "same"]
+        write_calls = [c for c in mock_neo4j_graph.query.call_args_list if c[0][0] == WRITE_EMBEDDINGS_CYPHER]
+        rows = write_calls[0][0][1]["rows"]
+        hashes = {r["id"]: r["hash"] for r in rows}
+        assert hashes == {"a": content_hash("same"), "b": content_hash("same"), "c": content_hash("other")}
+
+    def test_cache_hits_skip_embedding(self, mock_neo4j_graph, embedder, cache):
+        cache.put_many("Mock:fake", {content_hash("cached"): [1.0, 2.0, 3.0]})
+        mock_neo4j_graph.query.side_effect = lambda cypher, params=None: (
+            [{"id": "a", "text": "cached"}] if cypher == PENDING_CHUNKS_CYPHER else []
+        )
+        assert embed_pending_chunks(mock_neo4j_graph, embedder=embedder, cache=cache) == 1
+        embedder.embed_documents.assert_not_called()
+
+    def test_write_batching(self, mock_neo4j_graph, embedder, cache):
+        mock_neo4j_graph.query.side_effect = lambda cypher, params=None: (
+            [{"id": str(i), "text": f"text {i}"} for i in range(5)]
+            if cypher == PENDING_CHUNKS_CYPHER
+            else []
+        )
+        embed_pending_chunks(
+            mock_neo4j_graph, embedder=embedder, cache=cache, batch_size=2, write_batch_size=2
+        )
+        assert embedder.embed_documents.call_count == 3
+        write_calls = [c for c in mock_neo4j_graph.query.call_args_list if c[0][0] == WRITE_EMBEDDINGS_CYPHER]
+        assert len(write_calls) == 3
@@ -0,0 +1,95 @@
+"""Tests for entity_resolution module."""
+import pytest
+
+from src.data.entity_resolution import entity_kind, resolution_key, resolve_graph_data
+
+
+class TestResolutionKey:
+    """Tests for per-kind key normalization."""
+
+    @pytest.mark.parametrize("node_id", ["21-son BHMS", "21-сон БҲМС", "bhms_21", "BHMS 21", "21-sonli BHMS"])
+    def test_bhms_variants(self, node_id):
+        assert resolution_key("BHMS", node_id) == "21"
+
+    def test_bhms_edition_not_merged(self):
+        assert resolution_key("BHMS", "BHMS_17_Eski") is None
+
+    @pytest.mark.parametrize("node_id", ["0110", "Hisob 0110", "счёт 0110", "account_code_0110"])
+    def test_account_code_variants(self, node_id):
+        assert resolution_key("AccountCode", node_id) == "0110"
+
+    def test_account_code_from_properties(self):
+        assert resolution_key("AccountCode", "Yer", {"code": "0110"}) == "0110"
+
+    def test_normative_document(self):
+        assert resolution_key("NormativeDocument", "ZRU-582") == "ZRU-582"
+        assert resolution_key("NormativeDocument", "zru 582") == "ZRU-582"
+        assert resolution_key("NormativeDocument", "Adliya reg 3259") == "reg-3259"
+        assert resolution_key("NormativeDocument", "Солиқ кодекси") == resolution_key(
+            "NormativeDocument", "Soliq Kodeksi"
+        )
+
+    def test_entity_kind(self):
+        assert entity_kind("BHMS") == "BHMS"
+        assert entity_kind("Standart") == "BHMS"
+        assert entity_kind("Account_Code") == "AccountCode"
+        assert entity_kind("Tushuncha") is None
+
+
+class TestResolveGraphData:
+    """Tests for resolve_graph_data."""
+
+    def test_merges_variants_and_rewrites_relationships(self):
+        graph_data = [
+            {
+                "chunk_id": "0",
+                "nodes": [
+                    {"id": "21-son BHMS", "type": "BHMS", "properties": {"name": "Hisobvaraqlar rejasi"}},
+                    {"id": "bhms_21", "type": "BHMS"},
+                    {"id": "Moliya", "type": "MinistryOfFinance"},
+                ],
+                "relationships": [
+                    {"source": "Moliya", "target": "21-son BHMS", "type": "APPROVED"},
+                    {"source": "Moliya", "target": "bhms_21", "type": "APPROVED"},
+                    {"source": "bhms_21", "target": "21-son BHMS", "type": "SAME"},
+                ],
+            },
+            {
+                "chunk_id": "1",
+                "nodes": [{"id": "21-сон БҲМС", "type": "BHMS"}],
+                "relationships": [],
+            },
+        ]
+        resolved = resolve_graph_data(graph_data)
+        first = resolved[0]
+        assert [n["id"] for n in first["nodes"]] == ["BHMS_21", "Moliya"]
+        bhms = first["nodes"][0]
+        assert bhms["properties"]["name"] == "Hisobvaraqlar rejasi"
+        assert set(bhms["properties"]["aliases"]) == {"21-son BHMS", "bhms_21", "21-сон БҲМС"}
+        assert first["relationships"] == [{"source": "Moliya", "target": "BHMS_21", "type": "APPROVED"}]
+        assert resolved[1]["nodes"][0]["id"] == "BHMS_21"
+
+    def test_leaves_other_entities_untouched(self, sample_json_data):
+        graph_data = sample_json_data["graph_data"]
+        assert resolve_graph_data(graph_data) == graph_data
+
+    def test_curated_ids_keep_their_id_and_take_the_kind_label(self):
+        graph_data = [
+            {
+                "chunk_id": "0",
+                "nodes": [
+                    {"id": "BHMS_14", "type": "Standart", "properties": {"nomi": "Segmentlar"}},
+                    {"id": "14-son BHMS", "type": "BHMS"},
+                    {"id": "BHMS_10_Eski", "type": "Standart"},
+                ],
+                "relationships": [{"source": "14-son BHMS", "target": "BHMS_10_Eski", "type": "REPLACES"}],
+            },
+            {"chunk_id": "1", "nodes": [{"id": "14-sonli BHMS", "type": "BHMS"}], "relationships": []},
+        ]
+        resolved = resolve_graph_data(graph_data)
+        assert resolved[0]["nodes"] == [{**graph_data[0]["nodes"][0], "type": "BHMS"}, graph_data[0]["nodes"][2]]
+        assert resolved[0]["relationships"][0]["source"] == "BHMS_14"
+        assert resolved[1]["nodes"][0]["id"] == "BHMS_14"
+        # Same label as in a document without the curated node, so ingestion MERGEs one node
+        without_curated = resolve_graph_data([graph_data[1]])
+        assert resolved[1]["nodes"][0]["type"] == without_curated[0]["nodes"][0]["type"] == "BHMS"
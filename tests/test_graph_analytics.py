@@ -0,0 +1,156 @@
+"""Tests for graph_analytics module."""
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+
+from src.data.graph_analytics import compute_graph_analytics, label_propagation, pagerank
+from src.data.graph_rag import _is_broad_question, global_search
+from src.data.ingest_single import ingest_single_document
+from src.data.memory_graph import InMemoryGraph, MemoryGraphClient
+
+
+def chunk(chunk_id: str, text: str, entities: list[str]) -> dict:
+    return {
+        "chunk_id": chunk_id,
+        "original_text": text,
+        "nodes": [{"id": e, "type": "Tushuncha", "properties": {"nomi": e.replace("_", " ")}} for e in entities],
+        "relationships": [],
+    }
+
+
+def ingest(graph: InMemoryGraph, documents: dict) -> None:
+    with patch("src.data.ingest_single.get_schema_service"), \
+            patch("src.data.ingest_single.get_graph_client", return_value=MemoryGraphClient(graph)), \
+            patch("src.data.ingest_single.embed_pending_chunks"):
+        for file_name, graph_data in documents.items():
+            ingest_single_document({"file_name": file_name}, graph_data)
+
+
+ASSETS = ["Asosiy_vositalar", "Amortizatsiya", "Qoldiq_qiymat"]
+TAXES = ["QQS", "Foyda_solig'i", "Soliq_deklaratsiyasi"]
+
+
+@pytest.fixture
+def graph():
+    """Two topics whose chunks share entities only within the topic."""
+    graph = InMemoryGraph()
+    ingest(graph, {
+        "assets.json": [
+            chunk("0", "Asosiy vositalar boshlang'ich qiymatida hisobga olinadi.", ASSETS[:2]),
+            chunk("1", "Amortizatsiya qoldiq qiymatni kamaytiradi.", ASSETS[1:]),
+            chunk("2", "Qoldiq qiymat balansda ko'rsatiladi.", [ASSETS[0], ASSETS[2]]),
+        ],
+        "taxes.json": [
+            chunk("0", "QQS va foyda solig'i deklaratsiyada ko'rsatiladi.", TAXES),
+            chunk("1", "Soliq deklaratsiyasi har oy topshiriladi.", TAXES[1:]),
+        ],
+    })
+    return graph
+
+
+class TestPagerank:
+    """Tests for pagerank."""
+
+    def test_star_centre_ranks_first(self):
+        # Undirected star: 0 linked to 1, 2, 3
+        src = np.array([0, 0, 0, 1, 2, 3])
+        dst = np.array([1, 2, 3, 0, 0, 0])
+        rank = pagerank(4, src, dst)
+        assert rank.sum() == pytest.approx(1.0)
+        assert rank[0] > rank[1] == pytest.approx(rank[2])
+
+    def test_dangling_mass_is_kept(self):
+        rank = pagerank(3, np.array([0]), np.array([1]))
+        assert rank.sum() == pytest.approx(1.0)
+        assert rank[1] > rank[0]
+
+
+class TestLabelPropagation:
+    """Tests for label_propagation."""
+
+    def test_bipartite_components_get_one_label_each(self):
+        # Chunks 0, 1 share entity 4; chunk 2 and 3 share entity 5
+        edges = [(0, 4), (1, 4), (2, 5), (3, 5), (0, 6), (1, 6)]
+        src = np.array([a for a, b in edges] + [b for a, b in edges])
+        dst = np.array([b for a, b in edges] + [a for a, b in edges])
+        labels = label_propagation(7, src, dst, [np.arange(4), np.arange(4, 7)])
+        assert labels[0] == labels[1] == labels[4] == labels[6]
+        assert labels[2] == labels[3] == labels[5]
+        assert labels[0] != labels[2]
+
+
+class TestComputeGraphAnalytics:
+    """Tests for compute_graph_analytics on the in-memory graph."""
+
+    def test_stores_scores_and_summarized_communities(self, graph):
+        summarize = MagicMock(return_value="Summary.")
+        result = compute_graph_analytics(graph, summarize=summarize)
+
+        assert result == {"nodes": 11, "communities": 2, "summarized": 2, "cached": 0}
+        rows = graph.query("MATCH (c:Chunk {id: $id}) RETURN c.community AS community", {"id": "assets.json_0"})
+        assets_community = rows[0]["community"]
+        assert assets_community.startswith("community_")
+        other = graph.query("MATCH (c:Chunk {id: $id}) RETURN c.community AS community", {"id": "taxes.json_1"})
+        assert other[0]["community"] != assets_community
+        pagerank_row = graph.query("MATCH (c:Chunk {id: $id}) RETURN c.pagerank AS pagerank", {"id": "assets.json_0"})
+        assert pagerank_row[0]["pagerank"] > 0
+
+        prompts = " ".join(call.args[0] for call in summarize.call_args_list)
+        assert "Asosiy vositalar" in prompts and "Soliq deklaratsiyasi har oy topshiriladi." in prompts
+        assert graph.counts()["Community"] == 2
+
+    def test_unchanged_communities_reuse_summaries(self, graph):
+        compute_graph_analytics(graph, summarize=lambda prompt: "cached summary")
+        summarize = MagicMock(return_value="new summary")
+        result = compute_graph_analytics(graph, summarize=summarize)
+        assert result["cached"] == 2 and result["summarized"] == 0
+        summarize.assert_not_called()
+
+    def test_changed_members_replace_the_community(self, graph):
+        compute_graph_analytics(graph, summarize=lambda prompt: "first")
+        ingest(graph, {"taxes2.json": [chunk("0", "QQS stavkasi o'zgardi.", ["QQS"])]})
+        summarize = MagicMock(return_value="second")
+        result = compute_graph_analytics(graph, summarize=summarize)
+        assert result["cached"] == 1 and result["summarized"] == 1
+        # The old taxes community is removed, not kept next to the new one
+        assert graph.counts()["Community"] == 2
+
+    def test_summary_failure_is_retried_next_run(self, graph):
+        result = compute_graph_analytics(graph, summarize=MagicMock(side_effect=RuntimeError("rate limit")))
+        assert result["summarized"] == 0 and result["communities"] == 2
+        result = compute_graph_analytics(graph, summarize=lambda prompt: "ok")
+        assert result["summarized"] == 2
+
+    def test_empty_graph(self):
+        assert compute_graph_analytics(InMemoryGraph(), summarize=MagicMock())["nodes"] == 0
+
+
+class TestGlobalSearch:
+    """Tests for graph_rag.global_search over computed communities."""
+
+    def test_ranks_matching_summary_first(self, graph):
+        def summarize(prompt: str) -> str:
+            return "Asosiy vositalar va amortizatsiya hisobi." if "Amortizatsiya" in prompt else "Soliq va QQS."
+
+        compute_graph_analytics(graph, summarize=summarize)
+        with patch("src.data.graph_rag.get_graph_client", return_value=MemoryGraphClient(graph)):
+            context = global_search("amortizatsiya haqida umumiy ma'lumot", top_k=1)
+        assert context.startswith("[1] Community: ")
+        assert "amortizatsiya hisobi" in context
+        assert "QQS" not in context
+
+    def test_disabled_or_not_computed(self, graph):
+        with patch("src.data.graph_rag.get_graph_client", return_value=MemoryGraphClient(graph)):
+            assert global_search("overview", top_k=0) == ""
+            assert global_search("overview") == ""
+
+
+def test_is_broad_question():
+    assert _is_broad_question("Asosiy vositalar haqida umumiy ma'lumot bering")
+    assert _is_broad_question("Give me an overview of tax accounting")
+    assert not _is_broad_question("21-son BHMS haqida")
+    assert not _is_broad_question("Asosiy vositalar haqida")
+    assert not _is_broad_question("Explain how depreciation is calculated")
+    assert not _is_broad_question("Soliq kodeksining umumiy qoidalari")
+    assert not _is_broad_question("Amortizatsiya qanday hisoblanadi?")
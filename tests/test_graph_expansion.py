@@ -0,0 +1,81 @@
+"""Tests for graph_expansion module."""
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from src.data.graph_expansion import expand, personalized_pagerank
+from src.data.ingest_single import ingest_single_document
+from src.data.memory_graph import InMemoryGraph, MemoryGraphClient
+
+
+def chunk(chunk_id: str, text: str, entities: list[str]) -> dict:
+    return {
+        "chunk_id": chunk_id,
+        "original_text": text,
+        "nodes": [{"id": e, "type": "AccountCode"} for e in entities],
+        "relationships": [],
+    }
+
+
+@pytest.fixture
+def client():
+    """Two documents whose chunks share account-code entities."""
+    graph = InMemoryGraph()
+    documents = {
+        "a.json": [
+            chunk("0", "Asosiy vositalar hisobi 0110 hisobvarag'ida yuritiladi.", ["0110"]),
+            chunk("1", "Amortizatsiya 0200 hisobvarag'ida to'planadi.", ["0200"]),
+            chunk("2", "Boshqa qoidalar.", []),
+        ],
+        "b.json": [
+            chunk("0", "Kirim provodkasi: debet 0110, kredit 6010.", ["0110", "6010"]),
+            chunk("1", "Yetkazib beruvchilar bilan hisob-kitoblar 6010.", ["6010"]),
+        ],
+    }
+    with patch("src.data.ingest_single.get_schema_service"), \
+            patch("src.data.ingest_single.get_graph_client", return_value=MemoryGraphClient(graph)), \
+            patch("src.data.ingest_single.embed_pending_chunks"):
+        for file_name, graph_data in documents.items():
+            ingest_single_document({"file_name": file_name}, graph_data)
+    return MemoryGraphClient(graph)
+
+
+class TestPersonalizedPagerank:
+    """Tests for personalized_pagerank."""
+
+    def test_mass_decays_with_distance(self):
+        # Path 0 - 1 - 2 - 3, restarting at 0
+        adjacency = np.zeros((4, 4))
+        for a in range(3):
+            adjacency[a, a + 1] = adjacency[a + 1, a] = 1.0
+        rank = personalized_pagerank(adjacency, np.array([1.0, 0, 0, 0]))
+        assert rank.sum() == pytest.approx(1.0)
+        assert rank[0] > rank[1] > rank[2] > rank[3] > 0
+
+    def test_isolated_seed(self):
+        rank = personalized_pagerank(np.zeros((2, 2)), np.array([1.0, 0.0]))
+        assert rank.tolist() == pytest.approx([1.0, 0.0])
+
+
+class TestExpand:
+    """Tests for expand on the in-memory graph."""
+
+    def test_reaches_chunks_through_shared_entities_and_siblings(self, client):
+        rows = expand(client, [{"id": "a.json_0", "text": "..."}], top_k=5)
+        # Sibling a.json_1 (seq + 1) and b.json_0 through account 0110; the walk stops at
+        # chunks, so b.json_1 (only linked to b.json_0 through 6010) is not fetched
+        assert {r["id"] for r in rows} == {"a.json_1", "b.json_0"}
+        assert rows[0]["text"] and rows[0]["document"] in ("a.json", "b.json")
+        assert all(r["score"] > 0 for r in rows)
+
+    def test_chunks_reached_from_several_seeds_rank_first(self, client):
+        rows = expand(client, [{"id": "a.json_1"}, {"id": "b.json_1"}], top_k=5)
+        # a.json_0 and a.json_2 are siblings of one seed; b.json_0 is sibling of b.json_1
+        # and shares 6010 with it
+        assert rows[0]["id"] == "b.json_0"
+
+    def test_disabled_or_no_seeds(self, client):
+        assert expand(client, [{"id": "a.json_0"}], top_k=0) == []
+        assert expand(client, [{"text": "no id"}], top_k=3) == []
+        assert expand(client, [{"id": "missing"}], top_k=3) == []
@@ -32,19 +32,22 @@ class TestGetGraphRagChain:
 class TestQueryGraph:
     """Tests for graph querying."""
     
+    @patch('src.data.graph_rag.get_schema_service')
     @patch('src.data.graph_rag.get_graph_rag_chain')
-    def test_query_graph_success(self, mock_get_chain):
+    def test_query_graph_success(self, mock_get_chain, mock_get_schema):
         """Test successful graph query."""
         mock_chain = Mock()
         mock_chain.invoke.return_value = {"result": "Query result"}
         mock_get_chain.return_value = mock_chain
+        mock_get_schema.return_value.summary_for.return_value = "Pruned schema"
         
         result = query_graph("test query")
         assert result == "Query result"
-        mock_chain.invoke.assert_called_once_with({"query": "test query"})
+        mock_chain.invoke.assert_called_once_with({"query": "test query", "schema": "Pruned schema"})
     
+    @patch('src.data.graph_rag.get_schema_service')
     @patch('src.data.graph_rag.get_graph_rag_chain')
-    def test_query_graph_error(self, mock_get_chain):
+    def test_query_graph_error(self, mock_get_chain, mock_get_schema):
         """Test error handling in graph query."""
         mock_chain = Mock()
         mock_chain.invoke.side_effect = Exception("Test error")
@@ -129,11 +132,11 @@ class TestExtractBilingualKeywords:
 class TestFallbackTextSearch:
     """Tests for fallback_text_search."""
 
-    @patch('src.data.graph_rag.get_neo4j_graph')
+    @patch('src.data.graph_rag.get_graph_client')
     def test_fallback_returns_concatenated_text(self, mock_get_graph):
         """Test fallback returns concatenated chunk texts."""
         mock_graph = Mock()
-        mock_graph.query.return_value = [
+        mock_graph.read.return_value = [
             {"text": "Chunk 1 content"},
             {"text": "Chunk 2 content"},
         ]
@@ -142,23 +145,23 @@ class TestFallbackTextSearch:
         result = fallback_text_search("BҲMS", keywords=["BҲMS"])
         assert "Chunk 1 content" in result
         assert "Chunk 2 content" in result
-        mock_graph.query.assert_called()
+        mock_graph.read.assert_called()
 
-    @patch('src.data.graph_rag.get_neo4j_graph')
+    @patch('src.data.graph_rag.get_graph_client')
     def test_fallback_empty_result(self, mock_get_graph):
         """Test fallback handles empty result."""
         mock_graph = Mock()
-        mock_graph.query.return_value = []
+        mock_graph.read.return_value = []
         mock_get_graph.return_value = mock_graph
 
         result = fallback_text_search("nonexistent")
         assert result == ""
 
-    @patch('src.data.graph_rag.get_neo4j_graph')
+    @patch('src.data.graph_rag.get_graph_client')
     def test_fallback_with_original_query_uses_bilingual_keywords(self, mock_get_graph):
         """Test fallback with original_query uses bilingual keyword extraction."""
         mock_graph = Mock()
-        mock_graph.query.return_value = [{"text": "1-sonli BHMS content"}]
+        mock_graph.read.return_value = [{"text": "1-sonli BHMS content"}]
         mock_get_graph.return_value = mock_graph
 
         result = fallback_text_search(
@@ -167,4 +170,4 @@ class TestFallbackTextSearch:
         )
         assert "1-sonli BHMS content" in result
         # Should have been called with keywords derived from both queries
-        mock_graph.query.assert_called()
+        mock_graph.read.assert_called()
@@ -17,12 +17,15 @@ class TestIngestJsonData:
             with open(json_file, 'w', encoding='utf-8') as f:
                 json.dump(sample_json_data, f)
             
-            with patch('src.data.ingestion.get_neo4j_graph', return_value=mock_neo4j_graph):
+            with patch('src.data.ingestion.get_schema_service') as mock_schema, \
+                    patch('src.data.ingestion.get_graph_client', return_value=mock_neo4j_graph):
                 ingest_json_data(tmpdir)
             
-            # Verify that graph.query was called
-            assert mock_neo4j_graph.query.called
-            assert mock_neo4j_graph.refresh_schema.called
+            # Verify that the document was written in one write transaction
+            mock_neo4j_graph.execute_write.assert_called_once()
+            # Schema is reloaded lazily by the schema service, not on every ingestion
+            mock_schema.return_value.mark_stale.assert_called_once()
+            assert not mock_neo4j_graph.refresh_schema.called
     
     def test_ingest_json_data_invalid_file(self, mock_neo4j_graph):
         """Test handling of invalid JSON files."""
@@ -31,7 +34,8 @@ class TestIngestJsonData:
             with open(json_file, 'w', encoding='utf-8') as f:
                 f.write("invalid json content")
             
-            with patch('src.data.ingestion.get_neo4j_graph', return_value=mock_neo4j_graph):
+            with patch('src.data.ingestion.get_schema_service'), \
+                    patch('src.data.ingestion.get_graph_client', return_value=mock_neo4j_graph):
                 # Should not raise exception, but handle error gracefully
                 ingest_json_data(tmpdir)
     
@@ -49,6 +53,7 @@ class TestIngestJsonData:
             with open(json_file, 'w', encoding='utf-8') as f:
                 json.dump(incomplete_data, f)
             
-            with patch('src.data.ingestion.get_neo4j_graph', return_value=mock_neo4j_graph):
+            with patch('src.data.ingestion.get_schema_service'), \
+                    patch('src.data.ingestion.get_graph_client', return_value=mock_neo4j_graph):
                 ingest_json_data(tmpdir)
                 # Should handle gracefully without crashing
@@ -0,0 +1,62 @@
+"""Tests for upload jobs."""
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from src.bot.jobs import JobRegistry, process_upload, run_upload_job, upload_file_name
+
+TEXT = "Buxgalteriya hisobi to'g'risidagi qonun. " * 5
+
+
+class TestJobRegistry:
+    """Tests for JobRegistry."""
+
+    def test_create_and_lookup(self):
+        registry = JobRegistry()
+        job = registry.create(1, 10, "report.pdf", "ab" * 32)
+        assert registry.get(job.id) is job
+        assert job.file_name == upload_file_name("ab" * 32)
+        assert registry.active_for_hash("ab" * 32) is job
+        job.status = "done"
+        assert registry.active_for_hash("ab" * 32) is None
+
+    def test_for_user_newest_first_and_bounded(self):
+        registry = JobRegistry(max_jobs=3)
+        jobs = [registry.create(1, 10, f"f{i}.txt", str(i) * 64) for i in range(4)]
+        registry.create(2, 20, "other.txt", "f" * 64)
+        assert [j.id for j in registry.for_user(1)] == [jobs[3].id, jobs[2].id]
+        assert registry.get(jobs[1].id) is None
+
+
+class TestRunUploadJob:
+    """Tests for the background ingestion of an upload."""
+
+    @pytest.mark.asyncio
+    async def test_success_notifies(self):
+        job = JobRegistry().create(1, 10, "law.txt", "c" * 64)
+        notify = AsyncMock()
+        with patch("src.bot.jobs.ingest_single_document") as mock_ingest:
+            await run_upload_job(job, TEXT.encode("utf-8"), ".txt", notify)
+        assert job.status == "done"
+        assert job.chunks == 1
+        metadata = mock_ingest.call_args[0][0]
+        assert metadata["file_name"] == job.file_name
+        assert metadata["document_title"] == "law.txt"
+        assert "1 chunks" in notify.call_args[0][1]
+        assert notify.call_args[0][0] == 10
+
+    @pytest.mark.asyncio
+    async def test_unreadable_file_fails_with_message(self):
+        job = JobRegistry().create(1, 10, "empty.txt", "d" * 64)
+        notify = AsyncMock()
+        await run_upload_job(job, b"short", ".txt", notify)
+        assert job.status == "failed"
+        assert "meaningful text" in notify.call_args[0][1]
+        assert job.finished_at is not None
+
+
+def test_process_upload_decodes_cp1251():
+    job = JobRegistry().create(1, 10, "doc.txt", "e" * 64)
+    with patch("src.bot.jobs.ingest_single_document") as mock_ingest:
+        process_upload(job, ("Асосий воситалар ҳисоби. " * 5).encode("cp1251", errors="ignore"), ".txt")
+    assert "Асосий" in mock_ingest.call_args[0][1][0]["original_text"]
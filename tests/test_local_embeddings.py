@@ -0,0 +1,64 @@
+"""Tests for local_embeddings module."""
+import os
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+from src.data.embeddings import get_embedder
+from src.data.local_embeddings import HashingEmbedder, normalize_text
+
+
+class TestNormalizeText:
+    """Tests for script normalization."""
+
+    def test_cyrillic_and_latin_match(self):
+        assert normalize_text("Ҳисобварақ") == normalize_text("hisobvaraq")
+
+    def test_apostrophe_variants(self):
+        assert normalize_text("to‘lov") == normalize_text("toʻlov") == "to'lov"
+
+
+class TestHashingEmbedder:
+    """Tests for HashingEmbedder."""
+
+    def test_shape_and_unit_norm(self):
+        emb = HashingEmbedder(dimensions=64)
+        vectors = np.array(emb.embed_documents(["Asosiy vositalar", "Nomoddiy aktivlar", ""]))
+        assert vectors.shape == (3, 64)
+        assert np.allclose(np.linalg.norm(vectors[:2], axis=1), 1.0, atol=1e-5)
+
+    def test_cross_script_similarity(self):
+        emb = HashingEmbedder()
+        a, b, c = np.array(
+            emb.embed_documents(["Асосий воситалар ҳисоби", "Asosiy vositalar hisobi", "Soliq kodeksi"])
+        )
+        assert a @ b > 0.9
+        assert a @ b > a @ c
+
+    def test_deterministic(self):
+        assert HashingEmbedder().embed_query("BHMS") == HashingEmbedder().embed_query("BHMS")
+
+    def test_fit_save_load(self, tmp_path):
+        texts = ["asosiy vositalar", "nomoddiy aktivlar", "soliq kodeksi", "valyuta kursi"]
+        emb = HashingEmbedder()
+        emb.fit_lsa(texts, dimensions=2, n_features=256)
+        path = str(tmp_path / "lsa.npz")
+        emb.save(path)
+        loaded = HashingEmbedder(model_path=path)
+        assert loaded.dimensions == 2
+        assert loaded.model == emb.model
+        assert np.allclose(loaded.embed_query("soliq"), emb.embed_query("soliq"))
+
+
+class TestGetEmbedder:
+    """Tests for backend selection."""
+
+    @patch.dict(os.environ, {"EMBEDDING_BACKEND": "local"})
+    def test_local_backend(self):
+        assert isinstance(get_embedder(), HashingEmbedder)
+
+    @patch.dict(os.environ, {"EMBEDDING_BACKEND": "nope"})
+    def test_unknown_backend(self):
+        with pytest.raises(ValueError, match="EMBEDDING_BACKEND"):
+            get_embedder()
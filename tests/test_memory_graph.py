@@ -0,0 +1,119 @@
+"""Tests for memory_graph module."""
+import os
+from unittest.mock import patch
+
+import pytest
+
+from src.data.embeddings import embed_pending_chunks
+from src.data.ingest_single import ingest_single_document
+from src.data.local_embeddings import HashingEmbedder
+from src.data.memory_graph import InMemoryGraph, MemoryGraphClient
+
+CONTAINS_CYPHER = """
+MATCH (c:Chunk)
+WHERE c.text IS NOT NULL AND toLower(c.text) CONTAINS toLower($keyword)
+RETURN c.text AS text
+LIMIT 5
+"""
+
+
+@pytest.fixture
+def graph(sample_json_data):
+    """In-memory graph populated through ingest_single_document."""
+    g = InMemoryGraph()
+    data = sample_json_data
+    data["graph_data"].append({
+        "chunk_id": "chunk2",
+        "original_text": "Asosiy vositalar hisobi BHMS",
+        "nodes": [{"id": "bhms_5", "type": "BHMS"}, {"id": "node1", "type": "Entity"}],
+        "relationships": [{"source": "node1", "target": "BHMS_5", "type": "refers to"}],
+    })
+    with patch("src.data.ingest_single.get_schema_service"), \
+            patch("src.data.ingest_single.get_graph_client", return_value=MemoryGraphClient(g)), \
+            patch("src.data.ingest_single.embed_pending_chunks"):
+        ingest_single_document(data["metadata"], data["graph_data"])
+    g.refresh_schema()
+    return g
+
+
+class TestInMemoryGraph:
+    """Tests for InMemoryGraph."""
+
+    def test_ingestion_shapes(self, graph):
+        counts = graph.counts()
+        assert counts["Document"] == 1
+        assert counts["Chunk"] == 2
+        assert counts["Entity"] == 1
+        assert counts["BHMS"] == 1
+        # CONTAINS x2, MENTIONS x3, REFERSTO x1
+        assert counts["relationships"] == 6
+        assert "(:Document)-[:CONTAINS]->(:Chunk)" in graph.get_schema
+        assert "(:Entity)-[:REFERSTO]->(:BHMS)" in graph.get_schema
+
+    def test_merge_is_idempotent(self, graph, sample_json_data):
+        with patch("src.data.ingest_single.get_schema_service"), \
+                patch("src.data.ingest_single.get_graph_client", return_value=MemoryGraphClient(graph)), \
+                patch("src.data.ingest_single.embed_pending_chunks"):
+            ingest_single_document(sample_json_data["metadata"], sample_json_data["graph_data"])
+        assert graph.counts()["Chunk"] == 2
+        assert graph.counts()["relationships"] == 6
+
+    def test_add_graph_documents(self):
+        from langchain_community.graphs.graph_document import GraphDocument, Node, Relationship
+        from langchain_core.documents import Document
+
+        g = InMemoryGraph()
+        bhms = Node(id="BHMS_5", type="BHMS", properties={"nomi": "Asosiy vositalar"})
+        ministry = Node(id="Moliya", type="Ministry")
+        document = GraphDocument(
+            nodes=[bhms, ministry],
+            relationships=[Relationship(source=ministry, target=bhms, type="APPROVED")],
+            source=Document(page_content="Asosiy vositalar", metadata={"id": "doc1"}),
+        )
+        g.add_graph_documents([document, document], include_source=True)
+        assert g.counts() == {"BHMS": 1, "Ministry": 1, "Document": 1, "relationships": 3}
+        g.clear()
+        assert g.counts() == {"relationships": 0}
+
+    def test_contains_search_is_case_insensitive(self, graph):
+        rows = graph.query(CONTAINS_CYPHER, {"keyword": "ASOSIY"})
+        assert rows == [{"text": "Asosiy vositalar hisobi BHMS"}]
+        assert graph.query(CONTAINS_CYPHER, {"keyword": "missing"}) == []
+
+    def test_fulltext_requires_index(self, graph):
+        cypher = (
+            'CALL db.index.fulltext.queryNodes("chunk_text_index", $query) '
+            "YIELD node, score RETURN node.text AS text, score"
+        )
+        with pytest.raises(ValueError):
+            graph.query(cypher, {"query": "hisobi"})
+        graph.query("CREATE FULLTEXT INDEX chunk_text_index IF NOT EXISTS FOR (c:Chunk) ON EACH [c.text]")
+        rows = graph.query(cypher, {"query": "vositalar OR test"})
+        assert len(rows) == 2
+        assert rows[0]["score"] > 0
+
+    def test_unsupported_cypher_raises(self, graph):
+        with pytest.raises(ValueError, match="not supported"):
+            graph.query("MATCH (n) DETACH DELETE n")
+
+    def test_embedding_pipeline_and_vector_search(self, graph, tmp_path):
+        from src.data.embeddings import EmbeddingCache
+
+        embedder = HashingEmbedder(dimensions=64)
+        cache = EmbeddingCache(str(tmp_path / "cache.sqlite3"))
+        assert embed_pending_chunks(graph, embedder=embedder, cache=cache) == 2
+        assert embed_pending_chunks(graph, embedder=embedder, cache=cache) == 0
+        hits = graph.vector_search(embedder.embed_query("asosiy vositalar"), k=1)
+        assert hits[0][0]["text"] == "Asosiy vositalar hisobi BHMS"
+        cache.close()
+
+
+class TestMemoryUri:
+    """Tests for NEO4J_URI=memory:// selection."""
+
+    @patch.dict(os.environ, {"NEO4J_URI": "memory://"}, clear=True)
+    def test_get_neo4j_graph_memory(self):
+        import src.data.neo4j_client as client
+
+        with patch.object(client, "_graph_instance", None):
+            assert isinstance(client.get_neo4j_graph(), InMemoryGraph)
@@ -0,0 +1,96 @@
+"""Tests for neo4j_driver module."""
+import os
+from unittest.mock import patch
+
+import pytest
+
+import src.data.neo4j_driver as neo4j_driver
+from src.data.memory_graph import MemoryGraphClient
+from src.data.neo4j_driver import GraphClient, get_graph_client, is_write_query
+
+
+class TestIsWriteQuery:
+    """Tests for read/write routing."""
+
+    @pytest.mark.parametrize("cypher", [
+        "MERGE (n:Entity {id: $id}) SET n += $props",
+        "UNWIND $rows AS row MATCH (c:Chunk {id: row.id}) SET c.embedding = row.embedding",
+        "CREATE FULLTEXT INDEX chunk_text_index IF NOT EXISTS FOR (c:Chunk) ON EACH [c.text]",
+        "MATCH (n) DETACH DELETE n",
+    ])
+    def test_writes(self, cypher):
+        assert is_write_query(cypher)
+
+    @pytest.mark.parametrize("cypher", [
+        "MATCH (c:Chunk) WHERE toLower(c.text) CONTAINS toLower($keyword) RETURN c.text AS text",
+        "MATCH (c:Chunk) WHERE c.embedding_hash <> c.text_hash RETURN c.id AS id",
+        'CALL db.index.fulltext.queryNodes("chunk_text_index", $q) YIELD node RETURN node.text',
+    ])
+    def test_reads(self, cypher):
+        assert not is_write_query(cypher)
+
+
+class TestGraphClient:
+    """Tests for GraphClient."""
+
+    @patch("neo4j.GraphDatabase")
+    def test_pool_configuration(self, mock_db):
+        GraphClient("bolt://localhost:7687", "neo4j", "pw", max_pool_size=7, acquisition_timeout=2.5)
+        kwargs = mock_db.driver.call_args.kwargs
+        assert kwargs["max_connection_pool_size"] == 7
+        assert kwargs["connection_acquisition_timeout"] == 2.5
+
+    @patch("neo4j.GraphDatabase")
+    def test_read_uses_managed_read_transaction(self, mock_db):
+        session = mock_db.driver.return_value.session.return_value.__enter__.return_value
+        session.execute_read.return_value = ["record"]
+        client = GraphClient("bolt://localhost:7687", "neo4j", "pw", fetch_size=10)
+
+        assert client.read("MATCH (n) RETURN n", {"a": 1}) == ["record"]
+        session.execute_read.assert_called_once()
+        assert mock_db.driver.return_value.session.call_args.kwargs["fetch_size"] == 10
+
+    @patch("neo4j.GraphDatabase")
+    def test_query_routes_writes(self, mock_db):
+        session = mock_db.driver.return_value.session.return_value.__enter__.return_value
+        session.execute_write.return_value = []
+        client = GraphClient("bolt://localhost:7687", "neo4j", "pw")
+
+        client.query("MERGE (n:Entity {id: $id})", {"id": 1})
+        session.execute_write.assert_called_once()
+        session.execute_read.assert_not_called()
+        assert client.last_bookmarks == session.last_bookmarks.return_value
+
+
+class TestGetGraphClient:
+    """Tests for get_graph_client."""
+
+    @patch.dict(os.environ, {}, clear=True)
+    def test_missing_env(self):
+        with patch.object(neo4j_driver, "_client_instance", None):
+            with pytest.raises(ValueError, match="Neo4j configuration"):
+                get_graph_client()
+
+    @patch.dict(os.environ, {"NEO4J_URI": "memory://"}, clear=True)
+    def test_memory_backend(self):
+        import src.data.neo4j_client as neo4j_client
+
+        with patch.object(neo4j_driver, "_client_instance", None), \
+                patch.object(neo4j_client, "_graph_instance", None):
+            client = get_graph_client()
+            assert isinstance(client, MemoryGraphClient)
+            assert client.graph is neo4j_client.get_neo4j_graph()
+
+    @patch.dict(os.environ, {
+        "NEO4J_URI": "neo4j+s://example:7687",
+        "NEO4J_USERNAME": "neo4j",
+        "NEO4J_PASSWORD": "pw",
+        "NEO4J_MAX_POOL_SIZE": "12",
+    }, clear=True)
+    @patch("src.data.neo4j_driver.GraphClient")
+    def test_env_configuration(self, mock_client):
+        with patch.object(neo4j_driver, "_client_instance", None):
+            get_graph_client()
+        args, kwargs = mock_client.call_args
+        assert args[0] == "neo4j+ssc://example:7687"
+        assert kwargs["max_pool_size"] == 12
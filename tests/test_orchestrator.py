@@ -52,7 +52,7 @@ class TestProcessQuery:
         result = process_query("test query")
         assert result == "final answer"
         mock_refine.assert_called_once_with("test query")
-        mock_hybrid.assert_called_once_with("refined query", original_query="test query")
+        mock_hybrid.assert_called_once_with("refined query", original_query="test query", documents=None)
         mock_synthesize.assert_called_once_with("test query", "Detailed graph result with accounting standards and regulations.")
         mock_fallback.assert_not_called()
 
@@ -74,6 +74,42 @@ class TestProcessQuery:
         )
         mock_synthesize.assert_called_once_with("test query", "Fallback chunk text with relevant content.")
 
+    @patch('src.core.orchestrator.hybrid_retrieve')
+    @patch('src.core.orchestrator.refine_query')
+    @patch('src.core.orchestrator.synthesize_response')
+    @patch('src.core.orchestrator.resolve_citations')
+    def test_process_query_citation_lookup(self, mock_citations, mock_synthesize, mock_refine, mock_hybrid):
+        """Test that resolved citations skip refinement and retrieval."""
+        mock_citations.return_value = "[1] soliq_kodeksi, art. 237\n237-modda. Soliq to'lovchilar..."
+        mock_synthesize.return_value = "final answer"
+
+        result = process_query("Soliq kodeksi 237-modda")
+        assert result == "final answer"
+        mock_refine.assert_not_called()
+        mock_hybrid.assert_not_called()
+        mock_synthesize.assert_called_once_with("Soliq kodeksi 237-modda", mock_citations.return_value)
+
+    @patch('src.core.orchestrator.cited_documents')
+    @patch('src.core.orchestrator.hybrid_retrieve')
+    @patch('src.core.orchestrator.refine_query')
+    @patch('src.core.orchestrator.synthesize_response')
+    @patch('src.core.orchestrator.resolve_citations')
+    def test_process_query_named_document_goes_to_retrieval(
+        self, mock_citations, mock_synthesize, mock_refine, mock_hybrid, mock_documents
+    ):
+        """Test that a question naming only a document is retrieved with that document ranked first."""
+        mock_citations.return_value = ""
+        mock_documents.return_value = {"adliya_reg_3259_20200630.json"}
+        mock_refine.return_value = "refined query"
+        mock_hybrid.return_value = "Detailed graph result with accounting standards and regulations."
+        mock_synthesize.return_value = "final answer"
+
+        assert process_query("4-sonli BHMS bo'yicha baholash") == "final answer"
+        mock_hybrid.assert_called_once_with(
+            "refined query", original_query="4-sonli BHMS bo'yicha baholash",
+            documents={"adliya_reg_3259_20200630.json"},
+        )
+
     def test_process_query_empty(self):
         """Test processing empty query."""
         result = process_query("")
@@ -0,0 +1,88 @@
+"""Tests for query_monitor module."""
+import json
+from unittest.mock import Mock
+
+from src.data.query_monitor import (
+    MonitoredTransaction,
+    QueryMonitor,
+    build_report,
+    fingerprint,
+    instrument_graph,
+    normalize_statement,
+    summarize_params,
+)
+
+
+class TestFingerprint:
+    """Tests for statement normalization."""
+
+    def test_literals_and_whitespace_ignored(self):
+        a = "MATCH (c:Chunk)\n  WHERE c.text CONTAINS 'BHMS' RETURN c.text LIMIT 5"
+        b = 'MATCH (c:Chunk) WHERE c.text CONTAINS "hisob"   RETURN c.text LIMIT 10'
+        assert fingerprint(a) == fingerprint(b)
+        assert normalize_statement(a) == "MATCH (c:Chunk) WHERE c.text CONTAINS ? RETURN c.text LIMIT ?"
+
+    def test_identifiers_with_digits_kept(self):
+        assert "BHMS_21" in normalize_statement("MATCH (n {id: 'x'}) WHERE n:BHMS_21 RETURN n")
+
+    def test_summarize_params(self):
+        summary = summarize_params({"rows": [1, 2, 3], "keyword": "x" * 300, "k": 5})
+        assert summary["rows"] == "<list len=3>"
+        assert len(summary["keyword"]) == 203
+        assert summary["k"] == 5
+
+
+class TestQueryMonitor:
+    """Tests for QueryMonitor."""
+
+    def test_slow_statement_written(self, tmp_path):
+        path = tmp_path / "stats.jsonl"
+        monitor = QueryMonitor(slow_ms=100, stats_path=str(path))
+        monitor.observe("MATCH (n) RETURN n", {"a": 1}, 0.01, "read")
+        monitor.observe("MATCH (n) RETURN n", {"a": 1}, 0.2, "read")
+        records = [json.loads(line) for line in path.read_text().splitlines()]
+        assert [r["type"] for r in records] == ["slow"]
+        assert records[0]["params"] == {"a": 1}
+        stats = next(iter(monitor.snapshot().values()))
+        assert stats["count"] == 2
+        assert stats["slow"] == 1
+
+    def test_profile_sampling_reads_only(self):
+        monitor = QueryMonitor(profile_sample_rate=1.0, stats_path="")
+        assert monitor.should_profile("MATCH (n) RETURN n", "read")
+        assert not monitor.should_profile("MERGE (n {id: 1})", "write")
+        assert not QueryMonitor(stats_path="").should_profile("MATCH (n) RETURN n", "read")
+
+    def test_monitored_transaction_profiles(self):
+        monitor = QueryMonitor(profile_sample_rate=1.0, stats_path="")
+        plan = {"dbHits": 3, "rows": 2, "children": [{"dbHits": 7, "children": []}]}
+        result = Mock()
+        result.__iter__ = Mock(return_value=iter([{"text": "a"}, {"text": "b"}]))
+        tx = Mock()
+        tx.run.side_effect = [result, Mock(consume=Mock(return_value=Mock(profile=plan)))]
+
+        records = MonitoredTransaction(tx, "read", monitor).run("MATCH (c:Chunk) RETURN c.text AS text")
+        assert len(records) == 2
+        assert tx.run.call_args_list[1].args[0].startswith("PROFILE ")
+        stats = next(iter(monitor.snapshot().values()))
+        assert stats["db_hits"] == 10
+
+    def test_instrument_graph(self):
+        monitor = QueryMonitor(stats_path="")
+        graph = Mock()
+        graph.query.return_value = [{"x": 1}]
+        graph._driver = None
+        instrument_graph(graph, monitor)
+        assert graph.query("MATCH (n) RETURN n") == [{"x": 1}]
+        assert next(iter(monitor.snapshot().values()))["count"] == 1
+
+    def test_report_aggregates_processes(self, tmp_path):
+        path = tmp_path / "stats.jsonl"
+        for _ in range(2):
+            monitor = QueryMonitor(slow_ms=1e9, stats_path=str(path))
+            monitor.observe("MATCH (n) RETURN n", None, 0.5, "read")
+            monitor.flush()
+        rows = build_report(str(path))
+        assert len(rows) == 1
+        assert rows[0]["count"] == 2
+        assert rows[0]["mean_ms"] == 500.0
@@ -0,0 +1,95 @@
+"""Tests for rate_limiter module."""
+import os
+import tempfile
+from unittest.mock import patch
+
+import pytest
+
+from src.bot.rate_limiter import MemoryBackend, RateLimiter, SQLiteBackend, create_rate_limiter
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request):
+    """Each backend under the same limiter tests."""
+    if request.param == "memory":
+        yield MemoryBackend()
+        return
+    with tempfile.TemporaryDirectory() as tmpdir:
+        yield SQLiteBackend(os.path.join(tmpdir, "rate.sqlite3"))
+
+
+class TestRateLimiter:
+    """Tests for the token-bucket RateLimiter."""
+
+    def test_allows_burst_then_blocks(self, backend):
+        limiter = RateLimiter(max_requests=3, window_seconds=60, backend=backend)
+        with patch("src.bot.rate_limiter.time.time", return_value=1000.0):
+            assert all(limiter.is_allowed(1)[0] for _ in range(3))
+            allowed, message = limiter.is_allowed(1)
+        assert not allowed
+        assert "20 seconds" in message
+        # Other users are independent
+        with patch("src.bot.rate_limiter.time.time", return_value=1000.0):
+            assert limiter.is_allowed(2)[0]
+
+    def test_refills_over_time(self, backend):
+        limiter = RateLimiter(max_requests=3, window_seconds=60, backend=backend)
+        with patch("src.bot.rate_limiter.time.time", return_value=1000.0):
+            for _ in range(3):
+                limiter.is_allowed(1)
+        with patch("src.bot.rate_limiter.time.time", return_value=1020.0):
+            assert limiter.is_allowed(1)[0]
+            assert not limiter.is_allowed(1)[0]
+
+    def test_reset_user(self, backend):
+        limiter = RateLimiter(max_requests=1, window_seconds=60, backend=backend)
+        limiter.is_allowed(1)
+        assert not limiter.is_allowed(1)[0]
+        limiter.reset_user(1)
+        assert limiter.is_allowed(1)[0]
+
+    def test_evicts_idle_users(self, backend):
+        limiter = RateLimiter(max_requests=3, window_seconds=60, backend=backend, sweep_interval=30)
+        with patch("src.bot.rate_limiter.time.time", return_value=1000.0):
+            for user_id in range(100):
+                limiter.is_allowed(user_id)
+        assert len(backend) == 100
+        # The sweep runs as part of a later check once the users have been idle a window
+        with patch("src.bot.rate_limiter.time.time", return_value=2000.0):
+            limiter.is_allowed(500)
+        assert len(backend) == 1
+
+
+class TestSharedBackend:
+    """Two limiters (e.g. two bot processes) sharing one SQLite file."""
+
+    def test_quota_is_shared(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "rate.sqlite3")
+            first = RateLimiter(max_requests=2, window_seconds=60, backend=SQLiteBackend(path))
+            second = RateLimiter(max_requests=2, window_seconds=60, backend=SQLiteBackend(path))
+            assert first.is_allowed(7)[0]
+            assert second.is_allowed(7)[0]
+            assert not first.is_allowed(7)[0]
+            assert not second.is_allowed(7)[0]
+
+
+class TestCreateRateLimiter:
+    """Tests for environment configuration."""
+
+    def test_sqlite_from_env(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            env = {
+                "RATE_LIMIT_BACKEND": "sqlite",
+                "RATE_LIMIT_DB_PATH": os.path.join(tmpdir, "nested", "rate.sqlite3"),
+                "RATE_LIMIT_MAX_REQUESTS": "5",
+            }
+            with patch.dict(os.environ, env):
+                limiter = create_rate_limiter()
+        assert isinstance(limiter.backend, SQLiteBackend)
+        assert limiter.max_requests == 5
+
+    def test_unknown_backend(self):
+        with patch.dict(os.environ, {"RATE_LIMIT_BACKEND": "redis"}):
+            with pytest.raises(ValueError, match="RATE_LIMIT_BACKEND"):
+                create_rate_limiter()
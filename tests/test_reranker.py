@@ -0,0 +1,73 @@
+"""Tests for reranker module."""
+from src.data.reranker import query_terms, rerank
+
+FILLER = "Buxgalteriya hisobi to'g'risidagi umumiy qoidalar. "
+
+
+class TestRerank:
+    """Tests for rerank."""
+
+    def test_bm25_prefers_term_matches(self):
+        rows = [
+            {"text": FILLER * 3},
+            {"text": FILLER + "Asosiy vositalar amortizatsiyasi. " + FILLER},
+            {"text": FILLER + "Asosiy vositalar. Asosiy vositalar amortizatsiyasi hisoblanadi."},
+        ]
+        ranked = rerank("asosiy vositalar amortizatsiyasi", rows, top_k=3, budget=1.0)
+        assert ranked[0]["text"] == rows[2]["text"]
+        assert ranked[-1]["text"] == rows[0]["text"]
+        assert ranked[0]["score"] > ranked[1]["score"] > ranked[2]["score"]
+
+    def test_proximity(self):
+        rows = [
+            {"text": "kurs " + "boshqa so'zlar " * 20 + "farqi"},
+            {"text": "kurs farqi " + "boshqa so'zlar " * 20},
+        ]
+        ranked = rerank("kurs farqi", rows, top_k=2, budget=1.0)
+        assert ranked[0]["text"] == rows[1]["text"]
+
+    def test_domain_terms_and_article(self):
+        rows = [
+            {"text": "Hisobvaraqlar rejasi " + FILLER, "article": "11"},
+            {"text": "21-son BHMS bo'yicha hisobvaraqlar rejasi " + FILLER, "article": "11"},
+            {"text": "12-modda. Hisobvaraqlar rejasi " + FILLER, "article": "12"},
+        ]
+        ranked = rerank("12-modda hisobvaraqlar rejasi", rows, domain_terms=["21-son"], top_k=3, budget=1.0)
+        assert ranked[0]["article"] == "12"
+        assert ranked[1]["text"].startswith("21-son")
+
+    def test_pagerank_breaks_ties_between_equal_matches(self):
+        rows = [
+            {"text": "Amortizatsiya hisoblanadi. " + FILLER, "pagerank": 0.001},
+            {"text": FILLER + "Amortizatsiya hisoblanadi.", "pagerank": 0.02},
+        ]
+        ranked = rerank("amortizatsiya", rows, top_k=2, budget=1.0)
+        assert ranked[0]["pagerank"] == 0.02
+
+    def test_cited_documents_rank_first(self):
+        rows = [
+            {"text": "Tovar-moddiy zaxiralar tannarx bo'yicha baholanadi.", "document": "soliq.json"},
+            {"text": "Zaxiralar tannarx bo'yicha hisobga olinadi. " + FILLER, "document": "bhms_4.json"},
+        ]
+        ranked = rerank("zaxiralar tannarx bo'yicha baholanadi", rows, top_k=2, budget=1.0, documents={"bhms_4.json"})
+        assert ranked[0]["document"] == "bhms_4.json"
+
+    def test_duplicates_and_top_k(self):
+        rows = [{"text": f"band {i} hisobot"} for i in range(30)] + [{"text": "band 0 hisobot"}]
+        ranked = rerank("hisobot", rows, top_k=5, budget=1.0)
+        assert len(ranked) == 5
+        assert len({r["text"] for r in ranked}) == 5
+
+    def test_budget_exhausted_keeps_retrieval_order_for_the_rest(self):
+        rows = [{"text": "boshqa matn"}, {"text": "hisobot hisobot"}, {"text": "hisobot"}]
+        ranked = rerank("hisobot", rows, top_k=3, budget=0.0)
+        # Only the first candidate is tokenized; the others follow in retrieval order
+        assert [r["text"] for r in ranked] == ["boshqa matn", "hisobot hisobot", "hisobot"]
+
+    def test_disabled(self):
+        rows = [{"text": "b"}, {"text": "a"}, {"text": "b"}]
+        assert rerank("a", rows, top_k=0) == [{"text": "b"}, {"text": "a"}]
+
+
+def test_query_terms():
+    assert query_terms("Asosiy vositalar, asosiy", "12-modda") == ["asosiy", "vositalar", "12", "modda"]
@@ -0,0 +1,89 @@
+"""Tests for result_cache module."""
+from unittest.mock import Mock
+
+from src.data.memory_graph import InMemoryGraph, MemoryGraphClient
+from src.data.result_cache import ResultCache, cache_key, estimate_size
+
+CONTAINS_CYPHER = (
+    "MATCH (c:Chunk) WHERE c.text IS NOT NULL AND toLower(c.text) CONTAINS toLower($keyword) "
+    "RETURN c.text AS text LIMIT 5"
+)
+
+
+class TestResultCache:
+    """Tests for ResultCache."""
+
+    def test_hit_after_miss(self):
+        cache = ResultCache(max_bytes=1_000_000)
+        load = Mock(return_value=[{"text": "a"}])
+        assert cache.get_or_load("RETURN 1", {"k": 1}, load) == [{"text": "a"}]
+        assert cache.get_or_load("RETURN  1", {"k": 1}, load) == [{"text": "a"}]
+        load.assert_called_once()
+        assert cache.stats()["hit_ratio"] == 0.5
+
+    def test_parameters_and_literals_are_part_of_key(self):
+        assert cache_key("RETURN 1", {"k": 1}) != cache_key("RETURN 1", {"k": 2})
+        assert cache_key("RETURN 1", None) != cache_key("RETURN 2", None)
+        assert cache_key("RETURN 1", {"a": 1, "b": 2}) == cache_key("RETURN 1", {"b": 2, "a": 1})
+
+    def test_epoch_bump_invalidates(self):
+        cache = ResultCache(max_bytes=1_000_000)
+        load = Mock(return_value=[{"text": "a"}])
+        cache.get_or_load("RETURN 1", None, load)
+        cache.bump_epoch()
+        cache.get_or_load("RETURN 1", None, load)
+        assert load.call_count == 2
+
+    def test_result_loaded_across_a_write_is_not_stored(self):
+        cache = ResultCache(max_bytes=1_000_000)
+
+        def load():
+            cache.bump_epoch()
+            return [{"text": "a"}]
+
+        cache.get_or_load("RETURN 1", None, load)
+        assert cache.stats()["entries"] == 0
+
+    def test_ttl_expiry(self):
+        cache = ResultCache(max_bytes=1_000_000, ttl=-1)
+        load = Mock(return_value=[])
+        cache.get_or_load("RETURN 1", None, load)
+        cache.get_or_load("RETURN 1", None, load)
+        assert load.call_count == 2
+
+    def test_lru_eviction_by_bytes(self):
+        rows = [{"text": "x" * 100}]
+        size = estimate_size(rows)
+        cache = ResultCache(max_bytes=size * 4)
+        for i in range(5):
+            cache.get_or_load(f"RETURN {i}", None, lambda: rows)
+        # Touch the oldest survivor so it outlives the next insert
+        cache.get_or_load("RETURN 1", None, Mock())
+        cache.get_or_load("RETURN 5", None, lambda: rows)
+        stats = cache.stats()
+        assert stats["bytes"] <= size * 4
+        assert cache.get(cache_key("RETURN 1", None)) is not None
+        assert cache.get(cache_key("RETURN 0", None)) is None
+        assert cache.get(cache_key("RETURN 2", None)) is None
+
+    def test_oversized_result_not_cached(self):
+        cache = ResultCache(max_bytes=1000)
+        cache.get_or_load("RETURN 1", None, lambda: [{"text": "x" * 1000}])
+        assert cache.stats()["entries"] == 0
+
+
+class TestClientIntegration:
+    """Cached reads through MemoryGraphClient."""
+
+    def test_write_invalidates_cached_read(self):
+        graph = InMemoryGraph()
+        client = MemoryGraphClient(graph, result_cache=ResultCache(max_bytes=1_000_000))
+        client.write("MERGE (c:Chunk {id: $id}) SET c.text = $text", {"id": "c1", "text": "BHMS 21"})
+        assert client.read(CONTAINS_CYPHER, {"keyword": "bhms"}, cache=True) == [{"text": "BHMS 21"}]
+
+        client.write("MERGE (c:Chunk {id: $id}) SET c.text = $text", {"id": "c2", "text": "bhms 5"})
+        rows = client.read(CONTAINS_CYPHER, {"keyword": "bhms"}, cache=True)
+        assert len(rows) == 2
+        assert client.result_cache.stats()["hits"] == 0
+        client.read(CONTAINS_CYPHER, {"keyword": "bhms"}, cache=True)
+        assert client.result_cache.stats()["hits"] == 1
@@ -0,0 +1,118 @@
+"""Tests for scheduler module."""
+import asyncio
+import threading
+import time
+from unittest.mock import Mock, patch
+
+import pytest
+
+from src.bot.scheduler import ChatOrderedUpdateProcessor, Scheduler, SchedulerBusy, WorkPool
+from src.core.llm_config import llm_slot
+
+
+class TestWorkPool:
+    """Tests for WorkPool admission control."""
+
+    @pytest.mark.asyncio
+    async def test_runs_in_worker_thread(self):
+        pool = WorkPool("test", workers=1, queue_size=0)
+        name = await pool.run(lambda: threading.current_thread().name)
+        assert name.startswith("test-worker")
+        assert pool.pending == 0
+
+    @pytest.mark.asyncio
+    async def test_rejects_when_full(self):
+        pool = WorkPool("test", workers=1, queue_size=1)
+        release = threading.Event()
+        running = [asyncio.ensure_future(pool.run(release.wait, 5)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        assert not pool.has_capacity()
+        with pytest.raises(SchedulerBusy):
+            await pool.run(lambda: None)
+        release.set()
+        await asyncio.gather(*running)
+        assert pool.has_capacity()
+
+    @pytest.mark.asyncio
+    async def test_ingestion_does_not_starve_queries(self):
+        scheduler = Scheduler(query_workers=2, query_queue_size=2, ingest_workers=1, ingest_queue_size=4)
+        release = threading.Event()
+        uploads = [asyncio.ensure_future(scheduler.ingestion.run(release.wait, 5)) for _ in range(5)]
+        await asyncio.sleep(0.01)
+        started = time.monotonic()
+        assert await scheduler.queries.run(lambda: "answer") == "answer"
+        assert time.monotonic() - started < 0.5
+        release.set()
+        await asyncio.gather(*uploads)
+        scheduler.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_propagates_exceptions(self):
+        pool = WorkPool("test", workers=1, queue_size=0)
+
+        def fails():
+            raise ValueError("bad file")
+
+        with pytest.raises(ValueError, match="bad file"):
+            await pool.run(fails)
+        assert pool.pending == 0
+
+
+class TestLlmSlot:
+    """Tests for the global LLM concurrency cap."""
+
+    def test_caps_concurrency(self):
+        semaphore = threading.BoundedSemaphore(2)
+        active, peak = [0], [0]
+        lock = threading.Lock()
+
+        def call():
+            with llm_slot():
+                with lock:
+                    active[0] += 1
+                    peak[0] = max(peak[0], active[0])
+                time.sleep(0.02)
+                with lock:
+                    active[0] -= 1
+
+        with patch("src.core.llm_config._llm_semaphore", semaphore):
+            threads = [threading.Thread(target=call) for _ in range(6)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        assert peak[0] == 2
+
+
+
+class TestChatOrderedUpdateProcessor:
+    """Tests for concurrent, per-chat ordered update processing."""
+
+    @staticmethod
+    def _update(chat_id):
+        from telegram import Update
+
+        update = Mock(spec=Update)
+        update.effective_chat = Mock(id=chat_id)
+        return update
+
+    @pytest.mark.asyncio
+    async def test_orders_within_chat_and_overlaps_across_chats(self):
+        processor = ChatOrderedUpdateProcessor(8)
+        events = []
+
+        async def handle(name, delay):
+            events.append(f"start {name}")
+            await asyncio.sleep(delay)
+            events.append(f"end {name}")
+
+        await asyncio.gather(
+            processor.process_update(self._update(1), handle("a1", 0.05)),
+            processor.process_update(self._update(1), handle("a2", 0)),
+            processor.process_update(self._update(2), handle("b1", 0)),
+        )
+        # Chat 2 is not held up by chat 1's slow update
+        assert events.index("end b1") < events.index("end a1")
+        # Chat 1's second update starts only after the first finished
+        assert events.index("end a1") < events.index("start a2")
+        assert processor._chats == {}
@@ -0,0 +1,117 @@
+"""Tests for schema_service module."""
+from unittest.mock import Mock
+
+import pytest
+
+from src.data.schema_service import SchemaService, question_terms, render_schema
+
+
+def _props(*names):
+    return [{"property": name, "type": "STRING"} for name in names]
+
+
+@pytest.fixture
+def graph():
+    """Graph mock with a schema mixing core, domain and unrelated labels."""
+    g = Mock()
+    g.structured_schema = {
+        "node_props": {
+            "Document": _props("file_name", "title"),
+            "Chunk": _props("id", "text", "text_hash", "embedding_hash") + [{"property": "embedding", "type": "LIST"}],
+            "BHMS": _props("id", "name"),
+            "AccountCode": _props("id", "code"),
+            "Valyuta": _props("id", "kurs"),
+            "Organization": _props("id", "name"),
+        },
+        "rel_props": {},
+        "relationships": [
+            {"start": "Document", "type": "CONTAINS", "end": "Chunk"},
+            {"start": "Chunk", "type": "MENTIONS", "end": "BHMS"},
+            {"start": "Chunk", "type": "MENTIONS", "end": "Organization"},
+            {"start": "BHMS", "type": "REGULATES", "end": "AccountCode"},
+            {"start": "Valyuta", "type": "USED_IN", "end": "Organization"},
+        ],
+    }
+    return g
+
+
+class TestSchemaService:
+    """Tests for SchemaService."""
+
+    def test_refreshes_only_when_stale(self, graph):
+        service = SchemaService(graph, max_age=0)
+        service.get_structured()
+        service.get_structured()
+        assert graph.refresh_schema.call_count == 1
+        assert service.version == 1
+
+        service.mark_stale()
+        service.get_structured()
+        assert graph.refresh_schema.call_count == 2
+        # Unchanged content keeps the version (and cached summaries)
+        assert service.version == 1
+
+        graph.structured_schema = {**graph.structured_schema, "rel_props": {"CONTAINS": _props("order")}}
+        service.mark_stale()
+        service.get_structured()
+        assert service.version == 2
+
+    def test_refreshes_after_max_age(self, graph):
+        service = SchemaService(graph, max_age=-1)
+        service.get_structured()
+        service.get_structured()
+        assert graph.refresh_schema.call_count == 2
+
+    def test_summary_keeps_core_and_hides_internal_properties(self, graph):
+        summary = SchemaService(graph, max_age=0).summary_for("")
+        assert "Document {file_name: STRING, title: STRING}" in summary
+        assert "(:Document)-[:CONTAINS]->(:Chunk)" in summary
+        assert "embedding" not in summary
+        assert "text_hash" not in summary
+        assert "Organization" not in summary
+
+    def test_summary_selects_labels_for_question(self, graph):
+        service = SchemaService(graph, max_age=0)
+        summary = service.summary_for("21-son BHMS nima haqida?")
+        assert "BHMS {id: STRING, name: STRING}" in summary
+        assert "(:Chunk)-[:MENTIONS]->(:BHMS)" in summary
+        # One hop from a matched label
+        assert "(:BHMS)-[:REGULATES]->(:AccountCode)" in summary
+        assert "Valyuta" not in summary
+
+        currency = service.summary_for("Валюта курси қандай ҳисобланади?")
+        assert "Valyuta {id: STRING, kurs: STRING}" in currency
+        assert "BHMS" not in currency
+
+    def test_summary_respects_budget(self, graph):
+        service = SchemaService(graph, max_chars=200, max_age=0)
+        summary = service.summary_for("BHMS valyuta organization account")
+        assert len(summary) <= 200
+        assert "Document" in summary
+
+    def test_summary_is_cached_per_version(self, graph):
+        service = SchemaService(graph, max_age=0)
+        first = service.summary_for("BHMS")
+        assert service.summary_for("bhms") is first
+
+    def test_summary_cache_keeps_relationship_types_of_each_question(self, graph):
+        graph.structured_schema["node_props"]["Qonun"] = _props("id", "name")
+        graph.structured_schema["rel_props"] = {"AMENDS": _props("year")}
+        graph.structured_schema["relationships"].append({"start": "Qonun", "type": "AMENDS", "end": "Qonun"})
+        service = SchemaService(graph, max_age=0)
+        # Both questions select only the core labels; only the second names AMENDS
+        assert "year" not in service.summary_for("hello")
+        assert service.summary_for("amends") == SchemaService(graph, max_age=0).summary_for("amends")
+        assert "AMENDS" in service.summary_for("amends") and "year" in service.summary_for("amends")
+
+
+class TestHelpers:
+    """Tests for module helpers."""
+
+    def test_question_terms_transliterates(self):
+        assert question_terms("Асосий воситалар") == ["asosiy", "vositalar"]
+
+    def test_render_schema_format(self, graph):
+        text = render_schema(graph.structured_schema)
+        assert text.startswith("Node properties:\n")
+        assert "\nThe relationships:\n" in text
@@ -0,0 +1,109 @@
+"""Tests for the monitoring server and health prober."""
+import asyncio
+import time
+
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+
+from src.api.server import HealthProber, create_app
+
+
+def _prober(**checks):
+    return HealthProber(interval=60, llm_interval=600, timeout=0.2, checks=checks)
+
+
+class TestHealthProber:
+    """Tests for HealthProber."""
+
+    def test_snapshot_unknown_before_first_probe(self):
+        snapshot = _prober(neo4j=lambda: (True, "ok")).snapshot()
+        assert snapshot["status"] == "unknown"
+        assert snapshot["neo4j"]["healthy"] is False
+
+    @pytest.mark.asyncio
+    async def test_probe_runs_checks_concurrently(self):
+        def slow():
+            time.sleep(0.1)
+            return True, "ok"
+
+        prober = _prober(neo4j=slow, openai=slow)
+        started = time.monotonic()
+        snapshot = await prober.probe()
+        assert time.monotonic() - started < 0.19
+        assert snapshot["status"] == "healthy"
+        assert snapshot["openai"]["message"] == "ok"
+
+    @pytest.mark.asyncio
+    async def test_timeout_and_error_mark_unhealthy(self):
+        def hangs():
+            time.sleep(0.5)
+            return True, "ok"
+
+        def fails():
+            raise RuntimeError("boom")
+
+        snapshot = await _prober(neo4j=hangs, openai=fails).probe()
+        assert snapshot["status"] == "unhealthy"
+        assert "timed out" in snapshot["neo4j"]["message"]
+        assert "boom" in snapshot["openai"]["message"]
+
+    @pytest.mark.asyncio
+    async def test_hung_check_is_skipped_until_it_returns(self):
+        calls = []
+
+        def hangs_once():
+            calls.append(1)
+            if len(calls) == 1:
+                time.sleep(0.4)
+            return True, "ok"
+
+        prober = _prober(neo4j=hangs_once)
+        await prober.probe()
+        snapshot = await prober.probe(force=True)
+        assert len(calls) == 1
+        assert "timed out" in snapshot["neo4j"]["message"]
+        await asyncio.sleep(0.3)
+        assert (await prober.probe(force=True))["status"] == "healthy"
+        assert len(calls) == 2
+        await prober.stop()
+
+    @pytest.mark.asyncio
+    async def test_llm_probe_uses_longer_interval(self):
+        calls = {"neo4j": 0, "openai": 0}
+
+        def check(name):
+            def run():
+                calls[name] += 1
+                return True, "ok"
+            return run
+
+        prober = HealthProber(interval=0.01, llm_interval=600, timeout=1,
+                              checks={"neo4j": check("neo4j"), "openai": check("openai")})
+        await prober.probe()
+        await asyncio.sleep(0.02)
+        await prober.probe()
+        assert calls == {"neo4j": 2, "openai": 1}
+
+
+class TestEndpoints:
+    """Tests for /metrics, /healthz and /readyz."""
+
+    @pytest.mark.asyncio
+    async def test_endpoints(self):
+        prober = _prober(neo4j=lambda: (True, "ok"))
+        async with TestClient(TestServer(create_app(prober))) as client:
+            resp = await client.get("/readyz")
+            assert resp.status == 503
+            assert (await resp.json())["status"] == "unknown"
+
+            prober.start()
+            await asyncio.sleep(0.05)
+            resp = await client.get("/readyz")
+            assert resp.status == 200
+            resp = await client.get("/healthz")
+            assert resp.status == 200
+
+            resp = await client.get("/metrics")
+            assert resp.status == 200
+            assert "graphrag_queries_total" in await resp.text()
+            await prober.stop()
@@ -4,7 +4,8 @@ import asyncio
 from unittest.mock import Mock, patch, AsyncMock
 from telegram import Update, Message, Chat, User
 from telegram.ext import ContextTypes
-from src.bot.telegram_bot import start, handle_message
+from src.bot.telegram_bot import start, handle_message, handle_document, BUSY_MESSAGE
+from src.bot.scheduler import SchedulerBusy
 
 
 @pytest.fixture
@@ -62,3 +63,58 @@ async def test_handle_message_error(mock_process_query, mock_update, mock_contex
         await handle_message(mock_update, mock_context)
     except Exception:
         pytest.fail("handle_message should handle errors gracefully")
+
+
+@pytest.mark.asyncio
+async def test_handle_message_busy(mock_update, mock_context):
+    """Test immediate busy reply when the query queue is full."""
+    scheduler = Mock()
+    scheduler.queries.run = AsyncMock(side_effect=SchedulerBusy("queries"))
+
+    with patch('src.bot.telegram_bot.get_scheduler', return_value=scheduler):
+        await handle_message(mock_update, mock_context)
+    assert mock_context.bot.send_message.call_args[1]['text'] == BUSY_MESSAGE
+
+
+@pytest.mark.asyncio
+async def test_webhook_route_checks_secret_and_queues_update():
+    """Test webhook POSTs are authenticated and put on the update queue."""
+    from aiohttp import web
+    from aiohttp.test_utils import TestClient, TestServer
+    from src.bot.telegram_bot import add_webhook_route
+
+    application = Mock()
+    application.bot = Mock()
+    application.update_queue = asyncio.Queue()
+    app = web.Application()
+    add_webhook_route(app, application, "/telegram", "s3cret")
+
+    async with TestClient(TestServer(app)) as client:
+        resp = await client.post("/telegram", json={"update_id": 1})
+        assert resp.status == 403
+        resp = await client.post(
+            "/telegram", json={"update_id": 7}, headers={"X-Telegram-Bot-Api-Secret-Token": "s3cret"}
+        )
+        assert resp.status == 200
+
+    update = application.update_queue.get_nowait()
+    assert update.update_id == 7
+
+
+@pytest.mark.asyncio
+async def test_handle_document_duplicate_is_not_reingested(mock_update, mock_context):
+    """Test that a re-upload of an ingested file short-circuits after hashing."""
+    mock_update.effective_user = Mock(id=1)
+    mock_update.message.document = Mock(file_id="f1", file_size=100, file_name="law.txt")
+    file = Mock()
+    file.download_as_bytearray = AsyncMock(return_value=bytearray(b"same content"))
+    mock_context.bot.get_file = AsyncMock(return_value=file)
+    mock_context.application = Mock()
+
+    with patch('src.bot.telegram_bot.document_exists', return_value=True) as mock_exists:
+        await handle_document(mock_update, mock_context)
+
+    mock_exists.assert_called_once()
+    assert mock_exists.call_args[0][0].startswith("upload_")
+    mock_context.application.create_task.assert_not_called()
+    assert "already in the knowledge base" in mock_context.bot.send_message.call_args[1]['text']